@@ -0,0 +1,123 @@
+"""
+Per-backend circuit breakers for the LLM tier chain.
+
+A breaker opens after ``failure_threshold`` consecutive failures. While open,
+``allow()`` returns False immediately, so a dead tier costs nothing instead of
+a connect timeout. Once the cooldown expires, a health probe runs in the
+background (or, without a probe, a single live request is let through as the
+trial); success closes the breaker, failure re-opens it with a doubled
+cooldown up to ``max_reset_timeout``. A trial that is cancelled or produces
+nothing must be reported through ``abandon()``; one that is never settled
+expires after ``trial_timeout`` so the breaker cannot stay half-open forever.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HealthProbe = Callable[[], Awaitable[bool]]
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 2,
+        reset_timeout: float = 15.0,
+        max_reset_timeout: float = 300.0,
+        probe: Optional[HealthProbe] = None,
+        trial_timeout: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.probe = probe
+        self.trial_timeout = trial_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self.opened_at = 0.0
+        self.trial_started_at = 0.0
+        self.last_error: Optional[str] = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = self._clock()
+        if self.state == self.HALF_OPEN:
+            # A probe or trial request is already in flight, unless the trial
+            # has been outstanding so long that its outcome was lost.
+            if self.probe is None and now - self.trial_started_at >= self.trial_timeout:
+                logger.warning("LLM backend %s trial request never settled; starting a new one", self.name)
+                self.trial_started_at = now
+                return True
+            return False
+        if now - self.opened_at < self.reset_timeout:
+            return False
+
+        self.state = self.HALF_OPEN
+        self.trial_started_at = now
+        if self.probe is None:
+            return True
+        self._probe_task = asyncio.get_running_loop().create_task(self._run_probe())
+        return False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("LLM backend %s recovered", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+        self.last_error = None
+
+    def record_failure(self, error: Any = None):
+        self.failures += 1
+        self.last_error = str(error) if error is not None else self.last_error
+        if self.state == self.HALF_OPEN:
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+        elif self.failures < self.failure_threshold:
+            return
+        if self.state != self.OPEN:
+            logger.warning("LLM backend %s unavailable for %.0fs: %s", self.name, self.reset_timeout, self.last_error)
+        self.state = self.OPEN
+        self.opened_at = self._clock()
+
+    def abandon(self, error: Any = None):
+        """
+        Settle a request that ended without a result (cancelled, or a stream
+        that yielded nothing). While a trial is outstanding this counts as a
+        failed trial; otherwise the backend is not blamed.
+        """
+        if self.state == self.HALF_OPEN and self.probe is None:
+            self.record_failure(error)
+
+    async def _run_probe(self):
+        try:
+            healthy = await self.probe()
+        except Exception as exc:
+            healthy = False
+            self.last_error = str(exc)
+        if healthy:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "reset_timeout_seconds": self.reset_timeout,
+            "last_error": self.last_error,
+        }
@@ -1,13 +1,130 @@
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 import httpx
 import os
+import json
 import asyncio
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from app.ai.backend_health import CircuitBreaker
+from app.ai.native_worker import (
+    PRIORITY_INTERACTIVE,
+    NativeInferenceWorker,
+    NativeQueueFull,
+    default_thread_budget,
+    llama_engine_factory,
+)
 from app.core.config import settings
 
-# Global singleton for the native model engine
-_native_model_instance = None
+# Global singleton for the native inference worker pool
+_native_worker: Optional[NativeInferenceWorker] = None
 _native_model_lock = asyncio.Lock()
 
+NATIVE_STOP = ["<|end|>", "User:", "Assistant:"]
+
+
+def _build_llm_log() -> logging.Logger:
+    """backend_llm.log diagnostics, written by a listener thread so request paths never block on disk."""
+    llm_log = logging.getLogger("everafter.llm")
+    if not llm_log.handlers:
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        try:
+            file_handler = logging.FileHandler("backend_llm.log", encoding="utf-8", delay=True)
+        except OSError:
+            file_handler = logging.NullHandler()
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        QueueListener(records, file_handler).start()
+        llm_log.addHandler(QueueHandler(records))
+        llm_log.setLevel(logging.INFO)
+    return llm_log
+
+
+_llm_log = _build_llm_log()
+
+# Long-lived pooled HTTP clients, one per backend, bound to the running event loop
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+_http_clients_loop: Optional[asyncio.AbstractEventLoop] = None
+_HTTP_TIMEOUTS = {
+    "ollama": httpx.Timeout(120.0, connect=2.0),  # Local LLMs can be slow, but connect fast
+    "openai": httpx.Timeout(30.0, connect=5.0),
+}
+
+# Ollama model that actually answers, learned from a health probe or a 404 retry
+_resolved_ollama_model: Optional[str] = None
+
+
+def _get_http_client(backend: str) -> httpx.AsyncClient:
+    global _http_clients, _http_clients_loop
+    loop = asyncio.get_running_loop()
+    if _http_clients_loop is not loop:
+        # Connection pools cannot be shared across event loops.
+        _http_clients = {}
+        _http_clients_loop = loop
+    client = _http_clients.get(backend)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=_HTTP_TIMEOUTS[backend],
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+        )
+        _http_clients[backend] = client
+    return client
+
+
+async def close_llm_http_clients() -> None:
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def _native_model_path() -> str:
+    return os.path.join(settings.LOCAL_MODELS_DIR, settings.NATIVE_LLM_MODEL)
+
+
+async def _probe_native() -> bool:
+    try:
+        import llama_cpp  # noqa: F401
+    except ImportError:
+        return False
+    return os.path.exists(_native_model_path())
+
+
+async def _probe_ollama() -> bool:
+    global _resolved_ollama_model
+    ollama_url = settings.OLLAMA_URL.rstrip('/')
+    response = await _get_http_client("ollama").get(f"{ollama_url}/api/tags", timeout=2.0)
+    if response.status_code != 200:
+        return False
+    available = set()
+    for entry in response.json().get("models", []):
+        name = str(entry.get("name") or "")
+        available.update({name, name.split(":", 1)[0]})
+    for candidate in (settings.OLLAMA_MODEL, "llama3"):
+        if candidate in available:
+            _resolved_ollama_model = candidate
+            return True
+    _llm_log.warning(f"Ollama is up but has neither {settings.OLLAMA_MODEL} nor llama3")
+    return False
+
+
+# Dead tiers are skipped without paying a connect timeout until a probe sees them recover
+_backend_breakers: Dict[str, CircuitBreaker] = {
+    "native": CircuitBreaker("native", failure_threshold=1, reset_timeout=60.0, probe=_probe_native),
+    "ollama": CircuitBreaker("ollama", probe=_probe_ollama),
+    "openai": CircuitBreaker("openai", failure_threshold=3),
+}
+
+
+def get_llm_backend_health() -> List[Dict[str, Any]]:
+    return [breaker.snapshot() for breaker in _backend_breakers.values()]
+
+
+def shutdown_native_worker() -> None:
+    global _native_worker
+    if _native_worker is not None:
+        _native_worker.stop()
+        _native_worker = None
+
 
 class LLMClient:
     def __init__(self, api_key: Optional[str] = None):
@@ -22,7 +139,8 @@ class LLMClient:
         messages: List[Dict[str, str]],
         system_prompt: Optional[str] = None,
         max_tokens: Optional[int] = None,
-        temperature: Optional[float] = None
+        temperature: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE,
     ) -> str:
         full_messages = []
 
@@ -31,65 +149,133 @@ class LLMClient:
 
         full_messages.extend(messages)
 
-        # 1. Try NATIVE FIRST (in-process, truly native)
-        try:
-            return await self._generate_native_response(full_messages, max_tokens, temperature)
-        except Exception as e:
-            print(f"Native generation failed: {str(e)}")
-
-        # 2. Try Ollama (local server)
-        try:
-            return await self._generate_ollama_response(full_messages)
-        except Exception as e:
-            print(f"Ollama generation failed: {str(e)}")
-
-        # 3. Try OpenAI Fallback if API key is present
+        # 1. NATIVE first (in-process), 2. Ollama (local server), 3. OpenAI if an API key is present
+        tiers = [
+            ("native", lambda: self._generate_native_response(full_messages, max_tokens, temperature, priority)),
+            ("ollama", lambda: self._generate_ollama_response(full_messages)),
+        ]
         if self.api_key and self.api_key.strip():
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"{self.base_url}/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {self.api_key}",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": self.model,
-                            "messages": full_messages,
-                            "max_tokens": max_tokens or self.max_tokens,
-                            "temperature": temperature or self.temperature
-                        },
-                        timeout=30.0
-                    )
+            tiers.append(("openai", lambda: self._generate_openai_response(full_messages, max_tokens, temperature)))
 
-                    if response.status_code == 200:
-                        data = response.json()
-                        return data["choices"][0]["message"]["content"]
+        for backend, generate in tiers:
+            breaker = _backend_breakers[backend]
+            if not breaker.allow():
+                continue
+            settled = False
+            try:
+                content = await generate()
+                breaker.record_success()
+                settled = True
+                return content
+            except NativeQueueFull as e:
+                # Saturated, not broken: spill this request over to the next tier.
+                _llm_log.info(str(e))
+                continue
             except Exception as e:
-                print(f"OpenAI API Error: {str(e)}")
+                breaker.record_failure(e)
+                settled = True
+                print(f"{backend} generation failed: {str(e)}")
+                _llm_log.warning(f"{backend} generation failed: {e}")
+                continue
+            finally:
+                if not settled:
+                    # Cancelled (or spilled over) mid-trial: never leave the breaker half-open.
+                    breaker.abandon("request ended without a result")
 
         # 4. Final Fallback to Canned Responses
         return await self._generate_fallback_response(full_messages)
 
-    async def _get_native_engine(self):
-        """Thread-safe access to the embedded LLM engine."""
-        global _native_model_instance
+    async def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Token-streaming variant of generate_response with the same tier order
+        (native -> Ollama -> OpenAI -> canned). A tier that fails before its
+        first chunk falls through to the next; once text has been yielded the
+        stream ends with that tier.
+        """
+        full_messages = []
+        if system_prompt:
+            full_messages.append({"role": "system", "content": system_prompt})
+        full_messages.extend(messages)
+
+        tiers = [
+            ("native", lambda: self._stream_native_response(full_messages, max_tokens, temperature)),
+            ("ollama", lambda: self._stream_ollama_response(full_messages)),
+        ]
+        if self.api_key and self.api_key.strip():
+            tiers.append(("openai", lambda: self._stream_openai_response(full_messages, max_tokens, temperature)))
+
+        for backend, open_stream in tiers:
+            breaker = _backend_breakers[backend]
+            if not breaker.allow():
+                continue
+            started = False
+            settled = False
+            try:
+                async for chunk in open_stream():
+                    if not chunk:
+                        continue
+                    if not started:
+                        started = True
+                        breaker.record_success()
+                        settled = True
+                    yield chunk
+                if not started:
+                    # Ended cleanly without producing any text.
+                    breaker.record_failure(f"{backend} stream ended without output")
+                    settled = True
+            except NativeQueueFull as e:
+                _llm_log.info(str(e))
+                continue
+            except Exception as e:
+                if started:
+                    print(f"{backend} stream interrupted: {str(e)}")
+                    _llm_log.warning(f"{backend} stream interrupted: {e}")
+                    return
+                breaker.record_failure(e)
+                settled = True
+                print(f"{backend} streaming failed: {str(e)}")
+                _llm_log.warning(f"{backend} streaming failed: {e}")
+                continue
+            finally:
+                if not settled:
+                    breaker.abandon("stream ended without a result")
+            if started:
+                return
+
+        yield await self._generate_fallback_response(full_messages)
+
+    async def _get_native_worker(self) -> Optional[NativeInferenceWorker]:
+        """Lazily load the native engines into the dedicated worker pool."""
+        global _native_worker
         async with _native_model_lock:
-            if _native_model_instance is None:
+            if _native_worker is None:
                 try:
-                    from llama_cpp import Llama
-                    model_path = os.path.join(settings.LOCAL_MODELS_DIR, settings.NATIVE_LLM_MODEL)
-                    
+                    import llama_cpp  # noqa: F401
+                    model_path = _native_model_path()
+
                     if not os.path.exists(model_path):
                         return None # Need to download model
 
-                    print(f"Loading Native LLM engine: {model_path}...")
-                    _native_model_instance = Llama(
-                        model_path=model_path,
-                        n_ctx=2048,
-                        n_threads=os.cpu_count(),
-                        verbose=False
+                    workers = max(1, settings.NATIVE_LLM_WORKERS)
+                    print(f"Loading Native LLM engine: {model_path} ({workers} worker(s))...")
+                    worker = NativeInferenceWorker(
+                        llama_engine_factory(
+                            model_path,
+                            n_ctx=settings.NATIVE_LLM_CONTEXT,
+                            n_threads=settings.NATIVE_LLM_THREADS or default_thread_budget(workers),
+                            prefix_cache_bytes=settings.NATIVE_LLM_PREFIX_CACHE_MB * 1024 * 1024,
+                        ),
+                        workers=workers,
+                        max_queue=settings.NATIVE_LLM_QUEUE_SIZE,
                     )
+                    await asyncio.get_running_loop().run_in_executor(None, worker.start)
+                    _native_worker = worker
                     print("Native engine loaded successfully.")
                 except ImportError:
                     print("llama-cpp-python not installed. Native execution unavailable.")
@@ -97,14 +283,28 @@ class LLMClient:
                 except Exception as e:
                     print(f"Failed to load native engine: {e}")
                     return None
-            return _native_model_instance
+            return _native_worker
 
-    async def _generate_native_response(self, messages: List[Dict[str, str]], max_tokens=None, temp=None) -> str:
-        """Primary generation via embedded llama-cpp engine."""
-        engine = await self._get_native_engine()
-        if not engine:
+    async def _generate_native_response(
+        self, messages: List[Dict[str, str]], max_tokens=None, temp=None, priority: int = PRIORITY_INTERACTIVE
+    ) -> str:
+        """Primary generation via the embedded llama-cpp worker pool."""
+        worker = await self._get_native_worker()
+        if not worker:
             raise Exception("Native engine not initialized.")
 
+        content = await worker.complete(
+            self._format_native_prompt(messages),
+            priority=priority,
+            max_tokens=max_tokens or self.max_tokens,
+            temperature=temp or self.temperature,
+            stop=NATIVE_STOP,
+        )
+        # Add the [NATIVE] tag for visibility as requested
+        return f"[NATIVE] {content.strip()}"
+
+    @staticmethod
+    def _format_native_prompt(messages: List[Dict[str, str]]) -> str:
         # Format prompt for Llama 3/Instruct style
         prompt = ""
         for m in messages:
@@ -117,83 +317,165 @@ class LLMClient:
             elif role == "assistant":
                 prompt += f"<|assistant|>\n{content}<|end|>\n"
         prompt += "<|assistant|>\n"
+        return prompt
+
+    async def _stream_native_response(
+        self, messages: List[Dict[str, str]], max_tokens=None, temp=None, priority: int = PRIORITY_INTERACTIVE
+    ) -> AsyncIterator[str]:
+        """Stream tokens from the embedded llama-cpp worker pool."""
+        worker = await self._get_native_worker()
+        if not worker:
+            raise Exception("Native engine not initialized.")
+
+        first = True
+        async for item in worker.stream(
+            self._format_native_prompt(messages),
+            priority=priority,
+            max_tokens=max_tokens or self.max_tokens,
+            temperature=temp or self.temperature,
+            stop=NATIVE_STOP,
+        ):
+            if first:
+                item = item.lstrip()
+                if not item:
+                    continue
+                # Same [NATIVE] visibility tag as the blocking path
+                item = f"[NATIVE] {item}"
+                first = False
+            yield item
 
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: engine(
-                prompt,
-                max_tokens=max_tokens or self.max_tokens,
-                temperature=temp or self.temperature,
-                stop=["<|end|>", "User:", "Assistant:"]
+    async def _generate_ollama_response(self, messages: List[Dict[str, str]]) -> str:
+        """Generation via local Ollama instance over the pooled client."""
+        global _resolved_ollama_model
+        ollama_url = settings.OLLAMA_URL.rstrip('/')
+        client = _get_http_client("ollama")
+
+        for model in self._ollama_models():
+            _llm_log.info(f"Attempting Ollama with model {model} at {ollama_url}")
+            response = await client.post(
+                f"{ollama_url}/api/chat",
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "stream": False
+                },
             )
+
+            if response.status_code == 200:
+                _resolved_ollama_model = model
+                data = response.json()
+                return data["message"]["content"]
+
+            # If 404, maybe model not found. Try 'llama3' as backup
+            if response.status_code == 404 and model != "llama3":
+                print(f"Ollama model '{model}' not found, trying 'llama3'...")
+                _llm_log.info(f"Ollama model {model} not found (404). Trying llama3...")
+                continue
+
+            break
+
+        # If we get here, Ollama returned an error code
+        _llm_log.warning(f"Ollama failed with status {response.status_code}: {response.text}")
+        raise Exception(f"Ollama API returned status {response.status_code}: {response.text}")
+
+    @staticmethod
+    def _ollama_models() -> List[str]:
+        if _resolved_ollama_model:
+            return [_resolved_ollama_model]
+        models = [settings.OLLAMA_MODEL]
+        if settings.OLLAMA_MODEL != "llama3":
+            models.append("llama3")
+        return models
+
+    async def _generate_openai_response(
+        self, messages: List[Dict[str, str]], max_tokens=None, temperature=None
+    ) -> str:
+        response = await _get_http_client("openai").post(
+            f"{self.base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": max_tokens or self.max_tokens,
+                "temperature": temperature or self.temperature
+            },
         )
-        
-        content = response["choices"][0]["text"].strip()
-        # Add the [NATIVE] tag for visibility as requested
-        return f"[NATIVE] {content}"
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API returned status {response.status_code}: {response.text}")
+        data = response.json()
+        return data["choices"][0]["message"]["content"]
 
-    async def _generate_ollama_response(self, messages: List[Dict[str, str]]) -> str:
-        """Primary generation via local Ollama instance"""
-        # Use settings for configuration
+    async def _stream_ollama_response(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Stream NDJSON chunks from Ollama's /api/chat, retrying 'llama3' on a 404."""
+        global _resolved_ollama_model
         ollama_url = settings.OLLAMA_URL.rstrip('/')
-        model = settings.OLLAMA_MODEL
+        models = self._ollama_models()
+        client = _get_http_client("ollama")
 
-        try:
-            async with httpx.AsyncClient() as client:
-                # Try primary configured model
-                try:
-                    with open("backend_llm.log", "a") as f:
-                        f.write(f"Attempting Ollama with model {model} at {ollama_url}\n")
-                except:
-                    pass
-
-                response = await client.post(
-                    f"{ollama_url}/api/chat",
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "stream": False
-                    },
-                    timeout=120.0 # Local LLMs can be slow
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return data["message"]["content"]
-                
-                # If 404, maybe model not found. Try 'llama3' as backup
-                if response.status_code == 404 and model != "llama3":
-                     print(f"Ollama model '{model}' not found, trying 'llama3'...")
-                     with open("backend_llm.log", "a") as f:
-                        f.write(f"Ollama model {model} not found (404). Trying llama3...\n")
-                     
-                     response = await client.post(
-                        f"{ollama_url}/api/chat",
-                        json={
-                            "model": "llama3",
-                            "messages": messages,
-                            "stream": False
-                        },
-                        timeout=120.0
-                    )
-                     if response.status_code == 200:
-                        data = response.json()
-                        return data["message"]["content"]
-
-                # If we get here, Ollama returned an error code
-                with open("backend_llm.log", "a") as f:
-                    f.write(f"Ollama failed with status {response.status_code}: {response.text}\n")
-                raise Exception(f"Ollama API returned status {response.status_code}: {response.text}")
-
-        except Exception as e:
-            # Re-raise to trigger fallback in generate_response
-            with open("backend_llm.log", "a") as f:
-                f.write(f"Ollama Exception: {e}\n")
-            raise e
-        
-        # Final Fallback to Canned Responses
-        return await self._generate_fallback_response(messages)
+        for model in models:
+            async with client.stream(
+                "POST",
+                f"{ollama_url}/api/chat",
+                json={"model": model, "messages": messages, "stream": True},
+            ) as response:
+                if response.status_code == 404 and model != models[-1]:
+                    print(f"Ollama model '{model}' not found, trying 'llama3'...")
+                    continue
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    raise Exception(f"Ollama API returned status {response.status_code}: {body}")
+
+                _resolved_ollama_model = model
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise Exception(f"Ollama stream error: {data['error']}")
+                    chunk = (data.get("message") or {}).get("content")
+                    if chunk:
+                        yield chunk
+                    if data.get("done"):
+                        return
+                return
+
+    async def _stream_openai_response(
+        self, messages: List[Dict[str, str]], max_tokens=None, temperature=None
+    ) -> AsyncIterator[str]:
+        """Stream server-sent delta chunks from the OpenAI chat completions API."""
+        async with _get_http_client("openai").stream(
+            "POST",
+            f"{self.base_url}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": self.model,
+                "messages": messages,
+                "max_tokens": max_tokens or self.max_tokens,
+                "temperature": temperature or self.temperature,
+                "stream": True,
+            },
+        ) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode("utf-8", errors="replace")
+                raise Exception(f"OpenAI API returned status {response.status_code}: {body}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    return
+                choices = json.loads(payload).get("choices") or []
+                if choices:
+                    chunk = (choices[0].get("delta") or {}).get("content")
+                    if chunk:
+                        yield chunk
 
     async def _generate_fallback_response(self, messages: List[Dict[str, str]]) -> str:
         user_message: str = messages[-1]["content"].lower() if messages else ""
@@ -0,0 +1,200 @@
+"""
+Dedicated llama.cpp inference workers for the native LLM tier.
+
+Every worker thread owns its own ``Llama`` instance with an explicit thread
+budget, so concurrent chats queue instead of oversubscribing the CPU against a
+single shared model. Jobs wait in one bounded priority queue (interactive chat
+ahead of background work); when it is full, submission fails fast and the
+caller falls through to the next LLM tier.
+
+Prompts always start with the saint system prompt, so each engine keeps an
+in-RAM KV state cache: a turn whose prompt shares that prefix with an earlier
+one only evaluates the new suffix.
+"""
+
+import asyncio
+import itertools
+import os
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+_FINISHED = object()
+_STOP = object()
+
+EngineFactory = Callable[[int], Any]
+
+
+class NativeQueueFull(RuntimeError):
+    """Raised when the native inference queue is at capacity."""
+
+
+class _Job:
+    def __init__(self, prompt: str, params: Dict[str, Any], stream: bool, loop: asyncio.AbstractEventLoop):
+        self.prompt = prompt
+        self.params = params
+        self.stream = stream
+        self.loop = loop
+        self.output: asyncio.Queue = asyncio.Queue()
+        self.cancelled = threading.Event()
+        self.enqueued_at = time.perf_counter()
+
+    def emit(self, item: Any):
+        try:
+            self.loop.call_soon_threadsafe(self.output.put_nowait, item)
+        except RuntimeError:
+            # The requesting event loop has gone away; nobody is listening.
+            self.cancelled.set()
+
+
+def default_thread_budget(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+class NativeInferenceWorker:
+    def __init__(
+        self,
+        engine_factory: EngineFactory,
+        workers: int = 1,
+        max_queue: int = 32,
+    ):
+        self._engine_factory = engine_factory
+        self.workers = max(1, workers)
+        self._jobs: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=max(1, max_queue))
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "in_flight": 0,
+            "queue_wait_seconds_total": 0.0,
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return self._jobs.qsize()
+
+    def start(self):
+        """Load one engine per worker and start the worker threads (blocking)."""
+        if self._threads:
+            return
+        engines = [self._engine_factory(index) for index in range(self.workers)]
+        for index, engine in enumerate(engines):
+            thread = threading.Thread(
+                target=self._worker_loop, args=(engine,), name=f"native-llm-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        for _ in self._threads:
+            # Sorts after every real job, so queued work drains first.
+            self._jobs.put((float("inf"), next(self._sequence), _STOP))
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _submit(self, prompt: str, params: Dict[str, Any], stream: bool, priority: int) -> _Job:
+        job = _Job(prompt, params, stream, asyncio.get_running_loop())
+        try:
+            self._jobs.put_nowait((priority, next(self._sequence), job))
+        except queue.Full:
+            self._bump("rejected")
+            raise NativeQueueFull(f"Native inference queue is full ({self._jobs.maxsize} pending)")
+        self._bump("submitted")
+        return job
+
+    async def stream(self, prompt: str, priority: int = PRIORITY_INTERACTIVE, **params) -> AsyncIterator[str]:
+        job = self._submit(prompt, params, True, priority)
+        try:
+            while True:
+                item = await job.output.get()
+                if item is _FINISHED:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            job.cancelled.set()
+
+    async def complete(self, prompt: str, priority: int = PRIORITY_INTERACTIVE, **params) -> str:
+        job = self._submit(prompt, params, False, priority)
+        parts = []
+        try:
+            while True:
+                item = await job.output.get()
+                if item is _FINISHED:
+                    return "".join(parts)
+                if isinstance(item, Exception):
+                    raise item
+                parts.append(item)
+        finally:
+            job.cancelled.set()
+
+    def _worker_loop(self, engine: Any):
+        while True:
+            _, _, job = self._jobs.get()
+            if job is _STOP:
+                return
+            if job.cancelled.is_set():
+                continue
+            with self._stats_lock:
+                self.stats["in_flight"] += 1
+                self.stats["queue_wait_seconds_total"] += time.perf_counter() - job.enqueued_at
+            outcome = "completed"
+            try:
+                if job.stream:
+                    for part in engine(job.prompt, stream=True, **job.params):
+                        if job.cancelled.is_set():
+                            break
+                        job.emit(part["choices"][0]["text"])
+                else:
+                    job.emit(engine(job.prompt, **job.params)["choices"][0]["text"])
+            except Exception as exc:
+                outcome = "failed"
+                job.emit(exc)
+            finally:
+                job.emit(_FINISHED)
+                with self._stats_lock:
+                    self.stats["in_flight"] -= 1
+                    self.stats[outcome] += 1
+
+    def _bump(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["workers"] = len(self._threads)
+        stats["queue_depth"] = self.queue_depth
+        return stats
+
+
+def llama_engine_factory(
+    model_path: str, n_ctx: int, n_threads: int, prefix_cache_bytes: int
+) -> EngineFactory:
+    """Build ``Llama`` instances with a per-engine RAM cache of prompt KV states."""
+
+    def build(_index: int):
+        from llama_cpp import Llama
+
+        engine = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        if prefix_cache_bytes > 0:
+            try:
+                from llama_cpp import LlamaRAMCache
+
+                engine.set_cache(LlamaRAMCache(capacity_bytes=prefix_cache_bytes))
+            except ImportError:
+                # Older llama-cpp-python: the engine still reuses the prefix of its last prompt.
+                pass
+        return engine
+
+    return build
@@ -20,7 +20,7 @@ from app.services.causal_twin.safety_guardrails import safety_guardrails
 from app.services.causal_twin.ancestry_engine import ancestry_engine
 from app.models.health import Metric
 from app.schemas.causal_twin import (
-    SimulationRequest, ExperimentCreate, AdherenceLog, ExperimentUpdate
+    SimulationRequest, SimulationBatchRequest, ExperimentCreate, AdherenceLog, ExperimentUpdate
 )
 
 router = APIRouter(prefix="/api/v1/causal-twin", tags=["causal-twin"])
@@ -147,6 +147,22 @@ async def simulate_scenario(
     return result
 
 
+@router.post("/simulate/batch")
+async def simulate_scenario_batch(
+    request: SimulationBatchRequest,
+    member_id: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Evaluate several 'What If' scenarios against the same baselines (e.g. slider positions)."""
+    user_id = member_id if member_id else current_user.get("id", current_user.get("sub", "demo-user-001"))
+    return await counterfactual_engine.simulate_scenario_batch(
+        user_id=user_id,
+        scenarios=request.scenarios,
+        target_metrics=request.target_metrics,
+        horizons=request.horizons
+    )
+
+
 @router.get("/predictions")
 async def get_active_predictions(
     member_id: Optional[str] = Query(None),
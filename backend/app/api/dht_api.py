@@ -18,7 +18,7 @@ from app.models.dht import (
     DHTResponse, ObserveBatchRequest, ObserveRequest, ObserveResponse,
     OceanProfile, OceanScores, UserEventRequest,
 )
-from app.services.dht_engine import compute_dht, compute_behavioral_modifiers
+from app.services.dht_engine import compute_behavioral_modifiers, incremental_dht
 from app.services import dht_store
 from app.api.auth_utils import get_current_user_id   # existing auth helper
 
@@ -36,7 +36,7 @@ async def observe(
 ):
     """
     Ingest one health data point (vital, lab, wearable, etc.).
-    Triggers an async DHT recompute in the background (≤60s target).
+    Folds it into the running DHT state and refreshes the DHT in the background.
     """
     from app.models.dht import Observation
     obs = Observation(
@@ -51,7 +51,8 @@ async def observe(
         recorded_at=req.recorded_at or datetime.utcnow(),
     )
     dht_store.save_observation(obs)
-    background_tasks.add_task(_recompute_dht, req.person_id)
+    incremental_dht.observe(obs)
+    background_tasks.add_task(_refresh_dht, req.person_id)
     _audit(caller_id, req.person_id, "edit", f"observe:{req.metric}")
     return ObserveResponse(obs_id=obs.obs_id, queued=True, estimated_refresh_seconds=60)
 
@@ -63,17 +64,19 @@ async def observe_batch(
     caller_id: str = Depends(get_current_user_id),
 ):
     from app.models.dht import Observation
-    obs_ids = []
-    for o in req.observations:
-        obs = Observation(
+    now = datetime.utcnow()
+    observations = [
+        Observation(
             person_id=req.person_id,
             source=o.source, category=o.category, metric=o.metric,
             value=o.value, unit=o.unit, tags=o.tags, notes=o.notes,
-            recorded_at=o.recorded_at or datetime.utcnow(),
+            recorded_at=o.recorded_at or now,
         )
-        dht_store.save_observation(obs)
-        obs_ids.append(obs.obs_id)
-    background_tasks.add_task(_recompute_dht, req.person_id)
+        for o in req.observations
+    ]
+    obs_ids = dht_store.save_observations(observations)
+    incremental_dht.observe_many(observations)
+    background_tasks.add_task(_refresh_dht, req.person_id)
     _audit(caller_id, req.person_id, "edit", f"observe:batch:{len(req.observations)}")
     return ObserveResponse(obs_id=obs_ids[0] if obs_ids else "", queued=True, estimated_refresh_seconds=90)
 
@@ -97,7 +100,8 @@ async def user_event(
         notes=req.note,
     )
     dht_store.save_observation(obs)
-    background_tasks.add_task(_recompute_dht, req.person_id)
+    incremental_dht.observe(obs)
+    background_tasks.add_task(_refresh_dht, req.person_id)
     return ObserveResponse(obs_id=obs.obs_id, queued=True, estimated_refresh_seconds=60)
 
 
@@ -128,7 +132,10 @@ async def get_dht(
         raise HTTPException(status_code=404, detail="No DHT data found for this person.")
 
     stale = (datetime.utcnow() - dht.computed_at).seconds > 21600
-    obs = dht_store.get_observations(person_id, days=1)
+    try:
+        obs = dht_store.get_observations(person_id, days=1)
+    except Exception:
+        obs = []
     last_obs_at = max((o.recorded_at for o in obs), default=None) if obs else None
 
     return DHTResponse(dht=dht, stale=stale, last_observation_at=last_obs_at)
@@ -178,9 +185,10 @@ async def get_observation_history(
     caller_id: str = Depends(get_current_user_id),
 ):
     _audit(caller_id, person_id, "view", f"dht:obs_history:{metric or 'all'}:{days}d")
-    obs = dht_store.get_observations(person_id, days=days)
-    if metric:
-        obs = [o for o in obs if o.metric == metric]
+    try:
+        obs = dht_store.get_observations(person_id, days=days, metric=metric)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Observation history is temporarily unavailable.")
     return {"observations": [o.model_dump(mode="json") for o in obs], "count": len(obs)}
 
 
@@ -240,8 +248,9 @@ async def submit_ocean(
     profile.behavioral_modifiers = compute_behavioral_modifiers(scores)
     dht_store.save_ocean_profile(profile)
 
-    # Trigger DHT recompute to apply new OCEAN modifiers
-    background_tasks.add_task(_recompute_dht, person_id)
+    # Refresh the DHT to apply new OCEAN modifiers
+    incremental_dht.set_context(person_id, ocean_profile=profile)
+    background_tasks.add_task(_refresh_dht, person_id)
     _audit(caller_id, person_id, "edit", f"ocean:submit:v{next_version}")
 
     return {"profile_id": profile.profile_id, "version": next_version, "behavioral_modifiers": profile.behavioral_modifiers.model_dump()}
@@ -331,7 +340,7 @@ async def dht_stream(person_id: str, websocket: WebSocket):
 # ─────────────────────────────────────────────────────────────────────────────
 
 async def _recompute_dht(person_id: str) -> Optional[DelphiHealthTrajectory]:
-    """Recompute DHT from observations, save, and broadcast."""
+    """Recompute DHT from observations, reseed the running state, save, and broadcast."""
     try:
         observations = dht_store.get_observations(person_id, days=90)
         ocean = dht_store.get_latest_ocean(person_id)
@@ -340,38 +349,55 @@ async def _recompute_dht(person_id: str) -> Optional[DelphiHealthTrajectory]:
         existing = dht_store.get_dht(person_id)
         family_id = existing.family_id if existing else None
 
-        dht = compute_dht(
+        dht = incremental_dht.recompute(
             person_id=person_id,
             observations=observations,
             ocean_profile=ocean,
             family_id=family_id,
         )
-        dht_store.save_dht(dht)
-        dht_store.log_audit(AuditEntry(
-            actor_id="system",
-            person_id=person_id,
-            action="compute",
-            data_accessed=f"dht:recompute:{len(observations)}obs",
-            saint_triggered="dht_engine",
-        ))
-
-        # Broadcast update to connected WebSocket clients
-        await _ws_manager.broadcast(person_id, {
-            "type": "dht_update",
-            "payload": {
-                "overall_direction": dht.overall_direction,
-                "confidence": dht.confidence,
-                "risk_count": len(dht.risk_cards),
-                "data_quality": dht.data_quality,
-                "computed_at": dht.computed_at.isoformat(),
-            },
-        })
+        await _publish_dht(dht, f"dht:recompute:{len(observations)}obs")
         return dht
     except Exception as e:
         print(f"[DHT] Recompute failed for {person_id}: {e}")
         return None
 
 
+async def _refresh_dht(person_id: str) -> Optional[DelphiHealthTrajectory]:
+    """Refresh DHT from the running state; full recompute if the person is not seeded."""
+    try:
+        dht = incremental_dht.trajectory(person_id)
+        if dht is None:
+            return await _recompute_dht(person_id)
+        await _publish_dht(dht, f"dht:incremental:{dht.observation_count}obs")
+        return dht
+    except Exception as e:
+        print(f"[DHT] Refresh failed for {person_id}: {e}")
+        return None
+
+
+async def _publish_dht(dht: DelphiHealthTrajectory, data_accessed: str) -> None:
+    dht_store.save_dht(dht)
+    dht_store.log_audit(AuditEntry(
+        actor_id="system",
+        person_id=dht.person_id,
+        action="compute",
+        data_accessed=data_accessed,
+        saint_triggered="dht_engine",
+    ))
+
+    # Broadcast update to connected WebSocket clients
+    await _ws_manager.broadcast(dht.person_id, {
+        "type": "dht_update",
+        "payload": {
+            "overall_direction": dht.overall_direction,
+            "confidence": dht.confidence,
+            "risk_count": len(dht.risk_cards),
+            "data_quality": dht.data_quality,
+            "computed_at": dht.computed_at.isoformat(),
+        },
+    })
+
+
 def _audit(actor_id: str, person_id: str, action: str, data: str) -> None:
     dht_store.log_audit(AuditEntry(
         actor_id=actor_id,
@@ -52,6 +52,10 @@ class TransactionResponse(TransactionBase):
         from_attributes = True
 
 
+class TransactionCategoryUpdate(BaseModel):
+    category_id: Optional[UUID] = None
+
+
 class TransferRequest(BaseModel):
     from_category_id: UUID
     to_category_id: UUID
@@ -207,6 +211,24 @@ async def list_transactions(
     return await service.get_transactions(user_id, limit)
 
 
+@router.patch("/transactions/{transaction_id}/category")
+async def recategorize_transaction(
+    transaction_id: UUID,
+    update_data: TransactionCategoryUpdate,
+    current_user: dict = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Move a transaction to another category; later imports from the same merchant follow it"""
+    user_id = _get_user_id(current_user)
+    service = FinanceService(session)
+
+    try:
+        tx = await service.recategorize_transaction(user_id, transaction_id, update_data.category_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"success": True, "id": str(tx.id), "category_id": str(tx.category_id) if tx.category_id else None}
+
+
 @router.get("/treasury/summary")
 async def get_treasury_summary(
     months: int = 3,
@@ -128,6 +128,10 @@ async def update_consent(
     # In a full implementation this would persist to DB
     # For now, we acknowledge and return the updated map
     consent_map = {c["member_id"]: c["consent_granted"] for c in consents if "member_id" in c}
+    # Revoked members must not be served from cached predictions.
+    for member_id, granted in consent_map.items():
+        if not granted:
+            _predictor().prediction_cache.invalidate(user_id, member_id)
     return {
         "status": "updated",
         "user_id": user_id,
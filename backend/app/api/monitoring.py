@@ -6,7 +6,7 @@ from app.db.session import get_async_session
 from app.auth.dependencies import get_current_user
 from app.services.monitoring_service import SaintsMonitoringService
 from app.services.vulnerability_service import vulnerability_service
-from app.services.ledger_service import LedgerService
+from app.services.ledger_service import LedgerService, ledger_appender
 
 router = APIRouter(prefix="/api/v1/monitoring", tags=["monitoring"])
 
@@ -37,7 +37,11 @@ async def get_metrics(
     Get detailed time-series metrics.
     """
     from app.services.metrics_collector import metrics_collector
-    return metrics_collector.get_metrics()
+    from app.services.saint_agent_service import saint_agent_service
+    metrics = metrics_collector.get_metrics()
+    metrics["knowledge_extraction"] = saint_agent_service.knowledge_queue.snapshot()
+    metrics["audit_ledger"] = ledger_appender.snapshot()
+    return metrics
 
 @router.post("/michael/scan")
 async def trigger_michael_scan(
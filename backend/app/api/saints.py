@@ -4,6 +4,7 @@ Saints API Router
 Endpoints for interacting with Saint Agents:
 - Bootstrap engrams for saints
 - Chat with saints (with knowledge persistence)
+- Stream saint replies token by token over SSE
 - Retrieve saint knowledge
 - Get all saint statuses
 - Register dynamic family agents
@@ -11,14 +12,17 @@ Endpoints for interacting with Saint Agents:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
+import asyncio
+import json
 import uuid
 import logging
 
-from app.db.session import get_async_session
+from app.db.session import get_async_session, get_session_factory
 from app.auth.dependencies import get_current_user
 from app.services.saint_agent_service import (
     SaintStorageUnavailableError,
@@ -52,6 +56,10 @@ def _current_user_uuid(current_user: dict) -> uuid.UUID:
     raise HTTPException(status_code=401, detail="User ID not found in token")
 
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 # â”€â”€â”€ Schemas â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 
 class CognitionStatusResponse(BaseModel):
@@ -336,6 +344,67 @@ async def chat_with_saint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/{saint_id}/chat/stream")
+async def stream_chat_with_saint(
+    saint_id: str,
+    request: SaintChatRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Send a message to a saint/agent and stream the reply as server-sent events.
+
+    Emits ``token`` events ({"content": chunk}) while the model generates,
+    then one ``done`` event carrying the same payload as POST /chat (its
+    ``content`` is the final text, with action tags removed), or an
+    ``error`` event ({"status", "detail"}).
+    """
+    user_id = _current_user_uuid(current_user)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_token(chunk: str) -> None:
+        await queue.put(("token", {"content": chunk}))
+
+    async def run_chat() -> None:
+        try:
+            # The stream outlives the request scope, so it owns its session.
+            async with get_session_factory()() as session:
+                response = await saint_runtime.chat(
+                    session,
+                    user_id,
+                    saint_id,
+                    request.message,
+                    coordination_mode=request.coordination_mode,
+                    context=request.context,
+                    on_token=on_token,
+                )
+            await queue.put(("done", response))
+        except SaintStorageUnavailableError as exc:
+            await queue.put(("error", {"status": 503, "detail": str(exc)}))
+        except Exception as e:
+            logger.exception("Saint chat stream failed for %s", saint_id)
+            await queue.put(("error", {"status": 500, "detail": str(e)}))
+        finally:
+            await queue.put(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run_chat())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield _sse_event(*item)
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{saint_id}/knowledge", response_model=List[KnowledgeItem])
 async def get_saint_knowledge(
     saint_id: str,
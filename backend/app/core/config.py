@@ -129,6 +129,8 @@ class Settings(BaseSettings):
     PLAID_COUNTRY_CODES: str = "US"
     PLAID_REDIRECT_URI: str = ""
     PLAID_WEBHOOK_URL: str = ""
+    PLAID_SYNC_PAGE_SIZE: int = 500
+    PLAID_SYNC_CONCURRENCY: int = 4
     BANK_CONNECTOR_SECRET: str = ""
     WISEGOLD_ORACLE_API_KEY: str = ""
     WGOLD_TOKEN_CONTRACT: str = ""
@@ -150,12 +152,21 @@ class Settings(BaseSettings):
     TERRA_API_KEY: str = ""
     TERRA_DEV_ID: str = ""
     TERRA_WEBHOOK_SECRET: str = ""
+    DHT_OBSERVATION_BATCH_SIZE: int = 500
+    DHT_OBSERVATION_FLUSH_SECONDS: float = 0.5
+    DHT_OBSERVATION_PAGE_SIZE: int = 1000
 
     OLLAMA_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "mistral"
 
     NATIVE_LLM_MODEL: str = "Llama-3.2-1B-Instruct-Q4_K_M.gguf"
     LOCAL_MODELS_DIR: str = "models"
+    NATIVE_LLM_WORKERS: int = 1
+    NATIVE_LLM_THREADS: int = 0  # 0 = split the CPU cores evenly across workers
+    NATIVE_LLM_CONTEXT: int = 2048
+    NATIVE_LLM_QUEUE_SIZE: int = 32
+    NATIVE_LLM_PREFIX_CACHE_MB: int = 512
+    DELPHI_TORCH_THREADS: int = 0  # 0 = keep torch's default thread count
 
     REDIS_URL: str = "redis://localhost:6379/0"
     DB_CONNECT_TIMEOUT_SECONDS: float = 10.0
@@ -179,9 +190,17 @@ class Settings(BaseSettings):
     ENABLE_SAINT_EVENT_LISTENER: bool = True
     ENABLE_SAINT_BACKGROUND_VIGILS: bool = False
     ENABLE_COMPLIANCE_AUTOPILOT: bool = False
+    ENABLE_DELPHI_WARM_LOAD: bool = True
+    LEDGER_BATCH_SIZE: int = 256
+    LEDGER_MAX_PENDING: int = 10000
+    LEDGER_CHECKPOINT_INTERVAL: int = 1000
+    LEDGER_VERIFY_PAGE_SIZE: int = 5000
+    LEDGER_VERIFY_WORKERS: int = 4
     ENABLE_WISEGOLD_TICKER: bool = True
     WISEGOLD_TICK_CHECK_SECONDS: int = 300
     WISEGOLD_TICK_INTERVAL_HOURS: int = 24
+    WISEGOLD_BATCHED_TICK: bool = True
+    WISEGOLD_TICK_BATCH_SIZE: int = 1000
     SAINT_ACTION_AUTO_APPROVE: bool = False
 
     model_config = SettingsConfigDict(
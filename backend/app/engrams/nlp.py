@@ -3,10 +3,15 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import math
+import threading
+from collections import OrderedDict
 from functools import lru_cache
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 EMBEDDING_DIMENSION = 384
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
 
 def build_fallback_embedding(text: str, dimension: int = EMBEDDING_DIMENSION) -> List[float]:
@@ -48,17 +53,45 @@ def _get_torch_module():
     return torch
 
 
-class NLPEngine:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+def _content_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingService:
+    """
+    Process-wide sentence embedding front end shared by NLPEngine and the
+    Akashic Record.
+
+    - one model copy per model name, loaded lazily and thread-safely
+    - a bounded LRU cache keyed by content hash, so repeated prompts are free
+    - concurrent requests are coalesced for ``batch_window_seconds`` into one
+      ``encode`` call (one executor hop), and identical in-flight texts share
+      a single future
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        batch_window_seconds: float = 0.005,
+        max_batch_size: int = 64,
+        cache_size: int = 4096,
+    ):
         self.model_name = model_name
-        self._model = None
+        self.batch_window_seconds = batch_window_seconds
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
         torch = _get_torch_module()
-        self._device = "cuda" if torch and torch.cuda.is_available() else "cpu"
-        self._ml_available = _get_sentence_transformer_cls() is not None
-        if self._ml_available:
-            print(f"NLPEngine initialized. Device: {self._device}")
-        else:
-            print("NLPEngine initialized in degraded mode (ML extras unavailable).")
+        self.device = "cuda" if torch and torch.cuda.is_available() else "cpu"
+        self.ml_available = _get_sentence_transformer_cls() is not None
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._queue: List[Tuple[str, str]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {"requested": 0, "cache_hits": 0, "coalesced": 0, "encoded": 0, "batches": 0}
 
     @property
     def model(self) -> Any:
@@ -66,29 +99,147 @@ class NLPEngine:
         if sentence_transformer_cls is None:
             raise RuntimeError("sentence-transformers is unavailable")
         if self._model is None:
-            print(f"Loading ML model: {self.model_name}...")
-            self._model = sentence_transformer_cls(self.model_name, device=self._device)
-            print("Model loaded successfully.")
+            with self._model_lock:
+                if self._model is None:
+                    print(f"Loading ML model: {self.model_name}...")
+                    self._model = sentence_transformer_cls(self.model_name, device=self.device)
+                    print("Model loaded successfully.")
         return self._model
 
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        if not self.ml_available:
+            return np.array([build_fallback_embedding(text) for text in texts], dtype=np.float32)
+        embeddings = self.model.encode(
+            texts,
+            batch_size=32,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def _cache_get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+
+    def _cache_put(self, key: str, vector: np.ndarray):
+        vector.setflags(write=False)
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures belong to one loop; start fresh if we are now driven by another.
+            self._loop = loop
+            self._pending = {}
+            self._queue = []
+            self._flush_task = None
+        return loop
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` as a ``(len(texts), dim)`` float32 array, in input order."""
+        if not texts:
+            return np.empty((0, EMBEDDING_DIMENSION), dtype=np.float32)
+        loop = self._bind_loop()
+        self.stats["requested"] += len(texts)
+
+        slots: List[Any] = []
+        for text in texts:
+            key = _content_key(text)
+            cached = self._cache_get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                slots.append(cached)
+                continue
+            future = self._pending.get(key)
+            if future is None:
+                future = loop.create_future()
+                self._pending[key] = future
+                self._queue.append((key, text))
+            else:
+                self.stats["coalesced"] += 1
+            slots.append(future)
+
+        if self._queue and self._flush_task is None:
+            delay = 0.0 if len(self._queue) >= self.max_batch_size else self.batch_window_seconds
+            self._flush_task = loop.create_task(self._flush_after(delay))
+
+        # Futures are shared by every caller of the same text: shield them so one
+        # cancelled caller (e.g. a client disconnect) does not cancel the others.
+        vectors = [slot if isinstance(slot, np.ndarray) else await asyncio.shield(slot) for slot in slots]
+        return np.stack(vectors)
+
+    async def embed_one(self, text: str) -> np.ndarray:
+        return (await self.embed([text]))[0]
+
+    async def _flush_after(self, delay: float):
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            while self._queue:
+                batch = self._queue[: self.max_batch_size]
+                self._queue = self._queue[self.max_batch_size :]
+                try:
+                    vectors = await asyncio.to_thread(self._encode_batch, [text for _, text in batch])
+                except Exception as exc:
+                    for key, _ in batch:
+                        future = self._pending.pop(key, None)
+                        if future is not None and not future.done():
+                            future.set_exception(exc)
+                    continue
+
+                self.stats["batches"] += 1
+                self.stats["encoded"] += len(batch)
+                for (key, _), vector in zip(batch, vectors):
+                    self._cache_put(key, vector)
+                    future = self._pending.pop(key, None)
+                    if future is not None and not future.done():
+                        future.set_result(vector)
+        finally:
+            self._flush_task = None
+
+
+@lru_cache()
+def _embedding_service_for(model_name: str) -> EmbeddingService:
+    return EmbeddingService(model_name)
+
+
+def get_embedding_service(model_name: Optional[str] = None) -> EmbeddingService:
+    if model_name is None:
+        from app.core.config import settings
+        model_name = settings.HF_MODEL_NAME
+    return _embedding_service_for(model_name)
+
+
+class NLPEngine:
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL):
+        self.model_name = model_name
+        self._embeddings = get_embedding_service(model_name)
+        self._device = self._embeddings.device
+        self._ml_available = self._embeddings.ml_available
+        if self._ml_available:
+            print(f"NLPEngine initialized. Device: {self._device}")
+        else:
+            print("NLPEngine initialized in degraded mode (ML extras unavailable).")
+
+    @property
+    def model(self) -> Any:
+        return self._embeddings.model
+
     async def generate_embedding(self, text: str) -> List[float]:
         if not self._ml_available:
             return build_fallback_embedding(text)
-        loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(
-            None,
-            lambda: self.model.encode(text, convert_to_tensor=False)
-        )
+        embedding = await self._embeddings.embed_one(text)
         return embedding.tolist()
 
     async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         if not self._ml_available:
             return [build_fallback_embedding(text) for text in texts]
-        loop = asyncio.get_event_loop()
-        embeddings = await loop.run_in_executor(
-            None,
-            lambda: self.model.encode(texts, convert_to_tensor=False, batch_size=32)
-        )
+        embeddings = await self._embeddings.embed(texts)
         return [emb.tolist() for emb in embeddings]
 
     async def understand_question(self, question: str) -> Dict[str, Any]:
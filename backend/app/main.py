@@ -160,6 +160,14 @@ async def _start_optional_runtime(app: FastAPI) -> None:
         except Exception:
             logger.exception("Failed to start WiseGold scheduler")
 
+    if settings.ENABLE_DELPHI_WARM_LOAD:
+        try:
+            from app.services.health.strategies import warm_delphi_model
+
+            await asyncio.get_running_loop().run_in_executor(None, warm_delphi_model)
+        except Exception:
+            logger.exception("Failed to warm-load the Delphi model")
+
     app.state.background_tasks = background_tasks
     _refresh_subsystem_status(app)
 
@@ -264,6 +272,31 @@ async def lifespan(app: FastAPI):
     if getattr(app.state, "background_tasks", None):
         await asyncio.gather(*app.state.background_tasks, return_exceptions=True)
 
+    from app.services.saint_agent_service import saint_agent_service
+
+    try:
+        await saint_agent_service.knowledge_queue.drain(timeout=5.0)
+    except asyncio.TimeoutError:
+        print("Shutdown: abandoning queued saint knowledge extraction.")
+    await saint_agent_service.knowledge_queue.stop()
+
+    from app.services.ledger_service import ledger_appender
+
+    try:
+        await ledger_appender.flush(timeout=5.0)
+    except asyncio.TimeoutError:
+        print("Shutdown: audit ledger events still queued after 5s.")
+    await ledger_appender.stop()
+
+    from app.services.hipaa_service import hipaa_service
+
+    await asyncio.get_running_loop().run_in_executor(None, hipaa_service.close)
+
+    from app.ai.llm_client import close_llm_http_clients, shutdown_native_worker
+
+    await close_llm_http_clients()
+    await asyncio.get_running_loop().run_in_executor(None, shutdown_native_worker)
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
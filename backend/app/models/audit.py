@@ -20,7 +20,7 @@ class AuditLog(Base):
     consentId = Column(String, nullable=True)
     sha256 = Column(String, nullable=True)
     metadata_ = Column("metadata", JSON, nullable=True)
-    ts = Column(DateTime, default=func.now(), nullable=False)
+    ts = Column(DateTime, default=func.now(), nullable=False, index=True)
     
     # Cryptographic fields
     prevHash = Column(String, nullable=True)
@@ -28,6 +28,19 @@ class AuditLog(Base):
     signerId = Column(String, nullable=True)
 
 
+class AuditChainCheckpoint(Base):
+    """Signed marker that the audit chain verified up to ``position`` entries, ending at ``entryId``."""
+    __tablename__ = "audit_chain_checkpoints"
+
+    id = Column(String, primary_key=True, default=generate_cuid)
+    position = Column(Integer, nullable=False, unique=True, index=True)
+    entryId = Column(String, nullable=False)
+    entryTs = Column(DateTime, nullable=False)
+    entryHash = Column(String, nullable=True)
+    signature = Column(String, nullable=False)
+    createdAt = Column(DateTime, default=func.now(), nullable=False)
+
+
 class ComplianceControl(Base):
     __tablename__ = "compliance_controls"
 
@@ -7,9 +7,9 @@ Used by the DHT engine, API, and frontend serialisation.
 
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Literal, Optional, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 import uuid
 
 
@@ -72,6 +72,14 @@ class Observation(BaseModel):
     tags: List[str] = Field(default_factory=list)
     notes: Optional[str] = None
 
+    @field_validator("recorded_at", "sync_at")
+    @classmethod
+    def normalize_timestamp(cls, value: datetime) -> datetime:
+        # Stored and engine-side timestamps are naive UTC; aware input would not compare.
+        if value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # DHT — Derived outputs
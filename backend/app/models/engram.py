@@ -87,6 +87,10 @@ def _normalize_training_status_before_update(mapper, connection, target) -> None
     _normalize_training_status_for_db(target)
 
 
+# Engram-facing name used by the embedding and prompt services.
+EngramDailyResponse = DailyQuestionResponse
+
+
 class DailyQuestionEmbedding(Base):
     __tablename__ = "daily_question_embeddings"
 
@@ -7,7 +7,7 @@ Models for the Envelope Budgeting system.
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, Date, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, ForeignKey, Integer, JSON, String, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -40,6 +40,32 @@ class BudgetEnvelope(Base):
     category = relationship("BudgetCategory", back_populates="envelopes")
 
 
+class BudgetMonthSummary(Base):
+    """Materialized per-user, per-month envelope totals, keyed by category id."""
+    __tablename__ = "budget_month_summaries"
+    __table_args__ = (UniqueConstraint("user_id", "month", name="uq_budget_month_summaries_user_month"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(String, nullable=False, index=True)
+    month = Column(String, nullable=False)
+    assigned = Column(JSON, default=dict)
+    activity = Column(JSON, default=dict)
+    envelope_ids = Column(JSON, default=dict)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class MerchantCategoryChoice(Base):
+    """Category a user chose for a merchant, applied to that merchant's later transactions."""
+    __tablename__ = "finance_merchant_categories"
+    __table_args__ = (UniqueConstraint("user_id", "merchant", name="uq_finance_merchant_categories_user_merchant"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(String, nullable=False, index=True)
+    merchant = Column(String, nullable=False)  # normalize_merchant() form
+    category_id = Column(UUID(as_uuid=True), ForeignKey("budget_categories.id", ondelete="CASCADE"), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Transaction(Base):
     __tablename__ = "finance_transactions"
 
@@ -228,6 +254,23 @@ class WiseGoldSocialStanding(Base):
     last_synced_wallet_address = Column(String, nullable=True)
 
 
+class WiseGoldSocialAggregate(Base):
+    """Rolling interaction aggregates that WiseGoldSocialStanding snapshots are computed from."""
+    __tablename__ = "wisegold_social_aggregates"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(String, nullable=False, unique=True, index=True)
+    total_interactions = Column(Integer, default=0)
+    # Sums for interactions old enough to sit at the recency-weight floor
+    settled_sums = Column(JSON, default=dict)
+    # Interactions still decaying, per UTC epoch day: {day: {sum_key: [plain, weighted_from_day_start]}}
+    decay_buckets = Column(JSON, default=dict)
+    inbound_peers = Column(JSON, default=list)
+    outbound_peers = Column(JSON, default=list)
+    rebuilt_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class WiseGoldCovenantAttestation(Base):
     __tablename__ = "wisegold_covenant_attestations"
 
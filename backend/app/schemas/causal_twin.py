@@ -16,6 +16,14 @@ class SimulationRequest(BaseModel):
     horizons: Optional[List[int]] = Field(None, description="Forecast days e.g. [3, 7, 14, 30]")
 
 
+class SimulationBatchRequest(BaseModel):
+    scenarios: List[Dict[str, float]] = Field(
+        ..., min_length=1, max_length=50, description="Behavior-change sets evaluated against the same baselines"
+    )
+    target_metrics: Optional[List[str]] = None
+    horizons: Optional[List[int]] = Field(None, description="Forecast days e.g. [3, 7, 14, 30]")
+
+
 class ConfidenceReport(BaseModel):
     score: float
     level: str
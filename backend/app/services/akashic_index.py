@@ -0,0 +1,295 @@
+"""
+Nearest-neighbour indexes for Akashic semantic search.
+
+Every index stores L2-normalised vectors, so cosine similarity is a plain
+inner product and no per-query norm computation is needed. Row ids are the
+positions of the records in ``AkashicRecord.memories``.
+
+- ``ExactIndex``     brute-force scan with ``argpartition`` top-k
+- ``IVFFlatIndex``   spherical k-means coarse quantiser over exact inverted lists
+- ``HnswIndex``      hnswlib graph (optional dependency)
+
+The approximate indexes behave exactly like ``ExactIndex`` until the corpus
+reaches ``exact_threshold`` rows, where a scan is as fast as a lookup. Any
+index can also score an explicit candidate set (a metadata partition from
+``MetadataPostings``) exactly, at a cost proportional to that set.
+"""
+
+import math
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.engrams.nlp import EMBEDDING_DIMENSION
+from app.services.akashic_store import VECTOR_DTYPE, GrowableMatrix
+
+DEFAULT_EXACT_THRESHOLD = 4096
+# Metadata keys that get inverted postings; filters on other keys are checked per row.
+PARTITION_KEYS = ("saint_id", "user_email", "type", "source_saint", "ancestor_id")
+
+
+@lru_cache()
+def _get_hnswlib():
+    try:
+        import hnswlib
+    except Exception:
+        return None
+    return hnswlib
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=VECTOR_DTYPE)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first, without a full sort."""
+    if k <= 0 or scores.shape[0] == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class ExactIndex:
+    kind = "exact"
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        self.dimension = dimension
+        self._vectors = GrowableMatrix(dimension)
+
+    def __len__(self) -> int:
+        return self._vectors.rows
+
+    @property
+    def needs_training(self) -> bool:
+        return False
+
+    def train(self):
+        return None
+
+    def reset(self, vectors: Optional[np.ndarray]):
+        self._vectors.clear()
+        self._reset_structure()
+        if vectors is not None and len(vectors):
+            self.add(vectors)
+
+    def add(self, vectors: np.ndarray):
+        start = self._vectors.rows
+        normalized = normalize_rows(vectors)
+        self._vectors.extend(normalized)
+        self._on_add(start, normalized)
+
+    def search(
+        self, query: np.ndarray, k: int, candidates: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        query = normalize_rows(query)[0]
+        return self._exact_search(query, k, candidates)
+
+    def _exact_search(
+        self, query: np.ndarray, k: int, candidates: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        vectors = self._vectors.view()
+        if candidates is not None:
+            scores = vectors[candidates] @ query
+            order = _top_k(scores, k)
+            return candidates[order], scores[order]
+        scores = vectors @ query
+        order = _top_k(scores, k)
+        return order, scores[order]
+
+    def _reset_structure(self):
+        return None
+
+    def _on_add(self, start: int, normalized: np.ndarray):
+        return None
+
+
+class IVFFlatIndex(ExactIndex):
+    kind = "ivf"
+
+    def __init__(
+        self,
+        dimension: int = EMBEDDING_DIMENSION,
+        exact_threshold: int = DEFAULT_EXACT_THRESHOLD,
+        nprobe: int = 8,
+        kmeans_iterations: int = 10,
+        seed: int = 7,
+    ):
+        super().__init__(dimension)
+        self.exact_threshold = exact_threshold
+        self.nprobe = nprobe
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self._reset_structure()
+
+    def _reset_structure(self):
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._trained_size = 0
+
+    @property
+    def needs_training(self) -> bool:
+        size = len(self)
+        if size < self.exact_threshold:
+            return False
+        # Retrain once the corpus has outgrown the list count chosen at training time.
+        return self._centroids is None or size >= 4 * self._trained_size
+
+    def train(self):
+        vectors = self._vectors.view()
+        size = vectors.shape[0]
+        nlist = max(8, min(4096, int(math.sqrt(size))))
+        rng = np.random.default_rng(self.seed)
+
+        sample_size = min(size, 64 * nlist)
+        sample = vectors[rng.choice(size, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[assignment == cluster]
+                if members.shape[0]:
+                    centroids[cluster] = members.mean(axis=0)
+                else:
+                    centroids[cluster] = sample[rng.integers(sample_size)]
+            centroids = normalize_rows(centroids)
+
+        lists: List[List[int]] = [[] for _ in range(nlist)]
+        for start in range(0, size, 8192):
+            assignment = np.argmax(vectors[start : start + 8192] @ centroids.T, axis=1)
+            for offset, cluster in enumerate(assignment.tolist()):
+                lists[cluster].append(start + offset)
+
+        # Swap in one assignment so concurrent searches see either old or new lists.
+        self._centroids, self._lists, self._trained_size = centroids, lists, size
+
+    def _on_add(self, start: int, normalized: np.ndarray):
+        if self._centroids is None:
+            return
+        assignment = np.argmax(normalized @ self._centroids.T, axis=1)
+        for offset, cluster in enumerate(assignment.tolist()):
+            self._lists[cluster].append(start + offset)
+
+    def search(
+        self, query: np.ndarray, k: int, candidates: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        query = normalize_rows(query)[0]
+        if self._centroids is None or candidates is not None:
+            return self._exact_search(query, k, candidates)
+
+        probes = _top_k(self._centroids @ query, min(self.nprobe, self._centroids.shape[0]))
+        candidates = np.fromiter(
+            (idx for probe in probes.tolist() for idx in self._lists[probe]),
+            dtype=np.int64,
+        )
+        return self._exact_search(query, k, candidates)
+
+
+class HnswIndex(ExactIndex):
+    kind = "hnsw"
+
+    def __init__(
+        self,
+        dimension: int = EMBEDDING_DIMENSION,
+        exact_threshold: int = DEFAULT_EXACT_THRESHOLD,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+    ):
+        super().__init__(dimension)
+        self.exact_threshold = exact_threshold
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._reset_structure()
+
+    def _reset_structure(self):
+        self._graph = None
+
+    @property
+    def needs_training(self) -> bool:
+        return self._graph is None and len(self) >= self.exact_threshold
+
+    def train(self):
+        hnswlib = _get_hnswlib()
+        vectors = self._vectors.view()
+        graph = hnswlib.Index(space="ip", dim=self.dimension)
+        graph.init_index(max_elements=max(2 * vectors.shape[0], 1024), ef_construction=self.ef_construction, M=self.m)
+        graph.add_items(vectors, np.arange(vectors.shape[0]))
+        self._graph = graph
+
+    def _on_add(self, start: int, normalized: np.ndarray):
+        if self._graph is None:
+            return
+        needed = start + normalized.shape[0]
+        if needed > self._graph.get_max_elements():
+            self._graph.resize_index(2 * needed)
+        self._graph.add_items(normalized, np.arange(start, needed))
+
+    def search(
+        self, query: np.ndarray, k: int, candidates: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        query = normalize_rows(query)
+        if self._graph is None or candidates is not None:
+            return self._exact_search(query[0], k, candidates)
+        k = min(k, len(self))
+        self._graph.set_ef(max(self.ef_search, k))
+        labels, distances = self._graph.knn_query(query, k=k)
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(VECTOR_DTYPE)
+
+
+class MetadataPostings:
+    """Inverted lists of row ids per (metadata key, value) for pre-filtering search."""
+
+    def __init__(self, keys: Iterable[str] = PARTITION_KEYS):
+        self.keys = tuple(keys)
+        self._postings: Dict[str, Dict[Any, List[int]]] = {key: {} for key in self.keys}
+
+    def reset(self, records: Iterable[Dict[str, Any]]):
+        self._postings = {key: {} for key in self.keys}
+        for row_id, record in enumerate(records):
+            self.add(row_id, record.get("metadata") or {})
+
+    def add(self, row_id: int, metadata: Dict[str, Any]):
+        for key in self.keys:
+            value = metadata.get(key)
+            if isinstance(value, (str, int, bool)):
+                self._postings[key].setdefault(value, []).append(row_id)
+
+    def indexes(self, key: str) -> bool:
+        return key in self._postings
+
+    def lookup(self, key: str, value: Any) -> np.ndarray:
+        """Sorted row ids whose metadata ``key`` equals ``value``."""
+        rows = self._postings[key].get(value) if isinstance(value, (str, int, bool)) else None
+        return np.asarray(rows or [], dtype=np.int64)
+
+    def lookup_any(self, key: str, values: Iterable[Any]) -> np.ndarray:
+        parts = [self.lookup(key, value) for value in values]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+
+def create_index(
+    kind: str = "ivf",
+    dimension: int = EMBEDDING_DIMENSION,
+    exact_threshold: int = DEFAULT_EXACT_THRESHOLD,
+) -> ExactIndex:
+    kind = (kind or "ivf").strip().lower()
+    if kind == "exact":
+        return ExactIndex(dimension)
+    if kind == "hnsw":
+        if _get_hnswlib() is not None:
+            return HnswIndex(dimension, exact_threshold=exact_threshold)
+        print("hnswlib is unavailable; falling back to IVF-flat Akashic index.")
+    return IVFFlatIndex(dimension, exact_threshold=exact_threshold)
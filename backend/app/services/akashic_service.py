@@ -1,117 +1,148 @@
 import asyncio
-import json
 import os
 import uuid
 from datetime import datetime
-from functools import lru_cache
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
-from app.engrams.nlp import EMBEDDING_DIMENSION, build_fallback_embedding
+from app.engrams.nlp import DEFAULT_EMBEDDING_MODEL, EMBEDDING_DIMENSION, get_embedding_service
+from app.services.akashic_index import MetadataPostings, create_index, normalize_rows
+from app.services.akashic_store import VECTOR_DTYPE, AkashicSegmentStore, GrowableMatrix
 
 # Path to persistent storage
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
 MEMORY_FILE = os.path.join(DATA_DIR, "akashic_record.json")
 VECTOR_FILE = os.path.join(DATA_DIR, "akashic_vectors.npy")
+# Appended records are folded back into the base files after this many writes.
+COMPACT_EVERY = int(os.getenv("AKASHIC_COMPACT_EVERY", "256"))
+# "ivf" (default), "hnsw" (needs hnswlib) or "exact"; all scan exactly below the threshold.
+INDEX_KIND = os.getenv("AKASHIC_INDEX", "ivf")
+INDEX_EXACT_THRESHOLD = int(os.getenv("AKASHIC_INDEX_EXACT_THRESHOLD", "4096"))
+
+# Memory types visible to every user regardless of ``user_email``.
+GLOBAL_MEMORY_TYPES = ("health_event", "finance_event", "life_event", "career_event")
 
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 os.environ.setdefault("TQDM_DISABLE", "1")
 
 
-@lru_cache()
-def _get_sentence_transformer_cls():
-    try:
-        from sentence_transformers import SentenceTransformer
-    except Exception:
-        return None
-    return SentenceTransformer
-
-
 class AkashicRecord:
     _instance: Optional["AkashicRecord"] = None
-    _model: Optional[object] = None
     memories: List[Dict[str, Any]] = []
-    embeddings: Optional[np.ndarray] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(AkashicRecord, cls).__new__(cls)
             cls._instance._initialize()
-        elif not hasattr(cls._instance, "_model"):
+        elif not hasattr(cls._instance, "_store"):
             cls._instance._initialize()
         return cls._instance
 
     def _initialize(self):
         print("Initializing Akashic Record (Shared Memory)...")
-        self._model = None
+        self._store = AkashicSegmentStore(DATA_DIR, EMBEDDING_DIMENSION, COMPACT_EVERY)
+        self._write_lock = asyncio.Lock()
         self.memories = []
-        self.embeddings = None
+        self._base_count = 0
+        self._base_vectors: Optional[np.ndarray] = None
+        self._tail = GrowableMatrix(EMBEDDING_DIMENSION)
+        self._index = create_index(INDEX_KIND, EMBEDDING_DIMENSION, INDEX_EXACT_THRESHOLD)
+        self._postings = MetadataPostings()
         self._load_memories()
-        self._load_vectors()
-
-    def _load_vectors(self):
-        if os.path.exists(VECTOR_FILE):
-            try:
-                self.embeddings = np.load(VECTOR_FILE)
-                print(f"Loaded {self.embeddings.shape[0]} vectors from Akashic Record.")
-            except Exception as exc:
-                print(f"Failed to load Akashic vectors: {exc}")
-                self.embeddings = None
 
     @property
     def model(self):
-        sentence_transformer_cls = _get_sentence_transformer_cls()
-        if sentence_transformer_cls is None:
-            raise RuntimeError("sentence-transformers is unavailable")
-        if self._model is None:
-            print("Loading Akashic ML model: sentence-transformers/all-MiniLM-L6-v2...")
-            self._model = sentence_transformer_cls("sentence-transformers/all-MiniLM-L6-v2")
-        return self._model
-
-    def _encode(self, texts: List[str]) -> np.ndarray:
-        if _get_sentence_transformer_cls() is None:
-            return np.array([build_fallback_embedding(text) for text in texts], dtype=float)
-        return self.model.encode(
-            texts,
-            show_progress_bar=False,
-            convert_to_numpy=True,
-        )
+        return get_embedding_service(DEFAULT_EMBEDDING_MODEL).model
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        # Shares the model copy, batching window and LRU cache with NLPEngine.
+        return await get_embedding_service(DEFAULT_EMBEDDING_MODEL).embed(texts)
 
     def _load_memories(self):
-        if os.path.exists(MEMORY_FILE):
-            try:
-                with open(MEMORY_FILE, "r", encoding="utf-8") as handle:
-                    data = json.load(handle)
-                    self.memories = data
-                    print(f"Loaded {len(self.memories)} memories from Akashic Record.")
-            except Exception as exc:
-                print(f"Failed to load Akashic Record: {exc}")
-                self.memories = []
-        else:
-            self.memories = []
+        """Load the compacted base segment plus any records appended since."""
+        base_records = self._store.load_base_records()
+        known_ids = {record.get("id") for record in base_records}
+        log_records, log_vectors = self._store.load_log(known_ids)
+
+        self.memories = base_records + log_records
+        self._base_count = len(base_records)
+        self._base_vectors = self._store.open_base_vectors()
+        self._tail.clear()
+        self._tail.extend(log_vectors)
+        self._postings.reset(self.memories)
+        self._rebuild_index()
+
+        if self.memories:
+            print(f"Loaded {len(self.memories)} memories from Akashic Record.")
+
+    def _rebuild_index(self):
+        vectors = self.embeddings
+        if vectors is None or vectors.shape[0] != len(self.memories):
+            # Misaligned until _ensure_embeddings backfills the missing rows.
+            self._index.reset(None)
+            return
+        self._index.reset(vectors)
+        if self._index.needs_training:
+            self._index.train()
+
+    def _vector_segments(self) -> List[np.ndarray]:
+        segments = []
+        if self._base_vectors is not None and self._base_vectors.shape[0]:
+            segments.append(self._base_vectors)
+        if self._tail.rows:
+            segments.append(self._tail.view())
+        return segments
+
+    @property
+    def embeddings(self) -> Optional[np.ndarray]:
+        segments = self._vector_segments()
+        if not segments:
+            return None
+        return segments[0] if len(segments) == 1 else np.concatenate(segments)
 
     async def _ensure_embeddings(self):
-        if (self.embeddings is None or self.embeddings.shape[0] == 0) and self.memories:
-            print(f"Generating embeddings for {len(self.memories)} memories...")
-            texts = [memory["content"] for memory in self.memories]
-            self.embeddings = await asyncio.to_thread(self._encode, texts)
-            self._save_vectors()
-        elif self.embeddings is None:
-            self.embeddings = np.empty((0, EMBEDDING_DIMENSION))
-
-    def _save_vectors(self):
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR)
-        if self.embeddings is not None:
-            np.save(VECTOR_FILE, self.embeddings)
-
-    def _save_memories(self):
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR)
-
-        with open(MEMORY_FILE, "w", encoding="utf-8") as handle:
-            json.dump(self.memories, handle, indent=2, default=str)
+        """Backfill base vectors missing from disk (legacy or partially written records)."""
+        base_rows = 0 if self._base_vectors is None else self._base_vectors.shape[0]
+        if base_rows == self._base_count:
+            return
+
+        async with self._write_lock:
+            base_rows = 0 if self._base_vectors is None else self._base_vectors.shape[0]
+            if base_rows == self._base_count:
+                return
+            if base_rows > self._base_count:
+                base = np.asarray(self._base_vectors[: self._base_count], dtype=VECTOR_DTYPE)
+            else:
+                missing = self.memories[base_rows:self._base_count]
+                print(f"Generating embeddings for {len(missing)} memories...")
+                encoded = await self._encode([memory["content"] for memory in missing])
+                parts = [np.asarray(encoded, dtype=VECTOR_DTYPE)]
+                if base_rows:
+                    parts.insert(0, np.asarray(self._base_vectors, dtype=VECTOR_DTYPE))
+                base = np.concatenate(parts)
+            self._base_vectors = base
+            await self._compact_locked()
+            await asyncio.to_thread(self._rebuild_index)
+
+    async def _compact_locked(self):
+        vectors = self.embeddings
+        if vectors is None:
+            vectors = np.empty((0, EMBEDDING_DIMENSION), dtype=VECTOR_DTYPE)
+        # Materialise in memory so the old base memory map can be released before replacement.
+        vectors = np.array(vectors, dtype=VECTOR_DTYPE)
+        records = list(self.memories)
+        self._base_vectors = vectors
+        self._tail.clear()
+        self._base_count = len(records)
+
+        await asyncio.to_thread(self._store.compact, records, vectors)
+        self._base_vectors = self._store.open_base_vectors()
+        print(f"Compacted Akashic Record to {len(records)} memories.")
+
+    async def compact(self):
+        async with self._write_lock:
+            await self._compact_locked()
 
     async def canonize(self, content: str, metadata: Dict[str, Any], user_email: Optional[str] = None):
         await self._ensure_embeddings()
@@ -119,8 +150,8 @@ class AkashicRecord:
         if user_email:
             metadata["user_email"] = user_email
 
-        embedding = await asyncio.to_thread(self._encode, [content])
-        embedding = embedding[0]
+        embedding = await self._encode([content])
+        embedding = normalize_rows(embedding[0])[0]
 
         memory_id = str(uuid.uuid4())
         record = {
@@ -130,17 +161,43 @@ class AkashicRecord:
             "timestamp": datetime.now().isoformat(),
         }
 
-        self.memories.append(record)
+        async with self._write_lock:
+            await asyncio.to_thread(self._store.append, record, embedding)
+            self._postings.add(len(self.memories), metadata)
+            self.memories.append(record)
+            self._tail.append(embedding)
+            self._index.add(embedding)
+            if self._index.needs_training:
+                await asyncio.to_thread(self._index.train)
+            if self._store.needs_compaction:
+                await self._compact_locked()
+        return record
 
-        assert self.embeddings is not None
-        if self.embeddings.shape[0] == 0:
-            self.embeddings = np.array([embedding])
-        else:
-            self.embeddings = np.vstack([self.embeddings, embedding])
+    def _partition_rows(
+        self, filters: Optional[Dict[str, Any]], user_email: Optional[str]
+    ) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+        """
+        Resolve filters and the privacy scope to a sorted candidate row set via
+        the metadata postings. Returns ``None`` when nothing restricts the
+        search, plus any filters on keys without postings.
+        """
+        rows: Optional[np.ndarray] = None
+        residual: Dict[str, Any] = {}
 
-        self._save_memories()
-        self._save_vectors()
-        return record
+        if user_email:
+            rows = np.union1d(
+                self._postings.lookup("user_email", user_email),
+                self._postings.lookup_any("type", GLOBAL_MEMORY_TYPES),
+            )
+
+        for key, value in (filters or {}).items():
+            if not self._postings.indexes(key):
+                residual[key] = value
+                continue
+            matches = self._postings.lookup(key, value)
+            rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+
+        return rows, residual
 
     async def search(
         self,
@@ -151,52 +208,37 @@ class AkashicRecord:
         user_email: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         await self._ensure_embeddings()
-        if not self.memories or self.embeddings is None or self.embeddings.shape[0] == 0:
+        if not self.memories or len(self._index) == 0:
             return []
 
-        query_embedding = await asyncio.to_thread(self._encode, [query])
-        query_embedding = query_embedding[0]
+        candidates, residual = self._partition_rows(filters, user_email)
+        if candidates is not None and candidates.shape[0] == 0:
+            return []
+        if candidates is None and residual:
+            # Unindexed filter keys: score everything so the top-k stays exact.
+            candidates = np.arange(len(self._index))
 
-        norms = np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query_embedding)
-        norms[norms == 0] = 1e-10
-        scores = np.dot(self.embeddings, query_embedding) / norms
+        query_embedding = await self._encode([query])
 
-        search_limit = min(len(self.memories), 100)
-        top_indices = np.argsort(scores)[::-1][:search_limit]
+        if candidates is None:
+            search_limit = min(len(self.memories), limit)
+        else:
+            search_limit = candidates.shape[0] if residual else min(candidates.shape[0], limit)
+        top_indices, top_scores = self._index.search(query_embedding[0], search_limit, candidates)
 
         results = []
-        count = 0
-
-        for idx in top_indices:
-            if count >= limit:
+        for idx, score in zip(top_indices.tolist(), top_scores.tolist()):
+            if len(results) >= limit or score < min_score:
                 break
 
-            score = scores[idx]
-            if score < min_score:
-                continue
-
             memory = self.memories[idx]
             meta = memory.get("metadata", {})
-
-            if user_email:
-                mem_email = meta.get("user_email")
-                is_global = meta.get("type") in ["health_event", "finance_event", "life_event", "career_event"]
-                if not is_global and mem_email != user_email:
-                    continue
-
-            if filters:
-                match = True
-                for key, value in filters.items():
-                    if meta.get(key) != value:
-                        match = False
-                        break
-                if not match:
-                    continue
+            if any(meta.get(key) != value for key, value in residual.items()):
+                continue
 
             result = memory.copy()
             result["score"] = float(score)
             results.append(result)
-            count += 1
 
         return results
 
@@ -0,0 +1,206 @@
+"""
+Append-only segmented persistence for the Akashic Record.
+
+On-disk layout (inside the Akashic data directory):
+
+- ``akashic_record.json``  compacted base records (JSON list, legacy format)
+- ``akashic_vectors.npy``  compacted base vectors, memory-mapped on load
+- ``akashic_record.log``   newline-delimited JSON records appended since the last compaction
+- ``akashic_vectors.log``  raw float32 rows appended since the last compaction
+
+A canonize appends exactly one JSON line and one vector row. Once the log
+holds ``compact_every`` entries the owner folds everything back into the base
+files, so reload cost stays bounded without paying an O(n) rewrite per write.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.engrams.nlp import EMBEDDING_DIMENSION
+
+VECTOR_DTYPE = np.float32
+DEFAULT_COMPACT_EVERY = 256
+
+
+class GrowableMatrix:
+    """Row-appendable float32 matrix with amortised O(1) appends (capacity doubling)."""
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION, capacity: int = 64):
+        self.dimension = dimension
+        self.rows = 0
+        self._data = np.empty((max(capacity, 1), dimension), dtype=VECTOR_DTYPE)
+
+    def _reserve(self, rows: int):
+        if rows <= self._data.shape[0]:
+            return
+        capacity = self._data.shape[0]
+        while capacity < rows:
+            capacity *= 2
+        grown = np.empty((capacity, self.dimension), dtype=VECTOR_DTYPE)
+        grown[: self.rows] = self._data[: self.rows]
+        self._data = grown
+
+    def append(self, row: np.ndarray):
+        self._reserve(self.rows + 1)
+        self._data[self.rows] = row
+        self.rows += 1
+
+    def extend(self, rows: np.ndarray):
+        rows = np.asarray(rows, dtype=VECTOR_DTYPE).reshape(-1, self.dimension)
+        self._reserve(self.rows + rows.shape[0])
+        self._data[self.rows : self.rows + rows.shape[0]] = rows
+        self.rows += rows.shape[0]
+
+    def view(self) -> np.ndarray:
+        return self._data[: self.rows]
+
+    def clear(self):
+        self.rows = 0
+
+
+class AkashicSegmentStore:
+    def __init__(
+        self,
+        data_dir: str,
+        dimension: int = EMBEDDING_DIMENSION,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+    ):
+        self.data_dir = data_dir
+        self.dimension = dimension
+        self.compact_every = compact_every
+        self.base_records_path = os.path.join(data_dir, "akashic_record.json")
+        self.base_vectors_path = os.path.join(data_dir, "akashic_vectors.npy")
+        self.log_records_path = os.path.join(data_dir, "akashic_record.log")
+        self.log_vectors_path = os.path.join(data_dir, "akashic_vectors.log")
+        self.pending = 0
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.pending >= self.compact_every
+
+    def _ensure_dir(self):
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load_base_records(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.base_records_path):
+            return []
+        try:
+            with open(self.base_records_path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+            return data if isinstance(data, list) else []
+        except Exception as exc:
+            print(f"Failed to load Akashic Record: {exc}")
+            return []
+
+    def open_base_vectors(self) -> Optional[np.ndarray]:
+        if not os.path.exists(self.base_vectors_path):
+            return None
+        try:
+            vectors = np.load(self.base_vectors_path, mmap_mode="r")
+        except Exception as exc:
+            print(f"Failed to load Akashic vectors: {exc}")
+            return None
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            print(f"Ignoring Akashic vectors with unexpected shape {vectors.shape}.")
+            return None
+        return vectors
+
+    def _read_log_records(self) -> List[Dict[str, Any]]:
+        records: List[Dict[str, Any]] = []
+        if not os.path.exists(self.log_records_path):
+            return records
+        with open(self.log_records_path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.endswith("\n"):
+                    # Torn final write: everything before it is intact.
+                    break
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return records
+
+    def _read_log_vectors(self) -> np.ndarray:
+        row_bytes = self.dimension * np.dtype(VECTOR_DTYPE).itemsize
+        size = os.path.getsize(self.log_vectors_path) if os.path.exists(self.log_vectors_path) else 0
+        rows = size // row_bytes
+        if rows == 0:
+            return np.empty((0, self.dimension), dtype=VECTOR_DTYPE)
+        mapped = np.memmap(self.log_vectors_path, dtype=VECTOR_DTYPE, mode="r", shape=(rows, self.dimension))
+        vectors = np.array(mapped)
+        del mapped
+        return vectors
+
+    def load_log(self, known_ids: Optional[set] = None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Read the append log, dropping torn writes and entries that a crashed
+        compaction already folded into the base files. The log files are
+        rewritten in place if anything had to be dropped.
+        """
+        records = self._read_log_records()
+        vectors = self._read_log_vectors()
+        intact = min(len(records), vectors.shape[0])
+        dirty = intact != len(records) or intact != vectors.shape[0]
+        records, vectors = records[:intact], vectors[:intact]
+
+        if known_ids:
+            keep = [idx for idx, record in enumerate(records) if record.get("id") not in known_ids]
+            if len(keep) != len(records):
+                records = [records[idx] for idx in keep]
+                vectors = vectors[keep]
+                dirty = True
+
+        if dirty:
+            self._rewrite_log(records, vectors)
+        self.pending = len(records)
+        return records, vectors
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any], vector: np.ndarray):
+        self._ensure_dir()
+        row = np.asarray(vector, dtype=VECTOR_DTYPE).reshape(self.dimension)
+        with open(self.log_vectors_path, "ab") as handle:
+            handle.write(row.tobytes())
+        with open(self.log_records_path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, default=str) + "\n")
+        self.pending += 1
+
+    def _rewrite_log(self, records: List[Dict[str, Any]], vectors: np.ndarray):
+        self._ensure_dir()
+        with open(self.log_vectors_path, "wb") as handle:
+            handle.write(np.ascontiguousarray(vectors, dtype=VECTOR_DTYPE).tobytes())
+        with open(self.log_records_path, "w", encoding="utf-8") as handle:
+            for record in records:
+                handle.write(json.dumps(record, default=str) + "\n")
+
+    def compact(self, records: List[Dict[str, Any]], vectors: np.ndarray):
+        """
+        Fold the full record set into fresh base files and truncate the log.
+
+        Vectors are swapped in before records and the log is truncated last,
+        so a crash at any point leaves a state ``load_log`` can reconcile.
+        Callers must drop any memory map of the old base vectors first.
+        """
+        self._ensure_dir()
+        vectors_tmp = self.base_vectors_path + ".tmp.npy"
+        records_tmp = self.base_records_path + ".tmp"
+
+        np.save(vectors_tmp, np.ascontiguousarray(vectors, dtype=VECTOR_DTYPE))
+        with open(records_tmp, "w", encoding="utf-8") as handle:
+            json.dump(records, handle, default=str)
+
+        os.replace(vectors_tmp, self.base_vectors_path)
+        os.replace(records_tmp, self.base_records_path)
+        self._rewrite_log([], np.empty((0, self.dimension), dtype=VECTOR_DTYPE))
+        self.pending = 0
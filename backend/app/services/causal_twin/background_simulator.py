@@ -16,10 +16,11 @@ Used by both St. Raphael (individual) and St. Joseph (family).
 from __future__ import annotations
 
 import math
-import random
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from app.services.health.health_constants import (
     METRIC_THRESHOLDS as _HC_THRESHOLDS,
@@ -31,6 +32,8 @@ from app.services.health.health_constants import (
 PROJECTION_DAYS = 180          # 6-month forecast horizon
 DEFAULT_RUNS    = 500          # Monte Carlo sample count
 COMPOUNDING_WINDOW_DAYS = 21   # 3-week window for compounding detection
+SAMPLE_EVERY_DAYS = 7          # trajectories are reported weekly
+DAILY_JITTER = 0.1             # daily noise σ as a fraction of the observed σ
 
 # Metric threshold adapter: maps engine metric keys → health_constants entry.
 # Pulls warn/crit/direction from the canonical METRIC_THRESHOLDS table.
@@ -90,13 +93,39 @@ def _std(vals: List[float]) -> float:
     return math.sqrt(sum((v - m) ** 2 for v in vals) / len(vals))
 
 
-def _percentile(vals: List[float], p: float) -> float:
-    """Simple percentile (nearest-rank)."""
-    if not vals:
-        return 0.0
-    s = sorted(vals)
-    k = max(0, min(int(len(s) * p / 100), len(s) - 1))
-    return s[k]
+def _percentiles(samples: np.ndarray, ps: Tuple[float, ...]) -> np.ndarray:
+    """Nearest-rank percentiles down axis 0, via one partial sort."""
+    n = samples.shape[0]
+    ranks = [max(0, min(int(n * p / 100), n - 1)) for p in ps]
+    return np.partition(samples, ranks, axis=0)[ranks]
+
+
+def _simulate_paths(
+    starts: np.ndarray,
+    drifts: np.ndarray,
+    daily_sigmas: np.ndarray,
+    n_runs: int,
+    horizon_days: int,
+    rng: np.random.Generator,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Random-walk trajectories for every metric at once, shaped
+    (metrics, runs, points), observed on each weekly sample day and the final day.
+
+    Only the observed days are drawn: the sum of k daily N(0, σ) steps is
+    N(0, σ·√k), so each gap between observations is a single draw with the
+    same distribution as the day-by-day walk.
+    """
+    days = np.arange(SAMPLE_EVERY_DAYS, horizon_days + 1, SAMPLE_EVERY_DAYS)
+    if days.size == 0 or days[-1] != horizon_days:
+        days = np.append(days, horizon_days)
+    gaps = np.diff(days, prepend=0)
+
+    steps = rng.standard_normal((starts.size, n_runs, days.size))
+    steps *= daily_sigmas[:, None, None] * np.sqrt(gaps)
+    paths = np.cumsum(steps, axis=2)
+    paths += starts[:, None, None] + drifts[:, None, None] * days
+    return days, paths
 
 
 def _daily_drift_rate(vals: List[float]) -> float:
@@ -132,11 +161,12 @@ class BackgroundSimulator:
         metrics_history: List[Dict[str, Any]],
         n_runs: int = DEFAULT_RUNS,
         horizon_days: int = PROJECTION_DAYS,
+        seed: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Run *n_runs* Monte Carlo trajectories per metric, each jittered by
         the observed σ, and return the median / P5 / P95 risk envelopes
-        plus any compounding-risk alerts.
+        plus any compounding-risk alerts. Pass *seed* for reproducible runs.
         """
         # Group history by metric_type
         by_metric: Dict[str, List[float]] = {}
@@ -148,38 +178,43 @@ class BackgroundSimulator:
 
         metric_projections: Dict[str, Dict[str, Any]] = {}
 
-        for metric, values in by_metric.items():
-            mean = _mean(values)
-            sigma = _std(values) or mean * 0.05  # fallback 5% σ
-            drift = _daily_drift_rate(values)
-
-            # Run Monte Carlo
-            final_values: List[float] = []
-            sample_trajectories: List[List[float]] = []
-
-            for _ in range(n_runs):
-                trajectory: List[float] = []
-                current = values[-1] if values else mean
-                for day in range(1, horizon_days + 1):
-                    noise = random.gauss(0, sigma * 0.1)  # daily jitter
-                    current = current + drift + noise
-                    if day % 7 == 0:  # sample weekly
-                        trajectory.append(round(current, 2))
-                final_values.append(current)
-                if len(sample_trajectories) < 3:
-                    sample_trajectories.append(trajectory)
-
-            metric_projections[metric] = {
-                "current_mean": round(mean, 2),
-                "current_std": round(sigma, 2),
-                "drift_per_day": round(drift, 4),
-                "projected_median": round(_percentile(final_values, 50), 2),
-                "projected_p5": round(_percentile(final_values, 5), 2),
-                "projected_p95": round(_percentile(final_values, 95), 2),
-                "sample_trajectories": sample_trajectories,
-                "horizon_days": horizon_days,
-                "n_runs": n_runs,
-            }
+        if by_metric and n_runs > 0 and horizon_days > 0:
+            metrics = list(by_metric)
+            means = np.array([_mean(by_metric[metric]) for metric in metrics])
+            sigmas = np.array([_std(by_metric[metric]) for metric in metrics])
+            sigmas = np.where(sigmas > 0, sigmas, means * 0.05)  # fallback 5% σ
+            drifts = np.array([_daily_drift_rate(by_metric[metric]) for metric in metrics])
+            starts = np.array([by_metric[metric][-1] for metric in metrics])
+
+            # Run Monte Carlo: one array for every metric, run and sample day
+            rng = np.random.default_rng(seed)
+            days, paths = _simulate_paths(starts, drifts, sigmas * DAILY_JITTER, n_runs, horizon_days, rng)
+            weekly = days % SAMPLE_EVERY_DAYS == 0
+            finals = paths[:, :, -1]
+            final_p5, final_median, final_p95 = _percentiles(finals.T, (5, 50, 95))
+            envelope_p5, envelope_median, envelope_p95 = _percentiles(
+                paths[:, :, weekly].transpose(1, 0, 2), (5, 50, 95)
+            )
+            samples = np.round(paths[:, :3][:, :, weekly], 2)
+
+            for i, metric in enumerate(metrics):
+                metric_projections[metric] = {
+                    "current_mean": round(float(means[i]), 2),
+                    "current_std": round(float(sigmas[i]), 2),
+                    "drift_per_day": round(float(drifts[i]), 4),
+                    "projected_median": round(float(final_median[i]), 2),
+                    "projected_p5": round(float(final_p5[i]), 2),
+                    "projected_p95": round(float(final_p95[i]), 2),
+                    "weekly_envelope": {
+                        "days": days[weekly].tolist(),
+                        "p5": np.round(envelope_p5[i], 2).tolist(),
+                        "median": np.round(envelope_median[i], 2).tolist(),
+                        "p95": np.round(envelope_p95[i], 2).tolist(),
+                    },
+                    "sample_trajectories": samples[i].tolist(),
+                    "horizon_days": horizon_days,
+                    "n_runs": n_runs,
+                }
 
         # Detect compounding risks
         compounding_alerts = self._detect_compounding_risks(by_metric, metric_projections)
@@ -194,6 +229,7 @@ class BackgroundSimulator:
             "generated_at": datetime.utcnow().isoformat(),
             "horizon_days": horizon_days,
             "n_runs": n_runs,
+            "seed": seed,
             "metric_projections": metric_projections,
             "overall_risk_score": overall_risk["score"],
             "overall_risk_level": overall_risk["level"],
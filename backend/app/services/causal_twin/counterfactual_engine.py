@@ -5,7 +5,10 @@ and shows projected effects across key health metrics.
 """
 import random
 import asyncio
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Hashable, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import select, func
 from sqlalchemy.exc import ProgrammingError
@@ -123,6 +126,55 @@ BEHAVIOR_EFFECT_MAP = {
 
 HORIZONS = [3, 7, 14, 30]
 
+
+class BaselineCache:
+    """
+    Per-user cache of metric aggregates, keyed by a freshness stamp of the
+    user's ``Metric`` rows (row count and latest ``ts``). Any insert or backfill
+    changes the stamp, whichever service wrote it; the TTL bounds how long an
+    aggregate over a moving time window is reused.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 8192,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Hashable, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, kind: str, stamp: Hashable) -> Optional[Any]:
+        key = (user_id, kind)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            stored_at, stored_stamp, value = item
+            if stored_stamp != stamp or self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, user_id: str, kind: str, stamp: Hashable, value: Any):
+        with self._lock:
+            self._entries[(user_id, kind)] = (self._clock(), stamp, value)
+            self._entries.move_to_end((user_id, kind))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+baseline_cache = BaselineCache()
+
+
 class CounterfactualEngine:
     """Simulates multiple futures based on behavior changes and real historical data."""
 
@@ -130,43 +182,69 @@ class CounterfactualEngine:
         self.llm = get_llm_client()
 
     async def _get_user_baselines(self, user_id: str, days: int = 30) -> Dict[str, Any]:
-        """Compute personal baselines from the metrics table."""
-        baselines = DEFAULT_BASELINES.copy()
+        """Personal baselines from the metrics table, cached per user."""
+        kind = f"baselines:{days}"
+        stamp = await self._metric_stamp(user_id)
+        cached = baseline_cache.get(user_id, kind, stamp) if stamp is not None else None
+        if cached is None:
+            cached = await self._load_user_baselines(user_id, days)
+            if cached is not None and stamp is not None:
+                baseline_cache.put(user_id, kind, stamp, cached)
+        baselines = {key: dict(value) for key, value in DEFAULT_BASELINES.items()}
+        for metric_key, (mean, std) in (cached or {}).items():
+            baselines[metric_key]["mean"] = mean
+            if std is not None and std > 0:
+                baselines[metric_key]["std"] = std
+        return baselines
+
+    async def _metric_stamp(self, user_id: str) -> Optional[Tuple[int, Optional[datetime]]]:
+        """Row count and latest timestamp of the user's metrics; changes whenever a row is added."""
+        query = select(func.count(Metric.id), func.max(Metric.ts)).where(Metric.sourceId == user_id)
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            try:
+                count, latest = (await session.execute(query)).one()
+            except ProgrammingError:
+                await session.rollback()
+                return None
+        return int(count or 0), latest
+
+    async def _load_user_baselines(self, user_id: str, days: int) -> Optional[Dict[str, Tuple[float, Optional[float]]]]:
+        """Mean and σ per baseline metric over the window, in one grouped query; None if the table is unavailable."""
+        key_by_type = {
+            metric_type: metric_key
+            for metric_key, metric_type in METRIC_MAPPING.items()
+            if metric_key in DEFAULT_BASELINES
+        }
         start_date = datetime.utcnow() - timedelta(days=days)
-        
+        query = select(
+            Metric.type,
+            func.avg(Metric.value).label("avg"),
+            func.stddev(Metric.value).label("std")
+        ).where(
+            Metric.sourceId == user_id, # Simplified userId check
+            Metric.type.in_(list(key_by_type)),
+            Metric.ts >= start_date
+        ).group_by(Metric.type)
+
         session_factory = get_session_factory()
         async with session_factory() as session:
-            for metric_key, metric_type in METRIC_MAPPING.items():
-                if metric_key not in baselines:
-                    continue
-                
-                query = select(
-                    func.avg(Metric.value).label("avg"),
-                    func.stddev(Metric.value).label("std")
-                ).where(
-                    Metric.sourceId == user_id, # Simplified userId check
-                    Metric.type == metric_type,
-                    Metric.ts >= start_date
+            try:
+                rows = (await session.execute(query)).all()
+            except ProgrammingError as exc:
+                logger.warning(
+                    "Falling back to default baselines because the metrics table is unavailable for user %s: %s",
+                    user_id,
+                    exc,
                 )
+                await session.rollback()
+                return None
 
-                try:
-                    result = await session.execute(query)
-                    row = result.fetchone()
-                except ProgrammingError as exc:
-                    logger.warning(
-                        "Falling back to default baselines because the metrics table is unavailable for user %s: %s",
-                        user_id,
-                        exc,
-                    )
-                    await session.rollback()
-                    return baselines
-                
-                if row and row.avg is not None:
-                    baselines[metric_key]["mean"] = float(row.avg)
-                    if row.std is not None and row.std > 0:
-                        baselines[metric_key]["std"] = float(row.std)
-        
-        return baselines
+        return {
+            key_by_type[row.type]: (float(row.avg), float(row.std) if row.std is not None else None)
+            for row in rows
+            if row.avg is not None
+        }
 
     async def _assess_history_stats(self, user_id: str) -> Dict[str, Any]:
         """Determine data completeness and total history days."""
@@ -350,32 +428,38 @@ class CounterfactualEngine:
             },
         }
 
-    async def simulate_scenarios(
+    async def _load_context(
         self,
         user_id: str,
-        behavior_changes: Dict[str, float],
-        target_metrics: Optional[List[str]] = None,
-        horizons: Optional[List[int]] = None,
-        user_history_days: Optional[int] = None,
-        data_completeness: Optional[float] = None
-    ) -> Dict[str, Any]:
-        """Run a counterfactual simulation using real user baselines."""
-        
+        user_history_days: Optional[int],
+        data_completeness: Optional[float],
+    ) -> Tuple[Dict[str, Any], int, float]:
         # 1. Fetch real stats if not provided
         if user_history_days is None or data_completeness is None:
             stats = await self._assess_history_stats(user_id)
             user_history_days = user_history_days if user_history_days is not None else stats["history_days"]
             data_completeness = data_completeness if data_completeness is not None else stats["completeness"]
-            
+
         # 2. Get user baselines
         baselines = await self._get_user_baselines(user_id)
+        return baselines, user_history_days, data_completeness
+
+    def _project_scenario(
+        self,
+        baselines: Dict[str, Any],
+        behavior_changes: Dict[str, float],
+        target_metrics: Optional[List[str]],
+        horizons_list: List[int],
+        user_history_days: Optional[int],
+        data_completeness: Optional[float],
+    ) -> Dict[str, Any]:
+        """Everything in a simulation result except the narrative; no I/O."""
         behavior_baselines = self._get_behavior_baselines(baselines)
         behavior_deltas = {
             behavior: round(self._behavior_delta(behavior, value, behavior_baselines), 2)
             for behavior, value in behavior_changes.items()
         }
         
-        horizons_list = horizons or HORIZONS
         affected_metrics = set()
 
         for behavior, _value in behavior_changes.items():
@@ -450,15 +534,6 @@ class CounterfactualEngine:
             completeness=float(data_completeness or 0.0),
         )
 
-        narrative = await self._generate_narrative(
-            behavior_changes=behavior_changes,
-            behavior_deltas=behavior_deltas,
-            projections=projections,
-            composite_indices=composite_indices,
-            downstream_equations=downstream_equations,
-            confidence=confidence,
-        )
-
         return {
             "scenario": behavior_changes,
             "behavior_baselines": behavior_baselines,
@@ -469,13 +544,79 @@ class CounterfactualEngine:
             "horizons": horizons_list,
             "confidence": confidence,
             "evidence": evidence,
-            "narrative": narrative,
+            "narrative": None,
             "history_days": user_history_days,
             "completeness": data_completeness,
             "disclaimer": WELLNESS_DISCLAIMER,
             "generated_at": datetime.utcnow().isoformat()
         }
 
+    async def simulate_scenarios(
+        self,
+        user_id: str,
+        behavior_changes: Dict[str, float],
+        target_metrics: Optional[List[str]] = None,
+        horizons: Optional[List[int]] = None,
+        user_history_days: Optional[int] = None,
+        data_completeness: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Run a counterfactual simulation using real user baselines."""
+        baselines, user_history_days, data_completeness = await self._load_context(
+            user_id, user_history_days, data_completeness
+        )
+        result = self._project_scenario(
+            baselines, behavior_changes, target_metrics, horizons or HORIZONS, user_history_days, data_completeness
+        )
+        result["narrative"] = await self._generate_narrative(
+            behavior_changes=behavior_changes,
+            behavior_deltas=result["behavior_deltas"],
+            projections=result["projections"],
+            composite_indices=result["composite_indices"],
+            downstream_equations=result["downstream_equations"],
+            confidence=result["confidence"],
+        )
+        return result
+
+    async def simulate_scenario_batch(
+        self,
+        user_id: str,
+        scenarios: List[Dict[str, float]],
+        target_metrics: Optional[List[str]] = None,
+        horizons: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Evaluate many behavior-change scenarios against one load of the user's
+        baselines. Narratives are the template summary rather than an LLM call
+        per scenario, so a batch stays cheap enough for interactive sliders.
+        """
+        baselines, user_history_days, data_completeness = await self._load_context(user_id, None, None)
+        results = []
+        for behavior_changes in scenarios:
+            result = self._project_scenario(
+                baselines, behavior_changes, target_metrics, horizons or HORIZONS, user_history_days, data_completeness
+            )
+            result["narrative"] = self._fallback_narrative(
+                behavior_changes, result["projections"], result["confidence"]
+            )
+            results.append(result)
+        return {
+            "user_id": user_id,
+            "history_days": user_history_days,
+            "completeness": data_completeness,
+            "results": results,
+            "disclaimer": WELLNESS_DISCLAIMER,
+            "generated_at": datetime.utcnow().isoformat(),
+        }
+
+    @staticmethod
+    def _fallback_narrative(behavior_changes, projections, confidence) -> str:
+        changes_text = ", ".join([f"{k}: {v}" for k, v in behavior_changes.items()])
+        return (
+            f"Based on the proposed changes ({changes_text}), St. Raphael projects "
+            f"effects across {len(projections)} metrics over the coming weeks. "
+            f"Confidence is {confidence['level']} — more data will sharpen these predictions."
+        )
+
     async def _generate_narrative(self, behavior_changes, behavior_deltas, projections, composite_indices, downstream_equations, confidence) -> str:
         """Use LLM to generate a human-friendly summary."""
         changes_text = ", ".join([f"{k}: {v}" for k, v in behavior_changes.items()])
@@ -499,10 +640,6 @@ class CounterfactualEngine:
         try:
             return await self.llm.generate_response([{"role": "user", "content": prompt}])
         except Exception:
-            return (
-                f"Based on the proposed changes ({changes_text}), St. Raphael projects "
-                f"effects across {len(projections)} metrics over the coming weeks. "
-                f"Confidence is {confidence['level']} — more data will sharpen these predictions."
-            )
+            return self._fallback_narrative(behavior_changes, projections, confidence)
 
 counterfactual_engine = CounterfactualEngine()
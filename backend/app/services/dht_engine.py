@@ -9,14 +9,22 @@ Design: rule-based hybrid v1.
   - EWM (exponentially weighted mean) for baselines and deltas
   - Z-score + IQR hybrid for anomaly detection
   - OCEAN modifier applied post-scoring to direction + alert tone
+
+compute_dht() derives everything from the full observation list.
+IncrementalDHTEngine keeps the same features as running per-metric state,
+so a new observation costs O(1) per metric instead of a 90-day refetch.
 """
 
 from __future__ import annotations
 
+import bisect
 import math
 import statistics
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
 
 from app.models.dht import (
     Anomaly, BehavioralModifiers, DelphiHealthTrajectory, DeltaArrow,
@@ -214,22 +222,29 @@ def _detect_anomalies(obs_by_metric: Dict[str, List[float]]) -> List[Anomaly]:
         mean = statistics.mean(vals)
         stdev = statistics.stdev(vals) or 1e-9
         for v in vals[-3:]:  # check last 3 readings
-            z = abs(v - mean) / stdev
-            if z > 3.0:
-                severity = "severe" if z > 5 else "moderate" if z > 3.5 else "minor"
-                low = mean - 2 * stdev
-                high = mean + 2 * stdev
-                anomalies.append(Anomaly(
-                    metric=metric,
-                    value=v,
-                    expected_range=(round(low, 2), round(high, 2)),
-                    zscore=round(z, 2),
-                    detected_at=datetime.utcnow(),
-                    severity=severity,
-                ))
+            anomaly = _anomaly(metric, v, mean, stdev)
+            if anomaly is not None:
+                anomalies.append(anomaly)
     return anomalies
 
 
+def _anomaly(metric: str, v: float, mean: float, stdev: float) -> Optional[Anomaly]:
+    z = abs(v - mean) / stdev
+    if z <= 3.0:
+        return None
+    severity = "severe" if z > 5 else "moderate" if z > 3.5 else "minor"
+    low = mean - 2 * stdev
+    high = mean + 2 * stdev
+    return Anomaly(
+        metric=metric,
+        value=v,
+        expected_range=(round(low, 2), round(high, 2)),
+        zscore=round(z, 2),
+        detected_at=datetime.utcnow(),
+        severity=severity,
+    )
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Core DHT computation
 # ─────────────────────────────────────────────────────────────────────────────
@@ -252,16 +267,7 @@ def compute_dht(
     obs = [o for o in observations if o.recorded_at >= cutoff]
 
     if not obs:
-        # Empty — return a minimal skeleton
-        dht = DelphiHealthTrajectory(
-            person_id=person_id,
-            family_id=family_id,
-            data_quality="empty",
-            context_tags=context_tags or [],
-            confidence=0.0,
-        )
-        dht.next_best_measurement = _next_best({}, now)
-        return dht
+        return _empty_dht(person_id, family_id, context_tags, now)
 
     # ── Group by metric (numeric only) ──────────────────────────────────────
     obs_by_metric: Dict[str, List[Tuple[datetime, float]]] = {}
@@ -294,7 +300,6 @@ def compute_dht(
     for m, pts in obs_by_metric.items():
         vals_7d = [v for t, v in pts if t >= cut7]
         vals_30d = [v for t, v in pts if t >= cut30]
-        all_vals = [v for _, v in pts]
         baseline = baselines[m]
         if vals_7d:
             rolling_7d[m] = round(_delta_pct(_ewm_mean(vals_7d), baseline), 1)
@@ -308,17 +313,64 @@ def compute_dht(
         if len(vals) >= 3 and statistics.mean(vals) != 0:
             variability[m] = round(statistics.stdev(vals) / abs(statistics.mean(vals)), 3)
 
+    # ── Anomaly detection ────────────────────────────────────────────────────
+    obs_vals_only = {m: [v for _, v in pts] for m, pts in obs_by_metric.items()}
+    anomalies = _detect_anomalies(obs_vals_only)
+
+    most_recent_per_metric = {m: pts[-1][0] for m, pts in obs_by_metric.items()}
+    return _assemble_dht(
+        person_id, family_id, context_tags, ocean_profile, now,
+        observation_count=len(obs),
+        latest=latest,
+        baselines=baselines,
+        rolling_7d=rolling_7d,
+        rolling_30d=rolling_30d,
+        variability=variability,
+        anomalies=anomalies,
+        most_recent_per_metric=most_recent_per_metric,
+    )
+
+
+def _empty_dht(
+    person_id: str,
+    family_id: Optional[str],
+    context_tags: Optional[List[str]],
+    now: datetime,
+) -> DelphiHealthTrajectory:
+    # Empty — return a minimal skeleton
+    dht = DelphiHealthTrajectory(
+        person_id=person_id,
+        family_id=family_id,
+        data_quality="empty",
+        context_tags=context_tags or [],
+        confidence=0.0,
+    )
+    dht.next_best_measurement = _next_best({}, now)
+    return dht
+
+
+def _assemble_dht(
+    person_id: str,
+    family_id: Optional[str],
+    context_tags: Optional[List[str]],
+    ocean_profile: Optional[OceanProfile],
+    now: datetime,
+    observation_count: int,
+    latest: Dict[str, float],
+    baselines: Dict[str, float],
+    rolling_7d: Dict[str, float],
+    rolling_30d: Dict[str, float],
+    variability: Dict[str, float],
+    anomalies: List[Anomaly],
+    most_recent_per_metric: Dict[str, datetime],
+) -> DelphiHealthTrajectory:
+    """Scores, trajectory windows and OCEAN modulation from per-metric features."""
     # ── Adherence (proxy: recency of observations) ────────────────────────────
     adherence: Dict[str, float] = {}
-    for m, pts in obs_by_metric.items():
-        last_ts = pts[-1][0]
+    for m, last_ts in most_recent_per_metric.items():
         days_ago = (now - last_ts).days
         adherence[m] = max(0.0, round(1.0 - min(days_ago / 30, 1.0), 2))
 
-    # ── Anomaly detection ────────────────────────────────────────────────────
-    obs_vals_only = {m: [v for _, v in pts] for m, pts in obs_by_metric.items()}
-    anomalies = _detect_anomalies(obs_vals_only)
-
     # ── Risk cards (per domain) ───────────────────────────────────────────────
     risk_cards = _build_risk_cards(latest, rolling_30d, ocean_profile)
 
@@ -326,7 +378,7 @@ def compute_dht(
     leading = _build_leading_indicators(latest, rolling_7d, rolling_30d)
 
     # ── Data quality ─────────────────────────────────────────────────────────
-    metrics_count = len(obs_by_metric)
+    metrics_count = len(most_recent_per_metric)
     if metrics_count >= 5:
         quality = "rich"
     elif metrics_count >= 3:
@@ -351,7 +403,6 @@ def compute_dht(
     overall_direction = short_term.direction if short_term else "unknown"
 
     # ── Next-best measurement ─────────────────────────────────────────────────
-    most_recent_per_metric = {m: pts[-1][0] for m, pts in obs_by_metric.items()}
     nbm = _next_best(most_recent_per_metric, now)
 
     # ── OCEAN behavioral modifiers ────────────────────────────────────────────
@@ -362,7 +413,7 @@ def compute_dht(
         ocean_version = ocean_profile.version
 
     # ── freshness ─────────────────────────────────────────────────────────────
-    last_obs_ts = max((pts[-1][0] for pts in obs_by_metric.values()), default=now)
+    last_obs_ts = max(most_recent_per_metric.values(), default=now)
     freshness_seconds = int((now - last_obs_ts).total_seconds())
 
     # ── Build DHT ─────────────────────────────────────────────────────────────
@@ -371,7 +422,7 @@ def compute_dht(
         family_id=family_id,
         computed_at=now,
         data_freshness_seconds=freshness_seconds,
-        observation_count=len(obs),
+        observation_count=observation_count,
         data_quality=quality,
         baselines=baselines,
         rolling_deltas_7d=rolling_7d,
@@ -607,3 +658,271 @@ def _next_best(
         days_since_last=days_ago if days_ago < 9999 else None,
         suggested_source=source,
     )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Incremental engine (running per-metric state)
+# ─────────────────────────────────────────────────────────────────────────────
+
+_EWM_ALPHA = 0.3
+
+
+class _RollingWindow:
+    """
+    Readings of one metric inside a trailing time window, with the window's
+    EWM and Welford mean/M2 updated as readings enter and expire.
+
+    Dropping the oldest of n readings shifts the EWM by
+    (1 - alpha)^(n-1) * (second - oldest), so expiry is O(1) and the EWM
+    matches _ewm_mean() over the remaining readings.
+    """
+
+    __slots__ = ("span", "points", "ewm", "mean", "m2")
+
+    def __init__(self, span: timedelta):
+        self.span = span
+        self.points: Deque[Tuple[datetime, float]] = deque()
+        self.ewm = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, point: Tuple[datetime, float]) -> None:
+        v = point[1]
+        self.points.append(point)
+        n = len(self.points)
+        self.ewm = v if n == 1 else _EWM_ALPHA * v + (1 - _EWM_ALPHA) * self.ewm
+        d = v - self.mean
+        self.mean += d / n
+        self.m2 += d * (v - self.mean)
+
+    def expire(self, now: datetime) -> None:
+        cutoff = now - self.span
+        while self.points and self.points[0][0] < cutoff:
+            n = len(self.points)
+            _, oldest = self.points.popleft()
+            if n == 1:
+                self.ewm = self.mean = self.m2 = 0.0
+                continue
+            self.ewm += (1 - _EWM_ALPHA) ** (n - 1) * (self.points[0][1] - oldest)
+            d = oldest - self.mean
+            self.mean -= d / (n - 1)
+            self.m2 = max(0.0, self.m2 - d * (oldest - self.mean))
+
+    def stdev(self) -> float:
+        n = len(self.points)
+        return math.sqrt(self.m2 / (n - 1)) if n >= 2 else 0.0
+
+
+class _MetricState:
+    __slots__ = ("all", "month", "week")
+
+    def __init__(self):
+        self.all = _RollingWindow(timedelta(days=90))
+        self.month = _RollingWindow(timedelta(days=30))
+        self.week = _RollingWindow(timedelta(days=7))
+
+    def add(self, recorded_at: datetime, value: float) -> None:
+        point = (recorded_at, value)
+        points = self.all.points
+        if points and recorded_at < points[-1][0]:
+            # Backfilled reading: rebuild this metric in order (after equal timestamps, like a stable sort).
+            ordered = list(points)
+            ordered.insert(bisect.bisect_right([t for t, _ in ordered], recorded_at), point)
+            self.__init__()
+            for p in ordered:
+                self._push(p)
+            return
+        self._push(point)
+
+    def _push(self, point: Tuple[datetime, float]) -> None:
+        self.all.push(point)
+        self.month.push(point)
+        self.week.push(point)
+
+    def expire(self, now: datetime) -> None:
+        self.all.expire(now)
+        self.month.expire(now)
+        self.week.expire(now)
+
+
+class _PersonState:
+    __slots__ = ("metrics", "other", "ocean_profile", "family_id", "context_tags", "seeded_at")
+
+    def __init__(self, ocean_profile, family_id, context_tags, seeded_at: float):
+        self.metrics: Dict[str, _MetricState] = {}
+        self.other: List[datetime] = []   # non-numeric observations still count towards observation_count
+        self.ocean_profile = ocean_profile
+        self.family_id = family_id
+        self.context_tags = context_tags
+        self.seeded_at = seeded_at
+
+    def add(self, obs: Observation) -> None:
+        try:
+            v = float(obs.value)
+        except (ValueError, TypeError):
+            bisect.insort(self.other, obs.recorded_at)
+            return
+        state = self.metrics.get(obs.metric)
+        if state is None:
+            state = self.metrics[obs.metric] = _MetricState()
+        state.add(obs.recorded_at, v)
+
+    def expire(self, now: datetime) -> None:
+        for metric in list(self.metrics):
+            state = self.metrics[metric]
+            state.expire(now)
+            if not state.all.points:
+                del self.metrics[metric]
+        cutoff = now - timedelta(days=90)
+        if self.other and self.other[0] < cutoff:
+            del self.other[:bisect.bisect_left(self.other, cutoff)]
+
+
+class IncrementalDHTEngine:
+    """
+    Per-person running DHT state, seeded by a full recompute and then updated
+    one observation at a time.
+
+    State older than ``max_age_seconds`` is treated as missing, so observations
+    written by other processes are picked up by the next full recompute.
+    """
+
+    def __init__(
+        self,
+        max_people: int = 5000,
+        max_age_seconds: float = 6 * 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_people = max_people
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._people: "OrderedDict[str, _PersonState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, person_id: str) -> Optional[_PersonState]:
+        state = self._people.get(person_id)
+        if state is None:
+            return None
+        if self._clock() - state.seeded_at > self.max_age_seconds:
+            del self._people[person_id]
+            return None
+        self._people.move_to_end(person_id)
+        return state
+
+    def has(self, person_id: str) -> bool:
+        with self._lock:
+            return self._get(person_id) is not None
+
+    def observe(self, obs: Observation) -> bool:
+        """Fold one observation into the person's state; False if the person is not seeded."""
+        with self._lock:
+            state = self._get(obs.person_id)
+            if state is None:
+                return False
+            state.add(obs)
+            return True
+
+    def observe_many(self, observations: Iterable[Observation]) -> int:
+        applied = 0
+        for obs in observations:
+            applied += self.observe(obs)
+        return applied
+
+    def recompute(
+        self,
+        person_id: str,
+        observations: List[Observation],
+        ocean_profile: Optional[OceanProfile] = None,
+        family_id: Optional[str] = None,
+        context_tags: Optional[List[str]] = None,
+        now: Optional[datetime] = None,
+    ) -> DelphiHealthTrajectory:
+        """Full recompute: rebuild the person's state from ``observations`` and return the DHT."""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=90)
+        state = _PersonState(ocean_profile, family_id, context_tags, self._clock())
+        for obs in sorted((o for o in observations if o.recorded_at >= cutoff), key=lambda o: o.recorded_at):
+            state.add(obs)
+        with self._lock:
+            self._people[person_id] = state
+            self._people.move_to_end(person_id)
+            while len(self._people) > self.max_people:
+                self._people.popitem(last=False)
+            return self._build(person_id, state, now)
+
+    def trajectory(self, person_id: str, now: Optional[datetime] = None) -> Optional[DelphiHealthTrajectory]:
+        """DHT from the running state, or None when the person needs a full recompute."""
+        with self._lock:
+            state = self._get(person_id)
+            if state is None:
+                return None
+            return self._build(person_id, state, now or datetime.utcnow())
+
+    def set_context(
+        self,
+        person_id: str,
+        ocean_profile: Optional[OceanProfile] = None,
+        family_id: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            state = self._get(person_id)
+            if state is not None:
+                state.ocean_profile = ocean_profile or state.ocean_profile
+                state.family_id = family_id or state.family_id
+
+    def forget(self, person_id: str) -> None:
+        with self._lock:
+            self._people.pop(person_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._people.clear()
+
+    @staticmethod
+    def _build(person_id: str, state: _PersonState, now: datetime) -> DelphiHealthTrajectory:
+        state.expire(now)
+        observation_count = sum(len(m.all.points) for m in state.metrics.values()) + len(state.other)
+        if observation_count == 0:
+            return _empty_dht(person_id, state.family_id, state.context_tags, now)
+
+        latest: Dict[str, float] = {}
+        baselines: Dict[str, float] = {}
+        rolling_7d: Dict[str, float] = {}
+        rolling_30d: Dict[str, float] = {}
+        variability: Dict[str, float] = {}
+        anomalies: List[Anomaly] = []
+        most_recent: Dict[str, datetime] = {}
+        for m, metric in state.metrics.items():
+            window = metric.all
+            last_ts, last_value = window.points[-1]
+            latest[m] = last_value
+            most_recent[m] = last_ts
+            baseline = baselines[m] = round(window.ewm, 2)
+            if metric.week.points:
+                rolling_7d[m] = round(_delta_pct(metric.week.ewm, baseline), 1)
+            if metric.month.points:
+                rolling_30d[m] = round(_delta_pct(metric.month.ewm, baseline), 1)
+            n = len(window.points)
+            if n >= 3 and window.mean != 0:
+                variability[m] = round(window.stdev() / abs(window.mean), 3)
+            if n >= 5:
+                stdev = window.stdev() or 1e-9
+                for i in range(n - 3, n):  # check last 3 readings
+                    anomaly = _anomaly(m, window.points[i][1], window.mean, stdev)
+                    if anomaly is not None:
+                        anomalies.append(anomaly)
+
+        return _assemble_dht(
+            person_id, state.family_id, state.context_tags, state.ocean_profile, now,
+            observation_count=observation_count,
+            latest=latest,
+            baselines=baselines,
+            rolling_7d=rolling_7d,
+            rolling_30d=rolling_30d,
+            variability=variability,
+            anomalies=anomalies,
+            most_recent_per_metric=most_recent,
+        )
+
+
+incremental_dht = IncrementalDHTEngine()
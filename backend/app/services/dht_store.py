@@ -1,20 +1,37 @@
 """
 DHT Supabase Store — read/write helpers for DHT-related tables.
 All data persists in Supabase (PostgreSQL via REST).
+
+One Supabase client (and its pooled HTTP session) is shared by every helper.
+Observations are buffered and inserted in bulk by a background writer, at most
+DHT_OBSERVATION_FLUSH_SECONDS after they arrive; reads merge in observations
+that are still buffered, so a recompute right after ingest sees them.
 """
 from __future__ import annotations
 
+import atexit
 import json
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from postgrest.types import ReturnMethod
 
+from app.core.config import settings
 from app.db.session import create_supabase_client
 from app.models.dht import (
     AuditEntry, ConsentRecord, DelphiHealthTrajectory,
     Observation, OceanProfile, OceanScores, BehavioralModifiers,
 )
 
+logger = logging.getLogger(__name__)
+
 
+@lru_cache(maxsize=1)
 def _client():
     return create_supabase_client()
 
@@ -23,32 +40,198 @@ def _client():
 # Observations
 # ─────────────────────────────────────────────────────────────────────────────
 
+class ObservationWriter:
+    """
+    Buffers observations and hands them to ``insert`` in batches of up to
+    ``batch_size`` from one background thread. A batch is written once it is
+    full or its oldest observation has waited ``max_delay_seconds``.
+    Failed batches are retried with backoff before being dropped with an error.
+    """
+
+    def __init__(
+        self,
+        insert: Callable[[List[Dict[str, Any]]], None],
+        batch_size: int = 500,
+        max_delay_seconds: float = 0.5,
+        max_attempts: int = 3,
+    ):
+        self._insert = insert
+        self.batch_size = max(1, batch_size)
+        self.max_delay_seconds = max_delay_seconds
+        self.max_attempts = max(1, max_attempts)
+
+        self._cond = threading.Condition()
+        self._pending: Deque[Tuple[float, Observation]] = deque()
+        self._unwritten: Dict[str, Observation] = {}
+        self._enqueued_count = 0
+        self._done_count = 0
+        self._flush_target = 0
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+
+    def add_many(self, observations: Iterable[Observation]) -> None:
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, name="dht-observation-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            now = time.monotonic()
+            for obs in observations:
+                self._pending.append((now, obs))
+                self._unwritten[obs.obs_id] = obs
+                self._enqueued_count += 1
+            self._cond.notify_all()
+
+    def unwritten(self, person_id: str) -> List[Observation]:
+        """Observations for the person that are buffered or being written."""
+        with self._cond:
+            return [obs for obs in self._unwritten.values() if obs.person_id == person_id]
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything added so far has been written (or dropped)."""
+        with self._cond:
+            target = self._enqueued_count
+            self._flush_target = max(self._flush_target, target)
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._done_count >= target, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        thread.join(timeout)
+        self._thread = None
+
+    def _next_batch(self) -> Optional[List[Observation]]:
+        with self._cond:
+            while True:
+                if self._pending:
+                    full = len(self._pending) >= self.batch_size
+                    flushing = self._enqueued_count - len(self._pending) < self._flush_target
+                    wait = self._pending[0][0] + self.max_delay_seconds - time.monotonic()
+                    if full or flushing or self._closing or wait <= 0:
+                        count = min(self.batch_size, len(self._pending))
+                        return [self._pending.popleft()[1] for _ in range(count)]
+                    self._cond.wait(wait)
+                elif self._closing:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._write(batch)
+            with self._cond:
+                for obs in batch:
+                    self._unwritten.pop(obs.obs_id, None)
+                self._done_count += len(batch)
+                self._cond.notify_all()
+
+    def _write(self, batch: List[Observation]) -> None:
+        rows = [obs.model_dump(mode="json") for obs in batch]
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._insert(rows)
+                return
+            except Exception as e:
+                logger.warning(f"[DHT] Observation insert failed ({len(rows)} rows, attempt {attempt}): {e}")
+                if attempt < self.max_attempts:
+                    time.sleep(min(0.5 * 2 ** (attempt - 1), 5.0))
+        logger.error(f"[DHT] Dropped {len(rows)} observations after {self.max_attempts} failed inserts")
+
+
+def _insert_observation_rows(rows: List[Dict[str, Any]]) -> None:
+    # obs_id is the primary key, so a retried batch never duplicates rows.
+    _client().table("dht_observations").upsert(
+        rows, on_conflict="obs_id", ignore_duplicates=True, returning=ReturnMethod.minimal
+    ).execute()
+
+
+observation_writer = ObservationWriter(
+    _insert_observation_rows,
+    batch_size=settings.DHT_OBSERVATION_BATCH_SIZE,
+    max_delay_seconds=settings.DHT_OBSERVATION_FLUSH_SECONDS,
+)
+
+
 def save_observation(obs: Observation) -> str:
-    """Insert a new observation; returns obs_id."""
-    try:
-        client = _client()
-        data = obs.model_dump(mode="json")
-        client.table("dht_observations").insert(data).execute()
-    except Exception:
-        pass  # graceful — queue handles recompute regardless
+    """Queue an observation for the bulk writer; returns obs_id."""
+    observation_writer.add_many([obs])
     return obs.obs_id
 
 
-def get_observations(person_id: str, days: int = 90) -> List[Observation]:
-    """Fetch observations for a person from the last N days."""
+def save_observations(observations: List[Observation]) -> List[str]:
+    """Queue several observations for the bulk writer; returns their obs_ids."""
+    observation_writer.add_many(observations)
+    return [obs.obs_id for obs in observations]
+
+
+def get_observations(
+    person_id: str,
+    days: int = 90,
+    metric: Optional[str] = None,
+    page_size: Optional[int] = None,
+) -> List[Observation]:
+    """
+    Fetch observations for a person from the last N days, oldest first, page by
+    page. Pages are keyed on (recorded_at, obs_id) rather than offsets, so rows
+    the writer inserts mid-scan cannot shift a row into two pages. A failed page
+    raises rather than returning a truncated history.
+    """
+    page_size = page_size or settings.DHT_OBSERVATION_PAGE_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    observations: List[Observation] = []
+    seen = set()
     try:
         client = _client()
-        cutoff = (datetime.utcnow() - __import__("datetime").timedelta(days=days)).isoformat()
-        resp = (
-            client.table("dht_observations")
-            .select("*")
-            .eq("person_id", person_id)
-            .gte("recorded_at", cutoff)
-            .execute()
-        )
-        return [Observation(**row) for row in (resp.data or [])]
-    except Exception:
-        return []
+        last = None
+        while True:
+            query = (
+                client.table("dht_observations")
+                .select("*")
+                .eq("person_id", person_id)
+                .gte("recorded_at", cutoff.isoformat())
+            )
+            if metric:
+                query = query.eq("metric", metric)
+            if last is not None:
+                recorded_at, obs_id = last
+                query = query.or_(
+                    f'recorded_at.gt."{recorded_at}",'
+                    f'and(recorded_at.eq."{recorded_at}",obs_id.gt."{obs_id}")'
+                )
+            rows = (
+                query.order("recorded_at")
+                .order("obs_id")
+                .limit(page_size)
+                .execute()
+            ).data or []
+            for row in rows:
+                if row["obs_id"] not in seen:
+                    seen.add(row["obs_id"])
+                    observations.append(Observation(**row))
+            if len(rows) < page_size:
+                break
+            # The stored values, so the cursor compares exactly as the database orders.
+            last = (rows[-1]["recorded_at"], rows[-1]["obs_id"])
+    except Exception as e:
+        logger.warning(f"[DHT] Could not load observations for {person_id}: {e}")
+        raise
+
+    pending = [
+        obs for obs in observation_writer.unwritten(person_id)
+        if obs.obs_id not in seen and obs.recorded_at >= cutoff and (not metric or obs.metric == metric)
+    ]
+    if pending:
+        observations.extend(pending)
+        observations.sort(key=lambda obs: obs.recorded_at)
+    return observations
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1,6 +1,7 @@
 import asyncio
 import logging
-from typing import List, Any
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 from sqlalchemy.dialects.postgresql import insert
@@ -80,6 +81,128 @@ class EmbeddingsService:
         logger.info(f"Successfully backfilled {len(responses)} embeddings into sidecar.")
         return len(responses)
 
+    async def _fetch_backfill_page(
+        self,
+        session: AsyncSession,
+        after_id: Optional[Any],
+        batch_size: int,
+        reembed: bool,
+    ) -> Sequence[Any]:
+        """Next keyset page of (id, question_text, response_text), ordered by id."""
+        query = select(
+            EngramDailyResponse.id,
+            EngramDailyResponse.question_text,
+            EngramDailyResponse.response_text,
+        )
+        if not reembed:
+            query = query.outerjoin(
+                DailyQuestionEmbedding, EngramDailyResponse.id == DailyQuestionEmbedding.response_id
+            ).where(DailyQuestionEmbedding.id == None)
+        if after_id is not None:
+            query = query.where(EngramDailyResponse.id > after_id)
+        query = query.order_by(EngramDailyResponse.id).limit(batch_size)
+
+        result = await session.execute(query)
+        return result.all()
+
+    async def _write_backfill_batch(
+        self,
+        session: AsyncSession,
+        response_ids: List[Any],
+        embeddings_vecs: List[List[float]],
+    ):
+        """One multi-row upsert plus one flag update, committed as a single transaction."""
+        stmt = insert(DailyQuestionEmbedding).values([
+            {"response_id": response_id, "embedding": embedding}
+            for response_id, embedding in zip(response_ids, embeddings_vecs)
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["response_id"],
+            set_={"embedding": stmt.excluded.embedding},
+        )
+        await session.execute(stmt)
+        await session.execute(
+            update(EngramDailyResponse)
+            .where(EngramDailyResponse.id.in_(response_ids))
+            .values(embedding_generated=True)
+        )
+        await session.commit()
+
+    async def stream_backfill(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        batch_size: int = 256,
+        start_after: Optional[Any] = None,
+        reembed: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Backfill (or, with ``reembed``, regenerate) every sidecar embedding.
+
+        Pages through responses with a keyset cursor on ``id`` and pipelines
+        the work: while batch N is written on one session, batch N+1 is read
+        and encoded on another. The ``cursor`` in each progress report can be
+        passed back as ``start_after`` to resume an interrupted run.
+        """
+        if session_factory is None:
+            from app.db.session import get_session_factory
+            session_factory = get_session_factory()
+
+        started = time.monotonic()
+        progress: Dict[str, Any] = {
+            "processed": 0,
+            "batches": 0,
+            "cursor": start_after,
+            "elapsed_seconds": 0.0,
+            "rows_per_second": 0.0,
+        }
+
+        async def write(response_ids: List[Any], embeddings_vecs: List[List[float]]):
+            async with session_factory() as write_session:
+                await self._write_backfill_batch(write_session, response_ids, embeddings_vecs)
+            elapsed = time.monotonic() - started
+            progress["processed"] += len(response_ids)
+            progress["batches"] += 1
+            progress["cursor"] = response_ids[-1]
+            progress["elapsed_seconds"] = round(elapsed, 3)
+            progress["rows_per_second"] = round(progress["processed"] / elapsed, 1) if elapsed else 0.0
+            logger.info(
+                f"Backfilled {progress['processed']} embeddings "
+                f"({progress['rows_per_second']}/s), cursor={progress['cursor']}"
+            )
+            if on_progress:
+                on_progress(dict(progress))
+
+        pending_write: Optional[asyncio.Task] = None
+        cursor = start_after
+        try:
+            async with session_factory() as read_session:
+                while True:
+                    rows = await self._fetch_backfill_page(read_session, cursor, batch_size, reembed)
+                    if not rows:
+                        break
+                    cursor = rows[-1].id
+                    texts_to_embed = [f"{row.question_text}\n{row.response_text}" for row in rows]
+                    embeddings_vecs = await self.nlp_engine.generate_embeddings_batch(texts_to_embed)
+
+                    if pending_write is not None:
+                        await pending_write
+                    pending_write = asyncio.create_task(write([row.id for row in rows], embeddings_vecs))
+                    # Let the write start before the next read and encode.
+                    await asyncio.sleep(0)
+            if pending_write is not None:
+                await pending_write
+        except BaseException:
+            if pending_write is not None and not pending_write.done():
+                pending_write.cancel()
+            raise
+
+        logger.info(
+            f"Streaming backfill complete: {progress['processed']} embeddings in "
+            f"{progress['elapsed_seconds']}s"
+        )
+        return progress
+
 def get_embeddings_service() -> EmbeddingsService:
     global _embeddings_service
     if _embeddings_service is None:
@@ -1,11 +1,19 @@
 from app.db.session import Base, get_engine
-from app.models.finance import BankAccount, BankConnection, BankImportedTransaction
+from app.models.finance import (
+    BankAccount,
+    BankConnection,
+    BankImportedTransaction,
+    BudgetMonthSummary,
+    MerchantCategoryChoice,
+)
 
 
 FINANCE_RUNTIME_TABLES = [
     BankConnection.__table__,
     BankAccount.__table__,
     BankImportedTransaction.__table__,
+    BudgetMonthSummary.__table__,
+    MerchantCategoryChoice.__table__,
 ]
 
 
@@ -4,10 +4,14 @@ St. Gabriel Finance Service
 Handles detailed business logic for the Envelope Budgeting system.
 """
 
+import asyncio
 import json
-from typing import List, Optional, Dict, Any
+import uuid
+from typing import List, Optional, Dict, Any, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete, select, func, and_, desc
+from sqlalchemy import delete, insert, select, func, and_, desc, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from uuid import UUID
 from datetime import date, datetime, timedelta
@@ -19,6 +23,8 @@ from app.models.finance import (
     BankImportedTransaction,
     BudgetCategory,
     BudgetEnvelope,
+    BudgetMonthSummary,
+    MerchantCategoryChoice,
     Transaction,
     WiseGoldWallet,
     RitualBondNFT,
@@ -30,8 +36,36 @@ from app.models.finance import (
 from app.core.config import settings
 from app.services.plaid_service import PlaidAPIError, PlaidConfigurationError, PlaidService
 from app.services.social_reputation_service import social_reputation_service
+from app.services.transaction_classifier import default_classifier, merchant_category_cache, normalize_merchant
 from app.services.wisegold_policy_service import WiseGoldPolicyService
 
+# Pending changes to materialized budget summaries: {month: {category_id: {"assigned": d, "activity": d}}}
+BudgetDeltas = Dict[str, Dict[str, Dict[str, float]]]
+
+# Envelopes that do not exist yet are reported with an id derived from their category and
+# month: the category id XOR a tagged month index in the low 60 bits, which update_envelope
+# can map back to (category, month) without any stored lookup.
+_VIRTUAL_ENVELOPE_TAG = 0xB0D6E7E
+_VIRTUAL_ENVELOPE_MASK = (1 << 60) - 1
+
+
+def _month_index(month: str) -> int:
+    year, m = map(int, month.split('-'))
+    return year * 12 + m - 1
+
+
+def virtual_envelope_id(category_id: UUID, month: str) -> UUID:
+    return UUID(int=category_id.int ^ ((_VIRTUAL_ENVELOPE_TAG << 24) | _month_index(month)))
+
+
+def _virtual_envelope_month(envelope_id: UUID, category_id: UUID) -> Optional[str]:
+    code = (envelope_id.int ^ category_id.int)
+    if code & ~_VIRTUAL_ENVELOPE_MASK or code >> 24 != _VIRTUAL_ENVELOPE_TAG:
+        return None
+    index = code & 0xFFFFFF
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
 class FinanceService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -79,7 +113,8 @@ class FinanceService:
     async def get_budget_summary(self, user_id: str, month: str = None) -> List[Dict[str, Any]]:
         """
         Get the full budget summary for a specific month.
-        Calculates activity dynamically from transactions.
+        Reads the materialized month summary; months nobody has written to yet
+        are computed from envelopes and transactions without persisting anything.
         """
         if not month:
             month = datetime.utcnow().strftime("%Y-%m")
@@ -87,23 +122,64 @@ class FinanceService:
         # 1. Get Categories
         categories = await self.get_categories(user_id)
         if not categories:
-            # Seed default categories if none exist
+            # Seed default categories if none exist (first visit only)
             await self._seed_default_categories(user_id)
             categories = await self.get_categories(user_id)
 
-        # 2. Get Envelopes for this month
-        stmt_env = select(BudgetEnvelope).where(
-            BudgetEnvelope.month == month
-        )
-        result_env = await self.session.execute(stmt_env)
-        envelopes = {e.category_id: e for e in result_env.scalars().all()}
+        # 2. Month totals
+        summary = (
+            await self.session.execute(
+                select(BudgetMonthSummary).where(
+                    and_(BudgetMonthSummary.user_id == user_id, BudgetMonthSummary.month == month)
+                )
+            )
+        ).scalar_one_or_none()
+        if summary is not None:
+            totals = {
+                "assigned": summary.assigned or {},
+                "activity": summary.activity or {},
+                "envelope_ids": summary.envelope_ids or {},
+            }
+        else:
+            totals = await self._compute_budget_totals(user_id, month)
+
+        # 3. Build Summary
+        result = []
+        for cat in categories:
+            key = str(cat.id)
+            assigned = float(totals["assigned"].get(key, 0.0))
+            activity = float(totals["activity"].get(key, 0.0))
+            available = assigned + activity  # Activity is typically negative for spending
+            envelope_id = totals["envelope_ids"].get(key) or str(virtual_envelope_id(cat.id, month))
+
+            result.append({
+                "id": envelope_id,
+                "category_id": key,
+                "category_name": cat.name,
+                "group": cat.group,
+                "month": month,
+                "assigned": assigned,
+                "activity": activity,
+                "available": available
+            })
+
+        return result
+
+    async def _compute_budget_totals(self, user_id: str, month: str) -> Dict[str, Dict[str, Any]]:
+        """Per-category assigned, activity and envelope ids for a month, straight from the source tables."""
+        envelopes = (
+            await self.session.execute(
+                select(BudgetEnvelope.id, BudgetEnvelope.category_id, BudgetEnvelope.assigned)
+                .join(BudgetCategory, BudgetCategory.id == BudgetEnvelope.category_id)
+                .where(and_(BudgetEnvelope.month == month, BudgetCategory.user_id == user_id))
+            )
+        ).all()
 
-        # 3. Get Transactions for this month (summed by category)
         # Parse month string to get start/end dates
         year, m = map(int, month.split('-'))
-        start_date = datetime(year, m, 1)
+        start_date = date(year, m, 1)
         _, last_day = calendar.monthrange(year, m)
-        end_date = datetime(year, m, last_day)
+        end_date = date(year, m, last_day)
 
         stmt_tx = select(
             Transaction.category_id,
@@ -112,48 +188,88 @@ class FinanceService:
             and_(
                 Transaction.user_id == user_id,
                 Transaction.date >= start_date,
-                Transaction.date <= end_date
+                Transaction.date <= end_date,
+                Transaction.category_id.isnot(None),
             )
         ).group_by(Transaction.category_id)
-        
-        result_tx = await self.session.execute(stmt_tx)
-        activity_map = {row.category_id: row.total_activity for row in result_tx.all()}
+        activity_rows = (await self.session.execute(stmt_tx)).all()
 
-        # 4. Build Summary
-        summary = []
-        for cat in categories:
-            env = envelopes.get(cat.id)
-            
-            # Auto-create envelope if missing
-            if not env:
-                env = BudgetEnvelope(
-                    category_id=cat.id,
-                    month=month,
-                    assigned=0.0
-                )
-                self.session.add(env)
-                # We defer commit to the caller ideally, but for read-heavy endpoint we might need to flush
-                # For now, just construct the object representation without saving if not needed, 
-                # but saving ensures persistence. Let's save.
-                await self.session.flush()
-
-            assigned = env.assigned
-            activity = activity_map.get(cat.id, 0.0)
-            available = assigned + activity  # Activity is typically negative for spending
+        return {
+            "assigned": {str(row.category_id): float(row.assigned or 0.0) for row in envelopes},
+            "activity": {str(row.category_id): float(row.total_activity or 0.0) for row in activity_rows},
+            "envelope_ids": {str(row.category_id): str(row.id) for row in envelopes},
+        }
 
-            summary.append({
-                "id": str(env.id),
-                "category_id": str(cat.id),
-                "category_name": cat.name,
-                "group": cat.group,
-                "month": month,
-                "assigned": assigned,
-                "activity": activity,
-                "available": available
-            })
+    @staticmethod
+    def _add_budget_delta(
+        deltas: BudgetDeltas,
+        when: Union[str, date, None],
+        category_id: Optional[UUID],
+        *,
+        assigned: float = 0.0,
+        activity: float = 0.0,
+    ) -> None:
+        if category_id is None or when is None:
+            return
+        month = when if isinstance(when, str) else when.strftime("%Y-%m")
+        change = deltas.setdefault(month, {}).setdefault(str(category_id), {"assigned": 0.0, "activity": 0.0})
+        change["assigned"] += assigned
+        change["activity"] += activity
+
+    @staticmethod
+    def _fold_budget_changes(
+        summary: BudgetMonthSummary,
+        changes: Dict[str, Dict[str, float]],
+        envelope_ids: Optional[Dict[str, str]] = None,
+    ) -> None:
+        assigned = dict(summary.assigned or {})
+        activity = dict(summary.activity or {})
+        for category_id, change in changes.items():
+            if change["assigned"]:
+                assigned[category_id] = float(assigned.get(category_id, 0.0)) + change["assigned"]
+            if change["activity"]:
+                activity[category_id] = float(activity.get(category_id, 0.0)) + change["activity"]
+        # Reassign so the JSON columns are seen as modified.
+        summary.assigned = assigned
+        summary.activity = activity
+        if envelope_ids:
+            summary.envelope_ids = {**(summary.envelope_ids or {}), **envelope_ids}
+
+    async def _apply_budget_deltas(
+        self,
+        user_id: str,
+        deltas: BudgetDeltas,
+        envelope_ids: Optional[Dict[str, Dict[str, str]]] = None,
+    ) -> None:
+        """
+        Fold already-flushed changes into the user's month summaries, inside the
+        caller's transaction. A month without a summary is materialized from the
+        source tables instead, which already include the flushed changes.
+        """
+        envelope_ids = envelope_ids or {}
+        for month in sorted(set(deltas) | set(envelope_ids)):
+            changes = deltas.get(month, {})
+            summary = await self._lock_budget_summary(user_id, month)
+            if summary is None:
+                totals = await self._compute_budget_totals(user_id, month)
+                try:
+                    async with self.session.begin_nested():
+                        self.session.add(BudgetMonthSummary(user_id=user_id, month=month, **totals))
+                    continue
+                except IntegrityError:
+                    # A concurrent writer materialized it first, without our uncommitted changes.
+                    summary = await self._lock_budget_summary(user_id, month)
+            self._fold_budget_changes(summary, changes, envelope_ids.get(month))
+        await self.session.flush()
 
-        await self.session.commit()
-        return summary
+    async def _lock_budget_summary(self, user_id: str, month: str) -> Optional[BudgetMonthSummary]:
+        return (
+            await self.session.execute(
+                select(BudgetMonthSummary)
+                .where(and_(BudgetMonthSummary.user_id == user_id, BudgetMonthSummary.month == month))
+                .with_for_update()
+            )
+        ).scalar_one_or_none()
 
     async def _seed_default_categories(self, user_id: str):
         """Seed default categories for a new user."""
@@ -200,52 +316,80 @@ class FinanceService:
             return f"{name} • {detailed}"
         return detailed or name
 
-    async def _guess_category_id(self, user_id: str, payload: Dict[str, Any]) -> Optional[UUID]:
-        categories = await self.get_categories(user_id)
-        if not categories:
-            return None
+    async def _category_map(self, user_id: str) -> Dict[str, UUID]:
+        return {category.name.lower(): category.id for category in await self.get_categories(user_id)}
 
-        category_map = {category.name.lower(): category.id for category in categories}
-        category_text = " ".join(
-            filter(
-                None,
-                [
-                    payload.get("merchant_name"),
-                    payload.get("name"),
-                    (payload.get("personal_finance_category") or {}).get("primary"),
-                    (payload.get("personal_finance_category") or {}).get("detailed"),
-                ],
+    async def _load_merchant_categories(self, user_id: str) -> None:
+        """Make the user's stored merchant choices available to ``_categorize``."""
+        if merchant_category_cache.has(user_id):
+            return
+        choices = (
+            await self.session.execute(
+                select(MerchantCategoryChoice.merchant, MerchantCategoryChoice.category_id).where(
+                    MerchantCategoryChoice.user_id == user_id
+                )
             )
-        ).lower()
-
-        matching_rules = [
-            (["grocery", "supermarket"], "groceries"),
-            (["restaurant", "coffee", "food and drink"], "dining out"),
-            (["rent", "mortgage"], "rent/mortgage"),
-            (["utility", "electric", "water", "internet", "phone"], "utilities"),
-            (["maintenance", "repair"], "maintenance"),
-            (["gas", "fuel"], "gas"),
-            (["insurance"], "car insurance"),
-            (["transit", "taxi", "rideshare", "public transportation"], "public transit"),
-            (["movie", "streaming", "music", "entertainment"], "entertainment"),
-            (["clothing", "apparel"], "clothing"),
-            (["personal care", "salon", "barber", "pharmacy"], "personal care"),
-            (["investment", "brokerage"], "investments"),
-            (["vacation", "travel", "airline", "hotel"], "vacation"),
-            (["credit card"], "credit card payments"),
-            (["student loan", "loan"], "student loans"),
-            (["emergency"], "emergency fund"),
-        ]
+        ).all()
+        merchant_category_cache.load(user_id, choices)
 
-        for needles, category_name in matching_rules:
-            if any(needle in category_text for needle in needles):
-                return category_map.get(category_name)
+    async def _save_merchant_category(self, user_id: str, merchant: Optional[str], category_id: Optional[UUID]) -> None:
+        """Store the user's category choice for a merchant in the current transaction; ``None`` forgets it."""
+        merchant = normalize_merchant(merchant)
+        if not merchant:
+            return
+        if category_id is None:
+            await self.session.execute(
+                delete(MerchantCategoryChoice).where(
+                    and_(MerchantCategoryChoice.user_id == user_id, MerchantCategoryChoice.merchant == merchant)
+                )
+            )
+            return
+        stmt = pg_insert(MerchantCategoryChoice).values(
+            id=uuid.uuid4(), user_id=user_id, merchant=merchant, category_id=category_id, updated_at=datetime.utcnow()
+        )
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "merchant"],
+                set_={"category_id": stmt.excluded.category_id, "updated_at": stmt.excluded.updated_at},
+            )
+        )
 
-        return None
+    def _categorize(
+        self, user_id: str, category_map: Dict[str, UUID], merchant: Optional[str], fields: List[Optional[str]]
+    ) -> Optional[UUID]:
+        """
+        The user's learned category for the merchant, else the first keyword rule
+        matching ``fields``. Call ``_load_merchant_categories`` first.
+        """
+        learned = merchant_category_cache.lookup(user_id, merchant)
+        if learned is not None and learned in category_map.values():
+            return learned
+        category_name = default_classifier.classify_fields(*fields)
+        return category_map.get(category_name) if category_name else None
+
+    def _classify_plaid_transaction(
+        self, user_id: str, category_map: Dict[str, UUID], payload: Dict[str, Any]
+    ) -> Optional[UUID]:
+        if not category_map:
+            return None
+        category = payload.get("personal_finance_category") or {}
+        return self._categorize(
+            user_id,
+            category_map,
+            self._plaid_payee(payload),
+            [payload.get("merchant_name"), payload.get("name"), category.get("primary"), category.get("detailed")],
+        )
 
-    async def _upsert_bank_account(self, connection: BankConnection, payload: Dict[str, Any]) -> BankAccount:
-        stmt = select(BankAccount).where(BankAccount.provider_account_id == payload["account_id"])
-        bank_account = (await self.session.execute(stmt)).scalar_one_or_none()
+    async def _upsert_bank_account(
+        self,
+        connection: BankConnection,
+        payload: Dict[str, Any],
+        existing: Optional[BankAccount] = None,
+    ) -> BankAccount:
+        bank_account = existing
+        if bank_account is None:
+            stmt = select(BankAccount).where(BankAccount.provider_account_id == payload["account_id"])
+            bank_account = (await self.session.execute(stmt)).scalar_one_or_none()
 
         balances = payload.get("balances") or {}
         if not bank_account:
@@ -267,103 +411,162 @@ class FinanceService:
         await self.session.flush()
         return bank_account
 
-    async def _apply_added_bank_transaction(
-        self,
-        *,
-        user_id: str,
-        connection: BankConnection,
-        bank_accounts: Dict[str, BankAccount],
-        payload: Dict[str, Any],
-    ) -> bool:
-        existing = (
+    async def _load_imported_transactions(self, provider_transaction_ids) -> Dict[str, Any]:
+        """Imported records and their finance transactions, keyed by Plaid transaction id."""
+        if not provider_transaction_ids:
+            return {}
+        rows = (
             await self.session.execute(
-                select(BankImportedTransaction).where(
-                    BankImportedTransaction.provider_transaction_id == payload["transaction_id"]
+                select(
+                    BankImportedTransaction.id,
+                    BankImportedTransaction.provider_transaction_id,
+                    BankImportedTransaction.finance_transaction_id,
+                    Transaction.date,
+                    Transaction.amount,
+                    Transaction.category_id,
+                    Transaction.description,
                 )
+                .outerjoin(Transaction, Transaction.id == BankImportedTransaction.finance_transaction_id)
+                .where(BankImportedTransaction.provider_transaction_id.in_(list(provider_transaction_ids)))
             )
-        ).scalar_one_or_none()
-        if existing:
-            return False
-
-        category_id = await self._guess_category_id(user_id, payload)
-        account = bank_accounts.get(payload.get("account_id"))
-
-        transaction = Transaction(
-            user_id=user_id,
-            date=self._parse_transaction_date(payload.get("authorized_date") or payload.get("date")),
-            payee=self._plaid_payee(payload),
-            amount=self._normalize_plaid_amount(float(payload.get("amount") or 0.0)),
-            category_id=category_id,
-            description=self._plaid_description(payload),
-            is_cleared=not bool(payload.get("pending")),
-        )
-        self.session.add(transaction)
-        await self.session.flush()
-
-        imported = BankImportedTransaction(
-            user_id=user_id,
-            connection_id=connection.id,
-            bank_account_id=account.id if account else None,
-            finance_transaction_id=transaction.id,
-            provider=connection.provider,
-            provider_transaction_id=payload["transaction_id"],
-            pending=bool(payload.get("pending")),
-            raw_json=json.dumps(payload),
-        )
-        self.session.add(imported)
-        await self.session.flush()
-        return True
+        ).all()
+        return {row.provider_transaction_id: row for row in rows}
 
-    async def _apply_modified_bank_transaction(
+    async def _apply_bank_transaction_page(
         self,
         *,
         user_id: str,
+        connection: BankConnection,
         bank_accounts: Dict[str, BankAccount],
-        payload: Dict[str, Any],
-    ) -> bool:
-        imported = (
-            await self.session.execute(
-                select(BankImportedTransaction).where(
-                    BankImportedTransaction.provider_transaction_id == payload["transaction_id"]
-                )
+        page: Dict[str, Any],
+        category_map: Dict[str, UUID],
+        budget_deltas: BudgetDeltas,
+    ) -> Dict[str, int]:
+        """
+        Apply one ``transactions_sync`` page with a fixed number of statements:
+        one lookup, one multi-row insert and one bulk update of finance
+        transactions, one multi-row upsert of import records and one delete per
+        table for removals.
+        """
+        added = {payload["transaction_id"]: payload for payload in page.get("added", [])}
+        modified = {payload["transaction_id"]: payload for payload in page.get("modified", [])}
+        removed_ids = {payload.get("transaction_id") for payload in page.get("removed", [])} - {None}
+        for provider_transaction_id in removed_ids:
+            added.pop(provider_transaction_id, None)
+            modified.pop(provider_transaction_id, None)
+
+        known = await self._load_imported_transactions(set(added) | set(modified) | removed_ids)
+        for provider_transaction_id in list(added):
+            if provider_transaction_id in known:
+                # Already imported by an earlier sync; nothing to add.
+                del added[provider_transaction_id]
+            elif provider_transaction_id in modified:
+                added[provider_transaction_id] = modified.pop(provider_transaction_id)
+        modified = {key: payload for key, payload in modified.items() if key in known}
+
+        now = datetime.utcnow()
+        new_transactions: List[Dict[str, Any]] = []
+        changed_transactions: List[Dict[str, Any]] = []
+        import_records: List[Dict[str, Any]] = []
+
+        def import_record(payload: Dict[str, Any], finance_transaction_id: Optional[UUID]) -> Dict[str, Any]:
+            account = bank_accounts.get(payload.get("account_id"))
+            return {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "connection_id": connection.id,
+                "bank_account_id": account.id if account else None,
+                "finance_transaction_id": finance_transaction_id,
+                "provider": connection.provider,
+                "provider_transaction_id": payload["transaction_id"],
+                "pending": bool(payload.get("pending")),
+                "raw_json": json.dumps(payload),
+                "created_at": now,
+                "updated_at": now,
+            }
+
+        for provider_transaction_id, payload in added.items():
+            row = {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "date": self._parse_transaction_date(payload.get("authorized_date") or payload.get("date")),
+                "payee": self._plaid_payee(payload),
+                "amount": self._normalize_plaid_amount(float(payload.get("amount") or 0.0)),
+                "category_id": self._classify_plaid_transaction(user_id, category_map, payload),
+                "description": self._plaid_description(payload),
+                "is_cleared": not bool(payload.get("pending")),
+                "created_at": now,
+            }
+            new_transactions.append(row)
+            import_records.append(import_record(payload, row["id"]))
+
+        for provider_transaction_id, payload in modified.items():
+            existing = known[provider_transaction_id]
+            import_records.append(import_record(payload, existing.finance_transaction_id))
+            if existing.date is None:
+                # The finance transaction is gone; only the import record is refreshed.
+                continue
+            row = {
+                "id": existing.finance_transaction_id,
+                "date": self._parse_transaction_date(payload.get("authorized_date") or payload.get("date")),
+                "payee": self._plaid_payee(payload),
+                "amount": self._normalize_plaid_amount(float(payload.get("amount") or 0.0)),
+                "description": existing.description or self._plaid_description(payload),
+                "is_cleared": not bool(payload.get("pending")),
+                "category_id": (
+                    existing.category_id or self._classify_plaid_transaction(user_id, category_map, payload)
+                ),
+            }
+            changed_transactions.append(row)
+            self._add_budget_delta(
+                budget_deltas, existing.date, existing.category_id, activity=-float(existing.amount or 0.0)
             )
-        ).scalar_one_or_none()
-        if not imported:
-            return False
-
-        transaction = await self.session.get(Transaction, imported.finance_transaction_id)
-        if transaction:
-            transaction.date = self._parse_transaction_date(payload.get("authorized_date") or payload.get("date"))
-            transaction.payee = self._plaid_payee(payload)
-            transaction.amount = self._normalize_plaid_amount(float(payload.get("amount") or 0.0))
-            transaction.description = transaction.description or self._plaid_description(payload)
-            transaction.is_cleared = not bool(payload.get("pending"))
-            if transaction.category_id is None:
-                transaction.category_id = await self._guess_category_id(user_id, payload)
-
-        account = bank_accounts.get(payload.get("account_id"))
-        imported.bank_account_id = account.id if account else imported.bank_account_id
-        imported.pending = bool(payload.get("pending"))
-        imported.raw_json = json.dumps(payload)
-        await self.session.flush()
-        return True
+            self._add_budget_delta(budget_deltas, row["date"], row["category_id"], activity=row["amount"])
 
-    async def _apply_removed_bank_transaction(self, provider_transaction_id: str) -> bool:
-        imported = (
+        if new_transactions:
+            await self.session.execute(insert(Transaction), new_transactions)
+        if changed_transactions:
+            await self.session.execute(update(Transaction), changed_transactions)
+
+        imported_count = 0
+        if import_records:
+            stmt = pg_insert(BankImportedTransaction).values(import_records)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["provider_transaction_id"],
+                set_={
+                    "bank_account_id": func.coalesce(
+                        stmt.excluded.bank_account_id, BankImportedTransaction.bank_account_id
+                    ),
+                    "pending": stmt.excluded.pending,
+                    "raw_json": stmt.excluded.raw_json,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            ).returning(BankImportedTransaction.provider_transaction_id, BankImportedTransaction.finance_transaction_id)
+            linked = {row.provider_transaction_id: row.finance_transaction_id for row in await self.session.execute(stmt)}
+
+            # A concurrent sync may have imported the same Plaid transaction first; drop our copy.
+            orphaned = []
+            for row, record in zip(new_transactions, import_records):
+                if linked.get(record["provider_transaction_id"]) == row["id"]:
+                    imported_count += 1
+                    self._add_budget_delta(budget_deltas, row["date"], row["category_id"], activity=row["amount"])
+                else:
+                    orphaned.append(row["id"])
+            if orphaned:
+                await self.session.execute(delete(Transaction).where(Transaction.id.in_(orphaned)))
+
+        removed = [known[key] for key in removed_ids if key in known]
+        if removed:
             await self.session.execute(
-                select(BankImportedTransaction).where(
-                    BankImportedTransaction.provider_transaction_id == provider_transaction_id
-                )
+                delete(BankImportedTransaction).where(BankImportedTransaction.id.in_([row.id for row in removed]))
             )
-        ).scalar_one_or_none()
-        if not imported:
-            return False
+            finance_ids = [row.finance_transaction_id for row in removed if row.finance_transaction_id]
+            if finance_ids:
+                await self.session.execute(delete(Transaction).where(Transaction.id.in_(finance_ids)))
+            for row in removed:
+                self._add_budget_delta(budget_deltas, row.date, row.category_id, activity=-float(row.amount or 0.0))
 
-        if imported.finance_transaction_id:
-            await self.session.execute(delete(Transaction).where(Transaction.id == imported.finance_transaction_id))
-        await self.session.delete(imported)
-        await self.session.flush()
-        return True
+        return {"imported_count": imported_count, "modified_count": len(modified), "removed_count": len(removed)}
 
     async def get_bank_connection_status(self, user_id: str) -> Dict[str, Any]:
         stmt = (
@@ -494,61 +697,61 @@ class FinanceService:
         if not connections:
             return {"synced_connections": 0, "imported_count": 0, "modified_count": 0, "removed_count": 0}
 
-        imported_count = 0
-        modified_count = 0
-        removed_count = 0
-
-        for connection in connections:
-            access_token = plaid.decrypt_access_token(connection.access_token_encrypted)
-            accounts_response = await plaid.get_accounts(access_token)
-            for account_payload in accounts_response.get("accounts", []):
-                await self._upsert_bank_account(connection, account_payload)
-
-            bank_accounts = {
-                account.provider_account_id: account
-                for account in (
-                    await self.session.execute(
-                        select(BankAccount).where(BankAccount.connection_id == connection.id)
+        counts = {"imported_count": 0, "modified_count": 0, "removed_count": 0}
+        budget_deltas: BudgetDeltas = {}
+        category_map = await self._category_map(user_id)
+        await self._load_merchant_categories(user_id)
+        # Plaid calls for independent connections overlap; writes share this session one page at a time.
+        write_lock = asyncio.Lock()
+        semaphore = asyncio.Semaphore(max(1, settings.PLAID_SYNC_CONCURRENCY))
+
+        async def sync_connection(connection: BankConnection):
+            async with semaphore:
+                access_token = plaid.decrypt_access_token(connection.access_token_encrypted)
+                accounts_response = await plaid.get_accounts(access_token)
+                async with write_lock:
+                    bank_accounts = {account.provider_account_id: account for account in connection.accounts}
+                    for account_payload in accounts_response.get("accounts", []):
+                        account = await self._upsert_bank_account(
+                            connection, account_payload, bank_accounts.get(account_payload["account_id"])
+                        )
+                        bank_accounts[account.provider_account_id] = account
+
+                cursor = connection.sync_cursor
+                has_more = True
+                while has_more:
+                    response = await plaid.transactions_sync(
+                        access_token, cursor=cursor, count=settings.PLAID_SYNC_PAGE_SIZE
                     )
-                ).scalars().all()
-            }
-
-            cursor = connection.sync_cursor
-            has_more = True
-            while has_more:
-                response = await plaid.transactions_sync(access_token, cursor=cursor)
-                for payload in response.get("added", []):
-                    if await self._apply_added_bank_transaction(
-                        user_id=user_id,
-                        connection=connection,
-                        bank_accounts=bank_accounts,
-                        payload=payload,
-                    ):
-                        imported_count += 1
-                for payload in response.get("modified", []):
-                    if await self._apply_modified_bank_transaction(
-                        user_id=user_id,
-                        bank_accounts=bank_accounts,
-                        payload=payload,
-                    ):
-                        modified_count += 1
-                for payload in response.get("removed", []):
-                    if await self._apply_removed_bank_transaction(payload.get("transaction_id")):
-                        removed_count += 1
-
-                cursor = response.get("next_cursor")
-                has_more = bool(response.get("has_more"))
-
-            connection.sync_cursor = cursor
-            connection.last_synced_at = datetime.utcnow()
+                    async with write_lock:
+                        page_counts = await self._apply_bank_transaction_page(
+                            user_id=user_id,
+                            connection=connection,
+                            bank_accounts=bank_accounts,
+                            page=response,
+                            category_map=category_map,
+                            budget_deltas=budget_deltas,
+                        )
+                    for key, value in page_counts.items():
+                        counts[key] += value
+
+                    cursor = response.get("next_cursor")
+                    has_more = bool(response.get("has_more"))
+
+                connection.sync_cursor = cursor
+                connection.last_synced_at = datetime.utcnow()
+
+        # Let every connection settle before surfacing a failure, so none is still using the session.
+        results = await asyncio.gather(
+            *(sync_connection(connection) for connection in connections), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
+        await self._apply_budget_deltas(user_id, budget_deltas)
         await self.session.commit()
-        return {
-            "synced_connections": len(connections),
-            "imported_count": imported_count,
-            "modified_count": modified_count,
-            "removed_count": removed_count,
-        }
+        return {"synced_connections": len(connections), **counts}
 
     async def add_transaction(self, user_id: str, data: dict) -> Transaction:
         """Record a new transaction."""
@@ -557,17 +760,32 @@ class FinanceService:
         if isinstance(date_val, str):
             date_val = datetime.strptime(date_val, "%Y-%m-%d").date()
 
+        category_id = UUID(str(data['category_id'])) if data.get('category_id') else None
+        chosen = category_id is not None
+        if chosen:
+            await self._save_merchant_category(user_id, data['payee'], category_id)
+        else:
+            category_map = await self._category_map(user_id)
+            await self._load_merchant_categories(user_id)
+            category_id = self._categorize(user_id, category_map, data['payee'], [data['payee'], data.get('description')])
+
         tx = Transaction(
             user_id=user_id,
             date=date_val,
             payee=data['payee'],
             amount=float(data['amount']),
-            category_id=UUID(data['category_id']) if data.get('category_id') else None,
+            category_id=category_id,
             description=data.get('description'),
             is_cleared=data.get('is_cleared', False)
         )
         self.session.add(tx)
+        await self.session.flush()
+        deltas: BudgetDeltas = {}
+        self._add_budget_delta(deltas, tx.date, tx.category_id, activity=tx.amount)
+        await self._apply_budget_deltas(user_id, deltas)
         await self.session.commit()
+        if chosen:
+            merchant_category_cache.learn(user_id, tx.payee, category_id)
         await self.session.refresh(tx)
         
         # Emit Significant Financial Event to Neural Graph
@@ -592,19 +810,78 @@ class FinanceService:
 
         return tx
 
-    async def transfer_funds(self, user_id: str, from_cat_id: UUID, to_cat_id: UUID, amount: float, month: str):
-        """Move assigned money from one envelope to another."""
-        # Get envelopes
+    async def recategorize_transaction(
+        self, user_id: str, transaction_id: UUID, category_id: Optional[UUID]
+    ) -> Transaction:
+        """Move a transaction to another category and remember the choice for its merchant."""
+        tx = (
+            await self.session.execute(
+                select(Transaction).where(and_(Transaction.id == transaction_id, Transaction.user_id == user_id))
+            )
+        ).scalar_one_or_none()
+        if not tx:
+            raise ValueError("Transaction not found")
+        if category_id is not None:
+            owned = (
+                await self.session.execute(
+                    select(BudgetCategory.id).where(
+                        and_(BudgetCategory.id == category_id, BudgetCategory.user_id == user_id)
+                    )
+                )
+            ).scalar_one_or_none()
+            if owned is None:
+                raise ValueError("Category not found")
+
+        deltas: BudgetDeltas = {}
+        self._add_budget_delta(deltas, tx.date, tx.category_id, activity=-float(tx.amount or 0.0))
+        tx.category_id = category_id
+        self._add_budget_delta(deltas, tx.date, tx.category_id, activity=float(tx.amount or 0.0))
+        await self.session.flush()
+        await self._apply_budget_deltas(user_id, deltas)
+        await self._save_merchant_category(user_id, tx.payee, category_id)
+        await self.session.commit()
+        merchant_category_cache.learn(user_id, tx.payee, category_id)
+        return tx
+
+    async def _ensure_envelopes(
+        self, user_id: str, category_ids: List[UUID], month: str
+    ) -> Dict[UUID, BudgetEnvelope]:
+        """Envelopes for the user's categories in a month, creating missing ones under their virtual ids."""
         stmt = select(BudgetEnvelope).join(BudgetCategory).where(
             and_(
                 BudgetEnvelope.month == month,
                 BudgetCategory.user_id == user_id,
-                BudgetEnvelope.category_id.in_([from_cat_id, to_cat_id])
+                BudgetEnvelope.category_id.in_(category_ids)
             )
         )
         result = await self.session.execute(stmt)
         envelopes = {e.category_id: e for e in result.scalars().all()}
-        
+
+        missing = [category_id for category_id in category_ids if category_id not in envelopes]
+        if missing:
+            owned = (
+                await self.session.execute(
+                    select(BudgetCategory.id).where(
+                        and_(BudgetCategory.user_id == user_id, BudgetCategory.id.in_(missing))
+                    )
+                )
+            ).scalars().all()
+            for category_id in owned:
+                envelope = BudgetEnvelope(
+                    id=virtual_envelope_id(category_id, month),
+                    category_id=category_id,
+                    month=month,
+                    assigned=0.0,
+                )
+                self.session.add(envelope)
+                envelopes[category_id] = envelope
+            await self.session.flush()
+        return envelopes
+
+    async def transfer_funds(self, user_id: str, from_cat_id: UUID, to_cat_id: UUID, amount: float, month: str):
+        """Move assigned money from one envelope to another."""
+        envelopes = await self._ensure_envelopes(user_id, [from_cat_id, to_cat_id], month)
+
         from_env = envelopes.get(from_cat_id)
         to_env = envelopes.get(to_cat_id)
 
@@ -613,7 +890,16 @@ class FinanceService:
 
         from_env.assigned -= amount
         to_env.assigned += amount
-        
+
+        deltas: BudgetDeltas = {}
+        self._add_budget_delta(deltas, month, from_cat_id, assigned=-amount)
+        self._add_budget_delta(deltas, month, to_cat_id, assigned=amount)
+        await self.session.flush()
+        await self._apply_budget_deltas(
+            user_id,
+            deltas,
+            envelope_ids={month: {str(from_cat_id): str(from_env.id), str(to_cat_id): str(to_env.id)}},
+        )
         await self.session.commit()
         return {"success": True, "message": f"Transferred ${amount}"}
 
@@ -627,11 +913,30 @@ class FinanceService:
         )
         result = await self.session.execute(stmt)
         envelope = result.scalar_one_or_none()
-        
+
+        if not envelope:
+            # Budget summaries report envelopes that do not exist yet under a virtual id.
+            category_ids = (
+                await self.session.execute(select(BudgetCategory.id).where(BudgetCategory.user_id == user_id))
+            ).scalars().all()
+            for category_id in category_ids:
+                month = _virtual_envelope_month(envelope_id, category_id)
+                if month:
+                    envelope = (await self._ensure_envelopes(user_id, [category_id], month)).get(category_id)
+                    break
+
         if not envelope:
             raise ValueError("Envelope not found")
-            
+
+        deltas: BudgetDeltas = {}
+        self._add_budget_delta(
+            deltas, envelope.month, envelope.category_id, assigned=assigned_amount - float(envelope.assigned or 0.0)
+        )
         envelope.assigned = assigned_amount
+        await self.session.flush()
+        await self._apply_budget_deltas(
+            user_id, deltas, envelope_ids={envelope.month: {str(envelope.category_id): str(envelope.id)}}
+        )
         await self.session.commit()
         await self.session.refresh(envelope)
         return envelope
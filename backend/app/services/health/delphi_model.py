@@ -3,7 +3,22 @@ import torch.nn as nn
 from torch.nn import functional as F
 import math
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
+
+# Per-layer (key, value) tensors of shape (B, n_head, T, head_size).
+KVCache = Tuple[torch.Tensor, torch.Tensor]
+
+
+def configure_cpu_threads(num_threads: int = 0, interop_threads: int = 0) -> int:
+    """Size torch's CPU thread pools (0 keeps torch's default); returns the intra-op thread count."""
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            pass  # only settable before the first inter-op parallel work
+    return torch.get_num_threads()
 
 @dataclass
 class DelphiConfig:
@@ -43,7 +58,7 @@ class CausalSelfAttention(nn.Module):
         self.register_buffer("bias", torch.tril(torch.ones(config.block_size, config.block_size))
                                     .view(1, 1, config.block_size, config.block_size))
 
-    def forward(self, x):
+    def forward(self, x, past_kv: Optional[KVCache] = None, attn_mask: Optional[torch.Tensor] = None, use_cache: bool = False):
         B, T, C = x.size() # batch size, sequence length, embedding dimensionality (n_embd)
 
         # calculate query, key, values for all heads in batch and move head forward to be the batch dim
@@ -52,12 +67,32 @@ class CausalSelfAttention(nn.Module):
         q = q.view(B, T, self.n_head, C // self.n_head).transpose(1, 2) # (B, nh, T, hs)
         v = v.view(B, T, self.n_head, C // self.n_head).transpose(1, 2) # (B, nh, T, hs)
 
-        # causal self-attention; Self-attend: (B, nh, T, hs) x (B, nh, hs, T) -> (B, nh, T, T)
-        y = torch.nn.functional.scaled_dot_product_attention(q, k, v, attn_mask=None, dropout_p=self.dropout if self.training else 0, is_causal=True)
+        # with a cache, the new queries attend to every cached key/value plus their own
+        if past_kv is not None:
+            k = torch.cat((past_kv[0], k), dim=2) # (B, nh, S, hs)
+            v = torch.cat((past_kv[1], v), dim=2)
+        S = k.size(2)
+
+        dropout_p = self.dropout if self.training else 0
+        if attn_mask is not None:
+            # explicit boolean mask broadcastable to (B, nh, T, S); True = may attend
+            y = F.scaled_dot_product_attention(q, k, v, attn_mask=attn_mask, dropout_p=dropout_p)
+        elif S == T:
+            # causal self-attention; Self-attend: (B, nh, T, hs) x (B, nh, hs, T) -> (B, nh, T, T)
+            y = F.scaled_dot_product_attention(q, k, v, attn_mask=None, dropout_p=dropout_p, is_causal=True)
+        elif T == 1:
+            # a single new token may see everything before it
+            y = F.scaled_dot_product_attention(q, k, v, attn_mask=None, dropout_p=dropout_p)
+        else:
+            # several new tokens after a cache: causal over the last T positions
+            causal = torch.ones(T, S, dtype=torch.bool, device=x.device).tril(diagonal=S - T)
+            y = F.scaled_dot_product_attention(q, k, v, attn_mask=causal, dropout_p=dropout_p)
         y = y.transpose(1, 2).contiguous().view(B, T, C) # re-assemble all head outputs side by side
 
         # output projection
         y = self.resid_dropout(self.c_proj(y))
+        if use_cache:
+            return y, (k, v)
         return y
 
 class MLP(nn.Module):
@@ -83,8 +118,13 @@ class Block(nn.Module):
         self.ln_2 = LayerNorm(config.n_embd, bias=config.bias)
         self.mlp = MLP(config)
 
-    def forward(self, x):
-        x = x + self.attn(self.ln_1(x))
+    def forward(self, x, past_kv: Optional[KVCache] = None, attn_mask: Optional[torch.Tensor] = None, use_cache: bool = False):
+        if use_cache:
+            attn, present = self.attn(self.ln_1(x), past_kv=past_kv, attn_mask=attn_mask, use_cache=True)
+            x = x + attn
+            x = x + self.mlp(self.ln_2(x))
+            return x, present
+        x = x + self.attn(self.ln_1(x), past_kv=past_kv, attn_mask=attn_mask)
         x = x + self.mlp(self.ln_2(x))
         return x
 
@@ -139,26 +179,142 @@ class DelphiModel(nn.Module):
 
         return logits, loss
 
-    def generate_trajectory(self, idx, max_new_tokens, temperature=1.0, top_k=None):
+    def forward_with_cache(
+        self,
+        idx,
+        past_key_values: Optional[List[KVCache]] = None,
+        position_ids: Optional[torch.Tensor] = None,
+        attn_mask: Optional[torch.Tensor] = None,
+    ):
+        """
+        Incremental forward pass: encodes only ``idx`` (the tokens after the cache)
+        and returns the last position's logits plus the updated per-layer cache.
+        """
+        b, t = idx.size()
+        if position_ids is None:
+            past_len = past_key_values[0][0].size(2) if past_key_values else 0
+            position_ids = torch.arange(past_len, past_len + t, dtype=torch.long, device=idx.device).unsqueeze(0)
+
+        x = self.transformer.drop(self.transformer.wte(idx) + self.transformer.wpe(position_ids))
+        presents: List[KVCache] = []
+        for i, block in enumerate(self.transformer.h):
+            past_kv = past_key_values[i] if past_key_values else None
+            x, present = block(x, past_kv=past_kv, attn_mask=attn_mask, use_cache=True)
+            presents.append(present)
+        x = self.transformer.ln_f(x)
+        return self.lm_head(x[:, [-1], :]), presents
+
+    @staticmethod
+    def _sample_next(logits, temperature, top_k):
+        # pluck the logits at the final step and scale by desired temperature
+        logits = logits[:, -1, :] / temperature
+        # optionally crop the logits to only the top k options
+        if top_k is not None:
+            v, _ = torch.topk(logits, min(top_k, logits.size(-1)))
+            logits[logits < v[:, [-1]]] = -float('Inf')
+        # apply softmax to convert logits to (normalized) probabilities
+        probs = F.softmax(logits, dim=-1)
+        # sample from the distribution
+        return torch.multinomial(probs, num_samples=1)
+
+    @torch.inference_mode()
+    def generate_trajectory(self, idx, max_new_tokens, temperature=1.0, top_k=None, use_cache=True):
         """
         Inference logic for health trajectories.
+
+        With ``use_cache`` the prompt is encoded once and every new token attends to
+        the cached keys/values, so each step costs one token's forward pass instead
+        of re-encoding the whole sequence. Once the sequence outgrows block_size the
+        window slides and every position shifts, so those steps re-encode the
+        cropped window exactly like the uncached path.
         """
+        block_size = self.config.block_size
+        past = None
         for _ in range(max_new_tokens):
-            # if the sequence context is growing too long we must crop it at block_size
-            idx_cond = idx if idx.size(1) <= self.config.block_size else idx[:, -self.config.block_size:]
-            # forward the model to get the logits for the index in the sequence
-            logits, _ = self(idx_cond)
-            # pluck the logits at the final step and scale by desired temperature
-            logits = logits[:, -1, :] / temperature
-            # optionally crop the logits to only the top k options
-            if top_k is not None:
-                v, _ = torch.topk(logits, min(top_k, logits.size(-1)))
-                logits[logits < v[:, [-1]]] = -float('Inf')
-            # apply softmax to convert logits to (normalized) probabilities
-            probs = F.softmax(logits, dim=-1)
-            # sample from the distribution
-            idx_next = torch.multinomial(probs, num_samples=1)
+            if not use_cache or idx.size(1) > block_size:
+                # if the sequence context is growing too long we must crop it at block_size
+                idx_cond = idx if idx.size(1) <= block_size else idx[:, -block_size:]
+                # forward the model to get the logits for the index in the sequence
+                logits, _ = self(idx_cond)
+            elif past is None:
+                logits, past = self.forward_with_cache(idx)
+            else:
+                logits, past = self.forward_with_cache(idx[:, -1:], past)
+            idx_next = self._sample_next(logits, temperature, top_k)
             # append sampled index to the running sequence and continue
             idx = torch.cat((idx, idx_next), dim=1)
 
         return idx
+
+    @torch.inference_mode()
+    def generate_trajectories(
+        self,
+        prompts: Sequence[Sequence[int]],
+        max_new_tokens: int,
+        temperature: float = 1.0,
+        top_k: Optional[int] = None,
+        pad_token: int = 0,
+    ) -> List[List[int]]:
+        """
+        Batched generation for many users at once; returns each prompt followed by
+        its new tokens. Prompts are left-padded to a common length, and padding is
+        masked out of attention and skipped by the position ids, so each row
+        decodes as it would on its own.
+        """
+        if not prompts:
+            return []
+        if any(len(prompt) == 0 for prompt in prompts):
+            raise ValueError("Delphi prompts must contain at least one token.")
+        if max_new_tokens <= 0:
+            return [list(prompt) for prompt in prompts]
+
+        device = self.lm_head.weight.device
+        longest = max(len(prompt) for prompt in prompts)
+        if longest + max_new_tokens > self.config.block_size:
+            # The window would slide (shifting every position), which a shared cache cannot do.
+            return [
+                self.generate_trajectory(
+                    torch.tensor([list(prompt)], dtype=torch.long, device=device), max_new_tokens, temperature, top_k
+                )[0].tolist()
+                for prompt in prompts
+            ]
+
+        batch = len(prompts)
+        idx = torch.full((batch, longest), pad_token, dtype=torch.long, device=device)
+        valid = torch.zeros((batch, longest), dtype=torch.bool, device=device)
+        for row, prompt in enumerate(prompts):
+            idx[row, longest - len(prompt):] = torch.tensor(list(prompt), dtype=torch.long, device=device)
+            valid[row, longest - len(prompt):] = True
+        position_ids = (valid.long().cumsum(dim=1) - 1).clamp(min=0)
+
+        attn_mask = None
+        padded = not bool(valid.all())
+        if padded:
+            # Real tokens attend causally to real tokens only; padding rows attend causally
+            # to anything, which keeps them finite without affecting the real rows.
+            causal = torch.ones(longest, longest, dtype=torch.bool, device=device).tril()
+            attn_mask = causal & (valid[:, None, None, :] | ~valid[:, None, :, None])
+
+        logits, past = self.forward_with_cache(idx, position_ids=position_ids, attn_mask=attn_mask)
+        next_positions = position_ids[:, -1:] + 1
+        generated = []
+        for step in range(max_new_tokens):
+            idx_next = self._sample_next(logits, temperature, top_k)
+            generated.append(idx_next)
+            if step == max_new_tokens - 1:
+                break
+            if padded:
+                valid = torch.cat((valid, torch.ones((batch, 1), dtype=torch.bool, device=device)), dim=1)
+                attn_mask = valid[:, None, None, :]
+            logits, past = self.forward_with_cache(idx_next, past, position_ids=next_positions, attn_mask=attn_mask)
+            next_positions = next_positions + 1
+
+        new_tokens = torch.cat(generated, dim=1).tolist()
+        return [list(prompt) + tokens for prompt, tokens in zip(prompts, new_tokens)]
+
+    @torch.inference_mode()
+    def warm_up(self, prompt_length: int = 8, new_tokens: int = 2):
+        """One tiny generation so lazy allocations happen before the first request."""
+        device = self.lm_head.weight.device
+        length = max(1, min(prompt_length, self.config.block_size - new_tokens))
+        self.generate_trajectory(torch.zeros((1, length), dtype=torch.long, device=device), new_tokens)
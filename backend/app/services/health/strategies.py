@@ -107,9 +107,35 @@ class GlucoseStrategy(HealthAnalysisStrategy):
 
 from .core import HealthPredictionStrategy, PredictionResult, PredictionPoint
 from app.ai.llm_client import get_llm_client
+from app.core.config import settings
 from datetime import datetime, timedelta
+from functools import lru_cache
 import random
 
+
+@lru_cache()
+def get_delphi_model(n_layer: int = 4, n_head: int = 4, n_embd: int = 128):
+    """
+    One warmed-up, eval-mode Delphi model per shape, shared by every strategy
+    instance. Returns (config, model, error); model is None when the optional
+    ML extras are missing.
+    """
+    try:
+        from .delphi_model import DelphiConfig, DelphiModel, configure_cpu_threads
+
+        configure_cpu_threads(settings.DELPHI_TORCH_THREADS)
+        config = DelphiConfig(n_layer=n_layer, n_head=n_head, n_embd=n_embd)
+        model = DelphiModel(config).eval()
+        model.warm_up()
+        return config, model, None
+    except Exception as exc:
+        return None, None, str(exc)
+
+
+def warm_delphi_model() -> bool:
+    """Load the shared Delphi model ahead of the first prediction request."""
+    return get_delphi_model()[1] is not None
+
 class MetabolicTrendStrategy(HealthPredictionStrategy):
     """
     Predicts glucose stability using GMI and Time-in-Range (TIR).
@@ -191,18 +217,8 @@ class DelphiPredictionStrategy(HealthPredictionStrategy):
     Predicts health trajectories using a generative transformer model (Delphi-inspired).
     """
     def __init__(self):
-        self.config = None
-        self.model = None
         self.llm = get_llm_client()
-        self._model_error = None
-
-        try:
-            from .delphi_model import DelphiConfig, DelphiModel
-
-            self.config = DelphiConfig(n_layer=4, n_head=4, n_embd=128)
-            self.model = DelphiModel(self.config)
-        except Exception as exc:
-            self._model_error = str(exc)
+        self.config, self.model, self._model_error = get_delphi_model()
 
     async def predict(self, user_id: str, context_data: Dict[str, Any]) -> PredictionResult:
         # Context data should contain 'metrics_history'
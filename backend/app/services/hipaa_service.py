@@ -12,12 +12,13 @@ This service:
 """
 from __future__ import annotations
 
-import json
 import logging
 import os
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+from app.services.phi_access_log import PhiAccessLog
+
 logger = logging.getLogger(__name__)
 
 # PHI data-type categories per HIPAA §164.514(b)(2)
@@ -32,11 +33,10 @@ PHI_DATA_TYPES = {
 # Flatten to a quick lookup set
 _ALL_PHI_KEYWORDS = {kw for keywords in PHI_DATA_TYPES.values() for kw in keywords}
 
-# Storage: in-memory log + optional JSON persistence
-_LOG_FILE = os.path.join(
-    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-    "data", "hipaa_access_log.json"
-)
+# Storage: append-only JSONL segments; the pre-JSONL JSON file is read as history
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
+_LOG_DIR = os.path.join(_DATA_DIR, "hipaa_access_log")
+_LOG_FILE = os.path.join(_DATA_DIR, "hipaa_access_log.json")
 
 
 class HIPAAService:
@@ -48,27 +48,13 @@ class HIPAAService:
       - St. Anthony  → HIPAA Audit Controls §164.312(b) (Auditor)
     """
 
-    def __init__(self):
-        self._log: List[Dict[str, Any]] = self._load_log()
-
-    # ------------------------------------------------------------------
-    # Log persistence
-    # ------------------------------------------------------------------
+    def __init__(self, log_dir: str = _LOG_DIR, legacy_log_file: Optional[str] = _LOG_FILE):
+        self._access_log = PhiAccessLog(log_dir, legacy_file=legacy_log_file)
 
-    def _load_log(self) -> List[Dict[str, Any]]:
-        try:
-            with open(_LOG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return []
-
-    def _save_log(self):
-        try:
-            os.makedirs(os.path.dirname(_LOG_FILE), exist_ok=True)
-            with open(_LOG_FILE, "w", encoding="utf-8") as f:
-                json.dump(self._log[-2000:], f, indent=2)  # Keep last 2000 events
-        except Exception as e:
-            logger.warning(f"[HIPAA] Could not persist access log: {e}")
+    def close(self, timeout: float = 5.0) -> None:
+        """Write out queued access events and stop the log writer."""
+        self._access_log.flush(timeout)
+        self._access_log.close(timeout)
 
     # ------------------------------------------------------------------
     # Public API
@@ -96,7 +82,7 @@ class HIPAAService:
         outcome   : "allowed", "denied", or "flagged".
         """
         event = {
-            "event_id": f"phi-{len(self._log) + 1:06d}",
+            "event_id": None,  # sequence number assigned by the access log
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "user_id": user_id,
             "saint_id": saint_id,
@@ -106,8 +92,7 @@ class HIPAAService:
             "outcome": outcome,
             "hipaa_rule": "§164.312(b) Audit Controls",
         }
-        self._log.append(event)
-        self._save_log()
+        self._access_log.append(event)
         logger.info(f"[HIPAA] {outcome.upper()} | {saint_id} → {action} | user={user_id[:8]}...")
         return event
 
@@ -121,12 +106,7 @@ class HIPAAService:
         Return recent PHI access events, filterable by user or saint.
         Used by St. Anthony to audit the log.
         """
-        log = self._log
-        if user_id:
-            log = [e for e in log if e.get("user_id") == user_id]
-        if saint_id:
-            log = [e for e in log if e.get("saint_id") == saint_id]
-        return list(reversed(log[-limit:]))
+        return self._access_log.recent(user_id=user_id, saint_id=saint_id, limit=limit)
 
     def check_minimum_necessary(
         self,
@@ -189,13 +169,14 @@ class HIPAAService:
         Generate a structured HIPAA compliance posture report.
         St. Michael presents this; St. Anthony verifies the audit trail.
         """
-        user_log = [e for e in self._log if e.get("user_id") == user_id]
-        flagged = [e for e in user_log if e.get("outcome") == "flagged"]
-        denied  = [e for e in user_log if e.get("outcome") == "denied"]
+        outcomes = self._access_log.outcome_counts(user_id)
+        total_events = sum(outcomes.values())
+        flagged = outcomes.get("flagged", 0)
+        denied = outcomes.get("denied", 0)
 
         # Compute score: 100 - 10 pts per flagged, -5 per denied
         base_score = 100
-        score = max(0, base_score - len(flagged) * 10 - len(denied) * 5)
+        score = max(0, base_score - flagged * 10 - denied * 5)
 
         safeguards = [
             {
@@ -207,14 +188,14 @@ class HIPAAService:
             {
                 "rule": "§164.312(b) — Audit Controls",
                 "officer": "St. Anthony",
-                "status": "active" if len(user_log) > 0 else "pending",
-                "description": f"Access log contains {len(user_log)} PHI events for this user.",
+                "status": "active" if total_events > 0 else "pending",
+                "description": f"Access log contains {total_events} PHI events for this user.",
             },
             {
                 "rule": "§164.514(d) — Minimum Necessary",
                 "officer": "St. Michael",
                 "status": "compliant" if not flagged else "violations_detected",
-                "description": f"{len(flagged)} minimum-necessary violations logged.",
+                "description": f"{flagged} minimum-necessary violations logged.",
             },
             {
                 "rule": "§164.312(a)(1) — Access Control",
@@ -229,11 +210,11 @@ class HIPAAService:
             "user_id": user_id,
             "compliance_score": score,
             "status": "compliant" if score >= 80 else "at_risk" if score >= 50 else "non_compliant",
-            "total_phi_events": len(user_log),
-            "flagged_events": len(flagged),
-            "denied_events": len(denied),
+            "total_phi_events": total_events,
+            "flagged_events": flagged,
+            "denied_events": denied,
             "safeguards": safeguards,
-            "recent_events": list(reversed(user_log[-10:])),
+            "recent_events": self._access_log.recent(user_id=user_id, limit=10),
             "certifying_saints": {
                 "security_officer": "St. Michael — §164.308(a)(2)",
                 "audit_officer": "St. Anthony — §164.312(b)",
@@ -9,6 +9,7 @@ from app.models.engram import Engram, EngramDailyResponse
 from app.models.interaction import AgentInteraction
 from app.ai.prompt_builder import get_prompt_builder
 from app.ai.llm_client import get_llm_client
+from app.services.social_reputation_service import social_reputation_service
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +108,7 @@ class AgentInteractionService:
         )
         
         session.add(interaction)
+        await social_reputation_service.record_interactions(session, [interaction])
         await session.commit()
         await session.refresh(interaction)
         
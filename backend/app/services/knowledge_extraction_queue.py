@@ -0,0 +1,208 @@
+"""
+Background knowledge extraction for saint chats.
+
+Chat turns enqueue their exchange and return immediately. A worker task
+coalesces pending exchanges per (user, saint), extracts facts from each and
+persists the de-duplicated result in one write per batch. Facts identical to
+what was last stored for that user and saint are skipped.
+
+Backpressure: once ``max_pending`` exchanges are waiting, new exchanges keep
+only their cheap heuristic facts (no LLM extraction) so the queue stays
+bounded while explicit "remember this" requests still land.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Fact = Dict[str, Any]
+ExtractFacts = Callable[[str, str, str], Awaitable[List[Fact]]]
+StoreFacts = Callable[[str, str, str, str, List[Fact]], Awaitable[None]]
+
+BatchKey = Tuple[str, str]
+
+
+class _PendingBatch:
+    def __init__(self, saint_name: str, persistence: str, enqueued_at: float):
+        self.saint_name = saint_name
+        self.persistence = persistence
+        self.enqueued_at = enqueued_at
+        self.exchanges: List[Tuple[str, str]] = []
+        self.facts: Dict[str, Fact] = {}
+
+
+class KnowledgeExtractionQueue:
+    def __init__(
+        self,
+        extract: ExtractFacts,
+        store: StoreFacts,
+        max_pending: int = 256,
+        batch_size: int = 16,
+        batch_window_seconds: float = 0.05,
+        dedup_cache_size: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._extract = extract
+        self._store = store
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_window_seconds = batch_window_seconds
+        self.dedup_cache_size = dedup_cache_size
+        self._clock = clock
+
+        self._pending: "OrderedDict[BatchKey, _PendingBatch]" = OrderedDict()
+        self._pending_exchanges = 0
+        self._in_flight = 0
+        self._stored: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {
+            "enqueued": 0,
+            "shed_to_heuristics": 0,
+            "batches": 0,
+            "exchanges_processed": 0,
+            "facts_written": 0,
+            "facts_deduped": 0,
+            "failures": 0,
+            "last_lag_seconds": 0.0,
+            "max_lag_seconds": 0.0,
+        }
+
+    def submit(
+        self,
+        user_id: str,
+        saint_id: str,
+        saint_name: str,
+        user_message: str,
+        ai_response: str,
+        persistence: str = "database",
+        heuristic_facts: Optional[List[Fact]] = None,
+    ) -> bool:
+        """Queue one chat exchange; returns False if it was shed to heuristic facts only."""
+        self._ensure_worker()
+        key = (str(user_id), saint_id)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch(saint_name, persistence, self._clock())
+
+        accepted = self._pending_exchanges < self.max_pending
+        if accepted:
+            batch.exchanges.append((user_message, ai_response))
+            self._pending_exchanges += 1
+            self.stats["enqueued"] += 1
+        else:
+            self.stats["shed_to_heuristics"] += 1
+            for fact in heuristic_facts or []:
+                batch.facts[fact["key"]] = fact
+
+        self._idle.clear()
+        self._wakeup.set()
+        return accepted
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queued work from a previous (closed) loop cannot be resumed here.
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._worker = None
+            self._pending.clear()
+            self._pending_exchanges = 0
+            self._in_flight = 0
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run(), name="saint-knowledge-extraction")
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                self._idle.set()
+                await self._wakeup.wait()
+            # Let a burst of turns for the same user and saint coalesce into one batch.
+            await asyncio.sleep(self.batch_window_seconds)
+            for _ in range(min(self.batch_size, len(self._pending))):
+                key, batch = self._pending.popitem(last=False)
+                self._pending_exchanges -= len(batch.exchanges)
+                self._in_flight += len(batch.exchanges)
+                try:
+                    await self._process(key, batch)
+                except Exception as exc:
+                    self.stats["failures"] += 1
+                    logger.warning("Knowledge extraction failed for %s/%s: %s", key[0], key[1], exc)
+                finally:
+                    self._in_flight -= len(batch.exchanges)
+
+    async def _process(self, key: BatchKey, batch: _PendingBatch):
+        user_id, saint_id = key
+        facts = dict(batch.facts)
+        for user_message, ai_response in batch.exchanges:
+            for fact in await self._extract(saint_id, user_message, ai_response):
+                facts[fact["key"]] = fact
+
+        fresh = []
+        for fact in facts.values():
+            dedup_key = (user_id, saint_id, fact["key"])
+            digest = self._fact_digest(fact)
+            if self._stored.get(dedup_key) == digest:
+                self.stats["facts_deduped"] += 1
+                continue
+            fresh.append((dedup_key, digest, fact))
+
+        if fresh:
+            await self._store(user_id, saint_id, batch.saint_name, batch.persistence, [fact for _, _, fact in fresh])
+            for dedup_key, digest, _ in fresh:
+                self._remember(dedup_key, digest)
+
+        lag = self._clock() - batch.enqueued_at
+        self.stats["batches"] += 1
+        self.stats["exchanges_processed"] += len(batch.exchanges)
+        self.stats["facts_written"] += len(fresh)
+        self.stats["last_lag_seconds"] = round(lag, 3)
+        self.stats["max_lag_seconds"] = round(max(self.stats["max_lag_seconds"], lag), 3)
+
+    @staticmethod
+    def _fact_digest(fact: Fact) -> str:
+        raw = f"{fact['value']}\x1f{fact.get('category')}\x1f{fact.get('confidence')}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, dedup_key: Tuple[str, str, str], digest: str):
+        self._stored[dedup_key] = digest
+        self._stored.move_to_end(dedup_key)
+        while len(self._stored) > self.dedup_cache_size:
+            self._stored.popitem(last=False)
+
+    def forget(self, user_id: str, saint_id: str, key: str):
+        """Drop the dedup entry for a fact that was changed outside the queue."""
+        self._stored.pop((str(user_id), saint_id, key), None)
+
+    async def drain(self, timeout: Optional[float] = None):
+        """Wait until every queued exchange has been processed."""
+        if self._idle is None or self._loop is not asyncio.get_running_loop():
+            return
+        await asyncio.wait_for(self._idle.wait(), timeout)
+
+    async def stop(self):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        oldest = min((batch.enqueued_at for batch in self._pending.values()), default=None)
+        return {
+            **self.stats,
+            "queue_length": self._pending_exchanges,
+            "pending_batches": len(self._pending),
+            "in_flight": self._in_flight,
+            "oldest_pending_seconds": round(self._clock() - oldest, 3) if oldest is not None else 0.0,
+            "max_pending": self.max_pending,
+        }
@@ -1,104 +1,454 @@
+import asyncio
 import hashlib
 import hmac
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from app.models.audit import AuditLog
+from sqlalchemy import insert, select, desc, text, tuple_
+from app.models.audit import AuditChainCheckpoint, AuditLog, generate_cuid
 from app.core.config import settings
+from app.db.session import Base, get_engine, get_session_factory
 import logging
 
 logger = logging.getLogger(__name__)
 
+GENESIS_HASH = "genesis_hash_0000000000000000"
+SIGNER_ID = "st_anthony_system"
+# pg_advisory_xact_lock key ("ledger") serializing appenders across processes
+LEDGER_LOCK_KEY = 0x6C6564676572
+
+ChainHead = Tuple[str, Optional[datetime]]
+ChainKey = Tuple[datetime, str]
+
+_checkpoint_table_ready = False
+
+
+def _signing_secret() -> bytes:
+    # We use a secure system key for HMAC signing the audit log (ledger)
+    # Using Supabase service role key or a default
+    return getattr(settings, "VITE_SUPABASE_SERVICE_ROLE_KEY", "fallback_system_secret_key").encode()
+
+
+def compute_entry_hash(prev_hash: str, ts: datetime, action: str, user_id: str, meta: dict) -> str:
+    """Compute SHA256 spanning the previous hash and current event data."""
+    payload = {
+        "prevHash": prev_hash,
+        "ts": ts.isoformat() if ts else "",
+        "action": action,
+        "userId": user_id or "system",
+        "metadata": meta or {}
+    }
+    payload_str = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(payload_str.encode("utf-8")).hexdigest()
+
+
+def sign_hash(secret: bytes, entry_hash: str) -> str:
+    """Cryptographically sign the event hash."""
+    return hmac.new(secret, entry_hash.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+class _PendingAppend:
+    def __init__(self, entry: AuditLog, future: Optional[asyncio.Future]):
+        self.entry = entry
+        self.future = future
+
+
+class LedgerAppender:
+    """
+    Single writer for the hash-chained audit ledger.
+
+    Events are queued and chained by one worker task that owns the chain head in
+    memory, so concurrent writers can no longer read the same head and fork the
+    chain. Whatever queued up while the previous batch was committing is chained
+    and inserted in one transaction (group commit). Timestamps are assigned at
+    chaining time and strictly increase, so ``ts`` order is chain order.
+
+    On PostgreSQL each batch also takes a transaction-level advisory lock and
+    re-reads the head, which keeps the chain linear across processes.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Any]] = None,
+        batch_size: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size or settings.LEDGER_BATCH_SIZE
+        self.max_pending = max_pending or settings.LEDGER_MAX_PENDING
+        self.signing_secret = _signing_secret()
+        self.signer_id = SIGNER_ID
+
+        self._head: Optional[ChainHead] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {
+            "appended": 0,
+            "batches": 0,
+            "failed": 0,
+            "max_batch": 0,
+        }
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A previous loop's queue and worker cannot be reused.
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._worker = None
+            self._head = None
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run(), name="audit-ledger-appender")
+
+    async def append(
+        self,
+        action: str,
+        user_id: str = None,
+        provider: str = None,
+        metadata: dict = None,
+        *,
+        wait: bool = True,
+    ) -> AuditLog:
+        """
+        Queue an event for the ledger. With ``wait`` (the default) this returns
+        once the entry is committed; otherwise it returns immediately with the
+        entry id assigned and the hash fields filled in when it is written.
+        """
+        self._ensure_worker()
+        entry = AuditLog(
+            id=generate_cuid(),
+            userId=user_id,
+            action=action,
+            provider=provider,
+            metadata_=metadata,
+            signerId=self.signer_id,
+        )
+        future = self._loop.create_future() if wait else None
+        await self._queue.put(_PendingAppend(entry, future))
+        if future is None:
+            return entry
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_batch(self, batch: List[_PendingAppend]):
+        factory = self._session_factory or get_session_factory()
+        try:
+            async with factory() as session:
+                head = await self._current_head(session)
+                rows = self._chain(batch, head)
+                await session.execute(insert(AuditLog), rows)
+                await session.commit()
+        except Exception as exc:
+            # The in-memory head may be ahead of what was committed; reload it next batch.
+            self._head = None
+            self.stats["failed"] += len(batch)
+            logger.error(f"Failed to record verifiable audit log batch ({len(batch)} events): {exc}")
+            for pending in batch:
+                if pending.future is not None and not pending.future.done():
+                    pending.future.set_exception(exc)
+            return
+
+        last = batch[-1].entry
+        self._head = (last.sha256, last.ts)
+        self.stats["appended"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+        for pending in batch:
+            if pending.future is not None and not pending.future.done():
+                pending.future.set_result(pending.entry)
+
+    async def _current_head(self, session: AsyncSession) -> ChainHead:
+        bind = getattr(session, "bind", None)
+        if getattr(getattr(bind, "dialect", None), "name", None) == "postgresql":
+            await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LEDGER_LOCK_KEY})
+        elif self._head is not None:
+            return self._head
+        row = (await session.execute(
+            select(AuditLog.sha256, AuditLog.ts).order_by(desc(AuditLog.ts), desc(AuditLog.id)).limit(1)
+        )).first()
+        return (row.sha256 or GENESIS_HASH, row.ts) if row else (GENESIS_HASH, None)
+
+    def _chain(self, batch: List[_PendingAppend], head: ChainHead) -> List[Dict[str, Any]]:
+        prev_hash, last_ts = head
+        rows = []
+        for pending in batch:
+            entry = pending.entry
+            ts = datetime.utcnow()
+            if last_ts is not None and ts <= last_ts:
+                ts = last_ts + timedelta(microseconds=1)
+            entry.ts = ts
+            entry.prevHash = prev_hash
+            entry.sha256 = compute_entry_hash(prev_hash, ts, entry.action, entry.userId, entry.metadata_)
+            entry.signature = sign_hash(self.signing_secret, entry.sha256)
+            rows.append({
+                "id": entry.id,
+                "userId": entry.userId,
+                "action": entry.action,
+                "provider": entry.provider,
+                "metadata_": entry.metadata_,
+                "ts": ts,
+                "sha256": entry.sha256,
+                "prevHash": prev_hash,
+                "signature": entry.signature,
+                "signerId": entry.signerId,
+            })
+            prev_hash, last_ts = entry.sha256, ts
+        return rows
+
+    async def flush(self, timeout: Optional[float] = None):
+        """Wait until every queued event has been written (or has failed)."""
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        await asyncio.wait_for(self._queue.join(), timeout)
+
+    async def stop(self):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_length": self._queue.qsize() if self._queue is not None else 0,
+            "max_pending": self.max_pending,
+        }
+
+
+ledger_appender = LedgerAppender()
+
+
+async def ensure_checkpoint_table() -> None:
+    global _checkpoint_table_ready
+    if _checkpoint_table_ready:
+        return
+
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.create_all(
+            sync_conn, tables=[AuditChainCheckpoint.__table__]
+        ))
+    _checkpoint_table_ready = True
+
+
+class _ChainPoint:
+    """A verified position in the chain: ``position`` entries ending at (ts, entry_id) with ``entry_hash``."""
+
+    def __init__(self, position: int, entry_id: Optional[str], ts: Optional[datetime], entry_hash: Optional[str]):
+        self.position = position
+        self.entry_id = entry_id
+        self.ts = ts
+        self.entry_hash = entry_hash
+
+    @property
+    def key(self) -> Optional[ChainKey]:
+        return (self.ts, self.entry_id) if self.entry_id is not None else None
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: AuditChainCheckpoint) -> "_ChainPoint":
+        return cls(checkpoint.position, checkpoint.entryId, checkpoint.entryTs, checkpoint.entryHash)
+
+
+GENESIS_POINT = _ChainPoint(0, None, None, GENESIS_HASH)
+
+
 class LedgerService:
     def __init__(self, db: AsyncSession):
         self.db = db
-        # We use a secure system key for HMAC signing the audit log (ledger)
-        # Using Supabase service role key or a default
-        self.signing_secret = getattr(settings, "VITE_SUPABASE_SERVICE_ROLE_KEY", "fallback_system_secret_key").encode()
-        self.signer_id = "st_anthony_system"
-
-    async def _get_previous_hash(self) -> str:
-        """Fetch the chronologically previous AuditLog entry hash for Merkle chaining."""
-        stmt = select(AuditLog.sha256).order_by(desc(AuditLog.ts)).limit(1)
-        result = await self.db.execute(stmt)
-        prev_hash = result.scalar_one_or_none()
-        return prev_hash or "genesis_hash_0000000000000000"
+        self.signing_secret = _signing_secret()
+        self.signer_id = SIGNER_ID
 
     def _compute_entry_hash(self, prev_hash: str, ts: datetime, action: str, user_id: str, meta: dict) -> str:
-        """Compute SHA256 spanning the previous hash and current event data."""
-        payload = {
-            "prevHash": prev_hash,
-            "ts": ts.isoformat() if ts else "",
-            "action": action,
-            "userId": user_id or "system",
-            "metadata": meta or {}
-        }
-        payload_str = json.dumps(payload, sort_keys=True)
-        return hashlib.sha256(payload_str.encode("utf-8")).hexdigest()
+        return compute_entry_hash(prev_hash, ts, action, user_id, meta)
 
     def _sign_hash(self, entry_hash: str) -> str:
-        """Cryptographically sign the event hash."""
-        signature = hmac.new(self.signing_secret, entry_hash.encode("utf-8"), hashlib.sha256).hexdigest()
-        return signature
+        return sign_hash(self.signing_secret, entry_hash)
 
-    async def log_event(self, action: str, user_id: str = None, provider: str = None, metadata: dict = None) -> AuditLog:
+    async def log_event(
+        self, action: str, user_id: str = None, provider: str = None, metadata: dict = None, wait: bool = True
+    ) -> AuditLog:
         """
         Record a cryptographically verifiable event in the database ledger.
+
+        The event is chained and committed by the process-wide ledger appender in
+        its own transaction; the caller's session is neither flushed nor committed.
         """
-        try:
-            prev_hash = await self._get_previous_hash()
-            current_ts = datetime.utcnow()
-            
-            entry_hash = self._compute_entry_hash(prev_hash, current_ts, action, user_id, metadata)
-            signature = self._sign_hash(entry_hash)
-
-            new_log = AuditLog(
-                userId=user_id,
-                action=action,
-                provider=provider,
-                metadata_=metadata,
-                ts=current_ts,
-                sha256=entry_hash,
-                prevHash=prev_hash,
-                signature=signature,
-                signerId=self.signer_id
-            )
-
-            self.db.add(new_log)
-            await self.db.commit()
-            await self.db.refresh(new_log)
-            return new_log
-        except Exception as e:
-            logger.error(f"Failed to record verifiable audit log: {e}")
-            await self.db.rollback()
-            raise
-
-    async def verify_ledger_integrity(self) -> dict:
+        return await ledger_appender.append(action, user_id, provider, metadata, wait=wait)
+
+    def _sign_checkpoint(self, position: int, entry_id: str, ts: datetime, entry_hash: Optional[str]) -> str:
+        return self._sign_hash(f"{position}:{entry_id}:{ts.isoformat()}:{entry_hash or ''}")
+
+    def _checkpoint_is_signed(self, checkpoint: AuditChainCheckpoint) -> bool:
+        expected = self._sign_checkpoint(
+            checkpoint.position, checkpoint.entryId, checkpoint.entryTs, checkpoint.entryHash
+        )
+        return hmac.compare_digest(expected, checkpoint.signature or "")
+
+    def _check_entry(self, log: Any, prev_hash: Optional[str]) -> Optional[str]:
+        if log.prevHash != prev_hash:
+            return "prevHash mismatch"
+
+        # Recompute expected hash
+        expected_hash = self._compute_entry_hash(log.prevHash, log.ts, log.action, log.userId, log.metadata_)
+        if log.sha256 and expected_hash != log.sha256:
+            return "Hash tampering detected"
+
+        # Recompute signature
+        expected_signature = self._sign_hash(expected_hash)
+        if log.signature and expected_signature != log.signature:
+            return "Signature tampering detected"
+        return None
+
+    async def _fetch_page(
+        self, session: AsyncSession, after: Optional[ChainKey], until: Optional[ChainKey], limit: int
+    ) -> Sequence[Any]:
+        """One keyset page of chain entries in (ts, id) order, streamed from a server-side cursor."""
+        stmt = select(
+            AuditLog.id,
+            AuditLog.ts,
+            AuditLog.action,
+            AuditLog.userId,
+            AuditLog.metadata_,
+            AuditLog.sha256,
+            AuditLog.prevHash,
+            AuditLog.signature,
+        ).order_by(AuditLog.ts, AuditLog.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(tuple_(AuditLog.ts, AuditLog.id) > tuple_(*after))
+        if until is not None:
+            stmt = stmt.where(tuple_(AuditLog.ts, AuditLog.id) <= tuple_(*until))
+        result = await session.stream(stmt.execution_options(yield_per=min(limit, 1000)))
+        return [row async for row in result]
+
+    async def _load_checkpoints(self, session: AsyncSession, latest_only: bool) -> List[AuditChainCheckpoint]:
+        stmt = select(AuditChainCheckpoint)
+        if latest_only:
+            stmt = stmt.order_by(desc(AuditChainCheckpoint.position)).limit(1)
+        else:
+            stmt = stmt.order_by(AuditChainCheckpoint.position)
+        return list((await session.execute(stmt)).scalars().all())
+
+    async def _anchor_hash(self, session: AsyncSession, entry_id: str) -> Tuple[bool, Optional[str]]:
+        row = (await session.execute(select(AuditLog.sha256).where(AuditLog.id == entry_id))).first()
+        return (row is not None, row.sha256 if row is not None else None)
+
+    async def _save_checkpoints(self, checkpoints: List[AuditChainCheckpoint]) -> None:
+        if not checkpoints:
+            return
+        # Own session: committing or rolling back self.db would touch the caller's pending work.
+        session_factory = get_session_factory()
+        async with session_factory() as session:
+            try:
+                session.add_all(checkpoints)
+                await session.commit()
+            except Exception as exc:
+                # Usually a concurrent verify stored the same positions first.
+                await session.rollback()
+                logger.warning(f"Could not store audit chain checkpoints: {exc}")
+
+    async def _walk(
+        self,
+        session: AsyncSession,
+        start: _ChainPoint,
+        end: Optional[_ChainPoint] = None,
+        checkpoint_every: int = 0,
+    ) -> Tuple[Dict[str, Any], List[AuditChainCheckpoint]]:
+        """Verify the entries after ``start`` up to and including ``end`` (or the chain tail)."""
+        page_size = max(1, settings.LEDGER_VERIFY_PAGE_SIZE)
+        prev_hash = start.entry_hash
+        position = start.position
+        cursor = start.key
+        until = end.key if end is not None else None
+        new_checkpoints: List[AuditChainCheckpoint] = []
+
+        while True:
+            rows = await self._fetch_page(session, cursor, until, page_size)
+            for log in rows:
+                failure = self._check_entry(log, prev_hash)
+                if failure:
+                    return self._report(False, log.id, failure, position - start.position), new_checkpoints
+                position += 1
+                prev_hash = log.sha256
+                if checkpoint_every and position % checkpoint_every == 0:
+                    new_checkpoints.append(AuditChainCheckpoint(
+                        position=position,
+                        entryId=log.id,
+                        entryTs=log.ts,
+                        entryHash=log.sha256,
+                        signature=self._sign_checkpoint(position, log.id, log.ts, log.sha256),
+                    ))
+            if len(rows) < page_size:
+                break
+            cursor = (rows[-1].ts, rows[-1].id)
+
+        verified = position - start.position
+        if end is not None and (position != end.position or prev_hash != end.entry_hash):
+            return self._report(False, end.entry_id, "Checkpoint mismatch", verified), new_checkpoints
+        return self._report(True, None, "OK", verified), new_checkpoints
+
+    @staticmethod
+    def _report(is_valid: bool, broken_at_id: Optional[str], reason: str, verified: int) -> Dict[str, Any]:
+        return {"is_valid": is_valid, "broken_at_id": broken_at_id, "reason": reason, "entries_verified": verified}
+
+    async def verify_ledger_integrity(self, full: bool = False, workers: Optional[int] = None) -> dict:
         """
-        Verify the mathematical integrity of the entire audit log chain.
+        Verify the mathematical integrity of the audit log chain.
         Returns a dict of { "is_valid": bool, "broken_at_id": str | None }
+
+        By default only the entries after the latest signed checkpoint are
+        walked. ``full=True`` re-verifies from genesis, checking the ranges
+        between checkpoints concurrently on up to ``workers`` sessions.
+        New checkpoints are stored every LEDGER_CHECKPOINT_INTERVAL entries.
         """
-        stmt = select(AuditLog).order_by(AuditLog.ts)
-        result = await self.db.execute(stmt)
-        logs = result.scalars().all()
-
-        current_prev = "genesis_hash_0000000000000000"
-        
-        for log in logs:
-            if log.prevHash != current_prev:
-                return {"is_valid": False, "broken_at_id": log.id, "reason": "prevHash mismatch"}
-            
-            # Recompute expected hash
-            expected_hash = self._compute_entry_hash(log.prevHash, log.ts, log.action, log.userId, log.metadata_)
-            if log.sha256 and expected_hash != log.sha256:
-                return {"is_valid": False, "broken_at_id": log.id, "reason": "Hash tampering detected"}
-            
-            # Recompute signature
-            expected_signature = self._sign_hash(expected_hash)
-            if log.signature and expected_signature != log.signature:
-                return {"is_valid": False, "broken_at_id": log.id, "reason": "Signature tampering detected"}
-
-            current_prev = log.sha256
-
-        return {"is_valid": True, "broken_at_id": None, "reason": "OK"}
+        await ensure_checkpoint_table()
+        interval = max(0, settings.LEDGER_CHECKPOINT_INTERVAL)
+        checkpoints = await self._load_checkpoints(self.db, latest_only=not full)
+        for checkpoint in checkpoints:
+            if not self._checkpoint_is_signed(checkpoint):
+                return self._report(False, checkpoint.entryId, "Checkpoint signature tampering detected", 0)
+
+        if not full:
+            start = GENESIS_POINT
+            if checkpoints:
+                start = _ChainPoint.from_checkpoint(checkpoints[0])
+                exists, anchor_hash = await self._anchor_hash(self.db, start.entry_id)
+                if not exists or anchor_hash != start.entry_hash:
+                    return self._report(False, start.entry_id, "Checkpoint anchor altered", 0)
+            report, new_checkpoints = await self._walk(self.db, start, checkpoint_every=interval)
+            await self._save_checkpoints(new_checkpoints)
+            return {**report, "mode": "incremental", "verified_from": start.position}
+
+        points = [GENESIS_POINT] + [_ChainPoint.from_checkpoint(checkpoint) for checkpoint in checkpoints]
+        ranges = list(zip(points, points[1:] + [None]))
+        semaphore = asyncio.Semaphore(max(1, workers or settings.LEDGER_VERIFY_WORKERS))
+        session_factory = get_session_factory()
+
+        async def verify_range(start: _ChainPoint, end: Optional[_ChainPoint]):
+            async with semaphore:
+                async with session_factory() as session:
+                    # Only the open tail range can cross new checkpoint boundaries.
+                    return await self._walk(session, start, end, checkpoint_every=interval if end is None else 0)
+
+        results = await asyncio.gather(*[verify_range(start, end) for start, end in ranges])
+        verified = sum(report["entries_verified"] for report, _ in results)
+        for report, _ in results:
+            if not report["is_valid"]:
+                return {**report, "entries_verified": verified, "mode": "full", "verified_from": 0}
+
+        await self._save_checkpoints(results[-1][1])
+        return {**self._report(True, None, "OK", verified), "mode": "full", "verified_from": 0}
@@ -9,6 +9,7 @@ from app.models.engram import Engram
 from app.models.interaction import AgentInteraction
 from app.ai.prompt_builder import get_prompt_builder
 from app.ai.llm_client import get_llm_client
+from app.services.social_reputation_service import social_reputation_service
 
 logger = logging.getLogger(__name__)
 
@@ -89,6 +90,7 @@ class OasisService:
         )
         
         session.add(interaction)
+        await social_reputation_service.record_interactions(session, [interaction])
         await session.commit()
         return interaction
 
@@ -108,6 +110,7 @@ class OasisService:
         result = await session.execute(query)
         amplifiers = result.scalars().all()
 
+        replies = []
         for amp in amplifiers:
             # Generate a 'Reply' or 'Sharing' event
             amp_prompt = await self.prompt_builder.build_engram_system_prompt(session, str(amp.id))
@@ -128,7 +131,9 @@ class OasisService:
                 emotional_rapport=0.9
             )
             session.add(reply_interaction)
+            replies.append(reply_interaction)
 
+        await social_reputation_service.record_interactions(session, replies)
         await session.commit()
 
     async def run_council_deliberation(self, session: AsyncSession, topic: str, participating_ids: List[str]) -> str:
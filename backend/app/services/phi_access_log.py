@@ -0,0 +1,430 @@
+"""
+Append-only storage for the HIPAA PHI access log.
+
+Events are appended as JSON lines to numbered segment files
+(``phi-access-000001.jsonl``, ...). A new segment starts once the current one
+reaches ``max_segment_bytes``; old segments are never rewritten or deleted, so
+the full audit history is retained. Writes happen on a background thread that
+drains everything queued since its last write in one buffered append, so
+callers on the request path never touch the disk.
+
+Event and outcome counters are snapshotted to a sidecar index
+(``phi-access-index.json``) together with the segment position they cover, so
+startup only replays what was appended after the last snapshot. A window of
+the most recent events overall stays in memory; per-user, per-saint and
+per-(user, saint) windows are kept for at most ``max_cached_keys`` keys, least
+recently used evicted first. A read a window cannot answer (evicted, or from
+before a restart) scans segments newest first until enough matching events are
+found.
+"""
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_PATTERN = re.compile(r"^phi-access-(\d{6})\.jsonl$")
+_INDEX_FILE = "phi-access-index.json"
+_INDEX_VERSION = 1
+_STOP = object()
+
+
+class PhiAccessLog:
+    def __init__(
+        self,
+        directory: str,
+        legacy_file: Optional[str] = None,
+        max_segment_bytes: int = 8 * 1024 * 1024,
+        recent_window: int = 500,
+        key_window: int = 50,
+        max_cached_keys: int = 256,
+        snapshot_interval: float = 30.0,
+    ):
+        self.directory = directory
+        self.legacy_file = legacy_file
+        self.max_segment_bytes = max_segment_bytes
+        self.recent_window = recent_window
+        self.key_window = key_window
+        self.max_cached_keys = max_cached_keys
+        self.snapshot_interval = snapshot_interval
+
+        self._lock = threading.Lock()
+        self._recent_all: Deque[Dict[str, Any]] = deque(maxlen=recent_window)
+        # Per-user / per-saint / per-pair windows, least recently used first.
+        self._recent: "OrderedDict[Hashable, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._key_totals: Counter = Counter()
+        self._outcomes: Dict[str, Counter] = {}
+
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._written = threading.Condition()
+        self._enqueued_count = 0
+        self._written_count = 0
+        self._writer: Optional[threading.Thread] = None
+        self._segment_index = 0
+
+        # Counters for events known to be on disk, and the position they cover.
+        # Owned by the writer thread once it starts.
+        self._persisted_totals: Counter = Counter()
+        self._persisted_outcomes: Dict[Any, Counter] = {}
+        self._persisted_position = (0, 0)
+        self._snapshot_at = float("-inf")
+        self._snapshots_enabled = True
+
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Startup
+    # ------------------------------------------------------------------
+
+    def _segments(self) -> List[str]:
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if _SEGMENT_PATTERN.match(name))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in names]
+
+    @staticmethod
+    def _segment_number(path: str) -> int:
+        return int(_SEGMENT_PATTERN.match(os.path.basename(path)).group(1))
+
+    def _load(self):
+        # Only reads: the writer thread saves the first snapshot once something is appended.
+        if self._read_snapshot() is None:
+            # First start (or upgrade from the single JSON file): one full pass.
+            for event in self._iter_history():
+                self._count(event, self._persisted_totals, self._persisted_outcomes)
+        else:
+            for event in self._iter_segments(*self._persisted_position):
+                self._count(event, self._persisted_totals, self._persisted_outcomes)
+
+        segments = self._segments()
+        if segments:
+            self._segment_index = self._segment_number(segments[-1])
+            self._persisted_position = (self._segment_index, os.path.getsize(segments[-1]))
+        self._key_totals = Counter(self._persisted_totals)
+        self._outcomes = {user_id: Counter(counts) for user_id, counts in self._persisted_outcomes.items()}
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, _INDEX_FILE)
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Load the counter snapshot if it still matches the segments on disk."""
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            segment, offset = int(snapshot["segment"]), int(snapshot["offset"])
+            if snapshot.get("version") != _INDEX_VERSION:
+                return None
+            if segment and os.path.getsize(self._segment_path(segment)) < offset:
+                return None
+            totals = Counter({self._key_from_json(key): count for key, count in snapshot["totals"]})
+            outcomes: Dict[Any, Counter] = {}
+            for user_id, outcome, count in snapshot["outcomes"]:
+                outcomes.setdefault(user_id, Counter())[outcome] = count
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"[HIPAA] Ignoring unreadable access log index: {e}")
+            return None
+        self._persisted_totals = totals
+        self._persisted_outcomes = outcomes
+        self._persisted_position = (segment, offset)
+        return snapshot
+
+    def _write_snapshot(self):
+        snapshot = {
+            "version": _INDEX_VERSION,
+            "segment": self._persisted_position[0],
+            "offset": self._persisted_position[1],
+            "totals": [[self._key_to_json(key), count] for key, count in self._persisted_totals.items()],
+            "outcomes": [
+                [user_id, outcome, count]
+                for user_id, counts in self._persisted_outcomes.items()
+                for outcome, count in counts.items()
+            ],
+        }
+        path = self._index_path()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            logger.warning(f"[HIPAA] Could not write access log index: {e}")
+        self._snapshot_at = time.monotonic()
+
+    @staticmethod
+    def _key_to_json(key: Hashable) -> List[Any]:
+        return list(key) if key else []
+
+    @staticmethod
+    def _key_from_json(key: List[Any]) -> Hashable:
+        return tuple(key) if key else None
+
+    @staticmethod
+    def _parse_lines(path: str, lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash mid-append can leave one partial trailing line.
+                logger.warning(f"[HIPAA] Skipping unreadable access log line in {path}")
+
+    def _read_legacy(self) -> List[Dict[str, Any]]:
+        if not self.legacy_file:
+            return []
+        try:
+            with open(self.legacy_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"[HIPAA] Could not read legacy access log {self.legacy_file}: {e}")
+        return []
+
+    def _iter_segments(self, segment: int = 0, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """Stored segment events from ``offset`` bytes into ``segment`` onwards, oldest first."""
+        for path in self._segments():
+            number = self._segment_number(path)
+            if number < segment:
+                continue
+            with open(path, "rb") as f:
+                if number == segment:
+                    f.seek(offset)
+                yield from self._parse_lines(path, f)
+
+    def _iter_history(self) -> Iterator[Dict[str, Any]]:
+        """Every stored event, oldest first: the legacy JSON file, then each segment."""
+        yield from self._read_legacy()
+        yield from self._iter_segments()
+
+    def _iter_history_newest_first(
+        self, user_id: Optional[str] = None, saint_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stored events for the user and/or saint, newest first, one segment in memory at a time."""
+        needles = [json.dumps(value, ensure_ascii=False).encode("utf-8") for value in (user_id, saint_id) if value]
+        for path in reversed(self._segments()):
+            with open(path, "rb") as f:
+                lines = f.read().splitlines()
+            # Cheap substring filter before parsing; the field check below is exact.
+            candidates = (line for line in reversed(lines) if all(needle in line for needle in needles))
+            for event in self._parse_lines(path, candidates):
+                if self._matches(event, user_id, saint_id):
+                    yield event
+        for event in reversed(self._read_legacy()):
+            if self._matches(event, user_id, saint_id):
+                yield event
+
+    @staticmethod
+    def _matches(event: Dict[str, Any], user_id: Optional[str], saint_id: Optional[str]) -> bool:
+        return (not user_id or event.get("user_id") == user_id) and (not saint_id or event.get("saint_id") == saint_id)
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _event_keys(event: Dict[str, Any]) -> List[Hashable]:
+        user_id = event.get("user_id")
+        saint_id = event.get("saint_id")
+        return [None, ("user", user_id), ("saint", saint_id), ("user_saint", user_id, saint_id)]
+
+    @classmethod
+    def _count(cls, event: Dict[str, Any], totals: Counter, outcomes: Dict[Any, Counter]):
+        for key in cls._event_keys(event):
+            totals[key] += 1
+        outcomes.setdefault(event.get("user_id"), Counter())[event.get("outcome")] += 1
+
+    def _window(self, key: Hashable) -> Optional[Deque[Dict[str, Any]]]:
+        if key is None:
+            return self._recent_all
+        window = self._recent.get(key)
+        if window is not None:
+            self._recent.move_to_end(key)
+        return window
+
+    def _set_window(self, key: Hashable, events: Iterable[Dict[str, Any]]) -> Deque[Dict[str, Any]]:
+        if key is None:
+            self._recent_all = deque(events, maxlen=self.recent_window)
+            return self._recent_all
+        window = self._recent[key] = deque(events, maxlen=self.key_window)
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_cached_keys:
+            self._recent.popitem(last=False)
+        return window
+
+    def _index(self, event: Dict[str, Any]):
+        for key in self._event_keys(event):
+            window = self._window(key)
+            if window is None:
+                # Starts with just this event; reads needing more fall back to disk.
+                window = self._set_window(key, ())
+            window.append(event)
+        self._count(event, self._key_totals, self._outcomes)
+
+    @staticmethod
+    def _key(user_id: Optional[str], saint_id: Optional[str]) -> Hashable:
+        if user_id and saint_id:
+            return ("user_saint", user_id, saint_id)
+        if user_id:
+            return ("user", user_id)
+        if saint_id:
+            return ("saint", saint_id)
+        return None
+
+    @property
+    def total(self) -> int:
+        return self._key_totals[None]
+
+    def append(self, event: Dict[str, Any]):
+        """Index the event and queue it for the writer; fills in a missing ``event_id``."""
+        self._ensure_writer()
+        with self._lock:
+            # Numbered, indexed and queued under one lock so file order matches index order.
+            if event.get("event_id") is None:
+                event["event_id"] = f"phi-{self.total + 1:06d}"
+            self._index(event)
+            with self._written:
+                self._enqueued_count += 1
+            self._queue.put(event)
+
+    def recent(self, user_id: Optional[str] = None, saint_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest-first events for the user and/or saint."""
+        key = self._key(user_id, saint_id)
+        with self._lock:
+            window = self._window(key)
+            events = list(window) if window else []
+            stored = self._key_totals[key]
+        if limit > len(events) and stored > len(events):
+            # Not all in memory (older than the window, evicted, or from before a
+            # restart): read back from the newest segment until enough are found.
+            self.flush()
+            window_size = self.recent_window if key is None else self.key_window
+            wanted = min(stored, max(limit, window_size))
+            newest_first = list(itertools.islice(self._iter_history_newest_first(user_id, saint_id), wanted))
+            events = newest_first[::-1]
+            with self._lock:
+                if self._key_totals[key] == stored:
+                    self._set_window(key, events)
+        return list(reversed(events[-limit:]))
+
+    def outcome_counts(self, user_id: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._outcomes.get(user_id, {}))
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_loop, name="hipaa-access-log", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"phi-access-{index:06d}.jsonl")
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._segment_index == 0:
+            self._segment_index = 1
+        path = self._segment_path(self._segment_index)
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_segment_bytes:
+            self._segment_index += 1
+            path = self._segment_path(self._segment_index)
+        return open(path, "ab")
+
+    def _write_batch(self, handle, batch: List[Dict[str, Any]]):
+        """Append the batch as one buffered write per segment, rotating at the size limit."""
+        if not batch:
+            return handle
+        if handle is None:
+            handle = self._open_segment()
+        size = handle.tell()
+        chunk: List[bytes] = []
+        for event in batch:
+            line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+            if size and size + len(line) > self.max_segment_bytes:
+                handle.write(b"".join(chunk))
+                handle.close()
+                chunk = []
+                self._segment_index += 1
+                handle = self._open_segment()
+                size = 0
+            chunk.append(line)
+            size += len(line)
+        if chunk:
+            handle.write(b"".join(chunk))
+            handle.flush()
+        return handle
+
+    def _write_loop(self):
+        handle = None
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [event for event in batch if event is not _STOP]
+
+            try:
+                handle = self._write_batch(handle, batch)
+                if batch:
+                    for event in batch:
+                        self._count(event, self._persisted_totals, self._persisted_outcomes)
+                    self._persisted_position = (self._segment_index, handle.tell())
+                if self._snapshots_enabled and (
+                    stopping or time.monotonic() - self._snapshot_at >= self.snapshot_interval
+                ):
+                    self._write_snapshot()
+            except Exception as e:
+                logger.warning(f"[HIPAA] Could not persist {len(batch)} access log events: {e}")
+                # How much of the batch reached disk is unknown; keep the last good
+                # snapshot so the next start replays the segments from there.
+                self._snapshots_enabled = False
+                if handle is not None:
+                    handle.close()
+                    handle = None
+            finally:
+                with self._written:
+                    self._written_count += len(batch)
+                    self._written.notify_all()
+
+        if handle is not None:
+            handle.close()
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything appended so far has been written."""
+        with self._written:
+            target = self._enqueued_count
+            return self._written.wait_for(lambda: self._written_count >= target, timeout)
+
+    def close(self, timeout: float = 5.0):
+        writer = self._writer
+        if writer is None:
+            return
+        self._queue.put(_STOP)
+        writer.join(timeout)
+        self._writer = None
@@ -88,10 +88,13 @@ class PlaidService:
     async def get_accounts(self, access_token: str) -> Dict[str, Any]:
         return await self._post("/accounts/get", {"access_token": access_token})
 
-    async def transactions_sync(self, access_token: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+    async def transactions_sync(
+        self, access_token: str, cursor: Optional[str] = None, count: int = 100
+    ) -> Dict[str, Any]:
         payload: Dict[str, Any] = {
             "access_token": access_token,
-            "count": 100,
+            # Plaid accepts 1-500 transactions per page.
+            "count": max(1, min(count, 500)),
         }
         if cursor:
             payload["cursor"] = cursor
@@ -15,8 +15,8 @@ import logging
 import json
 import re
 import asyncio
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from typing import Optional, List, Dict, Any, Awaitable, Callable
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc
 from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
@@ -24,8 +24,11 @@ from sqlalchemy.exc import ProgrammingError, SQLAlchemyError
 from app.models.engram import ArchetypalAI, AIConversation, AIMessage
 from app.models.saint import SaintKnowledge
 from app.ai.llm_client import get_llm_client
+from app.ai.native_worker import PRIORITY_BACKGROUND
 from app.ai.prompt_builder import get_prompt_builder
 from app.services.native_action_dispatcher import native_action_dispatcher
+from app.services.knowledge_extraction_queue import KnowledgeExtractionQueue
+from app.services.saint_chat_cache import ConversationWindowCache, SaintPromptCache
 from app.services.saint_fallback_store import saint_fallback_store
 
 try:
@@ -35,6 +38,8 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+TokenCallback = Callable[[str], Awaitable[None]]
+
 
 class SaintStorageUnavailableError(RuntimeError):
     """Raised when a storage-dependent saint operation cannot run in degraded mode."""
@@ -319,9 +324,18 @@ def get_all_saint_ids() -> List[str]:
 # â”€â”€â”€ Saint Agent Service â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 
 class SaintAgentService:
+    # Messages handed to the model per turn (out of the cached window)
+    PROMPT_HISTORY_MESSAGES = 10
+
     def __init__(self):
         self.llm = get_llm_client()
         self.prompt_builder = get_prompt_builder()
+        self.conversation_windows = ConversationWindowCache()
+        self.prompt_cache = SaintPromptCache()
+        self.knowledge_queue = KnowledgeExtractionQueue(
+            extract=self._extract_knowledge_facts,
+            store=self._persist_knowledge_batch,
+        )
 
     @staticmethod
     def _classify_knowledge_category(saint_id: str, text: str) -> str:
@@ -387,6 +401,22 @@ class SaintAgentService:
 
         return list(facts.values())
 
+    async def _generate_reply(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str,
+        on_token: Optional[TokenCallback] = None,
+    ) -> str:
+        """Blocking completion, or a streamed one forwarded chunk by chunk to ``on_token``."""
+        if on_token is None:
+            return await self.llm.generate_response(messages=messages, system_prompt=system_prompt)
+
+        chunks: List[str] = []
+        async for chunk in self.llm.stream_response(messages=messages, system_prompt=system_prompt):
+            chunks.append(chunk)
+            await on_token(chunk)
+        return "".join(chunks)
+
     @staticmethod
     def _storage_error_for_dynamic(saint_id: str) -> SaintStorageUnavailableError:
         return SaintStorageUnavailableError(
@@ -398,6 +428,7 @@ class SaintAgentService:
         saint_id: str,
         saint_name: str,
         message: str,
+        on_token: Optional[TokenCallback] = None,
     ) -> str:
         saint_def = SAINT_DEFINITIONS[saint_id]
         degraded_guidance = (
@@ -415,9 +446,10 @@ class SaintAgentService:
                 degraded_guidance,
             ]
         )
-        return await self.llm.generate_response(
+        return await self._generate_reply(
             messages=[{"role": "user", "content": message}],
             system_prompt=system_prompt,
+            on_token=on_token,
         )
 
     async def _build_degraded_chat_response(
@@ -427,9 +459,10 @@ class SaintAgentService:
         saint_name: str,
         engram_id: str,
         message: str,
+        on_token: Optional[TokenCallback] = None,
     ) -> Dict[str, Any]:
         user_uuid = uuid.UUID(user_id) if isinstance(user_id, str) else user_id
-        ai_response_text = await self._generate_stateless_saint_response(saint_id, saint_name, message)
+        ai_response_text = await self._generate_stateless_saint_response(saint_id, saint_name, message, on_token)
         created_at = datetime.utcnow().isoformat()
         return {
             "id": str(uuid.uuid4()),
@@ -456,6 +489,7 @@ class SaintAgentService:
         saint_name: str,
         engram_id: str,
         message: str,
+        on_token: Optional[TokenCallback] = None,
     ) -> Dict[str, Any]:
         conversation_messages = await saint_fallback_store.get_recent_conversation_messages(
             str(user_id),
@@ -465,9 +499,10 @@ class SaintAgentService:
             pending_user_message=message,
         )
         system_prompt = await self._build_saint_prompt(session, user_id, saint_id, engram_id)
-        ai_response_text = await self.llm.generate_response(
+        ai_response_text = await self._generate_reply(
             messages=conversation_messages,
             system_prompt=system_prompt,
+            on_token=on_token,
         )
 
         created_at = datetime.utcnow().isoformat()
@@ -480,22 +515,7 @@ class SaintAgentService:
             created_at=created_at,
         )
 
-        facts = await self._extract_knowledge_facts(saint_id, message, ai_response_text)
-        for fact in facts:
-            key = str(fact.get("key") or "").strip()
-            value = str(fact.get("value") or "").strip()
-            category = str(fact.get("category") or "general").strip() or "general"
-            if not key or not value:
-                continue
-            await saint_fallback_store.upsert_knowledge(
-                str(user_id),
-                saint_id,
-                saint_name,
-                key=key,
-                value=value,
-                category=category,
-                confidence=float(fact.get("confidence") or 1.0),
-            )
+        self._enqueue_knowledge_extraction(user_id, saint_id, saint_name, message, ai_response_text, "fallback")
 
         return {
             "id": saved["id"],
@@ -728,11 +748,11 @@ class SaintAgentService:
         # Get messages
         msg_query = select(AIMessage).where(
             AIMessage.conversation_id == conversation.id
-        ).order_by(AIMessage.created_at.asc()).limit(50)
+        ).order_by(AIMessage.created_at.desc()).limit(50)
         
         try:
             msg_result = await session.execute(msg_query)
-            messages = msg_result.scalars().all()
+            messages = list(reversed(msg_result.scalars().all()))
         except Exception as exc:
             await _safe_session_rollback(session)
             if _is_transient_db_unavailable(exc):
@@ -757,10 +777,15 @@ class SaintAgentService:
         session: AsyncSession,
         user_id: str,
         saint_id: str,
-        message: str
+        message: str,
+        on_token: Optional[TokenCallback] = None,
     ) -> Dict[str, Any]:
         """
         Send a message to a saint agent OR dynamic agent.
+
+        When ``on_token`` is given the reply is streamed through it as it is
+        generated; the returned message remains the authoritative final text
+        (action and webhook tags stripped).
         """
         saint_def = SAINT_DEFINITIONS.get(saint_id)
 
@@ -778,6 +803,7 @@ class SaintAgentService:
                     saint_name=agent_name,
                     engram_id=engram_id,
                     message=message,
+                    on_token=on_token,
                 )
             return await self._build_degraded_chat_response(
                 user_id=user_id,
@@ -785,75 +811,46 @@ class SaintAgentService:
                 saint_name=agent_name,
                 engram_id=engram_id,
                 message=message,
+                on_token=on_token,
             )
 
         engram_uuid = uuid.UUID(engram_id)
         user_uuid = uuid.UUID(user_id) if isinstance(user_id, str) else user_id
 
         try:
-            # 2. Get or create conversation
-            conv_query = select(AIConversation).where(
-                and_(
-                    AIConversation.ai_id == engram_uuid,
-                    AIConversation.user_id == str(user_uuid),
-                )
-            ).order_by(AIConversation.updated_at.desc())
-            conv_result = await session.execute(conv_query)
-            conversation = conv_result.scalar_one_or_none()
-
-            if not conversation:
-                conversation = AIConversation(
-                    ai_id=engram_uuid,
-                    user_id=str(user_uuid),
-                    title=f"Chat with {agent_name}",
-                )
-                session.add(conversation)
-                await session.commit()
-                await session.refresh(conversation)
+            # 2. Build system prompt (cached until the saint learns something new).
+            # Built before anything is staged: its fallbacks may roll the session back.
+            system_prompt = await self._get_system_prompt(session, user_id, saint_id, engram_id, agent_name)
+
+            # 3. Get or create conversation, with its latest-N message window
+            window = await self._load_conversation_window(session, engram_uuid, user_uuid, agent_name)
+            conversation_id = window.conversation_id
 
-            # 3. Save user message
+            # 4. Stage the user message; everything in this turn commits together
             user_msg = AIMessage(
-                conversation_id=conversation.id,
+                id=uuid.uuid4(),
+                conversation_id=conversation_id,
                 role="user",
                 content=message,
+                created_at=datetime.now(timezone.utc),
             )
             session.add(user_msg)
-            await session.commit()
 
-            # 4. Load recent message history
-            history_query = select(AIMessage).where(
-                AIMessage.conversation_id == conversation.id
-            ).order_by(AIMessage.created_at.asc()).limit(20)
-            history_result = await session.execute(history_query)
-            past_messages = history_result.scalars().all()
-
-            # 5. Build system prompt
-            if saint_def:
-                system_prompt = await self._build_saint_prompt(session, user_id, saint_id, engram_id)
-            else:
-                # Build prompt for dynamic agent
-                engram_query = select(ArchetypalAI).where(ArchetypalAI.id == engram_uuid)
-                e_result = await session.execute(engram_query)
-                engram_obj = e_result.scalar_one()
-
-                traits = engram_obj.personality_traits or {}
-                base_prompt = traits.get("system_prompt", f"You are {agent_name}, a helpful AI agent.")
-
-                system_prompt = f"{base_prompt}\n\nCONVERSATION HISTORY:\n"
-
-            # 6. Format conversation for LLM
+            # 5. Format the latest messages for the LLM
+            recent = list(window.messages)[-(self.PROMPT_HISTORY_MESSAGES - 1):]
             conversation_messages = [
-                {"role": msg.role, "content": msg.content}
-                for msg in past_messages[-10:]
+                {"role": msg["role"], "content": msg["content"]} for msg in recent
             ]
+            conversation_messages.append({"role": "user", "content": message})
 
-            # 7. Generate AI response
-            ai_response_text = await self.llm.generate_response(
+            # 6. Generate AI response
+            ai_response_text = await self._generate_reply(
                 messages=conversation_messages,
                 system_prompt=system_prompt,
+                on_token=on_token,
             )
 
-            # 8. Parse autonomous external actions (Make.com webhooks)
+            # 7. Parse autonomous external actions (Make.com webhooks)
             webhook_pattern = r'\[MAKE_WEBHOOK:\s*(\{.*?\})\s*\]'
             match = re.search(webhook_pattern, ai_response_text, re.DOTALL)
             if match:
@@ -869,7 +866,7 @@ class SaintAgentService:
                 # Remove the tag from the text the user sees
                 ai_response_text = re.sub(webhook_pattern, '', ai_response_text, flags=re.DOTALL).strip()
 
-            # 9. Parse Actions from AI response if available
+            # 8. Parse Actions from AI response if available
             executed_actions = []
             if action_engine:
                 try:
@@ -889,23 +886,31 @@ class SaintAgentService:
                     ) else "Autonomous Actions Drafted"
                     ai_response_text += "\n\n*(" + summary_prefix + ": " + ", ".join([a["tool"] for a in executed_actions]) + ")*"
 
-            # 10. Save AI response
+            # 9. Stage AI response
             ai_msg = AIMessage(
-                conversation_id=conversation.id,
+                id=uuid.uuid4(),
+                conversation_id=conversation_id,
                 role="assistant",
                 content=ai_response_text,
+                created_at=datetime.now(timezone.utc),
             )
             session.add(ai_msg)
+
+            # 10. One commit for the whole turn, then write through to the caches
             await session.commit()
-            await session.refresh(ai_msg)
+            turn = [self._window_entry(user_msg), self._window_entry(ai_msg)]
+            if window.is_new:
+                self.conversation_windows.load(engram_uuid, user_uuid, conversation_id, turn)
+            else:
+                self.conversation_windows.append(engram_uuid, user_uuid, conversation_id, turn)
 
-            # 11. Extract and store knowledge (only for static saints for now, or expand later)
+            # 11. Extract knowledge off the request path (only for static saints for now)
             if saint_def:
-                await self._extract_and_store_knowledge(session, user_id, saint_id, message, ai_response_text)
+                self._enqueue_knowledge_extraction(user_id, saint_id, agent_name, message, ai_response_text, "database")
 
             return {
                 "id": str(ai_msg.id),
-                "conversation_id": str(conversation.id),
+                "conversation_id": str(conversation_id),
                 "engram_id": engram_id,
                 "role": "assistant",
                 "content": ai_response_text,
@@ -921,6 +926,7 @@ class SaintAgentService:
             }
         except Exception as exc:
             await _safe_session_rollback(session)
+            self.conversation_windows.invalidate(engram_uuid, user_uuid)
             if _is_transient_db_unavailable(exc):
                 if saint_def:
                     logger.warning("Saint chat degraded for %s: %s", saint_id, exc)
@@ -934,6 +940,83 @@ class SaintAgentService:
                 raise self._storage_error_for_dynamic(saint_id) from exc
             raise
 
+    @staticmethod
+    def _window_entry(msg: AIMessage) -> Dict[str, Any]:
+        return {"id": str(msg.id), "role": msg.role, "content": msg.content}
+
+    async def _load_conversation_window(
+        self,
+        session: AsyncSession,
+        engram_uuid: uuid.UUID,
+        user_uuid: uuid.UUID,
+        agent_name: str,
+    ):
+        window = self.conversation_windows.get(engram_uuid, user_uuid)
+        if window is not None:
+            return window
+
+        conv_query = select(AIConversation).where(
+            and_(
+                AIConversation.ai_id == engram_uuid,
+                AIConversation.user_id == str(user_uuid),
+            )
+        ).order_by(AIConversation.updated_at.desc())
+        conv_result = await session.execute(conv_query)
+        conversation = conv_result.scalars().first()
+
+        if not conversation:
+            # Committed with the first turn; the id is assigned client-side.
+            conversation = AIConversation(
+                id=uuid.uuid4(),
+                ai_id=engram_uuid,
+                user_id=str(user_uuid),
+                title=f"Chat with {agent_name}",
+            )
+            session.add(conversation)
+            return self.conversation_windows.new_conversation(conversation.id)
+
+        # Latest N messages (newest first in SQL, replayed oldest first)
+        history_query = select(AIMessage).where(
+            AIMessage.conversation_id == conversation.id
+        ).order_by(AIMessage.created_at.desc()).limit(self.conversation_windows.window_size)
+        history_result = await session.execute(history_query)
+        past_messages = list(reversed(history_result.scalars().all()))
+        return self.conversation_windows.load(
+            engram_uuid,
+            user_uuid,
+            conversation.id,
+            [self._window_entry(msg) for msg in past_messages],
+        )
+
+    async def _get_system_prompt(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        saint_id: str,
+        engram_id: str,
+        agent_name: str,
+    ) -> str:
+        cached = self.prompt_cache.get(user_id, saint_id)
+        if cached is not None:
+            return cached
+
+        version = self.prompt_cache.version(user_id, saint_id)
+        if saint_id in SAINT_DEFINITIONS:
+            system_prompt = await self._build_saint_prompt(session, user_id, saint_id, engram_id)
+        else:
+            # Build prompt for dynamic agent
+            engram_query = select(ArchetypalAI).where(ArchetypalAI.id == uuid.UUID(engram_id))
+            e_result = await session.execute(engram_query)
+            engram_obj = e_result.scalar_one()
+
+            traits = engram_obj.personality_traits or {}
+            base_prompt = traits.get("system_prompt", f"You are {agent_name}, a helpful AI agent.")
+
+            system_prompt = f"{base_prompt}\n\nCONVERSATION HISTORY:\n"
+
+        self.prompt_cache.put(user_id, saint_id, version, system_prompt)
+        return system_prompt
+
     async def _build_saint_prompt(
         self,
         session: AsyncSession,
@@ -1027,6 +1110,7 @@ class SaintAgentService:
                 messages=[{"role": "user", "content": extraction_prompt}],
                 max_tokens=300,
                 temperature=0.1,
+                priority=PRIORITY_BACKGROUND,
             )
 
             cleaned = extraction_result.strip()
@@ -1058,29 +1142,111 @@ class SaintAgentService:
             logger.debug(f"Knowledge extraction skipped: {e}")
             return list(facts_by_key.values())
 
-    async def _extract_and_store_knowledge(
+    def _enqueue_knowledge_extraction(
         self,
-        session: AsyncSession,
         user_id: str,
         saint_id: str,
+        saint_name: str,
         user_message: str,
         ai_response: str,
+        persistence: str,
     ) -> None:
-        """
-        Use LLM to extract actionable knowledge from the conversation.
-        Store it for future prompt enrichment.
-        """
-        facts = await self._extract_knowledge_facts(saint_id, user_message, ai_response)
+        self.knowledge_queue.submit(
+            str(user_id),
+            saint_id,
+            saint_name,
+            user_message,
+            ai_response,
+            persistence=persistence,
+            heuristic_facts=self._extract_heuristic_knowledge_facts(saint_id, user_message),
+        )
+
+    async def _persist_knowledge_batch(
+        self,
+        user_id: str,
+        saint_id: str,
+        saint_name: str,
+        persistence: str,
+        facts: List[Dict[str, Any]],
+    ) -> None:
+        """Store a batch of extracted facts in one transaction (knowledge queue callback)."""
+        user_uuid = uuid.UUID(user_id) if isinstance(user_id, str) else user_id
+        if persistence == "database":
+            from app.db.session import get_session_factory
+
+            try:
+                async with get_session_factory()() as session:
+                    await self._stage_knowledge(session, user_uuid, saint_id, facts)
+                    await session.commit()
+                self.prompt_cache.invalidate(user_id, saint_id)
+                return
+            except Exception as exc:
+                if not _is_transient_db_unavailable(exc):
+                    raise
+                logger.warning("Saint knowledge write degraded for %s: %s", saint_id, exc)
+
         for fact in facts:
-            await self.store_knowledge(
-                session,
-                user_id,
+            await saint_fallback_store.upsert_knowledge(
+                str(user_uuid),
                 saint_id,
-                fact["key"],
-                fact["value"],
-                fact["category"],
+                saint_name,
+                key=fact["key"],
+                value=fact["value"],
+                category=fact["category"],
                 confidence=float(fact.get("confidence") or 1.0),
             )
+        self.prompt_cache.invalidate(user_id, saint_id)
+
+    async def _stage_knowledge(
+        self,
+        session: AsyncSession,
+        user_uuid: uuid.UUID,
+        saint_id: str,
+        facts: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Upsert a knowledge-queue batch on the queue's own background session,
+        with one lookup query; the caller commits.
+        """
+        if not facts:
+            return
+        try:
+            # Savepoint: a missing knowledge table is skipped, and the caller's commit
+            # must not then fail on an aborted transaction.
+            async with session.begin_nested():
+                result = await session.execute(
+                    select(SaintKnowledge).where(
+                        and_(
+                            SaintKnowledge.user_id == user_uuid,
+                            SaintKnowledge.saint_id == saint_id,
+                            SaintKnowledge.knowledge_key.in_([fact["key"] for fact in facts]),
+                        )
+                    )
+                )
+                existing = {item.knowledge_key: item for item in result.scalars().all()}
+                for fact in facts:
+                    confidence = float(fact.get("confidence") or 1.0)
+                    item = existing.get(fact["key"])
+                    if item:
+                        item.knowledge_value = fact["value"]
+                        item.category = fact["category"]
+                        item.confidence = confidence
+                    else:
+                        session.add(
+                            SaintKnowledge(
+                                user_id=user_uuid,
+                                saint_id=saint_id,
+                                knowledge_key=fact["key"],
+                                knowledge_value=fact["value"],
+                                category=fact["category"],
+                                confidence=confidence,
+                            )
+                        )
+        except ProgrammingError as exc:
+            if _missing_saint_knowledge_table(exc):
+                logger.warning("Saint knowledge table missing; skipping knowledge write for %s", saint_id)
+                return
+            raise
 
     async def store_knowledge(
         self,
@@ -1122,6 +1288,8 @@ class SaintAgentService:
                 session.add(new_knowledge)
 
             await session.commit()
+            self.prompt_cache.invalidate(user_id, saint_id)
+            self.knowledge_queue.forget(str(user_uuid), saint_id, key)
         except ProgrammingError as exc:
             await _safe_session_rollback(session)
             if _missing_saint_knowledge_table(exc):
@@ -1143,6 +1311,7 @@ class SaintAgentService:
                     category=category,
                     confidence=confidence,
                 )
+                self.prompt_cache.invalidate(user_id, saint_id)
                 return
             raise
 
@@ -0,0 +1,142 @@
+"""
+In-process caches for the saint chat hot path.
+
+``ConversationWindowCache`` keeps the latest messages of each active
+conversation so a chat turn does not re-read its history; it is write-through,
+updated only after the turn's transaction commits. ``SaintPromptCache`` holds
+built system prompts per (user, saint), invalidated by bumping a version
+whenever the saint's knowledge about the user changes. Both are bounded LRUs
+with a TTL so data written by other processes is picked up eventually.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_WINDOW_SIZE = 20
+
+
+class _TtlLru:
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float]):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ConversationWindow:
+    def __init__(
+        self, conversation_id: Any, messages: List[Dict[str, Any]], window_size: int, is_new: bool = False
+    ):
+        self.conversation_id = conversation_id
+        self.messages: Deque[Dict[str, Any]] = deque(messages, maxlen=window_size)
+        # Conversation not committed yet, so the window is not shared through the cache.
+        self.is_new = is_new
+
+
+class ConversationWindowCache:
+    def __init__(
+        self,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        max_conversations: int = 2048,
+        ttl_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_size = window_size
+        self._windows = _TtlLru(max_conversations, ttl_seconds, clock)
+
+    @staticmethod
+    def key(engram_id: Any, user_id: Any) -> Tuple[str, str]:
+        return str(engram_id), str(user_id)
+
+    def get(self, engram_id: Any, user_id: Any) -> Optional[ConversationWindow]:
+        return self._windows.get(self.key(engram_id, user_id))
+
+    def new_conversation(self, conversation_id: Any) -> ConversationWindow:
+        return ConversationWindow(conversation_id, [], self.window_size, is_new=True)
+
+    def load(
+        self, engram_id: Any, user_id: Any, conversation_id: Any, messages: List[Dict[str, Any]]
+    ) -> ConversationWindow:
+        """Seed a window from the latest messages, oldest first."""
+        window = ConversationWindow(conversation_id, messages, self.window_size)
+        self._windows.put(self.key(engram_id, user_id), window)
+        return window
+
+    def append(self, engram_id: Any, user_id: Any, conversation_id: Any, messages: List[Dict[str, Any]]):
+        """Write committed messages through to the window, if it is still cached."""
+        window = self.get(engram_id, user_id)
+        if window is None or window.conversation_id != conversation_id:
+            return
+        window.messages.extend(messages)
+
+    def invalidate(self, engram_id: Any, user_id: Any):
+        self._windows.pop(self.key(engram_id, user_id))
+
+    def clear(self):
+        self._windows.clear()
+
+
+class SaintPromptCache:
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._prompts = _TtlLru(max_entries, ttl_seconds, clock)
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, user_id: Any, saint_id: str) -> int:
+        with self._lock:
+            return self._versions.get((str(user_id), saint_id), 0)
+
+    def get(self, user_id: Any, saint_id: str) -> Optional[str]:
+        cached = self._prompts.get((str(user_id), saint_id))
+        if cached is None:
+            return None
+        version, prompt = cached
+        return prompt if version == self.version(user_id, saint_id) else None
+
+    def put(self, user_id: Any, saint_id: str, version: int, prompt: str):
+        """Store a prompt built while ``version`` was current; stale builds are never served."""
+        self._prompts.put((str(user_id), saint_id), (version, prompt))
+
+    def invalidate(self, user_id: Any, saint_id: str):
+        key = (str(user_id), saint_id)
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+        self._prompts.pop(key)
+
+    def clear(self):
+        self._prompts.clear()
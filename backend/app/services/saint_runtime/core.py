@@ -1,6 +1,6 @@
 import logging
 import uuid
-from typing import Dict, Any, List, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -61,7 +61,8 @@ class SaintRuntime:
         saint_id: str,
         message: str,
         coordination_mode: bool = False,
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> Dict[str, Any]:
         """
         Enhanced Chat Loop:
@@ -150,7 +151,7 @@ class SaintRuntime:
                     logger.error(f"Error during consensus deliberation: {e}")
 
         # 7. EXECUTE: Call standard Agent Service with ENRICHED context
-        response = await saint_agent_service.chat(session, user_id, saint_id, enriched_message)
+        response = await saint_agent_service.chat(session, user_id, saint_id, enriched_message, on_token=on_token)
         
         # 8. OBSERVE: Add own response to memory
         ai_content = response.get("content", "")
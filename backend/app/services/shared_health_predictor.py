@@ -1,12 +1,28 @@
 """
 Shared health prediction service for St. Raphael and St. Joseph.
+
+A request's metrics history is converted once into a ``MetricFrame`` (NumPy
+columns per metric type); every lane, forecast delta and early warning reads
+its memoized per-group aggregates instead of rescanning the list of dicts.
+
+``predict_family`` caches each member's prediction under a data-version stamp
+(metric frame version plus fingerprints of the member, profile, medications,
+experiments and actions). Members whose inputs are unchanged come from the
+cache; only the family-level aggregation is recomputed per request.
 """
 from __future__ import annotations
 
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from statistics import mean
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
 
 
 def clamp_score(value: float, minimum: float = 0.0, maximum: float = 100.0) -> float:
@@ -68,6 +84,180 @@ def trend_label(delta: float) -> str:
     return "stable"
 
 
+def _metric_timestamp(metric: Dict[str, Any]) -> float:
+    parsed = parse_datetime(metric.get("timestamp") or metric.get("date") or metric.get("recorded_at"))
+    return parsed.timestamp() if parsed else float("-inf")
+
+
+class MetricFrame:
+    """
+    Columnar view of a metrics history: per metric type, arrays of timestamps,
+    values and row positions. Groups of metric types are merged and sorted by
+    time (ties in history order) once, then reused.
+    """
+
+    def __init__(self, metrics_history: Optional[List[Dict[str, Any]]] = None):
+        self.rows: List[Dict[str, Any]] = list(metrics_history or [])
+        positions: Dict[str, List[int]] = {}
+        for index, metric in enumerate(self.rows):
+            name = str(metric.get("metric_type") or metric.get("type") or "").lower()
+            positions.setdefault(name, []).append(index)
+
+        self._columns: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for name, indexes in positions.items():
+            rows = [self.rows[index] for index in indexes]
+            self._columns[name] = (
+                np.array([_metric_timestamp(row) for row in rows], dtype=np.float64),
+                np.array([safe_float(row.get("value")) for row in rows], dtype=np.float64),
+                np.array(indexes, dtype=np.int64),
+            )
+        self._groups: Dict[FrozenSet[str], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._averages: Dict[FrozenSet[str], Optional[float]] = {}
+        self._version: Optional[Tuple[int, float, str]] = None
+
+    @classmethod
+    def of(cls, metrics: Union["MetricFrame", List[Dict[str, Any]], None]) -> "MetricFrame":
+        return metrics if isinstance(metrics, MetricFrame) else cls(metrics)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def metric_types(self) -> List[str]:
+        return sorted(name for name in self._columns if name)
+
+    @property
+    def version(self) -> Tuple[int, float, str]:
+        """(row count, latest timestamp, digest of every column)."""
+        if self._version is None:
+            digest = hashlib.blake2b(digest_size=16)
+            latest = float("-inf")
+            for name in sorted(self._columns):
+                timestamps, values, positions = self._columns[name]
+                digest.update(name.encode("utf-8") + b"\0")
+                digest.update(timestamps.tobytes())
+                digest.update(values.tobytes())
+                digest.update(positions.tobytes())
+                if timestamps.size:
+                    latest = max(latest, float(timestamps.max()))
+            self._version = (len(self.rows), latest, digest.hexdigest())
+        return self._version
+
+    def _group(self, metric_names: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        key = frozenset(name.lower() for name in metric_names)
+        group = self._groups.get(key)
+        if group is None:
+            columns = [self._columns[name] for name in key if name in self._columns]
+            if not columns:
+                empty = np.empty(0)
+                group = (empty, empty, np.empty(0, dtype=np.int64))
+            else:
+                timestamps, values, positions = (np.concatenate(parts) for parts in zip(*columns))
+                order = np.lexsort((positions, timestamps))
+                group = (timestamps[order], values[order], positions[order])
+            self._groups[key] = group
+        return group
+
+    def values(self, metric_names: Iterable[str]) -> np.ndarray:
+        """Non-zero values of the metric types, in history order."""
+        _, values, positions = self._group(metric_names)
+        values = values[np.argsort(positions, kind="stable")]
+        return values[values != 0]
+
+    def rows_by_time(self, metric_names: Iterable[str]) -> List[Dict[str, Any]]:
+        _, _, positions = self._group(metric_names)
+        return [self.rows[index] for index in positions]
+
+    def average(self, metric_names: Iterable[str]) -> Optional[float]:
+        key = frozenset(name.lower() for name in metric_names)
+        if key not in self._averages:
+            _, values, _ = self._group(key)
+            values = values[values != 0]
+            self._averages[key] = float(values.mean()) if values.size else None
+        return self._averages[key]
+
+    def recent_delta(self, metric_names: Iterable[str]) -> float:
+        """Latest value minus the value four readings earlier (or the first)."""
+        _, values, _ = self._group(metric_names)
+        if values.size < 2:
+            return 0.0
+        return float(values[-1] - values[max(0, values.size - 5)])
+
+
+MetricsInput = Union[MetricFrame, List[Dict[str, Any]]]
+
+
+def fingerprint(value: Any) -> str:
+    return hashlib.blake2b(
+        json.dumps(value, sort_keys=True, default=str).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+class MemberPredictionCache:
+    """
+    Bounded LRU of member predictions keyed by (family, member). An entry is
+    only returned for the same data-version stamp it was stored with; the TTL
+    bounds how long an unused entry is kept.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Hashable, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(family_id: Any, member_id: Any) -> Tuple[str, str]:
+        return str(family_id), str(member_id)
+
+    def get(self, family_id: Any, member_id: Any, stamp: Hashable) -> Optional[Dict[str, Any]]:
+        key = self.key(family_id, member_id)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[1] != stamp or self._clock() - item[0] > self.ttl_seconds:
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[2]
+
+    def put(self, family_id: Any, member_id: Any, stamp: Hashable, prediction: Dict[str, Any]):
+        key = self.key(family_id, member_id)
+        with self._lock:
+            self._entries[key] = (self._clock(), stamp, prediction)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, family_id: Any, member_id: Optional[Any] = None):
+        """Drop one member's prediction, or the whole family's when ``member_id`` is None."""
+        with self._lock:
+            if member_id is not None:
+                self._entries.pop(self.key(family_id, member_id), None)
+                return
+            family_key = str(family_id)
+            for key in [key for key in self._entries if key[0] == family_key]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
 @dataclass
 class LaneComputation:
     name: str
@@ -85,41 +275,20 @@ class SharedHealthPredictor:
     SLEEP_KEYWORDS = {"sleep_apnea", "sleep", "insomnia"}
     STRESS_KEYWORDS = {"anxiety", "depression", "stress"}
 
-    def _get_metric_values(self, metrics_history: List[Dict[str, Any]], metric_names: Iterable[str]) -> List[float]:
-        names = {name.lower() for name in metric_names}
-        values: List[float] = []
-        for metric in metrics_history:
-            metric_name = str(metric.get("metric_type") or metric.get("type") or "").lower()
-            if metric_name in names:
-                value = safe_float(metric.get("value"))
-                if value:
-                    values.append(value)
-        return values
-
-    def _get_recent_metric_points(self, metrics_history: List[Dict[str, Any]], metric_names: Iterable[str]) -> List[Dict[str, Any]]:
-        names = {name.lower() for name in metric_names}
-        points = [
-            metric
-            for metric in metrics_history
-            if str(metric.get("metric_type") or metric.get("type") or "").lower() in names
-        ]
-        points.sort(
-            key=lambda metric: parse_datetime(metric.get("timestamp") or metric.get("date") or metric.get("recorded_at"))
-            or datetime.min.replace(tzinfo=timezone.utc)
-        )
-        return points
+    def __init__(self, prediction_cache: Optional[MemberPredictionCache] = None):
+        self.prediction_cache = prediction_cache or MemberPredictionCache()
 
-    def _average_metric(self, metrics_history: List[Dict[str, Any]], metric_names: Iterable[str]) -> Optional[float]:
-        values = self._get_metric_values(metrics_history, metric_names)
-        return mean(values) if values else None
+    def _get_metric_values(self, metrics_history: MetricsInput, metric_names: Iterable[str]) -> List[float]:
+        return MetricFrame.of(metrics_history).values(metric_names).tolist()
 
-    def _recent_delta(self, metrics_history: List[Dict[str, Any]], metric_names: Iterable[str]) -> float:
-        points = self._get_recent_metric_points(metrics_history, metric_names)
-        if len(points) < 2:
-            return 0.0
-        first = safe_float(points[max(0, len(points) - 5)].get("value"))
-        last = safe_float(points[-1].get("value"))
-        return last - first
+    def _get_recent_metric_points(self, metrics_history: MetricsInput, metric_names: Iterable[str]) -> List[Dict[str, Any]]:
+        return MetricFrame.of(metrics_history).rows_by_time(metric_names)
+
+    def _average_metric(self, metrics_history: MetricsInput, metric_names: Iterable[str]) -> Optional[float]:
+        return MetricFrame.of(metrics_history).average(metric_names)
+
+    def _recent_delta(self, metrics_history: MetricsInput, metric_names: Iterable[str]) -> float:
+        return MetricFrame.of(metrics_history).recent_delta(metric_names)
 
     def _extract_conditions(self, profile: Optional[Dict[str, Any]], member: Optional[Dict[str, Any]] = None) -> List[str]:
         conditions: List[str] = []
@@ -223,7 +392,7 @@ class SharedHealthPredictor:
 
     def _build_condition_forecasts(
         self,
-        metrics_history: List[Dict[str, Any]],
+        metrics_history: MetricsInput,
         profile: Optional[Dict[str, Any]],
         member_conditions: List[str],
         ocean_scores: Dict[str, float],
@@ -232,6 +401,7 @@ class SharedHealthPredictor:
         experiment_summary: Optional[List[Dict[str, Any]]] = None,
     ) -> List[Dict[str, Any]]:
         conditions = set(member_conditions)
+        metrics_history = MetricFrame.of(metrics_history)
 
         resting_hr = self._average_metric(metrics_history, ["heart_rate", "resting_hr"])
         blood_pressure = self._average_metric(metrics_history, ["blood_pressure", "blood_pressure_systolic"])
@@ -353,10 +523,11 @@ class SharedHealthPredictor:
 
     def _build_forecast_deltas(
         self,
-        metrics_history: List[Dict[str, Any]],
+        metrics_history: MetricsInput,
         medications: Optional[List[Dict[str, Any]]] = None,
         experiment_summary: Optional[List[Dict[str, Any]]] = None,
     ) -> List[Dict[str, Any]]:
+        metrics_history = MetricFrame.of(metrics_history)
         deltas: List[Dict[str, Any]] = []
         for label, metric_names in {
             "Heart rate trend": ["heart_rate", "resting_hr"],
@@ -397,19 +568,20 @@ class SharedHealthPredictor:
     def _build_source_breakdown(
         self,
         family_members: List[Dict[str, Any]],
-        metrics_history: List[Dict[str, Any]],
+        metrics_history: MetricsInput,
         profile: Optional[Dict[str, Any]],
         medications: Optional[List[Dict[str, Any]]],
         experiment_summary: Optional[List[Dict[str, Any]]],
         trinity_context: Optional[Dict[str, Any]],
         emergency_contacts: Optional[List[Dict[str, Any]]],
     ) -> Dict[str, Any]:
+        metrics_history = MetricFrame.of(metrics_history)
         profiled_members = sum(1 for member in family_members if any(self._extract_ocean_scores(member).values()))
         conditions = self._extract_conditions(profile)
         return {
             "measured": {
                 "recent_health_metrics": len(metrics_history),
-                "metric_types": sorted({str(metric.get("metric_type") or metric.get("type") or "").lower() for metric in metrics_history if metric.get("metric_type") or metric.get("type")}),
+                "metric_types": metrics_history.metric_types,
                 "medications": len(medications or []),
                 "experiments": len(experiment_summary or []),
                 "emergency_contacts": len(emergency_contacts or []),
@@ -578,8 +750,9 @@ class SharedHealthPredictor:
     async def detect_early_warnings(
         self,
         user_id: str,
-        metrics_history: List[Dict[str, Any]],
+        metrics_history: MetricsInput,
     ) -> List[Dict[str, Any]]:
+        metrics_history = MetricFrame.of(metrics_history)
         warnings: List[Dict[str, Any]] = []
 
         resting_hr = self._average_metric(metrics_history, ["heart_rate", "resting_hr"])
@@ -640,7 +813,7 @@ class SharedHealthPredictor:
     def _build_member_prediction(
         self,
         member: Dict[str, Any],
-        metrics_history: List[Dict[str, Any]],
+        metrics_history: MetricFrame,
         profile: Optional[Dict[str, Any]],
         medications: Optional[List[Dict[str, Any]]],
         experiment_summary: Optional[List[Dict[str, Any]]],
@@ -707,9 +880,10 @@ class SharedHealthPredictor:
     async def predict_user(
         self,
         user_id: str,
-        metrics_history: List[Dict[str, Any]],
+        metrics_history: MetricsInput,
         profile: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
+        metrics_history = MetricFrame.of(metrics_history)
         ocean_scores = self._extract_ocean_scores({}, profile)
         forecasts = self._build_condition_forecasts(metrics_history, profile, self._extract_conditions(profile), ocean_scores)
         aggregate_score = clamp_score(mean(item["score"] for item in forecasts)) if forecasts else 0.0
@@ -753,7 +927,7 @@ class SharedHealthPredictor:
         family_members: List[Dict[str, Any]],
         consent_map: Optional[Dict[str, bool]] = None,
         relationships: Optional[List[Dict[str, Any]]] = None,
-        metrics_history: Optional[List[Dict[str, Any]]] = None,
+        metrics_history: Optional[MetricsInput] = None,
         profile: Optional[Dict[str, Any]] = None,
         medications: Optional[List[Dict[str, Any]]] = None,
         experiment_summary: Optional[List[Dict[str, Any]]] = None,
@@ -761,13 +935,21 @@ class SharedHealthPredictor:
         emergency_contacts: Optional[List[Dict[str, Any]]] = None,
         existing_actions: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
-        metrics_history = metrics_history or []
+        metrics_history = MetricFrame.of(metrics_history)
         family_members = family_members or []
         consent_map = consent_map or {}
 
+        shared_stamp = (
+            metrics_history.version,
+            fingerprint([profile, medications, experiment_summary, existing_actions]),
+        )
+        # Every member is scored against the same history, so the warnings are shared.
+        early_warnings: Optional[List[Dict[str, Any]]] = None
         member_predictions: List[Dict[str, Any]] = []
         for member in family_members:
-            if consent_map and not consent_map.get(str(member.get("id")), False):
+            member_id = str(member.get("id"))
+            if consent_map and not consent_map.get(member_id, False):
+                self.prediction_cache.invalidate(user_id, member_id)
                 member_predictions.append(
                     {
                         "member_id": member.get("id"),
@@ -778,15 +960,24 @@ class SharedHealthPredictor:
                     }
                 )
                 continue
-            member_prediction = self._build_member_prediction(
-                member,
-                metrics_history,
-                profile,
-                medications,
-                experiment_summary,
-                existing_actions,
-            )
-            member_prediction["early_warnings"] = await self.detect_early_warnings(user_id, metrics_history)
+            stamp = (shared_stamp, fingerprint(member))
+            cached = self.prediction_cache.get(user_id, member_id, stamp)
+            if cached is None:
+                cached = self._build_member_prediction(
+                    member,
+                    metrics_history,
+                    profile,
+                    medications,
+                    experiment_summary,
+                    existing_actions,
+                )
+                if early_warnings is None:
+                    early_warnings = await self.detect_early_warnings(user_id, metrics_history)
+                cached["early_warnings"] = early_warnings
+                self.prediction_cache.put(user_id, member_id, stamp, cached)
+            # Per-request copy: the aggregation below rounds risk_score in place.
+            member_prediction = dict(cached)
+            member_prediction["early_warnings"] = list(cached["early_warnings"])
             member_predictions.append(member_prediction)
 
         active_predictions = [entry for entry in member_predictions if entry.get("prediction")]
@@ -1,20 +1,152 @@
 import math
 import uuid
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Set
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.engram import Engram
-from app.models.finance import WiseGoldSocialStanding
+from app.models.finance import WiseGoldSocialAggregate, WiseGoldSocialStanding
 from app.models.interaction import AgentInteraction
 
+RECENCY_DECAY_DAYS = 45.0
+RECENCY_FLOOR = 0.35
+# Age at which exp(-age / 45) reaches the floor; older interactions weigh a constant 0.35.
+RECENCY_FLOOR_AGE_DAYS = -RECENCY_DECAY_DAYS * math.log(RECENCY_FLOOR)
+SECONDS_PER_DAY = 86400.0
+# Upper bound on live day buckets per aggregate.
+DECAY_BUCKET_COUNT = math.ceil(RECENCY_FLOOR_AGE_DAYS) + 1
+# Full rescans reconcile aggregates with interactions written outside record_interactions.
+AGGREGATE_REBUILD_INTERVAL = timedelta(days=7)
+SUM_KEYS = ("total", "in_weight", "in_sentiment", "in_rapport", "out_weight", "out_sentiment")
+
 
 def _clamp(value: float, lower: float, upper: float) -> float:
     return max(lower, min(upper, value))
 
 
+class ReputationAggregate:
+    """
+    Rolling, incrementally maintained inputs to a user's reputation score.
+
+    The recency weight is ``max(0.35, exp(-age / 45d))``. Interactions still on
+    the exponential part are summed into one bucket per UTC day, holding plain
+    sums and sums weighted relative to the day start, so a bucket never changes
+    as time passes and there are at most ``DECAY_BUCKET_COUNT`` of them. A day
+    whose start has reached the floor age is settled into constant-weight sums;
+    interactions late in that day are rounded down to the floor early (by at
+    most one day's decay).
+    """
+
+    def __init__(self, as_of: datetime):
+        self.total_interactions = 0
+        # day -> {key: [plain sum, sum weighted by exp((created - day start) / 45d)]}
+        self.buckets: Dict[int, Dict[str, List[float]]] = {}
+        self.settled = dict.fromkeys(SUM_KEYS, 0.0)
+        self.as_of = as_of
+        self.inbound_peers: Set[str] = set()
+        self.outbound_peers: Set[str] = set()
+
+    @classmethod
+    def from_row(cls, row: WiseGoldSocialAggregate, now: datetime) -> "ReputationAggregate":
+        aggregate = cls(now)
+        aggregate.total_interactions = int(row.total_interactions or 0)
+        aggregate.settled.update(row.settled_sums or {})
+        aggregate.buckets = {
+            int(day): {key: list(pair) for key, pair in sums.items()}
+            for day, sums in (row.decay_buckets or {}).items()
+        }
+        aggregate.inbound_peers = set(row.inbound_peers or [])
+        aggregate.outbound_peers = set(row.outbound_peers or [])
+        aggregate.advance(now)
+        return aggregate
+
+    def to_row(self, row: WiseGoldSocialAggregate) -> None:
+        row.total_interactions = self.total_interactions
+        row.settled_sums = dict(self.settled)
+        row.decay_buckets = {
+            str(day): {key: list(pair) for key, pair in sums.items()} for day, sums in sorted(self.buckets.items())
+        }
+        row.inbound_peers = sorted(self.inbound_peers)
+        row.outbound_peers = sorted(self.outbound_peers)
+
+    @staticmethod
+    def _contributions(inbound: bool, outbound: bool, sentiment: float, rapport: float) -> Dict[str, float]:
+        values = {"total": 1.0}
+        if inbound:
+            values.update(in_weight=1.0, in_sentiment=sentiment, in_rapport=rapport)
+        if outbound:
+            values.update(out_weight=1.0, out_sentiment=sentiment)
+        return values
+
+    def _settled_through(self) -> int:
+        """Last day whose bucket sits at the floor as of ``as_of``."""
+        return math.floor(self.as_of.timestamp() / SECONDS_PER_DAY - RECENCY_FLOOR_AGE_DAYS)
+
+    def advance(self, now: datetime) -> None:
+        """Move ``as_of`` forward and settle day buckets that reached the floor."""
+        if now > self.as_of:
+            self.as_of = now
+        cutoff = self._settled_through()
+        for day in [day for day in self.buckets if day <= cutoff]:
+            for key, (plain, _) in self.buckets.pop(day).items():
+                self.settled[key] += plain * RECENCY_FLOOR
+
+    def add(
+        self,
+        *,
+        initiator_id: Any,
+        receiver_id: Any,
+        created_at: Optional[datetime],
+        sentiment_score: Optional[float],
+        emotional_rapport: Optional[float],
+        initiator_is_user: bool,
+        receiver_is_user: bool,
+    ) -> None:
+        if not initiator_is_user and not receiver_is_user:
+            return
+
+        self.total_interactions += 1
+        inbound = receiver_is_user and not initiator_is_user
+        outbound = initiator_is_user and not receiver_is_user
+        if inbound:
+            self.inbound_peers.add(str(initiator_id))
+        if outbound:
+            self.outbound_peers.add(str(receiver_id))
+
+        sentiment = SocialReputationService._sentiment_to_unit(sentiment_score)
+        rapport = _clamp(float(emotional_rapport or 0.0), 0.0, 1.0)
+        contributions = self._contributions(inbound, outbound, sentiment, rapport)
+
+        created = SocialReputationService._to_utc(created_at)
+        if created is None:
+            day = None
+        else:
+            created = min(created, self.as_of)
+            day = int(created.timestamp() // SECONDS_PER_DAY)
+        if day is None or day <= self._settled_through():
+            for key, value in contributions.items():
+                self.settled[key] += value * RECENCY_FLOOR
+            return
+
+        offset = math.exp((created.timestamp() - day * SECONDS_PER_DAY) / SECONDS_PER_DAY / RECENCY_DECAY_DAYS)
+        bucket = self.buckets.setdefault(day, {})
+        for key, value in contributions.items():
+            pair = bucket.setdefault(key, [0.0, 0.0])
+            pair[0] += value
+            pair[1] += value * offset
+
+    def totals(self) -> Dict[str, float]:
+        totals = dict(self.settled)
+        as_of_days = self.as_of.timestamp() / SECONDS_PER_DAY
+        for day, sums in self.buckets.items():
+            decay = math.exp(-(as_of_days - day) / RECENCY_DECAY_DAYS)
+            for key, (_, weighted) in sums.items():
+                totals[key] += weighted * decay
+        return totals
+
+
 class SocialReputationService:
     """
     Computes how a user's engrams are perceived by the wider social graph and
@@ -40,15 +172,6 @@ class SocialReputationService:
     def _sentiment_to_unit(value: Optional[float]) -> float:
         return _clamp(((float(value or 0.0) + 1.0) / 2.0), 0.0, 1.0)
 
-    @staticmethod
-    def _recency_weight(value: Optional[datetime]) -> float:
-        dt = SocialReputationService._to_utc(value)
-        if not dt:
-            return 0.35
-        age_days = max(0.0, (datetime.now(timezone.utc) - dt).total_seconds() / 86400.0)
-        # Recent interactions matter more, but historical reputation should not vanish.
-        return _clamp(math.exp(-age_days / 45.0), 0.35, 1.0)
-
     @staticmethod
     def _tier_from_bps(score_bps: int) -> str:
         if score_bps >= 8500:
@@ -80,102 +203,20 @@ class SocialReputationService:
             "last_calculated_at": datetime.utcnow().isoformat(),
         }
 
-    async def _get_or_create_row(self, session: AsyncSession, user_id: str) -> WiseGoldSocialStanding:
-        row = (await session.execute(
-            select(WiseGoldSocialStanding).where(WiseGoldSocialStanding.user_id == user_id)
-        )).scalar_one_or_none()
-        if not row:
-            row = WiseGoldSocialStanding(user_id=user_id)
-            session.add(row)
-            await session.flush()
-        return row
-
-    async def calculate_user_reputation(
-        self,
-        session: AsyncSession,
-        user_id: str,
-        *,
-        persist: bool = True,
-        wallet_address: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        user_uuid = self._parse_user_uuid(user_id)
-        if not user_uuid:
-            snapshot = self._neutral_snapshot(user_id, reason="user-id-not-uuid")
-            if persist:
-                row = await self._get_or_create_row(session, user_id)
-                self._apply_snapshot_to_row(row, snapshot, wallet_address=wallet_address)
-                await session.flush()
-            return snapshot
-
-        engrams = (await session.execute(
-            select(Engram.id).where(Engram.user_id == user_uuid)
-        )).scalars().all()
-
-        user_engram_ids: Set[Any] = set(engrams)
-        if not user_engram_ids:
-            snapshot = self._neutral_snapshot(user_id, reason="no-engrams")
-            if persist:
-                row = await self._get_or_create_row(session, user_id)
-                self._apply_snapshot_to_row(row, snapshot, wallet_address=wallet_address)
-                await session.flush()
-            return snapshot
-
-        interactions = (await session.execute(
-            select(AgentInteraction).where(
-                or_(
-                    AgentInteraction.initiator_id.in_(list(user_engram_ids)),
-                    AgentInteraction.receiver_id.in_(list(user_engram_ids)),
-                )
-            )
-        )).scalars().all()
-
-        if not interactions:
-            snapshot = self._neutral_snapshot(user_id, reason="no-interactions")
-            if persist:
-                row = await self._get_or_create_row(session, user_id)
-                self._apply_snapshot_to_row(row, snapshot, wallet_address=wallet_address)
-                await session.flush()
-            return snapshot
-
-        inbound_weight = 0.0
-        inbound_sentiment = 0.0
-        inbound_rapport = 0.0
-        outbound_weight = 0.0
-        outbound_sentiment = 0.0
-        total_weight = 0.0
-        total_interactions = 0
-        peer_ids: Set[Any] = set()
-        inbound_peers: Set[Any] = set()
-        outbound_peers: Set[Any] = set()
-
-        for interaction in interactions:
-            initiator_is_user = interaction.initiator_id in user_engram_ids
-            receiver_is_user = interaction.receiver_id in user_engram_ids
-            if not initiator_is_user and not receiver_is_user:
-                continue
-
-            total_interactions += 1
-            weight = self._recency_weight(interaction.created_at)
-            sentiment_unit = self._sentiment_to_unit(interaction.sentiment_score)
-            rapport_unit = _clamp(float(interaction.emotional_rapport or 0.0), 0.0, 1.0)
-            total_weight += weight
-
-            if receiver_is_user and interaction.initiator_id not in user_engram_ids:
-                peer_ids.add(interaction.initiator_id)
-                inbound_peers.add(interaction.initiator_id)
-                inbound_weight += weight
-                inbound_sentiment += sentiment_unit * weight
-                inbound_rapport += rapport_unit * weight
-
-            if initiator_is_user and interaction.receiver_id not in user_engram_ids:
-                peer_ids.add(interaction.receiver_id)
-                outbound_peers.add(interaction.receiver_id)
-                outbound_weight += weight
-                outbound_sentiment += sentiment_unit * weight
-
-        inbound_sentiment_avg = (inbound_sentiment / inbound_weight) if inbound_weight else 0.5
-        inbound_rapport_avg = (inbound_rapport / inbound_weight) if inbound_weight else 0.5
-        outbound_sentiment_avg = (outbound_sentiment / outbound_weight) if outbound_weight else 0.5
+    @classmethod
+    def _snapshot_from_aggregate(cls, user_id: str, aggregate: ReputationAggregate) -> Dict[str, Any]:
+        totals = aggregate.totals()
+        inbound_peers = aggregate.inbound_peers
+        outbound_peers = aggregate.outbound_peers
+        peer_ids = inbound_peers | outbound_peers
+        total_interactions = aggregate.total_interactions
+        inbound_weight = totals["in_weight"]
+        outbound_weight = totals["out_weight"]
+        total_weight = totals["total"]
+
+        inbound_sentiment_avg = (totals["in_sentiment"] / inbound_weight) if inbound_weight else 0.5
+        inbound_rapport_avg = (totals["in_rapport"] / inbound_weight) if inbound_weight else 0.5
+        outbound_sentiment_avg = (totals["out_sentiment"] / outbound_weight) if outbound_weight else 0.5
         reciprocity = (len(inbound_peers & outbound_peers) / len(peer_ids)) if peer_ids else 0.0
         reach = _clamp(len(peer_ids) / 12.0, 0.0, 1.0)
         activity = _clamp(total_interactions / 24.0, 0.0, 1.0)
@@ -196,13 +237,13 @@ class SocialReputationService:
         daily_manna_multiplier_bps = int(round(_clamp(7000 + (normalized_score * 8000), 7000, 15000)))
         governance_weight_bps = int(round(_clamp(8000 + (normalized_score * 5000), 8000, 13000)))
 
-        snapshot = {
+        return {
             "user_id": user_id,
             "reputation_bps": reputation_bps,
             "normalized_score": normalized_score,
             "daily_manna_multiplier_bps": daily_manna_multiplier_bps,
             "governance_weight_bps": governance_weight_bps,
-            "tier": self._tier_from_bps(reputation_bps),
+            "tier": cls._tier_from_bps(reputation_bps),
             "total_interactions": total_interactions,
             "distinct_peers": len(peer_ids),
             "reciprocal_peers": len(inbound_peers & outbound_peers),
@@ -212,12 +253,245 @@ class SocialReputationService:
             "last_calculated_at": datetime.utcnow().isoformat(),
         }
 
-        if persist:
-            row = await self._get_or_create_row(session, user_id)
-            self._apply_snapshot_to_row(row, snapshot, wallet_address=wallet_address)
+    def _score_interactions(
+        self,
+        user_id: str,
+        user_engram_ids: Set[Any],
+        interactions: Iterable[Any],
+        now: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """Score a user straight from interaction rows (full rescan)."""
+        return self._snapshot_from_aggregate(
+            user_id, self._aggregate_interactions(user_engram_ids, interactions, now or datetime.now(timezone.utc))
+        )
+
+    @staticmethod
+    def _aggregate_interactions(
+        user_engram_ids: Set[Any], interactions: Iterable[Any], now: datetime
+    ) -> ReputationAggregate:
+        aggregate = ReputationAggregate(now)
+        for interaction in interactions:
+            aggregate.add(
+                initiator_id=interaction.initiator_id,
+                receiver_id=interaction.receiver_id,
+                created_at=interaction.created_at,
+                sentiment_score=interaction.sentiment_score,
+                emotional_rapport=interaction.emotional_rapport,
+                initiator_is_user=interaction.initiator_id in user_engram_ids,
+                receiver_is_user=interaction.receiver_id in user_engram_ids,
+            )
+        return aggregate
+
+    async def calculate_user_reputation(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        *,
+        persist: bool = True,
+        wallet_address: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        snapshots = await self.calculate_reputations_bulk(
+            session, [user_id], persist=persist, wallet_addresses={user_id: wallet_address}
+        )
+        return snapshots[user_id]
+
+    async def calculate_reputations_bulk(
+        self,
+        session: AsyncSession,
+        user_ids: Sequence[str],
+        *,
+        persist: bool = True,
+        wallet_addresses: Optional[Dict[str, Optional[str]]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Reputation snapshots for many users, read from their rolling aggregates.
+        Users without a fresh aggregate are rebuilt together from one engram
+        query and one interaction query.
+        """
+        now = datetime.now(timezone.utc)
+        user_uuids = {user_id: self._parse_user_uuid(user_id) for user_id in user_ids}
+        valid_user_ids = [user_id for user_id, user_uuid in user_uuids.items() if user_uuid]
+
+        rows: Dict[str, WiseGoldSocialAggregate] = {}
+        if valid_user_ids:
+            rows = {
+                row.user_id: row
+                for row in (await session.execute(
+                    select(WiseGoldSocialAggregate).where(WiseGoldSocialAggregate.user_id.in_(valid_user_ids))
+                )).scalars().all()
+            }
+
+        aggregates: Dict[str, Optional[ReputationAggregate]] = {}
+        stale: List[str] = []
+        for user_id in valid_user_ids:
+            row = rows.get(user_id)
+            rebuilt_at = self._to_utc(row.rebuilt_at) if row else None
+            if rebuilt_at is None or now - rebuilt_at > AGGREGATE_REBUILD_INTERVAL:
+                stale.append(user_id)
+            else:
+                # Decayed as of now in memory only; rows are written under a lock.
+                aggregates[user_id] = ReputationAggregate.from_row(row, now)
+        if stale:
+            # Lock rows being rebuilt so a concurrent record_interactions is not overwritten.
+            stale_rows = [user_id for user_id in stale if user_id in rows]
+            if stale_rows:
+                rows.update({
+                    row.user_id: row
+                    for row in (await session.execute(
+                        select(WiseGoldSocialAggregate)
+                        .where(WiseGoldSocialAggregate.user_id.in_(stale_rows))
+                        .with_for_update()
+                        .execution_options(populate_existing=True)
+                    )).scalars().all()
+                })
+            aggregates.update(await self._rebuild_aggregates(
+                session, {user_id: user_uuids[user_id] for user_id in stale}, rows, now
+            ))
+
+        snapshots: Dict[str, Dict[str, Any]] = {}
+        for user_id, user_uuid in user_uuids.items():
+            aggregate = aggregates.get(user_id)
+            if not user_uuid:
+                snapshots[user_id] = self._neutral_snapshot(user_id, reason="user-id-not-uuid")
+            elif aggregate is None:
+                snapshots[user_id] = self._neutral_snapshot(user_id, reason="no-engrams")
+            elif not aggregate.total_interactions:
+                snapshots[user_id] = self._neutral_snapshot(user_id, reason="no-interactions")
+            else:
+                snapshots[user_id] = self._snapshot_from_aggregate(user_id, aggregate)
+
+        if persist and snapshots:
+            standings = {
+                row.user_id: row
+                for row in (await session.execute(
+                    select(WiseGoldSocialStanding).where(WiseGoldSocialStanding.user_id.in_(list(snapshots)))
+                )).scalars().all()
+            }
+            for user_id, snapshot in snapshots.items():
+                row = standings.get(user_id)
+                if row is None:
+                    row = WiseGoldSocialStanding(user_id=user_id)
+                    session.add(row)
+                self._apply_snapshot_to_row(
+                    row, snapshot, wallet_address=(wallet_addresses or {}).get(user_id)
+                )
+        if persist or stale:
             await session.flush()
 
-        return snapshot
+        return snapshots
+
+    @staticmethod
+    async def _engram_owners(session: AsyncSession, condition: Any) -> Dict[Any, Any]:
+        return {
+            engram_id: owner
+            for engram_id, owner in (await session.execute(
+                select(Engram.id, Engram.user_id).where(condition)
+            )).all()
+        }
+
+    async def _rebuild_aggregates(
+        self,
+        session: AsyncSession,
+        user_uuids: Dict[str, uuid.UUID],
+        rows: Dict[str, WiseGoldSocialAggregate],
+        now: datetime,
+    ) -> Dict[str, Optional[ReputationAggregate]]:
+        """Full rescan for the given users; the result replaces their aggregate rows."""
+        owner_by_engram = await self._engram_owners(session, Engram.user_id.in_(list(user_uuids.values())))
+        engrams_by_user: Dict[Any, Set[Any]] = {}
+        for engram_id, owner in owner_by_engram.items():
+            engrams_by_user.setdefault(owner, set()).add(engram_id)
+
+        interactions_by_user: Dict[Any, List[Any]] = {}
+        if owner_by_engram:
+            engram_ids = list(owner_by_engram)
+            interactions = (await session.execute(
+                select(
+                    AgentInteraction.initiator_id,
+                    AgentInteraction.receiver_id,
+                    AgentInteraction.created_at,
+                    AgentInteraction.sentiment_score,
+                    AgentInteraction.emotional_rapport,
+                ).where(
+                    or_(
+                        AgentInteraction.initiator_id.in_(engram_ids),
+                        AgentInteraction.receiver_id.in_(engram_ids),
+                    )
+                )
+            )).all()
+            for interaction in interactions:
+                owners = {owner_by_engram.get(interaction.initiator_id), owner_by_engram.get(interaction.receiver_id)}
+                owners.discard(None)
+                for owner in owners:
+                    interactions_by_user.setdefault(owner, []).append(interaction)
+
+        rebuilt: Dict[str, Optional[ReputationAggregate]] = {}
+        for user_id, user_uuid in user_uuids.items():
+            if user_uuid not in engrams_by_user:
+                rebuilt[user_id] = None
+                continue
+            aggregate = self._aggregate_interactions(
+                engrams_by_user[user_uuid], interactions_by_user.get(user_uuid, []), now
+            )
+            row = rows.get(user_id)
+            if row is None:
+                row = WiseGoldSocialAggregate(user_id=user_id)
+                session.add(row)
+            aggregate.to_row(row)
+            row.rebuilt_at = now
+            rebuilt[user_id] = aggregate
+        return rebuilt
+
+    async def record_interactions(self, session: AsyncSession, interactions: Sequence[Any]) -> None:
+        """
+        Fold newly written interactions into the owners' aggregates. Call in the
+        same transaction that adds the interactions. Users without an aggregate
+        yet are skipped; their first read rebuilds it from the table.
+        """
+        engram_ids = {
+            engram_id
+            for interaction in interactions
+            for engram_id in (interaction.initiator_id, interaction.receiver_id)
+            if engram_id is not None
+        }
+        if not engram_ids:
+            return
+        owner_by_engram = await self._engram_owners(session, Engram.id.in_(list(engram_ids)))
+        user_ids = sorted({str(owner) for owner in owner_by_engram.values()})
+        if not user_ids:
+            return
+
+        rows = {
+            row.user_id: row
+            for row in (await session.execute(
+                select(WiseGoldSocialAggregate)
+                .where(WiseGoldSocialAggregate.user_id.in_(user_ids))
+                .with_for_update()
+            )).scalars().all()
+        }
+        if not rows:
+            return
+
+        now = datetime.now(timezone.utc)
+        aggregates = {user_id: ReputationAggregate.from_row(row, now) for user_id, row in rows.items()}
+        for interaction in interactions:
+            initiator_owner = owner_by_engram.get(interaction.initiator_id)
+            receiver_owner = owner_by_engram.get(interaction.receiver_id)
+            for owner in {initiator_owner, receiver_owner} - {None}:
+                aggregate = aggregates.get(str(owner))
+                if aggregate is None:
+                    continue
+                aggregate.add(
+                    initiator_id=interaction.initiator_id,
+                    receiver_id=interaction.receiver_id,
+                    created_at=getattr(interaction, "created_at", None) or now,
+                    sentiment_score=interaction.sentiment_score,
+                    emotional_rapport=interaction.emotional_rapport,
+                    initiator_is_user=initiator_owner == owner,
+                    receiver_is_user=receiver_owner == owner,
+                )
+        for user_id, aggregate in aggregates.items():
+            aggregate.to_row(rows[user_id])
 
     def _apply_snapshot_to_row(
         self,
@@ -0,0 +1,251 @@
+"""
+Merchant-to-category classification for finance transactions.
+
+``CategoryClassifier`` compiles an ordered list of keyword rules into one
+prefix-factored regular expression (a keyword trie), so a transaction is
+categorized in one scan of its text plus a few precomputed checks for keywords
+that straddle a match, instead of one substring search per keyword; with
+``pyahocorasick`` installed an Aho-Corasick automaton is used instead. The
+first rule (in list order) with any keyword anywhere in the text wins, exactly
+like checking the rules one by one. On unique texts the regex scan is about
+1.5x as fast as the rule-by-rule search; most of the gain on real imports
+comes from memoizing results per text, since the same merchant strings recur
+across a user's history (see scripts/benchmark_transaction_classifier.py).
+
+``MerchantCategoryCache`` holds, per user, the category a user chose for a
+merchant (on manual entry or recategorization). Learned choices take
+precedence over the keyword rules. The choices themselves are stored in
+``finance_merchant_categories``; the cache holds whole users loaded from there,
+bounded by user count and reloaded after ``max_age_seconds`` so choices made
+in another worker are picked up.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CategoryRule = Tuple[Sequence[str], str]
+
+DEFAULT_CATEGORY_RULES: List[CategoryRule] = [
+    (["grocery", "supermarket"], "groceries"),
+    (["restaurant", "coffee", "food and drink"], "dining out"),
+    (["rent", "mortgage"], "rent/mortgage"),
+    (["utility", "electric", "water", "internet", "phone"], "utilities"),
+    (["maintenance", "repair"], "maintenance"),
+    (["gas", "fuel"], "gas"),
+    (["insurance"], "car insurance"),
+    (["transit", "taxi", "rideshare", "public transportation"], "public transit"),
+    (["movie", "streaming", "music", "entertainment"], "entertainment"),
+    (["clothing", "apparel"], "clothing"),
+    (["personal care", "salon", "barber", "pharmacy"], "personal care"),
+    (["investment", "brokerage"], "investments"),
+    (["vacation", "travel", "airline", "hotel"], "vacation"),
+    (["credit card"], "credit card payments"),
+    (["student loan", "loan"], "student loans"),
+    (["emergency"], "emergency fund"),
+]
+
+_MERCHANT_NOISE = re.compile(r"[#*]\s*\d+|\d{3,}|[^\w&' ]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_merchant(name: Optional[str]) -> str:
+    """Lower-case merchant name without store numbers and punctuation ("STARBUCKS #1234" -> "starbucks")."""
+    if not name:
+        return ""
+    return _WHITESPACE.sub(" ", _MERCHANT_NOISE.sub(" ", name.lower())).strip()
+
+
+@lru_cache()
+def _get_ahocorasick():
+    try:
+        import ahocorasick
+    except Exception:
+        return None
+    return ahocorasick
+
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """Regex matching the longest of ``words`` at a position, factored by common prefix."""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and "" not in node else "(?:" + "|".join(branches) + ")"
+        return body + "?" if "" in node else body
+
+    return build(trie)
+
+
+def _straddles(needle: str, other: str) -> bool:
+    """Whether ``other`` can start inside ``needle`` and end past it (a suffix of one is a prefix of the other)."""
+    return any(
+        other.startswith(needle[start:]) and len(other) > len(needle) - start for start in range(1, len(needle))
+    )
+
+
+class CategoryClassifier:
+    def __init__(self, rules: Sequence[CategoryRule] = DEFAULT_CATEGORY_RULES, memo_size: int = 65_536):
+        self.rules = [(tuple(needle.lower() for needle in needles), category) for needles, category in rules]
+        self.memo_size = memo_size
+        self._memo: Dict[str, Optional[str]] = {}
+
+        first_rule: Dict[str, int] = {}
+        for index, (needles, _) in enumerate(self.rules):
+            for needle in needles:
+                first_rule.setdefault(needle, index)
+
+        self._automaton = None
+        self._pattern = None
+        ahocorasick = _get_ahocorasick()
+        if ahocorasick is not None and first_rule:
+            # Aho-Corasick reports every (overlapping) keyword occurrence in one pass.
+            automaton = ahocorasick.Automaton()
+            for needle, rule in first_rule.items():
+                automaton.add_word(needle, rule)
+            automaton.make_automaton()
+            self._automaton = automaton
+        elif first_rule:
+            # findall reports the longest keyword at a position and resumes after it. Keywords
+            # inside a match are folded into its priority; one that starts inside a match and runs
+            # past its end (a "straddler") is checked separately, only if it could win.
+            self._rule_of_match = {
+                needle: min(rule for other, rule in first_rule.items() if other in needle)
+                for needle in first_rule
+            }
+            straddlers = {
+                needle: sorted(
+                    (rule, other)
+                    for other, rule in first_rule.items()
+                    if rule < self._rule_of_match[needle] and _straddles(needle, other)
+                )
+                for needle in first_rule
+            }
+            self._straddlers = {needle: found for needle, found in straddlers.items() if found}
+            self._pattern = re.compile(_trie_pattern(list(first_rule)))
+
+    def _match(self, text: str) -> Optional[str]:
+        if self._automaton is not None:
+            rules = [rule for _, rule in self._automaton.iter(text)]
+        elif self._pattern is not None:
+            matches = self._pattern.findall(text)
+            if not matches:
+                return None
+            best = min(map(self._rule_of_match.__getitem__, matches))
+            for needle in matches:
+                for rule, other in self._straddlers.get(needle, ()):
+                    if rule >= best:
+                        break
+                    if other in text:
+                        best = rule
+                        break
+            return self.rules[best][1]
+        else:
+            rules = []
+        return self.rules[min(rules)][1] if rules else None
+
+    def classify(self, text: str) -> Optional[str]:
+        """Category name of the first rule with a keyword in ``text`` (already lower-cased)."""
+        if not text:
+            return None
+        if self.memo_size <= 0:
+            return self._match(text)
+        try:
+            return self._memo[text]
+        except KeyError:
+            pass
+        category = self._match(text)
+        if len(self._memo) >= self.memo_size:
+            # Merchant strings repeat heavily; a full reset is cheaper than LRU bookkeeping per hit.
+            self._memo.clear()
+        self._memo[text] = category
+        return category
+
+    def classify_fields(self, *fields: Optional[str]) -> Optional[str]:
+        return self.classify(" ".join(filter(None, fields)).lower())
+
+
+class MerchantCategoryCache:
+    def __init__(
+        self,
+        max_users: int = 10_000,
+        max_age_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_users = max_users
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        # user_id -> (loaded_at, {normalized merchant: category_id}), least recently used first
+        self._users: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def has(self, user_id: Any) -> bool:
+        """Whether the user's choices are loaded and recent enough to use."""
+        with self._lock:
+            entry = self._users.get(str(user_id))
+            if entry is None:
+                return False
+            if self._clock() - entry[0] > self.max_age_seconds:
+                del self._users[str(user_id)]
+                return False
+            return True
+
+    def load(self, user_id: Any, choices: Iterable[Tuple[str, Any]]):
+        """Replace the user's entries with their stored (merchant, category_id) choices."""
+        entries = {normalize_merchant(merchant): category_id for merchant, category_id in choices}
+        entries.pop("", None)
+        with self._lock:
+            self._users[str(user_id)] = (self._clock(), entries)
+            self._users.move_to_end(str(user_id))
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def lookup(self, user_id: Any, merchant: Optional[str]) -> Optional[Any]:
+        merchant = normalize_merchant(merchant)
+        if not merchant:
+            return None
+        with self._lock:
+            entry = self._users.get(str(user_id))
+            if entry is None:
+                return None
+            self._users.move_to_end(str(user_id))
+            return entry[1].get(merchant)
+
+    def learn(self, user_id: Any, merchant: Optional[str], category_id: Optional[Any]):
+        """
+        Apply a choice already written to storage; ``None`` forgets the merchant.
+        Users that are not loaded are left alone: their next load reads it back.
+        """
+        merchant = normalize_merchant(merchant)
+        if not merchant:
+            return
+        with self._lock:
+            entry = self._users.get(str(user_id))
+            if entry is None:
+                return
+            if category_id is None:
+                entry[1].pop(merchant, None)
+            else:
+                entry[1][merchant] = category_id
+
+    def forget(self, user_id: Any):
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+default_classifier = CategoryClassifier()
+merchant_category_cache = MerchantCategoryCache()
@@ -1,12 +1,15 @@
 import json
 import logging
 import random
+import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.finance import (
     LivingWill,
     RitualBondNFT,
@@ -285,6 +288,188 @@ class GoldenSovereignEngine:
             "recipients": recipient_count,
         }
 
+    async def distribute_living_manna_batched(self, batch_size: Optional[int] = None) -> Dict[str, float]:
+        """
+        Set-based equivalent of ``distribute_living_manna``.
+
+        Wallets are walked in keyset pages. Per page, bonds come with the wallet
+        query, and standings and attestations come from one bulk query each.
+        Allocations, limits and pool exhaustion are computed with numpy. Balances
+        and ledger entries are written with one bulk UPDATE and one bulk INSERT.
+        """
+        batch_size = batch_size or settings.WISEGOLD_TICK_BATCH_SIZE
+        policy_service = WiseGoldPolicyService(self.session)
+        policy = await self._get_policy_state()
+
+        total_outflow = 0.0
+        recipient_count = 0
+        held_count = 0
+        after_id = None
+
+        while self.daily_manna_pool > 0:
+            query = (
+                select(
+                    WiseGoldWallet.id,
+                    WiseGoldWallet.user_id,
+                    WiseGoldWallet.solana_pubkey,
+                    WiseGoldWallet.balance,
+                    RitualBondNFT.multiplier,
+                )
+                .join(LivingWill, LivingWill.wallet_id == WiseGoldWallet.id)
+                .outerjoin(RitualBondNFT, RitualBondNFT.wallet_id == WiseGoldWallet.id)
+                .where(LivingWill.status == "ACTIVE")
+                .order_by(WiseGoldWallet.id)
+                .limit(batch_size)
+            )
+            if after_id is not None:
+                query = query.where(WiseGoldWallet.id > after_id)
+            rows = (await self.session.execute(query)).all()
+            if not rows:
+                break
+            after_id = rows[-1].id
+
+            addresses = {row.user_id: row.solana_pubkey for row in rows}
+            standings = await social_reputation_service.calculate_reputations_bulk(
+                self.session, list(addresses), persist=True, wallet_addresses=addresses
+            )
+            attestations = await policy_service.sync_attestations_bulk(addresses)
+
+            ritual_boost = np.array([float(row.multiplier or 1.0) for row in rows])
+            social_boost = np.array(
+                [float(standings[row.user_id]["daily_manna_multiplier_bps"]) / 10000.0 for row in rows]
+            )
+            scores = np.array([float(standings[row.user_id].get("normalized_score", 0.5)) for row in rows])
+            attested = np.array([
+                any(att.status == "ACTIVE" for att in attestations[row.user_id]) for row in rows
+            ])
+            amounts = np.round(self.current_base_manna * ritual_boost * social_boost, 4)
+            limits = policy_service.compute_limits("mint", policy, scores)
+            granted, offered, processed = self._allocate_pool(amounts, limits, attested)
+
+            now = datetime.utcnow()
+            balance_updates: List[Dict[str, Any]] = []
+            entries: List[Dict[str, Any]] = []
+            for idx in range(processed):
+                row = rows[idx]
+                standing = standings[row.user_id]
+                balance = float(row.balance or 0.0)
+                amount = float(granted[idx])
+                if amount > 0:
+                    balance = balance + amount
+                    balance_updates.append({"id": row.id, "balance": balance, "last_manna_claim": now})
+                    entries.append(self._ledger_row(
+                        row, "credit", amount, balance, "COMPLETED",
+                        "Daily manna distribution applied.",
+                        {
+                            "ritual_multiplier": float(ritual_boost[idx]),
+                            "social_multiplier": float(social_boost[idx]),
+                            "reputation_bps": standing["reputation_bps"],
+                            "community_tier": standing["tier"],
+                        },
+                        now,
+                    ))
+                elif offered[idx] > 0:
+                    evaluation = policy_service.build_evaluation(
+                        action="mint",
+                        amount=float(offered[idx]),
+                        policy=policy,
+                        standing=standing,
+                        attestations=attestations[row.user_id],
+                        effective_limit=float(limits[idx]),
+                    )
+                    held_count += 1
+                    entries.append(self._ledger_row(
+                        row, "info", 0.0, balance, "FAILED",
+                        f"Manna distribution held: {evaluation['reason']}",
+                        {
+                            "reason_code": evaluation["reason_code"],
+                            "effective_limit": evaluation["effective_limit"],
+                        },
+                        now,
+                    ))
+
+            page_outflow = float(granted[:processed].sum())
+            if balance_updates:
+                await self.execute_with_failover("Manna_Distribution", page_outflow, f"batch of {len(balance_updates)} wallets")
+                await self.session.execute(update(WiseGoldWallet), balance_updates)
+            if entries:
+                await self.session.execute(insert(WiseGoldLedgerEntry), entries)
+
+            self.daily_manna_pool = max(0.0, self.daily_manna_pool - page_outflow)
+            self.total_circulating += page_outflow
+            total_outflow += page_outflow
+            recipient_count += len(balance_updates)
+
+            if processed < len(rows) or len(rows) < batch_size:
+                break
+
+        return {
+            "distributed": total_outflow,
+            "recipients": recipient_count,
+            "held": held_count,
+        }
+
+    def _allocate_pool(
+        self,
+        amounts: np.ndarray,
+        limits: np.ndarray,
+        attested: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Grant amounts in wallet order until the pool runs dry, matching the
+        per-wallet loop: each wallet is offered min(amount, remaining pool) and
+        held if unattested or over its limit; wallets after exhaustion are not
+        processed. Returns (granted, offered, processed_count).
+        """
+        pool = self.daily_manna_pool
+        offered = amounts.copy()
+        granted = np.where(attested & (amounts > 0) & (amounts <= limits), amounts, 0.0)
+        spent_before = np.concatenate(([0.0], np.cumsum(granted)[:-1]))
+        # First wallet whose full amount no longer fits; before it nothing is capped.
+        short = np.flatnonzero((amounts > 0) & (pool - spent_before < amounts))
+        if not short.size:
+            return granted, offered, len(amounts)
+
+        boundary = int(short[0])
+        granted[boundary:] = 0.0
+        offered[boundary:] = 0.0
+        remaining = pool - float(spent_before[boundary])
+        for idx in range(boundary, len(amounts)):
+            if remaining <= 0:
+                return granted, offered, idx
+            amount = min(float(amounts[idx]), remaining)
+            offered[idx] = amount
+            if amount <= 0 or not attested[idx] or amount > limits[idx]:
+                continue
+            granted[idx] = amount
+            remaining -= amount
+        return granted, offered, len(amounts)
+
+    @staticmethod
+    def _ledger_row(
+        row: Any,
+        direction: str,
+        amount: float,
+        balance_after: float,
+        status: str,
+        description: str,
+        metadata: Dict[str, Any],
+        created_at: datetime,
+    ) -> Dict[str, Any]:
+        return {
+            "id": uuid.uuid4(),
+            "user_id": row.user_id,
+            "wallet_id": row.id,
+            "entry_type": "MANNA_DISTRIBUTION",
+            "direction": direction,
+            "amount": amount,
+            "balance_after": balance_after,
+            "status": status,
+            "description": description,
+            "metadata_json": json.dumps(metadata),
+            "created_at": created_at,
+        }
+
     async def system_tick(self, velocity_24h: float, latest_gold_price: float) -> Dict[str, Any]:
         policy = await self._hydrate_from_policy()
         gold_delta = round(float(latest_gold_price) - float(self.last_gold_price or 0.0), 4)
@@ -298,7 +483,10 @@ class GoldenSovereignEngine:
             gold_delta,
         )
 
-        distribution = await self.distribute_living_manna()
+        if settings.WISEGOLD_BATCHED_TICK:
+            distribution = await self.distribute_living_manna_batched()
+        else:
+            distribution = await self.distribute_living_manna()
         await self._persist_policy(policy, velocity_24h=velocity_24h, gold_delta=gold_delta)
         await self.session.commit()
 
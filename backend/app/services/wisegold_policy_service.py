@@ -1,9 +1,10 @@
 import hashlib
 import json
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
+import numpy as np
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -69,21 +70,53 @@ class WiseGoldPolicyService:
         return standing
 
     async def sync_user_attestations(self, user_id: str, wallet_address: Optional[str] = None) -> List[WiseGoldCovenantAttestation]:
+        synced = await self.sync_attestations_bulk({user_id: wallet_address})
+        return synced[user_id]
+
+    async def sync_attestations_bulk(
+        self, wallet_addresses: Dict[str, Optional[str]]
+    ) -> Dict[str, List[WiseGoldCovenantAttestation]]:
+        """Sync covenant attestations for many users with one covenant and one attestation query."""
         covenants = (await self.session.execute(select(SovereignCovenant))).scalars().all()
-        existing = (
-            await self.session.execute(
-                select(WiseGoldCovenantAttestation).where(WiseGoldCovenantAttestation.user_id == user_id)
+        memberships: Dict[str, List[Tuple[SovereignCovenant, Dict[str, Any]]]] = {}
+        for covenant in covenants:
+            seen: set[str] = set()
+            for member in self._parse_members(covenant.members):
+                member_user_id = member.get("user_id")
+                if member_user_id in wallet_addresses and member_user_id not in seen:
+                    seen.add(member_user_id)
+                    memberships.setdefault(member_user_id, []).append((covenant, member))
+
+        existing_by_user: Dict[str, Dict[str, WiseGoldCovenantAttestation]] = {user_id: {} for user_id in wallet_addresses}
+        if wallet_addresses:
+            existing = (
+                await self.session.execute(
+                    select(WiseGoldCovenantAttestation).where(
+                        WiseGoldCovenantAttestation.user_id.in_(list(wallet_addresses))
+                    )
+                )
+            ).scalars().all()
+            for att in existing:
+                existing_by_user[att.user_id][str(att.covenant_id)] = att
+
+        for user_id, wallet_address in wallet_addresses.items():
+            self._apply_attestation_sync(
+                user_id, wallet_address, memberships.get(user_id, []), existing_by_user[user_id]
             )
-        ).scalars().all()
-        existing_by_covenant = {str(att.covenant_id): att for att in existing}
-        active_covenant_ids: set[str] = set()
 
-        for covenant in covenants:
-            members = self._parse_members(covenant.members)
-            member_record = next((member for member in members if member.get("user_id") == user_id), None)
-            if not member_record:
-                continue
+        await self.session.flush()
+        return {user_id: list(existing.values()) for user_id, existing in existing_by_user.items()}
 
+    def _apply_attestation_sync(
+        self,
+        user_id: str,
+        wallet_address: Optional[str],
+        memberships: List[Tuple[SovereignCovenant, Dict[str, Any]]],
+        existing_by_covenant: Dict[str, WiseGoldCovenantAttestation],
+    ) -> None:
+        active_covenant_ids: set[str] = set()
+
+        for covenant, member_record in memberships:
             active_covenant_ids.add(str(covenant.id))
             attestation = existing_by_covenant.get(str(covenant.id))
             expires_at = datetime.utcnow() + timedelta(days=30)
@@ -125,9 +158,6 @@ class WiseGoldPolicyService:
                 attestation.status = "INACTIVE"
                 attestation.last_verified_at = datetime.utcnow()
 
-        await self.session.flush()
-        return list(existing_by_covenant.values())
-
     async def get_user_attestations(self, user_id: str, wallet_address: Optional[str] = None) -> List[Dict[str, Any]]:
         attestations = await self.sync_user_attestations(user_id, wallet_address=wallet_address)
         out: List[Dict[str, Any]] = []
@@ -148,8 +178,9 @@ class WiseGoldPolicyService:
             })
         return out
 
-    def _compute_limit(self, action: str, policy: WiseGoldPolicyState, standing: Dict[str, Any]) -> float:
-        reputation_factor = 0.75 + max(0.0, min(1.0, float(standing.get("normalized_score", 0.5)))) * 0.9
+    @staticmethod
+    def _limit_factors(action: str, policy: WiseGoldPolicyState) -> Tuple[float, float, float]:
+        """(base_limit, stress_factor, velocity_factor) shared by every user for one policy state."""
         stress_norm = max(0.0, min(1.0, float(policy.stress_level or 0.0) / 10.0))
         stress_factor = max(0.35, 1.0 - (stress_norm * 0.55))
         pool_size = max(float(policy.daily_manna_pool or 0.0), 1.0)
@@ -165,8 +196,19 @@ class WiseGoldPolicyService:
         else:
             base_limit = max(float(policy.current_base_manna or 0.0) * 100.0, 25.0)
 
+        return base_limit, stress_factor, velocity_factor
+
+    def _compute_limit(self, action: str, policy: WiseGoldPolicyState, standing: Dict[str, Any]) -> float:
+        reputation_factor = 0.75 + max(0.0, min(1.0, float(standing.get("normalized_score", 0.5)))) * 0.9
+        base_limit, stress_factor, velocity_factor = self._limit_factors(action, policy)
         return round(base_limit * reputation_factor * stress_factor * velocity_factor, 4)
 
+    def compute_limits(self, action: str, policy: WiseGoldPolicyState, normalized_scores: np.ndarray) -> np.ndarray:
+        """Vectorized ``_compute_limit`` over an array of normalized reputation scores."""
+        reputation_factor = 0.75 + np.clip(normalized_scores, 0.0, 1.0) * 0.9
+        base_limit, stress_factor, velocity_factor = self._limit_factors(action, policy)
+        return np.round(base_limit * reputation_factor * stress_factor * velocity_factor, 4)
+
     async def evaluate_action(
         self,
         *,
@@ -182,6 +224,29 @@ class WiseGoldPolicyService:
         standing = await self._get_social_standing(user_id, wallet_address or (wallet.solana_pubkey if wallet else None))
         attestations = await self.sync_user_attestations(user_id, wallet_address=wallet_address or (wallet.solana_pubkey if wallet else None))
 
+        return self.build_evaluation(
+            action=action,
+            amount=amount,
+            policy=policy,
+            standing=standing,
+            attestations=attestations,
+            covenant_id=covenant_id,
+            destination_chain=destination_chain,
+        )
+
+    def build_evaluation(
+        self,
+        *,
+        action: str,
+        amount: float,
+        policy: WiseGoldPolicyState,
+        standing: Dict[str, Any],
+        attestations: List[WiseGoldCovenantAttestation],
+        covenant_id: Optional[UUID] = None,
+        destination_chain: Optional[str] = None,
+        effective_limit: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Policy decision from already-loaded state (no queries)."""
         active_attestations = [att for att in attestations if att.status == "ACTIVE"]
         matching_attestation = None
         if covenant_id:
@@ -189,7 +254,8 @@ class WiseGoldPolicyService:
         elif active_attestations:
             matching_attestation = active_attestations[0]
 
-        effective_limit = self._compute_limit(action, policy, standing)
+        if effective_limit is None:
+            effective_limit = self._compute_limit(action, policy, standing)
         reasons: List[str] = []
         reason_code = "ALLOW"
         allowed = True
@@ -292,6 +358,8 @@ class WiseGoldPolicyService:
             "reason": reason,
             **(metadata or {}),
         }
+        # Persist what the evaluation synced; the ledger commits its entry separately.
+        await self.session.commit()
         await ledger.log_event(action=action_name, user_id=user_id, provider="wisegold_policy", metadata=payload)
 
         severity = 8.0 if allowed else 9.5
@@ -14,6 +14,7 @@ from app.models.finance import (
     SovereignCovenant,
     WiseGoldLedgerEntry,
     WiseGoldPolicyState,
+    WiseGoldSocialAggregate,
     WiseGoldSocialStanding,
     WiseGoldCovenantAttestation,
     WiseGoldWallet,
@@ -29,6 +30,7 @@ WISEGOLD_TABLES = [
     WiseGoldLedgerEntry.__table__,
     WiseGoldPolicyState.__table__,
     WiseGoldSocialStanding.__table__,
+    WiseGoldSocialAggregate.__table__,
     WiseGoldCovenantAttestation.__table__,
 ]
 
@@ -1,26 +1,31 @@
+import argparse
 import asyncio
 import sys
 import logging
-from app.db.session import get_async_session
 from app.services.embeddings import get_embeddings_service
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def main():
+async def main(args):
     logger.info("Starting embeddings backfill...")
-    async for session in get_async_session():
-        service = get_embeddings_service()
-        total_backfilled = 0
-        while True:
-            count = await service.backfill_embeddings(session)
-            if count == 0:
-                break
-            total_backfilled += count
-        logger.info(f"Backfill complete. Total: {total_backfilled}")
-        break # Only need one session
+    service = get_embeddings_service()
+    report = await service.stream_backfill(
+        batch_size=args.batch_size,
+        start_after=args.start_after,
+        reembed=args.reembed,
+    )
+    logger.info(
+        f"Backfill complete. Total: {report['processed']} "
+        f"({report['rows_per_second']}/s, last cursor {report['cursor']})"
+    )
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill sidecar embeddings for daily question responses.")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--start-after", default=None, help="Resume after this response id (cursor from a previous run).")
+    parser.add_argument("--reembed", action="store_true", help="Regenerate every embedding, e.g. after a model change.")
+
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(main())
+    asyncio.run(main(parser.parse_args()))
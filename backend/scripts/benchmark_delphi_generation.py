@@ -0,0 +1,72 @@
+"""
+Tokens per second of Delphi trajectory generation: full re-encoding per token
+(the original path) against KV-cached decoding, single and batched.
+
+    python scripts/benchmark_delphi_generation.py --prompt-length 128 --new-tokens 256 --batch 16
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from app.services.health.delphi_model import DelphiConfig, DelphiModel, configure_cpu_threads
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prompt-length", type=int, default=128)
+    parser.add_argument("--new-tokens", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--heads", type=int, default=4)
+    parser.add_argument("--embd", type=int, default=128)
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    threads = configure_cpu_threads(args.threads)
+    torch.manual_seed(args.seed)
+    config = DelphiConfig(n_layer=args.layers, n_head=args.heads, n_embd=args.embd)
+    model = DelphiModel(config).eval()
+    model.warm_up()
+
+    prompt = torch.randint(0, config.vocab_size, (1, args.prompt_length))
+    # Ragged prompts, as a batch of real users would have.
+    prompts = [
+        torch.randint(0, config.vocab_size, (max(1, args.prompt_length - (i * 7) % args.prompt_length),)).tolist()
+        for i in range(args.batch)
+    ]
+
+    # Greedy decoding (top_k=1) so the paths must produce identical tokens.
+    full, full_s = timed(lambda: model.generate_trajectory(prompt, args.new_tokens, top_k=1, use_cache=False))
+    cached, cached_s = timed(lambda: model.generate_trajectory(prompt, args.new_tokens, top_k=1))
+    sequential, sequential_s = timed(
+        lambda: [model.generate_trajectory(torch.tensor([p]), args.new_tokens, top_k=1)[0].tolist() for p in prompts]
+    )
+    batched, batched_s = timed(lambda: model.generate_trajectories(prompts, args.new_tokens, top_k=1))
+
+    print(f"threads={threads} layers={args.layers} embd={args.embd} prompt={args.prompt_length} new={args.new_tokens}")
+    rows = [
+        ("full re-encode, 1 user", args.new_tokens, full_s),
+        ("kv cache, 1 user", args.new_tokens, cached_s),
+        (f"kv cache, {args.batch} users one by one", args.new_tokens * args.batch, sequential_s),
+        (f"kv cache, {args.batch} users batched", args.new_tokens * args.batch, batched_s),
+    ]
+    for name, tokens, seconds in rows:
+        print(f"{name:<36} {seconds * 1000:9.1f} ms  {tokens / seconds:10.0f} tok/s")
+    print(f"cached matches full: {torch.equal(full, cached)}; batched matches one by one: {batched == sequential}")
+
+
+if __name__ == "__main__":
+    main()
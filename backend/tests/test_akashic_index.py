@@ -0,0 +1,64 @@
+import numpy as np
+
+from app.services.akashic_index import ExactIndex, IVFFlatIndex, create_index, normalize_rows
+
+DIM = 16
+
+
+def _clustered_vectors(count: int, clusters: int = 20, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIM))
+    labels = rng.integers(clusters, size=count)
+    return (centers[labels] + 0.05 * rng.normal(size=(count, DIM))).astype(np.float32)
+
+
+def test_exact_index_returns_cosine_ranking():
+    index = ExactIndex(DIM)
+    vectors = _clustered_vectors(50)
+    index.add(vectors)
+
+    ids, scores = index.search(vectors[7] * 3.0, 5)
+
+    assert ids[0] == 7
+    assert np.isclose(scores[0], 1.0, atol=1e-5)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_ivf_index_scans_exactly_below_threshold():
+    index = IVFFlatIndex(DIM, exact_threshold=1000)
+    vectors = _clustered_vectors(200)
+    index.add(vectors)
+
+    assert not index.needs_training
+    ids, _ = index.search(vectors[42], 3)
+    expected = np.argsort(-(normalize_rows(vectors) @ normalize_rows(vectors[42])[0]))[:3]
+    assert ids.tolist() == expected.tolist()
+
+
+def test_ivf_index_recall_and_incremental_inserts():
+    vectors = _clustered_vectors(3000)
+    index = IVFFlatIndex(DIM, exact_threshold=500, nprobe=4)
+    index.reset(vectors[:2000])
+    assert index.needs_training
+    index.train()
+
+    index.add(vectors[2000:])
+    exact = ExactIndex(DIM)
+    exact.add(vectors)
+
+    hits = 0
+    for query in vectors[::100]:
+        approx_ids, _ = index.search(query, 10)
+        exact_ids, _ = exact.search(query, 10)
+        hits += len(set(approx_ids.tolist()) & set(exact_ids.tolist()))
+    assert hits / (10 * len(vectors[::100])) >= 0.9
+
+    ids, _ = index.search(vectors[2999], 1)
+    assert ids[0] == 2999
+
+
+def test_create_index_falls_back_without_hnswlib(monkeypatch):
+    monkeypatch.setattr("app.services.akashic_index._get_hnswlib", lambda: None)
+
+    assert isinstance(create_index("hnsw", DIM), IVFFlatIndex)
+    assert type(create_index("exact", DIM)) is ExactIndex
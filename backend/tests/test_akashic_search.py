@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.engrams.nlp import build_fallback_embedding
+from app.services import akashic_service
+from app.services.akashic_service import AkashicRecord
+
+
+@pytest.fixture
+def record(tmp_path, monkeypatch):
+    monkeypatch.setattr(akashic_service, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(AkashicRecord, "_instance", None)
+    instance = AkashicRecord()
+
+    async def encode(texts):
+        return np.array([build_fallback_embedding(text) for text in texts], dtype=np.float32)
+
+    monkeypatch.setattr(instance, "_encode", encode)
+    return instance
+
+
+@pytest.mark.asyncio
+async def test_quiet_saint_filter_finds_matches_beyond_top_100(record):
+    for idx in range(150):
+        await record.canonize(f"gabriel budget note {idx}", {"saint_id": "gabriel"})
+    await record.canonize("raphael hydration reminder", {"saint_id": "raphael"})
+
+    results = await record.search("unrelated query", limit=3, min_score=-1.0, filters={"saint_id": "raphael"})
+
+    assert [result["content"] for result in results] == ["raphael hydration reminder"]
+
+
+@pytest.mark.asyncio
+async def test_user_scope_includes_own_and_global_memories_only(record):
+    await record.canonize("mine", {"type": "observation"}, user_email="a@example.com")
+    await record.canonize("theirs", {"type": "observation"}, user_email="b@example.com")
+    await record.canonize("shared", {"type": "health_event"}, user_email="b@example.com")
+
+    results = await record.search("mine", limit=10, min_score=-1.0, user_email="a@example.com")
+
+    assert sorted(result["content"] for result in results) == ["mine", "shared"]
+    assert results[0]["content"] == "mine"
+
+
+@pytest.mark.asyncio
+async def test_unindexed_filter_keys_are_still_applied(record):
+    await record.canonize("alpha", {"topic": "health"})
+    await record.canonize("beta", {"topic": "finance"})
+
+    results = await record.search("alpha", limit=5, min_score=-1.0, filters={"topic": "finance"})
+
+    assert [result["content"] for result in results] == ["beta"]
+    assert await record.search("alpha", filters={"saint_id": "nobody"}) == []
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+from app.services.akashic_store import AkashicSegmentStore, GrowableMatrix
+
+DIM = 8
+
+
+def _record(idx: int) -> dict:
+    return {"id": f"mem-{idx}", "content": f"memory {idx}", "metadata": {}, "timestamp": "2026-01-01T00:00:00"}
+
+
+def _vector(idx: int) -> np.ndarray:
+    return np.full(DIM, float(idx), dtype=np.float32)
+
+
+def test_growable_matrix_appends_without_losing_rows():
+    matrix = GrowableMatrix(DIM, capacity=1)
+    for idx in range(5):
+        matrix.append(_vector(idx))
+    matrix.extend(np.stack([_vector(5), _vector(6)]))
+
+    assert matrix.rows == 7
+    assert matrix.view()[:, 0].tolist() == [0, 1, 2, 3, 4, 5, 6]
+
+
+def test_append_only_writes_log_and_reloads(tmp_path):
+    store = AkashicSegmentStore(str(tmp_path), DIM, compact_every=10)
+    for idx in range(3):
+        store.append(_record(idx), _vector(idx))
+
+    assert not (tmp_path / "akashic_record.json").exists()
+    assert store.pending == 3
+
+    reloaded = AkashicSegmentStore(str(tmp_path), DIM, compact_every=10)
+    records, vectors = reloaded.load_log()
+    assert [record["id"] for record in records] == ["mem-0", "mem-1", "mem-2"]
+    assert vectors[:, 0].tolist() == [0, 1, 2]
+    assert reloaded.pending == 3
+
+
+def test_compaction_folds_log_into_memory_mapped_base(tmp_path):
+    store = AkashicSegmentStore(str(tmp_path), DIM, compact_every=2)
+    store.append(_record(0), _vector(0))
+    store.append(_record(1), _vector(1))
+    assert store.needs_compaction
+
+    store.compact([_record(0), _record(1)], np.stack([_vector(0), _vector(1)]))
+
+    assert store.pending == 0
+    assert [record["id"] for record in store.load_base_records()] == ["mem-0", "mem-1"]
+    base = store.open_base_vectors()
+    assert isinstance(base, np.memmap)
+    assert base.shape == (2, DIM)
+    records, vectors = store.load_log()
+    assert records == [] and vectors.shape == (0, DIM)
+
+
+def test_load_log_repairs_torn_writes_and_compaction_leftovers(tmp_path):
+    store = AkashicSegmentStore(str(tmp_path), DIM)
+    for idx in range(3):
+        store.append(_record(idx), _vector(idx))
+
+    # Simulate a crash: a vector row written without its record line.
+    with open(store.log_vectors_path, "ab") as handle:
+        handle.write(_vector(9).tobytes())
+    with open(store.log_records_path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(_record(9))[:10])
+
+    records, vectors = store.load_log(known_ids={"mem-0"})
+
+    assert [record["id"] for record in records] == ["mem-1", "mem-2"]
+    assert vectors[:, 0].tolist() == [1, 2]
+    again, _ = AkashicSegmentStore(str(tmp_path), DIM).load_log()
+    assert [record["id"] for record in again] == ["mem-1", "mem-2"]
@@ -0,0 +1,82 @@
+import pytest
+
+from app.ai.backend_health import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_threshold_and_recovers_through_probe():
+    clock = FakeClock()
+    probe_results = [False, True]
+
+    async def probe():
+        return probe_results.pop(0)
+
+    breaker = CircuitBreaker("ollama", failure_threshold=2, reset_timeout=10.0, probe=probe, clock=clock)
+
+    breaker.record_failure(ConnectionError("refused"))
+    assert breaker.allow()
+    breaker.record_failure(ConnectionError("refused"))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 10.0
+    assert not breaker.allow()  # cooldown elapsed: probe runs in the background
+    await breaker._probe_task
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.reset_timeout == 20.0
+
+    clock.now = 30.0
+    assert not breaker.allow()
+    await breaker._probe_task
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.reset_timeout == 10.0
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_breaker_without_probe_lets_one_trial_request_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker("openai", failure_threshold=1, reset_timeout=5.0, max_reset_timeout=8.0, clock=clock)
+
+    breaker.record_failure("HTTP 500")
+    clock.now = 5.0
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial while half-open
+
+    breaker.record_failure("HTTP 500")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.reset_timeout == 8.0
+    assert breaker.snapshot()["last_error"] == "HTTP 500"
+
+
+@pytest.mark.asyncio
+async def test_breaker_settles_an_abandoned_or_lost_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker("openai", failure_threshold=1, reset_timeout=5.0, trial_timeout=30.0, clock=clock)
+
+    breaker.record_failure("HTTP 500")
+    clock.now = 5.0
+    assert breaker.allow()
+    breaker.abandon("cancelled")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.reset_timeout == 10.0
+
+    clock.now = 15.0
+    assert breaker.allow()  # trial whose outcome is never reported
+    clock.now = 44.0
+    assert not breaker.allow()
+    clock.now = 45.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.abandon("client went away")  # outside a trial the backend is not blamed
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -56,3 +56,98 @@ async def test_simulate_scenarios_basic():
         assert "trajectory_lift" in result["downstream_equations"]
     
         assert result["narrative"] == "Mocked LLM narrative."
+
+
+@pytest.mark.asyncio
+async def test_background_simulation_is_seeded_and_matches_random_walk_spread():
+    from app.services.causal_twin.background_simulator import BackgroundSimulator
+
+    history = [{"metric_type": "glucose", "value": v} for v in (90.0, 100.0) * 10]
+    simulator = BackgroundSimulator()
+
+    first = await simulator.run_simulation("u", history, n_runs=20000, horizon_days=365, seed=11)
+    again = await simulator.run_simulation("u", history, n_runs=20000, horizon_days=365, seed=11)
+    assert first["metric_projections"] == again["metric_projections"]
+
+    glucose = first["metric_projections"]["glucose"]
+    # 365 daily N(0, 0.1σ) steps (σ = 5) plus the fitted drift, starting from the last value (100).
+    spread = 0.1 * 5.0 * 365 ** 0.5
+    drift = glucose["drift_per_day"] * 365
+    assert glucose["projected_median"] == pytest.approx(100.0 + drift, abs=0.2)
+    assert glucose["projected_p95"] - glucose["projected_p5"] == pytest.approx(2 * 1.645 * spread, rel=0.03)
+
+    envelope = glucose["weekly_envelope"]
+    assert envelope["days"] == list(range(7, 365, 7))
+    assert all(lo <= mid <= hi for lo, mid, hi in zip(envelope["p5"], envelope["median"], envelope["p95"]))
+    assert len(glucose["sample_trajectories"]) == 3
+    assert all(len(trajectory) == 52 for trajectory in glucose["sample_trajectories"])
+
+
+@pytest.mark.asyncio
+async def test_baselines_load_in_one_grouped_query_and_cache_until_metrics_change():
+    from datetime import datetime
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from app.services.causal_twin import counterfactual_engine as module
+
+    stamp = [(40, datetime(2026, 10, 1))]
+    aggregates = MagicMock(all=MagicMock(return_value=[
+        SimpleNamespace(type="HRV", avg=52.0, std=9.0),
+        SimpleNamespace(type="HEART_RATE", avg=61.0, std=0.0),
+    ]))
+    loads = []
+
+    async def execute(query):
+        if "GROUP BY" in str(query):
+            loads.append(query)
+            return aggregates
+        return MagicMock(one=MagicMock(return_value=stamp[0]))
+
+    session = MagicMock()
+    session.execute = execute
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    engine = CounterfactualEngine()
+    user_id = "baseline-cache-user"
+    module.baseline_cache.clear()
+
+    with patch.object(module, "get_session_factory", return_value=lambda: session):
+        first = await engine._get_user_baselines(user_id)
+        second = await engine._get_user_baselines(user_id)
+        assert len(loads) == 1
+
+        # A row written by any service (here a backfill: same latest ts) changes the stamp.
+        stamp[0] = (41, datetime(2026, 10, 1))
+        await engine._get_user_baselines(user_id)
+        assert len(loads) == 2
+
+    assert first == second
+    assert first["hrv"]["mean"] == 52.0 and first["hrv"]["std"] == 9.0
+    # A zero σ keeps the default spread; the shared defaults are never modified.
+    assert first["resting_hr"] == {**module.DEFAULT_BASELINES["resting_hr"], "mean": 61.0}
+    assert module.DEFAULT_BASELINES["hrv"]["mean"] == 45.0
+
+
+@pytest.mark.asyncio
+async def test_scenario_batch_shares_one_baseline_load_and_skips_the_llm():
+    engine = CounterfactualEngine()
+    engine.llm.generate_response = AsyncMock(return_value="unused")
+
+    with patch.object(engine, '_get_user_baselines', new_callable=AsyncMock) as mock_baselines, \
+         patch.object(engine, '_assess_history_stats', new_callable=AsyncMock) as mock_stats:
+        mock_baselines.return_value = {"hrv": {"mean": 45.0, "std": 12.0, "unit": "ms"}}
+        mock_stats.return_value = {"history_days": 21, "completeness": 0.8}
+
+        batch = await engine.simulate_scenario_batch(
+            "test-123",
+            [{"sleep_hours": sleep} for sleep in (6.0, 7.0, 8.0, 9.0)],
+            horizons=[7],
+        )
+
+    assert mock_baselines.await_count == 1
+    assert mock_stats.await_count == 1
+    engine.llm.generate_response.assert_not_awaited()
+    assert [result["scenario"]["sleep_hours"] for result in batch["results"]] == [6.0, 7.0, 8.0, 9.0]
+    assert all(result["narrative"] for result in batch["results"])
+    assert all("7d" in result["projections"]["hrv"] for result in batch["results"])
@@ -0,0 +1,47 @@
+import pytest
+
+from app.services.health.strategies import DelphiPredictionStrategy, get_delphi_model
+
+
+def test_strategies_share_one_delphi_model():
+    first = DelphiPredictionStrategy()
+    second = DelphiPredictionStrategy()
+
+    assert first.model is second.model
+    assert first._model_error == second._model_error
+    assert get_delphi_model.cache_info().currsize == 1
+
+
+def _tiny_model():
+    torch = pytest.importorskip("torch")
+    from app.services.health.delphi_model import DelphiConfig, DelphiModel
+
+    torch.manual_seed(0)
+    return torch, DelphiModel(DelphiConfig(block_size=32, vocab_size=64, n_layer=2, n_head=2, n_embd=32)).eval()
+
+
+def test_cached_decoding_matches_full_forward():
+    torch, model = _tiny_model()
+    idx = torch.randint(0, 64, (2, 10))
+
+    with torch.inference_mode():
+        logits, past = model.forward_with_cache(idx[:, :6])
+        for t in range(6, 10):
+            expected, _ = model(idx[:, : t + 1])
+            logits, past = model.forward_with_cache(idx[:, t : t + 1], past)
+            assert torch.allclose(logits, expected, atol=1e-5)
+
+    # Greedy decoding agrees, including once the sequence slides past block_size.
+    full = model.generate_trajectory(idx, 30, top_k=1, use_cache=False)
+    assert torch.equal(model.generate_trajectory(idx, 30, top_k=1), full)
+
+
+def test_batched_generation_matches_each_prompt_alone():
+    torch, model = _tiny_model()
+    prompts = [[5, 9, 1, 7, 3, 3, 8], [4], [12, 2, 60]]
+
+    batched = model.generate_trajectories(prompts, 8, top_k=1)
+
+    for prompt, row in zip(prompts, batched):
+        alone = model.generate_trajectory(torch.tensor([prompt]), 8, top_k=1)[0].tolist()
+        assert row == alone
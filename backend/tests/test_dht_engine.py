@@ -55,3 +55,110 @@ def test_compute_dht_with_data():
     rhr_card = next((c for c in dht.risk_cards if c.domain == "cardiovascular"), None)
     assert rhr_card is not None
     assert rhr_card.current_level == "low"
+
+
+def _assert_same_dht(incremental, full):
+    assert incremental.observation_count == full.observation_count
+    assert incremental.data_quality == full.data_quality
+    assert incremental.baselines == pytest.approx(full.baselines)
+    assert incremental.rolling_deltas_7d == pytest.approx(full.rolling_deltas_7d, abs=0.1)
+    assert incremental.rolling_deltas_30d == pytest.approx(full.rolling_deltas_30d, abs=0.1)
+    assert incremental.variability == pytest.approx(full.variability, abs=1e-3)
+    assert incremental.adherence_signals == full.adherence_signals
+    assert [(a.metric, a.value) for a in incremental.anomalies] == [(a.metric, a.value) for a in full.anomalies]
+    assert [(c.domain, c.current_level) for c in incremental.risk_cards] == [
+        (c.domain, c.current_level) for c in full.risk_cards
+    ]
+    assert incremental.confidence == full.confidence
+    assert incremental.overall_direction == full.overall_direction
+
+
+def _compute_dht_at(person_id, observations, now):
+    from unittest.mock import patch
+    import app.services.dht_engine as dht_engine
+
+    class _Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+
+    with patch.object(dht_engine, "datetime", _Clock):
+        return compute_dht(person_id=person_id, observations=observations)
+
+
+def test_incremental_engine_tracks_full_recompute():
+    import random
+    from app.services.dht_engine import IncrementalDHTEngine
+
+    person_id = "test-inc"
+    start = datetime.utcnow() - timedelta(days=120)
+    rng = random.Random(7)
+    stream = []
+    for i in range(600):
+        metric = "resting_hr" if i == 590 else rng.choice(["resting_hr", "hrv_ms", "steps", "mood"])
+        value = {"resting_hr": 62, "hrv_ms": 45, "steps": 7000, "mood": "ok"}[metric]
+        if metric != "mood":
+            value = value * rng.uniform(0.8, 1.2) + (value * 3 if i == 590 else 0)
+        stream.append(Observation(
+            person_id=person_id, metric=metric, value=value, source="wearable",
+            category="vital", recorded_at=start + timedelta(hours=4.8 * i),
+        ))
+
+    engine = IncrementalDHTEngine()
+    assert engine.observe(stream[0]) is False  # not seeded yet
+    engine.recompute(person_id, stream[:300], now=stream[299].recorded_at)
+    for i, obs in enumerate(stream[300:], 300):
+        assert engine.observe(obs)
+        if i % 50 == 0 or i == len(stream) - 1:
+            now = obs.recorded_at
+            _assert_same_dht(engine.trajectory(person_id, now=now), _compute_dht_at(person_id, stream[:i + 1], now))
+
+    # A backfilled reading lands in order.
+    late = Observation(
+        person_id=person_id, metric="resting_hr", value=99, source="wearable", category="vital",
+        recorded_at=stream[-1].recorded_at - timedelta(days=3),
+    )
+    engine.observe(late)
+    now = stream[-1].recorded_at
+    full = _compute_dht_at(person_id, stream + [late], now)
+    assert [a.metric for a in full.anomalies] == ["resting_hr"]
+    _assert_same_dht(engine.trajectory(person_id, now=now), full)
+
+
+def test_incremental_state_expires_and_is_bounded():
+    from app.services.dht_engine import IncrementalDHTEngine
+
+    clock = [0.0]
+    engine = IncrementalDHTEngine(max_people=1, max_age_seconds=60, clock=lambda: clock[0])
+    now = datetime.utcnow()
+    engine.recompute("a", [])
+    engine.recompute("b", [])
+    assert not engine.has("a") and engine.has("b")
+
+    obs = Observation(person_id="b", metric="steps", value=9000, source="wearable", category="activity", recorded_at=now)
+    assert engine.observe(obs)
+    assert engine.trajectory("b", now=now).baselines == {"steps": 9000.0}
+    # Readings age out of the 90-day window.
+    assert engine.trajectory("b", now=now + timedelta(days=91)).data_quality == "empty"
+
+    clock[0] = 61.0
+    assert engine.trajectory("b") is None
+
+
+def test_timezone_aware_readings_are_stored_as_naive_utc():
+    from datetime import timezone
+    from app.services.dht_engine import IncrementalDHTEngine
+
+    engine = IncrementalDHTEngine()
+    now = datetime(2026, 10, 17, 12, 0)
+    engine.recompute("tz", [Observation(
+        person_id="tz", metric="steps", value=8000, source="wearable", category="activity", recorded_at=now,
+    )], now=now)
+    aware = Observation(
+        person_id="tz", metric="steps", value=9000, source="wearable", category="activity",
+        recorded_at=datetime(2026, 10, 17, 14, 0, tzinfo=timezone(timedelta(hours=2))),
+    )
+
+    assert aware.recorded_at == datetime(2026, 10, 17, 12, 0)
+    assert engine.observe(aware)
+    assert engine.trajectory("tz", now=now).observation_count == 2
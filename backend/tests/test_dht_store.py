@@ -0,0 +1,172 @@
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.models.dht import Observation
+from app.services import dht_store
+from app.services.dht_store import ObservationWriter
+
+
+def _obs(i, person_id="p1", **kwargs):
+    fields = dict(person_id=person_id, metric="steps", value=1000 + i, source="wearable", category="activity")
+    fields.update(kwargs)
+    return Observation(**fields)
+
+
+def test_writer_inserts_in_bulk_batches():
+    batches = []
+    writer = ObservationWriter(lambda rows: batches.append(rows), batch_size=500, max_delay_seconds=60)
+    observations = [_obs(i) for i in range(1200)]
+
+    writer.add_many(observations)
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    assert [len(batch) for batch in batches] == [500, 500, 200]
+    assert [row["obs_id"] for batch in batches for row in batch] == [o.obs_id for o in observations]
+    assert writer.unwritten("p1") == []
+
+
+def test_writer_flushes_a_partial_batch_after_the_delay():
+    written = threading.Event()
+    writer = ObservationWriter(lambda rows: written.set(), batch_size=500, max_delay_seconds=0.05)
+
+    writer.add_many([_obs(1)])
+    assert written.wait(timeout=2)
+    writer.close()
+
+
+def test_writer_retries_and_keeps_observations_readable_until_written():
+    calls = []
+    release = threading.Event()
+
+    def insert(rows):
+        calls.append(len(rows))
+        release.wait(timeout=2)
+        if len(calls) == 1:
+            raise RuntimeError("supabase unavailable")
+
+    writer = ObservationWriter(insert, batch_size=10, max_delay_seconds=0, max_attempts=2)
+    obs = _obs(1)
+    writer.add_many([obs])
+    assert writer.unwritten("p1") == [obs]
+    assert writer.unwritten("p2") == []
+
+    release.set()
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert calls == [1, 1]
+    assert writer.unwritten("p1") == []
+
+
+class _Query:
+    _KEYSET = re.compile(r'recorded_at\.gt\."([^"]+)",and\(recorded_at\.eq\."[^"]+",obs_id\.gt\."([^"]+)"\)')
+
+    def __init__(self, table):
+        self.table = table
+        self.filters = []
+        self.after = None
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def gte(self, column, value):
+        return self
+
+    def or_(self, expression):
+        self.after = self._KEYSET.fullmatch(expression).groups()
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        self.table.cursors.append(self.after)
+        rows = sorted(
+            (row for row in self.table.rows if all(row[c] == v for c, v in self.filters)),
+            key=lambda row: (row["recorded_at"], row["obs_id"]),
+        )
+        if self.after is not None:
+            rows = [row for row in rows if (row["recorded_at"], row["obs_id"]) > self.after]
+        page = rows[:self.count]
+        if self.table.on_page:
+            self.table.on_page()
+        return type("Resp", (), {"data": page})()
+
+
+class _Client:
+    def __init__(self, rows, on_page=None):
+        self.rows = rows
+        self.cursors = []
+        self.on_page = on_page
+
+    def table(self, name):
+        return _Query(self)
+
+
+def test_get_observations_pages_through_results_and_merges_buffered_rows():
+    start = datetime.now(timezone.utc) - timedelta(days=2)
+    stored = [
+        _obs(i, recorded_at=start + timedelta(minutes=i)).model_dump(mode="json") for i in range(5)
+    ]
+    client = _Client(stored)
+    buffered = _obs(99, recorded_at=datetime.now(timezone.utc))
+    writer = ObservationWriter(lambda rows: None, max_delay_seconds=60)
+    writer.add_many([buffered, _obs(100, person_id="p2")])
+
+    with patch.object(dht_store, "_client", lambda: client), patch.object(dht_store, "observation_writer", writer):
+        observations = dht_store.get_observations("p1", days=7, page_size=2)
+
+    assert client.cursors == [None, (stored[1]["recorded_at"], stored[1]["obs_id"]),
+                              (stored[3]["recorded_at"], stored[3]["obs_id"])]
+    assert [o.value for o in observations] == [1000.0, 1001.0, 1002.0, 1003.0, 1004.0, 1099.0]
+    # Stored rows come back as naive UTC, like the rest of the engine.
+    assert all(o.recorded_at.tzinfo is None for o in observations)
+    writer.close()
+
+
+def test_get_observations_raises_instead_of_returning_a_partial_history():
+    start = datetime.utcnow() - timedelta(days=2)
+    client = _Client([_obs(i, recorded_at=start + timedelta(minutes=i)).model_dump(mode="json") for i in range(5)])
+    pages = _Query.execute
+
+    def flaky(query):
+        if query.after is not None:
+            raise ConnectionError("connection reset")
+        return pages(query)
+
+    writer = ObservationWriter(lambda rows: None, max_delay_seconds=60)
+    with patch.object(dht_store, "_client", lambda: client), patch.object(dht_store, "observation_writer", writer), \
+            patch.object(_Query, "execute", flaky), pytest.raises(ConnectionError):
+        dht_store.get_observations("p1", days=7, page_size=2)
+    writer.close()
+
+
+def test_rows_backfilled_mid_scan_do_not_repeat_a_row():
+    start = datetime.utcnow() - timedelta(days=2)
+    client = _Client([_obs(i, recorded_at=start + timedelta(minutes=i)).model_dump(mode="json") for i in range(5)])
+
+    def backfill():
+        if len(client.cursors) == 1:
+            # Lands before every row already returned; with offsets it would push row 1 onto page 2.
+            client.rows.append(_obs(50, recorded_at=start - timedelta(minutes=5)).model_dump(mode="json"))
+
+    client.on_page = backfill
+    writer = ObservationWriter(lambda rows: None, max_delay_seconds=60)
+    with patch.object(dht_store, "_client", lambda: client), patch.object(dht_store, "observation_writer", writer):
+        observations = dht_store.get_observations("p1", days=7, page_size=2)
+
+    assert [o.value for o in observations] == [1000.0, 1001.0, 1002.0, 1003.0, 1004.0]
+    writer.close()
@@ -0,0 +1,79 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.engrams.nlp import EMBEDDING_DIMENSION, EmbeddingService, build_fallback_embedding
+
+
+def _service(monkeypatch, **kwargs):
+    service = EmbeddingService(**kwargs)
+    calls = []
+
+    def encode_batch(texts):
+        calls.append(list(texts))
+        return np.array([build_fallback_embedding(text) for text in texts], dtype=np.float32)
+
+    monkeypatch.setattr(service, "_encode_batch", encode_batch)
+    return service, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced_into_one_batch(monkeypatch):
+    service, calls = _service(monkeypatch, batch_window_seconds=0.01)
+
+    results = await asyncio.gather(
+        service.embed_one("hello"),
+        service.embed_one("world"),
+        service.embed_one("hello"),
+        service.embed(["world", "again"]),
+    )
+
+    assert calls == [["hello", "world", "again"]]
+    assert np.array_equal(results[0], results[2])
+    assert results[3].shape == (2, EMBEDDING_DIMENSION)
+    assert np.allclose(results[3][0], build_fallback_embedding("world"))
+    assert service.stats["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_repeated_texts_are_served_from_bounded_lru_cache(monkeypatch):
+    service, calls = _service(monkeypatch, batch_window_seconds=0.0, cache_size=2)
+
+    await service.embed(["a", "b"])
+    await service.embed(["a"])
+    assert len(calls) == 1
+    assert service.stats["cache_hits"] == 1
+
+    await service.embed(["c"])  # evicts "b", the least recently used entry
+    await service.embed(["a", "b"])
+    assert calls[-1] == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_encode_failures_propagate_to_every_waiter(monkeypatch):
+    service = EmbeddingService(batch_window_seconds=0.0)
+
+    def explode(_texts):
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(service, "_encode_batch", explode)
+
+    with pytest.raises(RuntimeError):
+        await asyncio.gather(service.embed_one("x"), service.embed_one("x"))
+    assert service._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_leaves_the_others_their_result(monkeypatch):
+    service, calls = _service(monkeypatch, batch_window_seconds=0.01)
+
+    first = asyncio.create_task(service.embed_one("hello"))
+    second = asyncio.create_task(service.embed_one("hello"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    vector = await second
+    assert first.cancelled()
+    assert np.allclose(vector, build_fallback_embedding("hello"))
+    assert calls == [["hello"]]
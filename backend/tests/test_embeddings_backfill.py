@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.embeddings import EmbeddingsService
+
+
+def _rows(start, stop):
+    return [SimpleNamespace(id=idx, question_text=f"q{idx}", response_text=f"a{idx}") for idx in range(start, stop)]
+
+
+def _session_factory():
+    factory = MagicMock()
+    factory.return_value.__aenter__.return_value = AsyncMock()
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_stream_backfill_pages_by_cursor_and_writes_one_upsert_per_batch(monkeypatch):
+    service = EmbeddingsService()
+    service._nlp_engine = MagicMock()
+    service._nlp_engine.generate_embeddings_batch = AsyncMock(side_effect=lambda texts: [[0.0]] * len(texts))
+
+    pages = {None: _rows(0, 3), 2: _rows(3, 5), 4: []}
+    cursors = []
+
+    async def fetch(_session, after_id, batch_size, reembed):
+        cursors.append(after_id)
+        return pages[after_id]
+
+    writes = []
+
+    async def write(_session, response_ids, embeddings_vecs):
+        writes.append((response_ids, len(embeddings_vecs)))
+
+    monkeypatch.setattr(service, "_fetch_backfill_page", fetch)
+    monkeypatch.setattr(service, "_write_backfill_batch", write)
+    reports = []
+
+    report = await service.stream_backfill(
+        session_factory=_session_factory(), batch_size=3, on_progress=reports.append
+    )
+
+    assert cursors == [None, 2, 4]
+    assert writes == [([0, 1, 2], 3), ([3, 4], 2)]
+    assert report["processed"] == 5
+    assert report["batches"] == 2
+    assert report["cursor"] == 4
+    assert [entry["processed"] for entry in reports] == [3, 5]
+
+
+@pytest.mark.asyncio
+async def test_stream_backfill_resumes_after_cursor(monkeypatch):
+    service = EmbeddingsService()
+    service._nlp_engine = MagicMock()
+    service._nlp_engine.generate_embeddings_batch = AsyncMock(return_value=[[0.0]])
+
+    fetch = AsyncMock(side_effect=[_rows(8, 9), []])
+    monkeypatch.setattr(service, "_fetch_backfill_page", fetch)
+    monkeypatch.setattr(service, "_write_backfill_batch", AsyncMock())
+
+    report = await service.stream_backfill(session_factory=_session_factory(), start_after=7, reembed=True)
+
+    assert fetch.await_args_list[0].args[1:] == (7, 256, True)
+    assert report["cursor"] == 8
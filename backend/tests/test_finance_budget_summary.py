@@ -0,0 +1,74 @@
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.finance import BudgetMonthSummary
+from app.services.finance_service import (
+    FinanceService,
+    _virtual_envelope_month,
+    virtual_envelope_id,
+)
+
+
+def test_virtual_envelope_id_round_trips_to_its_category_and_month():
+    category_id = uuid.uuid4()
+    envelope_id = virtual_envelope_id(category_id, "2026-03")
+
+    assert envelope_id != category_id
+    assert _virtual_envelope_month(envelope_id, category_id) == "2026-03"
+    assert _virtual_envelope_month(envelope_id, uuid.uuid4()) is None
+    assert _virtual_envelope_month(uuid.uuid4(), category_id) is None
+
+
+def test_budget_deltas_fold_into_existing_summary():
+    groceries, rent = str(uuid.uuid4()), str(uuid.uuid4())
+    deltas = {}
+    FinanceService._add_budget_delta(deltas, date(2026, 3, 4), groceries, activity=-40.0)
+    FinanceService._add_budget_delta(deltas, date(2026, 3, 9), groceries, activity=-10.0)
+    FinanceService._add_budget_delta(deltas, "2026-03", rent, assigned=1200.0)
+    FinanceService._add_budget_delta(deltas, date(2026, 3, 9), None, activity=-99.0)
+
+    summary = BudgetMonthSummary(
+        user_id="u", month="2026-03", assigned={groceries: 300.0}, activity={groceries: -25.0}, envelope_ids={}
+    )
+    FinanceService._fold_budget_changes(summary, deltas["2026-03"], {rent: "env-rent"})
+
+    assert summary.assigned == {groceries: 300.0, rent: 1200.0}
+    assert summary.activity == {groceries: -75.0}
+    assert summary.envelope_ids == {rent: "env-rent"}
+
+
+@pytest.mark.asyncio
+async def test_budget_summary_read_does_not_write():
+    groceries = SimpleNamespace(id=uuid.uuid4(), name="Groceries", group="Food")
+    dining = SimpleNamespace(id=uuid.uuid4(), name="Dining Out", group="Food")
+    summary = BudgetMonthSummary(
+        user_id="u",
+        month="2026-03",
+        assigned={str(groceries.id): 300.0},
+        activity={str(groceries.id): -120.0},
+        envelope_ids={str(groceries.id): "env-groceries"},
+    )
+
+    categories_result = MagicMock()
+    categories_result.scalars.return_value.all.return_value = [groceries, dining]
+    summary_result = MagicMock()
+    summary_result.scalar_one_or_none.return_value = summary
+
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=[categories_result, summary_result])
+    session.flush = AsyncMock()
+    session.commit = AsyncMock()
+
+    rows = await FinanceService(session).get_budget_summary("u", "2026-03")
+
+    assert rows[0]["id"] == "env-groceries"
+    assert rows[0]["available"] == 180.0
+    assert rows[1]["id"] == str(virtual_envelope_id(dining.id, "2026-03"))
+    assert rows[1]["assigned"] == 0.0
+    session.add.assert_not_called()
+    session.flush.assert_not_awaited()
+    session.commit.assert_not_awaited()
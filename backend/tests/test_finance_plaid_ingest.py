@@ -0,0 +1,183 @@
+import asyncio
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Delete, Insert, Select, Update
+
+from app.services.finance_service import FinanceService
+
+
+def _payload(transaction_id, amount, name="Corner Grocery", day="2026-03-04", account_id="acct-1"):
+    return {
+        "transaction_id": transaction_id,
+        "account_id": account_id,
+        "amount": amount,
+        "date": day,
+        "name": name,
+        "pending": False,
+    }
+
+
+class _RecordingSession:
+    """Answers the page statements and records what was executed."""
+
+    def __init__(self, known, stolen=()):
+        self.known = known
+        self.stolen = set(stolen)
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((stmt, params))
+        result = MagicMock()
+        if isinstance(stmt, Select):
+            result.all.return_value = self.known
+        elif isinstance(stmt, Insert) and stmt.table.name == "bank_imported_transactions":
+            compiled = stmt.compile(dialect=postgresql.dialect()).params
+            rows = []
+            index = 0
+            while f"provider_transaction_id_m{index}" in compiled:
+                provider_id = compiled[f"provider_transaction_id_m{index}"]
+                finance_id = compiled[f"finance_transaction_id_m{index}"]
+                if provider_id in self.stolen:
+                    finance_id = uuid.uuid4()
+                rows.append(SimpleNamespace(provider_transaction_id=provider_id, finance_transaction_id=finance_id))
+                index += 1
+            return iter(rows)
+        return result
+
+    def executed(self, kind, table):
+        return [(stmt, params) for stmt, params in self.statements if isinstance(stmt, kind) and stmt.table.name == table]
+
+
+@pytest.mark.asyncio
+async def test_page_is_applied_with_bulk_statements_and_budget_deltas():
+    groceries = uuid.uuid4()
+    modified_tx, removed_tx = uuid.uuid4(), uuid.uuid4()
+    known = [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            provider_transaction_id="tx-mod",
+            finance_transaction_id=modified_tx,
+            date=date(2026, 2, 27),
+            amount=-20.0,
+            category_id=groceries,
+            description="Corner Grocery",
+        ),
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            provider_transaction_id="tx-gone",
+            finance_transaction_id=removed_tx,
+            date=date(2026, 3, 1),
+            amount=-5.0,
+            category_id=groceries,
+            description=None,
+        ),
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            provider_transaction_id="tx-old",
+            finance_transaction_id=uuid.uuid4(),
+            date=date(2026, 3, 1),
+            amount=-1.0,
+            category_id=None,
+            description=None,
+        ),
+    ]
+    session = _RecordingSession(known, stolen={"tx-race"})
+    connection = SimpleNamespace(id=uuid.uuid4(), provider="plaid")
+    deltas = {}
+
+    counts = await FinanceService(session)._apply_bank_transaction_page(
+        user_id="u",
+        connection=connection,
+        bank_accounts={"acct-1": SimpleNamespace(id=uuid.uuid4())},
+        page={
+            "added": [_payload("tx-new", 12.5), _payload("tx-old", 1.0), _payload("tx-race", 3.0)],
+            "modified": [_payload("tx-mod", 25.0, day="2026-03-02")],
+            "removed": [{"transaction_id": "tx-gone"}, {"transaction_id": "tx-unknown"}],
+        },
+        category_map={"groceries": groceries},
+        budget_deltas=deltas,
+    )
+
+    assert counts == {"imported_count": 1, "modified_count": 1, "removed_count": 1}
+    # One lookup for the whole page.
+    assert len([stmt for stmt, _ in session.statements if isinstance(stmt, Select)]) == 1
+
+    [(_, inserted)] = session.executed(Insert, "finance_transactions")
+    assert [row["amount"] for row in inserted] == [-12.5, -3.0]
+    assert all(row["category_id"] == groceries for row in inserted)
+    [(_, updated)] = session.executed(Update, "finance_transactions")
+    assert updated == [
+        {
+            "id": modified_tx,
+            "date": date(2026, 3, 2),
+            "payee": "Corner Grocery",
+            "amount": -25.0,
+            "description": "Corner Grocery",
+            "is_cleared": True,
+            "category_id": groceries,
+        }
+    ]
+    assert len(session.executed(Insert, "bank_imported_transactions")) == 1
+    assert len(session.executed(Delete, "bank_imported_transactions")) == 1
+    # The removed transaction and the copy that lost the import race.
+    assert len(session.executed(Delete, "finance_transactions")) == 2
+
+    assert deltas == {
+        "2026-02": {str(groceries): {"assigned": 0.0, "activity": 20.0}},
+        "2026-03": {str(groceries): {"assigned": 0.0, "activity": -25.0 - 12.5 + 5.0}},
+    }
+
+
+@pytest.mark.asyncio
+async def test_sync_overlaps_connections_within_the_concurrency_limit():
+    connections = [
+        SimpleNamespace(id=uuid.uuid4(), accounts=[], access_token_encrypted=f"token-{i}", sync_cursor=None)
+        for i in range(5)
+    ]
+    in_flight = 0
+    peak = 0
+
+    class _Plaid:
+        def decrypt_access_token(self, token):
+            return token
+
+        async def get_accounts(self, access_token):
+            return {"accounts": []}
+
+        async def transactions_sync(self, access_token, cursor=None, count=100):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            page = int(cursor or 0) + 1
+            return {"added": [], "modified": [], "removed": [], "next_cursor": str(page), "has_more": page < 2}
+
+    connections_result = MagicMock()
+    connections_result.scalars.return_value.all.return_value = connections
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=connections_result)
+    session.commit = AsyncMock()
+
+    service = FinanceService(session)
+    service._category_map = AsyncMock(return_value={})
+    service._apply_bank_transaction_page = AsyncMock(
+        return_value={"imported_count": 1, "modified_count": 0, "removed_count": 0}
+    )
+    service._apply_budget_deltas = AsyncMock()
+
+    with patch("app.services.finance_service.PlaidService", _Plaid), patch(
+        "app.services.finance_service.settings.PLAID_SYNC_CONCURRENCY", 2
+    ):
+        summary = await service.sync_bank_connections("u")
+
+    assert summary == {"synced_connections": 5, "imported_count": 10, "modified_count": 0, "removed_count": 0}
+    assert peak == 2
+    service._category_map.assert_awaited_once()
+    assert all(connection.sync_cursor == "2" for connection in connections)
+    session.commit.assert_awaited_once()
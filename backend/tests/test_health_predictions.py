@@ -1,8 +1,10 @@
+from unittest.mock import patch
+
 import pytest
 
 from app.models.health_prediction_runtime import DelphiTrajectory
 from app.services.health_prediction_runtime_tables import HEALTH_PREDICTION_RUNTIME_TABLES
-from app.services.shared_health_predictor import SharedHealthPredictor, shared_predictor
+from app.services.shared_health_predictor import MetricFrame, SharedHealthPredictor, shared_predictor
 
 
 def test_shared_predictor_singleton_is_exported():
@@ -35,3 +37,74 @@ async def test_shared_predictor_family_prediction_returns_member_bundle():
     member_prediction = result["member_predictions"][0]
     assert member_prediction["consent_granted"] is True
     assert member_prediction["prediction"]["risk_level"] in {"low", "moderate", "high", "critical"}
+
+
+def test_metric_frame_groups_metric_types_by_time():
+    frame = MetricFrame(
+        [
+            {"metric_type": "heart_rate", "value": 80, "timestamp": "2026-03-03T00:00:00Z"},
+            {"type": "Resting_HR", "value": 70, "timestamp": "2026-03-01T00:00:00Z"},
+            {"metric_type": "heart_rate", "value": 0, "timestamp": "2026-03-02T00:00:00Z"},
+            {"metric_type": "heart_rate", "value": 100},
+            {"metric_type": "glucose", "value": "n/a", "date": "2026-03-04"},
+        ]
+    )
+
+    assert frame.metric_types == ["glucose", "heart_rate", "resting_hr"]
+    # Zero readings are ignored by averages but still count as trend points.
+    assert frame.values(["heart_rate", "resting_hr"]).tolist() == [80.0, 70.0, 100.0]
+    assert frame.average(["heart_rate", "resting_hr"]) == pytest.approx(250 / 3)
+    assert [row["value"] for row in frame.rows_by_time(["heart_rate", "resting_hr"])] == [100, 70, 0, 80]
+    assert frame.recent_delta(["heart_rate", "resting_hr"]) == -20.0
+    assert frame.average(["glucose"]) is None
+    assert frame.recent_delta(["unknown"]) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_family_prediction_computes_early_warnings_once():
+    predictor = SharedHealthPredictor()
+    history = [{"metric_type": "heart_rate", "value": 110, "timestamp": "2026-03-01T00:00:00Z"}]
+    members = [{"id": f"member-{i}", "firstName": "Member"} for i in range(4)]
+
+    with patch.object(predictor, "detect_early_warnings", wraps=predictor.detect_early_warnings) as warnings:
+        result = await predictor.predict_family(user_id="user-1", family_members=members, metrics_history=history)
+
+    warnings.assert_awaited_once()
+    assert isinstance(warnings.await_args.args[1], MetricFrame)
+    assert all(entry["early_warnings"][0]["metric"] == "heart_rate" for entry in result["member_predictions"])
+
+
+@pytest.mark.asyncio
+async def test_family_prediction_reuses_unchanged_members():
+    predictor = SharedHealthPredictor()
+    history = [{"metric_type": "glucose", "value": 150, "timestamp": "2026-03-01T00:00:00Z"}]
+    members = [
+        {"id": "member-1", "firstName": "Ann", "traits": ["diabetes"]},
+        {"id": "member-2", "firstName": "Ben", "traits": ["stress"]},
+    ]
+
+    with patch.object(predictor, "_build_member_prediction", wraps=predictor._build_member_prediction) as build:
+        first = await predictor.predict_family(user_id="family-1", family_members=members, metrics_history=history)
+        second = await predictor.predict_family(user_id="family-1", family_members=members, metrics_history=history)
+        assert build.call_count == 2
+        assert second["member_predictions"] == first["member_predictions"]
+        assert second["aggregate_score"] == first["aggregate_score"]
+
+        # A new reading invalidates every member; a changed member only itself.
+        history.append({"metric_type": "glucose", "value": 90, "timestamp": "2026-03-02T00:00:00Z"})
+        await predictor.predict_family(user_id="family-1", family_members=members, metrics_history=history)
+        assert build.call_count == 4
+        members[1] = dict(members[1], traits=["sleep"])
+        await predictor.predict_family(user_id="family-1", family_members=members, metrics_history=history)
+        assert build.call_count == 5
+
+        await predictor.predict_family(
+            user_id="family-1", family_members=members, metrics_history=history, medications=[{"name": "metformin"}]
+        )
+        assert build.call_count == 7
+
+    # Revoking consent evicts the member's cached prediction.
+    await predictor.predict_family(
+        user_id="family-1", family_members=members, metrics_history=history, consent_map={"member-2": True}
+    )
+    assert predictor.prediction_cache.snapshot()["entries"] == 1
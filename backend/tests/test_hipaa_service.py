@@ -0,0 +1,106 @@
+import json
+import os
+
+from app.services.hipaa_service import HIPAAService
+from app.services.phi_access_log import PhiAccessLog
+
+
+def _segment_lines(directory):
+    lines = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            lines.extend(json.loads(line) for line in f)
+    return lines
+
+
+def test_access_events_are_appended_and_indexed(tmp_path):
+    service = HIPAAService(log_dir=str(tmp_path / "log"), legacy_log_file=None)
+
+    for index in range(6):
+        service.log_phi_access(
+            user_id="user-a" if index % 2 else "user-b",
+            saint_id="raphael" if index < 4 else "joseph",
+            action=f"read_{index}",
+            data_types=["heart_rate"],
+            outcome="flagged" if index == 5 else "allowed",
+        )
+    service._access_log.close()
+
+    stored = _segment_lines(tmp_path / "log")
+    assert [event["event_id"] for event in stored] == [f"phi-{n:06d}" for n in range(1, 7)]
+    assert [e["action"] for e in service.get_access_log(user_id="user-a", saint_id="raphael")] == ["read_3", "read_1"]
+    assert [e["action"] for e in service.get_access_log(saint_id="joseph")] == ["read_5", "read_4"]
+
+    report = service.get_compliance_report("user-a")
+    assert report["total_phi_events"] == 3
+    assert report["flagged_events"] == 1
+    assert report["compliance_score"] == 90
+    assert report["recent_events"][0]["action"] == "read_5"
+
+
+def test_segments_rotate_and_history_reloads_with_legacy_file(tmp_path):
+    legacy = tmp_path / "legacy.json"
+    legacy.write_text(json.dumps([
+        {"event_id": "phi-000001", "user_id": "user-a", "saint_id": "raphael", "action": "old", "outcome": "denied"}
+    ]))
+    log_dir = str(tmp_path / "log")
+    log = PhiAccessLog(log_dir, legacy_file=str(legacy), max_segment_bytes=200, recent_window=3, key_window=3)
+    assert not os.path.exists(log_dir)  # loading never writes
+    for index in range(8):
+        log.append({"event_id": None, "user_id": "user-a", "saint_id": "raphael", "action": f"new_{index}", "outcome": "allowed"})
+    log.close()
+
+    assert len([name for name in os.listdir(log_dir) if name.endswith(".jsonl")]) > 1
+    assert len(_segment_lines(log_dir)) == 8
+    assert json.loads(legacy.read_text())[0]["action"] == "old"
+
+    reloaded = PhiAccessLog(log_dir, legacy_file=str(legacy), recent_window=3, key_window=3)
+    assert reloaded.total == 9
+    assert reloaded.outcome_counts("user-a") == {"denied": 1, "allowed": 8}
+    # Beyond the in-memory window the segments are scanned.
+    history = reloaded.recent(user_id="user-a", limit=20)
+    assert [event["action"] for event in history][-2:] == ["new_0", "old"]
+    assert history[0]["event_id"] == "phi-000009"
+
+
+def test_restart_reads_counters_from_the_index_and_history_newest_first(tmp_path):
+    log_dir = tmp_path / "log"
+    log = PhiAccessLog(str(log_dir), max_segment_bytes=200, recent_window=2, key_window=2)
+    for index in range(10):
+        log.append({"event_id": None, "user_id": "user-a", "saint_id": "raphael", "action": f"a_{index}", "outcome": "allowed"})
+    log.close()
+    segments = sorted(name for name in os.listdir(log_dir) if name.endswith(".jsonl"))
+    assert len(segments) > 3
+
+    # Written after the last snapshot, e.g. by a process that crashed before snapshotting.
+    with open(log_dir / segments[-1], "a", encoding="utf-8") as f:
+        f.write(json.dumps({"event_id": "phi-000011", "user_id": "user-b", "saint_id": "raphael", "outcome": "denied"}) + "\n")
+    # Startup must not need old segments: the index covers them.
+    os.remove(log_dir / segments[0])
+
+    reloaded = PhiAccessLog(str(log_dir), recent_window=2, key_window=2)
+    assert reloaded.total == 11
+    assert reloaded.outcome_counts("user-a") == {"allowed": 10}
+    assert reloaded.outcome_counts("user-b") == {"denied": 1}
+    assert [e["action"] for e in reloaded.recent(user_id="user-a", limit=3)] == ["a_9", "a_8", "a_7"]
+    # The window was seeded by that read, so the next one stays in memory.
+    assert [e["action"] for e in reloaded.recent(user_id="user-a", limit=2)] == ["a_9", "a_8"]
+
+    reloaded.append({"event_id": None, "user_id": "user-a", "saint_id": "raphael", "action": "a_10", "outcome": "allowed"})
+    assert reloaded.recent(user_id="user-a", limit=1)[0]["event_id"] == "phi-000012"
+    reloaded.close()
+
+
+def test_per_key_windows_are_bounded_and_fall_back_to_disk(tmp_path):
+    log = PhiAccessLog(str(tmp_path / "log"), recent_window=4, key_window=2, max_cached_keys=2)
+    for index in range(6):
+        log.append({"event_id": None, "user_id": f"user-{index % 3}", "saint_id": "raphael", "action": f"a_{index}", "outcome": "allowed"})
+
+    assert len(log._recent) == 2
+    assert len(log._recent_all) == 4
+    # user-0's window was evicted; its history is read back from the segments.
+    assert [e["action"] for e in log.recent(user_id="user-0", limit=5)] == ["a_3", "a_0"]
+    assert [e["action"] for e in log.recent(limit=3)] == ["a_5", "a_4", "a_3"]
+    log.close()
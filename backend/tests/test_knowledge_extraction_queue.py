@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.services.knowledge_extraction_queue import KnowledgeExtractionQueue
+
+
+def _fact(key, value):
+    return {"key": key, "value": value, "category": "general", "confidence": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_exchanges_are_batched_per_user_and_saint_and_repeated_facts_skipped():
+    extracted = []
+    stored = []
+
+    async def extract(saint_id, user_message, _ai_response):
+        extracted.append((saint_id, user_message))
+        return [_fact("budget_priority", "groceries first")]
+
+    async def store(user_id, saint_id, _saint_name, persistence, facts):
+        stored.append((user_id, saint_id, persistence, [fact["key"] for fact in facts]))
+
+    queue = KnowledgeExtractionQueue(extract, store, batch_window_seconds=0.01)
+    queue.submit("u1", "gabriel", "St. Gabriel", "groceries first", "ok")
+    queue.submit("u1", "gabriel", "St. Gabriel", "groceries first, really", "ok")
+    queue.submit("u2", "raphael", "St. Raphael", "hello", "hi")
+    await queue.drain(timeout=5)
+
+    assert len(extracted) == 3
+    assert stored == [
+        ("u1", "gabriel", "database", ["budget_priority"]),
+        ("u2", "raphael", "database", ["budget_priority"]),
+    ]
+
+    queue.submit("u1", "gabriel", "St. Gabriel", "groceries first", "ok")
+    await queue.drain(timeout=5)
+
+    snapshot = queue.snapshot()
+    assert len(stored) == 2  # unchanged fact is not rewritten
+    assert snapshot["facts_deduped"] == 1
+    assert snapshot["batches"] == 3
+    assert snapshot["queue_length"] == 0
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_to_heuristic_facts_without_llm_extraction():
+    gate = asyncio.Event()
+    extracted = []
+    stored = []
+
+    async def extract(_saint_id, user_message, _ai_response):
+        await gate.wait()
+        extracted.append(user_message)
+        return []
+
+    async def store(_user_id, _saint_id, _saint_name, _persistence, facts):
+        stored.extend(fact["key"] for fact in facts)
+
+    queue = KnowledgeExtractionQueue(extract, store, max_pending=1, batch_window_seconds=0.0)
+    assert queue.submit("u1", "gabriel", "St. Gabriel", "first", "ok")
+    assert not queue.submit(
+        "u2", "gabriel", "St. Gabriel", "remember my pin", "ok", heuristic_facts=[_fact("explicit_memory", "my pin")]
+    )
+
+    snapshot = queue.snapshot()
+    assert snapshot["queue_length"] == 1
+    assert snapshot["shed_to_heuristics"] == 1
+
+    gate.set()
+    await queue.drain(timeout=5)
+    assert extracted == ["first"]
+    assert stored == ["explicit_memory"]
+    await queue.stop()
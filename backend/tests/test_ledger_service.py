@@ -0,0 +1,207 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services import ledger_service
+from app.services.ledger_service import (
+    GENESIS_HASH,
+    LedgerAppender,
+    LedgerService,
+    compute_entry_hash,
+    sign_hash,
+)
+
+
+class _FakeLedgerDb:
+    def __init__(self, fail_batches=0):
+        self.rows = []
+        self.head_reads = 0
+        self.commits = 0
+        self.fail_batches = fail_batches
+
+    def factory(self):
+        db = self
+
+        class _Session:
+            bind = None
+
+            def __init__(self):
+                self.pending = []
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, stmt, params=None):
+                if isinstance(params, list):
+                    self.pending.extend(params)
+                    return MagicMock()
+                db.head_reads += 1
+                result = MagicMock()
+                last = db.rows[-1] if db.rows else None
+                result.first.return_value = SimpleNamespace(sha256=last["sha256"], ts=last["ts"]) if last else None
+                return result
+
+            async def commit(self):
+                await asyncio.sleep(0.01)
+                if db.fail_batches:
+                    db.fail_batches -= 1
+                    raise RuntimeError("connection lost")
+                db.rows.extend(self.pending)
+                db.commits += 1
+
+        return _Session()
+
+
+def _assert_linked(rows):
+    prev = GENESIS_HASH
+    for row in rows:
+        assert row["prevHash"] == prev
+        assert row["sha256"] == compute_entry_hash(prev, row["ts"], row["action"], row["userId"], row["metadata_"])
+        prev = row["sha256"]
+    assert [row["ts"] for row in rows] == sorted({row["ts"] for row in rows})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_form_one_chain_with_group_commits():
+    db = _FakeLedgerDb()
+    appender = LedgerAppender(session_factory=db.factory, batch_size=16, max_pending=100)
+
+    entries = await asyncio.gather(*[
+        appender.append(f"event/{index}", user_id="u1", metadata={"n": index}) for index in range(40)
+    ])
+    await appender.stop()
+
+    assert len(db.rows) == 40
+    _assert_linked(db.rows)
+    # The head is read once; later batches chain from memory.
+    assert db.head_reads == 1
+    assert db.commits < 40
+    assert {entry.id for entry in entries} == {row["id"] for row in db.rows}
+    assert entries[-1].sha256 in {row["sha256"] for row in db.rows}
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_raises_and_chain_resumes_from_committed_head():
+    db = _FakeLedgerDb(fail_batches=1)
+    appender = LedgerAppender(session_factory=db.factory, batch_size=8)
+
+    with pytest.raises(RuntimeError):
+        await appender.append("event/lost")
+    fire_and_forget = await appender.append("event/queued", wait=False)
+    await appender.flush(timeout=1.0)
+    await appender.append("event/kept")
+    await appender.stop()
+
+    assert [row["action"] for row in db.rows] == ["event/queued", "event/kept"]
+    assert fire_and_forget.sha256 == db.rows[0]["sha256"]
+    _assert_linked(db.rows)
+    assert appender.snapshot()["failed"] == 1
+
+
+class _InMemoryChain(LedgerService):
+    def __init__(self, count):
+        super().__init__(AsyncMock())
+        self.entries = []
+        self.checkpoints = []
+        self.fetches = []
+        prev = GENESIS_HASH
+        start = datetime(2026, 1, 1)
+        for index in range(count):
+            ts = start + timedelta(seconds=index)
+            entry_hash = compute_entry_hash(prev, ts, "event", "u1", {"n": index})
+            self.entries.append(SimpleNamespace(
+                id=f"e{index:05d}", ts=ts, action="event", userId="u1", metadata_={"n": index},
+                sha256=entry_hash, prevHash=prev, signature=sign_hash(self.signing_secret, entry_hash),
+            ))
+            prev = entry_hash
+
+    async def _fetch_page(self, session, after, until, limit):
+        self.fetches.append(after)
+        rows = [
+            e for e in self.entries
+            if (after is None or (e.ts, e.id) > after) and (until is None or (e.ts, e.id) <= until)
+        ]
+        return rows[:limit]
+
+    async def _load_checkpoints(self, session, latest_only):
+        ordered = sorted(self.checkpoints, key=lambda c: c.position)
+        return ordered[-1:] if latest_only else ordered
+
+    async def _anchor_hash(self, session, entry_id):
+        match = [e for e in self.entries if e.id == entry_id]
+        return (bool(match), match[0].sha256 if match else None)
+
+    async def _save_checkpoints(self, checkpoints):
+        self.checkpoints.extend(checkpoints)
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(ledger_service, "ensure_checkpoint_table", AsyncMock())
+    monkeypatch.setattr(ledger_service.settings, "LEDGER_CHECKPOINT_INTERVAL", 10)
+    monkeypatch.setattr(ledger_service.settings, "LEDGER_VERIFY_PAGE_SIZE", 4)
+
+
+@pytest.mark.asyncio
+async def test_incremental_verify_resumes_after_latest_checkpoint(small_pages):
+    chain = _InMemoryChain(25)
+
+    first = await chain.verify_ledger_integrity()
+    assert first["is_valid"] and first["entries_verified"] == 25
+    assert [c.position for c in chain.checkpoints] == [10, 20]
+
+    chain.fetches.clear()
+    second = await chain.verify_ledger_integrity()
+    assert second["is_valid"]
+    assert second["verified_from"] == 20
+    assert second["entries_verified"] == 5
+    assert chain.fetches[0] == (chain.entries[19].ts, chain.entries[19].id)
+
+
+@pytest.mark.asyncio
+async def test_full_verify_checks_ranges_and_catches_tampering_behind_checkpoint(small_pages):
+    chain = _InMemoryChain(25)
+    await chain.verify_ledger_integrity()
+
+    chain.entries[13].metadata_ = {"n": "forged"}
+    assert (await chain.verify_ledger_integrity())["is_valid"]
+
+    report = await chain.verify_ledger_integrity(full=True, workers=2)
+    assert report["is_valid"] is False
+    assert report["broken_at_id"] == "e00013"
+    assert report["reason"] == "Hash tampering detected"
+
+
+@pytest.mark.asyncio
+async def test_forged_checkpoint_is_rejected(small_pages):
+    chain = _InMemoryChain(12)
+    await chain.verify_ledger_integrity()
+    chain.checkpoints[0].entryHash = "0" * 64
+
+    report = await chain.verify_ledger_integrity()
+
+    assert report["is_valid"] is False
+    assert report["reason"] == "Checkpoint signature tampering detected"
+
+
+@pytest.mark.asyncio
+async def test_checkpoints_are_saved_without_touching_the_callers_session(monkeypatch):
+    caller_session = AsyncMock()
+    own_session = AsyncMock()
+    own_session.add_all = MagicMock()
+    own_session.__aenter__.return_value = own_session
+    monkeypatch.setattr(ledger_service, "get_session_factory", lambda: lambda: own_session)
+    checkpoint = SimpleNamespace(position=10)
+
+    await LedgerService(caller_session)._save_checkpoints([checkpoint])
+
+    own_session.add_all.assert_called_once_with([checkpoint])
+    own_session.commit.assert_awaited_once()
+    caller_session.commit.assert_not_awaited()
+    caller_session.rollback.assert_not_awaited()
@@ -0,0 +1,125 @@
+import pytest
+
+from app.ai import llm_client
+from app.ai.backend_health import CircuitBreaker
+from app.ai.llm_client import LLMClient
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    breakers = {name: CircuitBreaker(name) for name in ("native", "ollama", "openai")}
+    monkeypatch.setattr(llm_client, "_backend_breakers", breakers)
+    return breakers
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+@pytest.mark.asyncio
+async def test_stream_response_falls_through_tiers_that_fail_before_first_chunk(monkeypatch):
+    client = LLMClient(api_key="")
+
+    async def native_down(*_args, **_kwargs):
+        raise RuntimeError("Native engine not initialized.")
+        yield  # pragma: no cover
+
+    async def ollama_tokens(messages):
+        assert messages[0] == {"role": "system", "content": "be brief"}
+        for chunk in ("Hel", "", "lo"):
+            yield chunk
+
+    monkeypatch.setattr(client, "_stream_native_response", native_down)
+    monkeypatch.setattr(client, "_stream_ollama_response", ollama_tokens)
+
+    chunks = await _collect(
+        client.stream_response([{"role": "user", "content": "hi"}], system_prompt="be brief")
+    )
+
+    assert chunks == ["Hel", "lo"]
+
+
+@pytest.mark.asyncio
+async def test_stream_response_stops_quietly_when_a_started_stream_breaks(monkeypatch):
+    client = LLMClient(api_key="")
+
+    async def native_breaks(*_args, **_kwargs):
+        yield "[NATIVE] partial"
+        raise RuntimeError("engine crashed")
+
+    async def ollama_unused(_messages):
+        raise AssertionError("should not fall back after streaming began")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(client, "_stream_native_response", native_breaks)
+    monkeypatch.setattr(client, "_stream_ollama_response", ollama_unused)
+
+    assert await _collect(client.stream_response([{"role": "user", "content": "hi"}])) == ["[NATIVE] partial"]
+
+
+@pytest.mark.asyncio
+async def test_stream_response_uses_canned_fallback_when_every_tier_fails(monkeypatch):
+    client = LLMClient(api_key="")
+
+    async def down(*_args, **_kwargs):
+        raise RuntimeError("down")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(client, "_stream_native_response", down)
+    monkeypatch.setattr(client, "_stream_ollama_response", down)
+
+    chunks = await _collect(client.stream_response([{"role": "user", "content": "hello"}]))
+
+    assert chunks == ["Hello! I'm here and ready to chat with you. How can I help you today?"]
+
+
+@pytest.mark.asyncio
+async def test_generate_response_skips_a_backend_whose_breaker_is_open(fresh_breakers, monkeypatch):
+    client = LLMClient(api_key="")
+    calls = []
+
+    async def native_down(*_args, **_kwargs):
+        calls.append("native")
+        raise RuntimeError("Native engine not initialized.")
+
+    async def ollama_ok(_messages):
+        calls.append("ollama")
+        return "hi there"
+
+    monkeypatch.setattr(client, "_generate_native_response", native_down)
+    monkeypatch.setattr(client, "_generate_ollama_response", ollama_ok)
+
+    for _ in range(3):
+        assert await client.generate_response([{"role": "user", "content": "hi"}]) == "hi there"
+
+    assert calls == ["native", "ollama", "native", "ollama", "ollama"]
+    assert fresh_breakers["native"].state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_cancelled_or_empty_trials_do_not_leave_a_breaker_half_open(fresh_breakers, monkeypatch):
+    import asyncio
+
+    client = LLMClient(api_key="sk-test")
+    for name in ("native", "ollama"):
+        fresh_breakers[name].state = CircuitBreaker.OPEN
+        fresh_breakers[name].opened_at = float("inf")
+    openai = fresh_breakers["openai"]
+    openai.state = CircuitBreaker.OPEN
+
+    async def cancelled(*_args, **_kwargs):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr(client, "_generate_openai_response", cancelled)
+    with pytest.raises(asyncio.CancelledError):
+        await client.generate_response([{"role": "user", "content": "hi"}])
+    assert openai.state == CircuitBreaker.OPEN
+
+    async def empty(*_args, **_kwargs):
+        return
+        yield  # pragma: no cover
+
+    openai.opened_at = -1e9
+    monkeypatch.setattr(client, "_stream_openai_response", empty)
+    await _collect(client.stream_response([{"role": "user", "content": "hi"}]))
+    assert openai.state == CircuitBreaker.OPEN
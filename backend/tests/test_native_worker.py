@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.ai.native_worker import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, NativeInferenceWorker, NativeQueueFull
+
+
+class FakeEngine:
+    def __init__(self):
+        self.gate = threading.Event()
+        self.prompts = []
+
+    def __call__(self, prompt, stream=False, **params):
+        if prompt == "block":
+            self.gate.wait(5)
+        self.prompts.append(prompt)
+        if stream:
+            return iter([{"choices": [{"text": token}]} for token in prompt.split()])
+        return {"choices": [{"text": f"echo {prompt}"}]}
+
+
+def _worker(engine, **kwargs):
+    worker = NativeInferenceWorker(lambda _index: engine, **kwargs)
+    worker.start()
+    return worker
+
+
+async def _wait_for(predicate):
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_interactive_jobs_jump_ahead_of_queued_background_work():
+    engine = FakeEngine()
+    worker = _worker(engine)
+    try:
+        blocker = asyncio.create_task(worker.complete("block"))
+        await _wait_for(lambda: worker.stats["in_flight"] == 1)
+
+        background = asyncio.create_task(worker.complete("background", priority=PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(worker.complete("interactive", priority=PRIORITY_INTERACTIVE))
+        await _wait_for(lambda: worker.queue_depth == 2)
+        engine.gate.set()
+
+        assert await interactive == "echo interactive"
+        await asyncio.gather(blocker, background)
+        assert engine.prompts == ["block", "interactive", "background"]
+        assert worker.snapshot()["completed"] == 3
+    finally:
+        engine.gate.set()
+        worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately_and_streams_tokens():
+    engine = FakeEngine()
+    worker = _worker(engine, max_queue=1)
+    try:
+        blocker = asyncio.create_task(worker.complete("block"))
+        await _wait_for(lambda: worker.stats["in_flight"] == 1)
+        queued = asyncio.create_task(worker.complete("queued"))
+        await _wait_for(lambda: worker.queue_depth == 1)
+
+        with pytest.raises(NativeQueueFull):
+            await worker.complete("overflow")
+        assert worker.stats["rejected"] == 1
+
+        engine.gate.set()
+        await asyncio.gather(blocker, queued)
+        assert [token async for token in worker.stream("hello native world")] == ["hello", "native", "world"]
+    finally:
+        engine.gate.set()
+        worker.stop()
@@ -109,6 +109,7 @@ async def test_builtin_saint_chat_persists_to_local_fallback_store(monkeypatch,
     )
 
     response = await service.chat(session, TEST_USER_ID, "gabriel", "Please remember groceries come first.")
+    await service.knowledge_queue.drain(timeout=5)
 
     assert response["degraded"] is True
     assert response["persistence_available"] is True
@@ -123,6 +124,7 @@ async def test_builtin_saint_chat_persists_to_local_fallback_store(monkeypatch,
     knowledge = await service.get_knowledge(session, TEST_USER_ID, "gabriel")
     assert knowledge[0]["key"] == "budget_priority"
     assert knowledge[0]["value"] == "groceries first"
+    await service.knowledge_queue.stop()
 
 
 @pytest.mark.asyncio
@@ -158,6 +160,7 @@ async def test_builtin_saint_fallback_heuristically_remembers_explicit_requests(
     )
 
     await service.chat(session, TEST_USER_ID, "gabriel", "Please remember that groceries come first and I want weekly Friday budget reviews.")
+    await service.knowledge_queue.drain(timeout=5)
 
     knowledge = await service.get_knowledge(session, TEST_USER_ID, "gabriel")
     keys = {item["key"] for item in knowledge}
@@ -166,6 +169,7 @@ async def test_builtin_saint_fallback_heuristically_remembers_explicit_requests(
     assert "stated_goal" in keys
     assert "review_cadence" in keys
     assert "stated_priority" in keys
+    await service.knowledge_queue.stop()
 
 
 @pytest.mark.asyncio
@@ -182,3 +186,92 @@ async def test_saint_statuses_degrade_when_storage_is_unreachable():
     assert all(status["persistence_available"] is True for status in statuses)
     assert all(status["history_available"] is True for status in statuses)
     assert all(status["knowledge_available"] is True for status in statuses)
+
+
+@pytest.mark.asyncio
+async def test_degraded_saint_chat_streams_tokens_to_callback(monkeypatch):
+    service = SaintAgentService()
+
+    async def fake_stream(**_kwargs):
+        for chunk in ("Still ", "here."):
+            yield chunk
+
+    service.llm = MagicMock()
+    service.llm.stream_response = fake_stream
+    service.llm.generate_response = AsyncMock()
+
+    monkeypatch.setattr(
+        service,
+        "bootstrap_saint_engram",
+        AsyncMock(
+            return_value={
+                "engram_id": str(uuid.uuid4()),
+                "saint_id": "gabriel",
+                "name": "St. Gabriel",
+                "is_new": False,
+                "degraded": True,
+                "mode": "degraded",
+                "persistence_available": False,
+            }
+        ),
+    )
+    streamed = []
+
+    async def on_token(chunk):
+        streamed.append(chunk)
+
+    response = await service.chat(AsyncMock(), TEST_USER_ID, "gabriel", "Are you there?", on_token=on_token)
+
+    assert streamed == ["Still ", "here."]
+    assert response["content"] == "Still here."
+    service.llm.generate_response.assert_not_called()
+
+
+def _result(rows):
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = rows[0] if rows else None
+    result.scalars.return_value.all.return_value = rows
+    return result
+
+
+@pytest.mark.asyncio
+async def test_full_chat_uses_latest_history_window_and_commits_once_per_turn(monkeypatch):
+    from types import SimpleNamespace
+
+    service = SaintAgentService()
+    engram_id = str(uuid.uuid4())
+    conversation = SimpleNamespace(id=uuid.uuid4())
+    # SQL returns newest first; the window replays them oldest first.
+    newest_first = [
+        SimpleNamespace(id=uuid.uuid4(), role="user" if idx % 2 else "assistant", content=f"m{idx}")
+        for idx in range(20, 0, -1)
+    ]
+
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=[_result([conversation]), _result(newest_first)])
+    session.commit = AsyncMock()
+    service.llm = MagicMock()
+    service.llm.generate_response = AsyncMock(side_effect=["First reply.", "Second reply."])
+    build_prompt = AsyncMock(return_value="You are St. Gabriel.")
+    monkeypatch.setattr(service, "_build_saint_prompt", build_prompt)
+    monkeypatch.setattr(service.knowledge_queue, "submit", MagicMock())
+    monkeypatch.setattr(
+        service,
+        "bootstrap_saint_engram",
+        AsyncMock(return_value={"engram_id": engram_id, "name": "St. Gabriel", "degraded": False}),
+    )
+
+    first = await service.chat(session, TEST_USER_ID, "gabriel", "hello")
+    second = await service.chat(session, TEST_USER_ID, "gabriel", "again")
+
+    first_messages = service.llm.generate_response.await_args_list[0].kwargs["messages"]
+    assert [m["content"] for m in first_messages] == [f"m{idx}" for idx in range(12, 21)] + ["hello"]
+    second_messages = service.llm.generate_response.await_args_list[1].kwargs["messages"]
+    assert [m["content"] for m in second_messages][-3:] == ["hello", "First reply.", "again"]
+
+    assert session.execute.await_count == 2  # second turn served from the window cache
+    assert session.commit.await_count == 2
+    build_prompt.assert_awaited_once()
+    assert first["conversation_id"] == second["conversation_id"] == str(conversation.id)
+    assert second["content"] == "Second reply."
+    assert service.knowledge_queue.submit.call_count == 2  # extraction happens off the request path
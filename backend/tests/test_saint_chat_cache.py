@@ -0,0 +1,40 @@
+from app.services.saint_chat_cache import ConversationWindowCache, SaintPromptCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_keeps_latest_messages_and_writes_through_only_for_its_conversation():
+    cache = ConversationWindowCache(window_size=3)
+    cache.load("engram", "user", "conv-1", [{"content": "a"}, {"content": "b"}])
+
+    cache.append("engram", "user", "conv-1", [{"content": "c"}, {"content": "d"}])
+    cache.append("engram", "user", "conv-2", [{"content": "ignored"}])
+
+    window = cache.get("engram", "user")
+    assert [msg["content"] for msg in window.messages] == ["b", "c", "d"]
+
+    cache.invalidate("engram", "user")
+    assert cache.get("engram", "user") is None
+
+
+def test_prompt_cache_is_invalidated_by_version_bump_and_ttl():
+    clock = FakeClock()
+    cache = SaintPromptCache(ttl_seconds=60.0, clock=clock)
+
+    version = cache.version("user", "raphael")
+    cache.invalidate("user", "raphael")  # knowledge written while the prompt was being built
+    cache.put("user", "raphael", version, "stale prompt")
+    assert cache.get("user", "raphael") is None
+
+    cache.put("user", "raphael", cache.version("user", "raphael"), "fresh prompt")
+    assert cache.get("user", "raphael") == "fresh prompt"
+    assert cache.get("user", "gabriel") is None
+
+    clock.now = 61.0
+    assert cache.get("user", "raphael") is None
@@ -0,0 +1,145 @@
+import math
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.finance import WiseGoldSocialAggregate
+from app.services.social_reputation_service import (
+    DECAY_BUCKET_COUNT,
+    RECENCY_FLOOR,
+    RECENCY_FLOOR_AGE_DAYS,
+    ReputationAggregate,
+    SocialReputationService,
+)
+
+
+def _interaction(initiator, receiver, created_at, sentiment=0.0, rapport=0.5):
+    return SimpleNamespace(
+        initiator_id=initiator,
+        receiver_id=receiver,
+        created_at=created_at,
+        sentiment_score=sentiment,
+        emotional_rapport=rapport,
+    )
+
+
+def _add(aggregate, mine, interaction):
+    aggregate.add(
+        initiator_id=interaction.initiator_id,
+        receiver_id=interaction.receiver_id,
+        created_at=interaction.created_at,
+        sentiment_score=interaction.sentiment_score,
+        emotional_rapport=interaction.emotional_rapport,
+        initiator_is_user=interaction.initiator_id in mine,
+        receiver_is_user=interaction.receiver_id in mine,
+    )
+
+
+def test_incremental_aggregate_matches_full_rescan_across_decay_floor():
+    service = SocialReputationService()
+    mine, peer_a, peer_b = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    history = [
+        _interaction(peer_a, mine, start - timedelta(days=90), 0.9, 0.8),
+        _interaction(mine, peer_a, start - timedelta(days=20), -0.2, 0.3),
+        _interaction(peer_b, mine, start - timedelta(days=1), 0.4, 0.9),
+        _interaction(mine, peer_b, None, 0.1, 0.6),
+    ]
+
+    aggregate = ReputationAggregate(start)
+    for interaction in history:
+        _add(aggregate, {mine}, interaction)
+
+    # Persist and reload across a span that pushes every earlier interaction onto the floor.
+    later = start + timedelta(days=RECENCY_FLOOR_AGE_DAYS)
+    row = WiseGoldSocialAggregate(user_id="u")
+    aggregate.to_row(row)
+    aggregate = ReputationAggregate.from_row(row, later)
+    fresh = _interaction(peer_a, mine, later - timedelta(hours=2), 0.7, 0.7)
+    _add(aggregate, {mine}, fresh)
+
+    assert len(aggregate.buckets) == 1
+    incremental = service._snapshot_from_aggregate("u", aggregate)
+    rescan = service._score_interactions("u", {mine}, history + [fresh], now=later)
+    for key in ("normalized_score", "inbound_sentiment_avg", "inbound_rapport_avg", "outbound_sentiment_avg"):
+        assert incremental[key] == pytest.approx(rescan[key], rel=1e-9)
+    assert incremental["distinct_peers"] == rescan["distinct_peers"] == 2
+    assert incremental["total_interactions"] == 5
+
+
+@pytest.mark.asyncio
+async def test_fresh_aggregate_is_read_without_scanning_interactions():
+    service = SocialReputationService()
+    user_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    peer, mine = uuid.uuid4(), uuid.uuid4()
+
+    aggregate = ReputationAggregate(now)
+    _add(aggregate, {mine}, _interaction(peer, mine, now, 0.5, 0.9))
+    row = WiseGoldSocialAggregate(user_id=user_id, rebuilt_at=now - timedelta(hours=1))
+    aggregate.to_row(row)
+
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [row]
+    session = MagicMock()
+    session.flush = AsyncMock()
+    session.execute = AsyncMock(return_value=result)
+
+    stored = dict(row.decay_buckets)
+    snapshot = await service.calculate_user_reputation(session, user_id, persist=False)
+
+    assert session.execute.await_count == 1
+    assert row.decay_buckets == stored  # reads never write the aggregate row
+    assert snapshot["total_interactions"] == 1
+    assert snapshot["inbound_rapport_avg"] == pytest.approx(0.9)
+
+
+@pytest.mark.asyncio
+async def test_record_interactions_updates_existing_aggregates_only():
+    service = SocialReputationService()
+    owner, other_owner = uuid.uuid4(), uuid.uuid4()
+    mine, theirs = uuid.uuid4(), uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    row = WiseGoldSocialAggregate(user_id=str(owner), rebuilt_at=now)
+    ReputationAggregate(now).to_row(row)
+
+    owners = MagicMock()
+    owners.all.return_value = [(mine, owner), (theirs, other_owner)]
+    rows = MagicMock()
+    rows.scalars.return_value.all.return_value = [row]
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=[owners, rows])
+
+    await service.record_interactions(session, [_interaction(theirs, mine, None, 0.6, 0.8)])
+
+    assert row.total_interactions == 1
+    assert row.inbound_peers == [str(theirs)]
+    assert len(row.decay_buckets) == 1
+
+
+def test_day_buckets_stay_bounded_and_track_the_recency_weight():
+    service = SocialReputationService()
+    mine, peer = uuid.uuid4(), uuid.uuid4()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    aggregate = ReputationAggregate(start)
+    history = []
+    for hour in range(0, 24 * 200, 5):
+        now = start + timedelta(hours=hour)
+        interaction = _interaction(peer, mine, now, 0.5, (hour % 7) / 7)
+        history.append(interaction)
+        aggregate.advance(now)
+        _add(aggregate, {mine}, interaction)
+        assert len(aggregate.buckets) <= DECAY_BUCKET_COUNT
+
+    exact_weight = sum(
+        max(RECENCY_FLOOR, math.exp(-((now - item.created_at).total_seconds() / 86400.0) / 45.0))
+        for item in history
+    )
+    assert aggregate.totals()["in_weight"] == pytest.approx(exact_weight, rel=1e-3)
+    rescan = service._score_interactions("u", {mine}, history, now=now)
+    assert service._snapshot_from_aggregate("u", aggregate)["normalized_score"] == pytest.approx(
+        rescan["normalized_score"], rel=1e-9
+    )
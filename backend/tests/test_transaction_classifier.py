@@ -0,0 +1,140 @@
+import random
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.finance_service import FinanceService
+from app.services.transaction_classifier import (
+    DEFAULT_CATEGORY_RULES,
+    CategoryClassifier,
+    MerchantCategoryCache,
+    merchant_category_cache,
+    normalize_merchant,
+)
+
+
+def _linear(rules, text):
+    for needles, category in rules:
+        if any(needle in text for needle in needles):
+            return category
+    return None
+
+
+def test_compiled_classifier_matches_linear_rule_scan():
+    needles = [needle for rule_needles, _ in DEFAULT_CATEGORY_RULES for needle in rule_needles]
+    filler = ["acme", "store", "the", "payroll", "x", "ren", "gasp", "stu", "dent", "#42"]
+    rng = random.Random(3)
+    classifier = CategoryClassifier()
+    for _ in range(2000):
+        words = rng.choices(filler, k=rng.randint(0, 4)) + rng.choices(needles, k=rng.randint(0, 3))
+        rng.shuffle(words)
+        text = rng.choice([" ", ""]).join(words)
+        assert classifier.classify(text) == _linear(DEFAULT_CATEGORY_RULES, text), text
+
+
+def test_overlapping_keywords_match_linear_rule_scan(monkeypatch):
+    from app.services import transaction_classifier
+
+    monkeypatch.setattr(transaction_classifier, "_get_ahocorasick", lambda: None)
+    rng = random.Random(11)
+    for _ in range(300):
+        # Tiny alphabet, so keywords overlap, nest and straddle each other constantly.
+        words = ["".join(rng.choices("abc", k=rng.randint(1, 4))) for _ in range(rng.randint(1, 8))]
+        rules = [(words[i::3], f"rule-{i}") for i in range(3)]
+        classifier = CategoryClassifier(rules, memo_size=0)
+        for _ in range(50):
+            text = "".join(rng.choices("abc", k=rng.randint(0, 12)))
+            assert classifier.classify(text) == _linear(rules, text), (rules, text)
+
+
+def test_shorter_keyword_with_higher_priority_wins_at_the_same_position():
+    rules = [(["car"], "auto"), (["cardio"], "health"), (["card"], "fees")]
+    classifier = CategoryClassifier(rules)
+
+    assert classifier.classify("cardio class") == "auto"
+    assert CategoryClassifier(rules[1:]).classify("cardio class") == "health"
+    assert CategoryClassifier(rules[1:]).classify("card fee") == "fees"
+
+
+def test_merchant_cache_normalizes_store_numbers_and_evicts_oldest():
+    clock = [0.0]
+    cache = MerchantCategoryCache(max_users=2, max_age_seconds=60, clock=lambda: clock[0])
+    assert normalize_merchant("STARBUCKS #1234") == "starbucks"
+
+    cache.learn("u", "Starbucks", "coffee")  # not loaded: left to the next load
+    assert not cache.has("u")
+    cache.load("u", [("starbucks", "coffee"), ("shell oil", "gas")])
+    assert cache.lookup("u", "STARBUCKS #9") == "coffee"
+    assert cache.lookup("other", "Starbucks") is None
+
+    cache.learn("u", "Netflix", "fun")
+    assert cache.lookup("u", "Netflix") == "fun"
+    cache.learn("u", "Netflix", None)
+    assert cache.lookup("u", "Netflix") is None
+
+    cache.load("v", [])
+    cache.load("w", [])
+    assert not cache.has("u") and cache.has("w")
+    clock[0] = 61.0
+    assert not cache.has("w")  # reloaded so choices made by other workers show up
+
+
+@pytest.mark.asyncio
+async def test_recategorizing_teaches_the_merchant_to_later_imports():
+    user_id = f"user-{uuid.uuid4()}"
+    groceries, dining = uuid.uuid4(), uuid.uuid4()
+    category_map = {"groceries": groceries, "dining out": dining}
+    tx = SimpleNamespace(id=uuid.uuid4(), date=None, amount=-8.0, category_id=groceries, payee="Blue Bottle")
+
+    stored_choices = MagicMock()
+    stored_choices.all.return_value = []
+    tx_result = MagicMock()
+    tx_result.scalar_one_or_none.return_value = tx
+    owned_result = MagicMock()
+    owned_result.scalar_one_or_none.return_value = dining
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=[stored_choices, tx_result, owned_result, MagicMock()])
+    session.flush = AsyncMock()
+    session.commit = AsyncMock()
+    service = FinanceService(session)
+    service._apply_budget_deltas = AsyncMock()
+
+    payload = {"merchant_name": "Blue Bottle", "name": "BLUE BOTTLE #12 grocery"}
+    await service._load_merchant_categories(user_id)
+    assert service._classify_plaid_transaction(user_id, category_map, payload) == groceries
+
+    await service.recategorize_transaction(user_id, tx.id, dining)
+
+    # The choice is written in the same transaction as the move.
+    upsert = session.execute.await_args_list[3].args[0]
+    assert upsert.table.name == "finance_merchant_categories"
+    assert upsert.compile().params["merchant"] == "blue bottle"
+    assert tx.category_id == dining
+    assert service._classify_plaid_transaction(user_id, category_map, payload) == dining
+    # A learned category the user no longer sees falls back to the rules.
+    assert service._classify_plaid_transaction(user_id, {"groceries": groceries}, payload) == groceries
+    merchant_category_cache.forget(user_id)
+
+
+@pytest.mark.asyncio
+async def test_learned_merchant_categories_are_reloaded_from_storage():
+    user_id = f"user-{uuid.uuid4()}"
+    groceries, dining = uuid.uuid4(), uuid.uuid4()
+    stored_choices = MagicMock()
+    stored_choices.all.return_value = [("blue bottle", dining)]
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=stored_choices)
+    service = FinanceService(session)
+
+    # A fresh process (or another worker) starts with nothing cached.
+    merchant_category_cache.forget(user_id)
+    await service._load_merchant_categories(user_id)
+    await service._load_merchant_categories(user_id)
+
+    assert session.execute.await_count == 1
+    payload = {"merchant_name": "Blue Bottle #7", "name": "BLUE BOTTLE grocery"}
+    category_map = {"groceries": groceries, "dining out": dining}
+    assert service._classify_plaid_transaction(user_id, category_map, payload) == dining
+    merchant_category_cache.forget(user_id)
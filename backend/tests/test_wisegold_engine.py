@@ -0,0 +1,101 @@
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from app.services.social_reputation_service import SocialReputationService
+from app.services.wisegold_engine import GoldenSovereignEngine
+from app.services.wisegold_policy_service import WiseGoldPolicyService
+
+
+def _sequential_allocation(pool, amounts, limits, attested):
+    granted = [0.0] * len(amounts)
+    for idx, raw in enumerate(amounts):
+        if pool <= 0:
+            return granted, idx
+        amount = min(raw, pool)
+        if amount <= 0 or not attested[idx] or amount > limits[idx]:
+            continue
+        granted[idx] = amount
+        pool -= amount
+    return granted, len(amounts)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_vectorized_pool_allocation_matches_per_wallet_loop(seed):
+    rng = np.random.default_rng(seed)
+    size = 200
+    amounts = np.round(rng.uniform(0.0, 2.0, size), 4)
+    amounts[rng.integers(0, size, 10)] = 0.0
+    limits = np.round(rng.uniform(0.5, 2.5, size), 4)
+    attested = rng.random(size) > 0.2
+
+    engine = GoldenSovereignEngine(session=MagicMock())
+    engine.daily_manna_pool = float(rng.uniform(20.0, 250.0))
+
+    granted, _offered, processed = engine._allocate_pool(amounts, limits, attested)
+    expected, expected_processed = _sequential_allocation(engine.daily_manna_pool, amounts.tolist(), limits, attested)
+
+    assert processed == expected_processed
+    assert np.allclose(granted, expected)
+
+
+def test_vectorized_limits_match_scalar_policy_limits():
+    service = WiseGoldPolicyService(session=MagicMock())
+    policy = SimpleNamespace(
+        stress_level=3.0, daily_manna_pool=35762.61, last_tick_velocity=3200.0, current_base_manna=0.5
+    )
+    scores = np.array([-0.2, 0.0, 0.31, 0.78, 1.4])
+
+    limits = service.compute_limits("mint", policy, scores)
+
+    assert limits.tolist() == [
+        service._compute_limit("mint", policy, {"normalized_score": score}) for score in scores
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_reputation_matches_per_user_scoring():
+    service = SocialReputationService()
+    alice, bob, carol = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    alice_engram, bob_engram, stranger = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    now = datetime.utcnow()
+    interactions = [
+        SimpleNamespace(initiator_id=alice_engram, receiver_id=bob_engram, created_at=now, sentiment_score=0.8, emotional_rapport=0.9),
+        SimpleNamespace(initiator_id=bob_engram, receiver_id=alice_engram, created_at=now - timedelta(days=30), sentiment_score=0.2, emotional_rapport=0.4),
+        SimpleNamespace(initiator_id=stranger, receiver_id=alice_engram, created_at=now, sentiment_score=-0.5, emotional_rapport=0.1),
+    ]
+
+    def result(rows):
+        res = MagicMock()
+        res.all.return_value = rows
+        return res
+
+    aggregates = MagicMock()
+    aggregates.scalars.return_value.all.return_value = []
+
+    session = MagicMock()
+    session.flush = AsyncMock()
+    session.execute = AsyncMock(side_effect=[
+        aggregates,
+        result([(alice_engram, alice), (bob_engram, bob)]),
+        result(interactions),
+    ])
+
+    snapshots = await service.calculate_reputations_bulk(
+        session, [str(alice), str(bob), str(carol), "not-a-uuid"], persist=False
+    )
+
+    assert session.execute.await_count == 3
+    for user_id, engram in ((alice, alice_engram), (bob, bob_engram)):
+        touching = [i for i in interactions if engram in (i.initiator_id, i.receiver_id)]
+        expected = service._score_interactions(str(user_id), {engram}, touching)
+        got = snapshots[str(user_id)]
+        assert got["reputation_bps"] == expected["reputation_bps"]
+        assert got["daily_manna_multiplier_bps"] == expected["daily_manna_multiplier_bps"]
+        assert got["distinct_peers"] == expected["distinct_peers"]
+    assert snapshots[str(carol)]["reason"] == "no-engrams"
+    assert snapshots["not-a-uuid"]["reason"] == "user-id-not-uuid"
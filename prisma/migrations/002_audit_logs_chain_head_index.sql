@@ -0,0 +1,4 @@
+-- Audit ledger chain ordering
+-- The ledger appender reads the chain head and integrity checks walk the chain in ts order
+
+CREATE INDEX IF NOT EXISTS idx_audit_logs_ts ON audit_logs(ts);